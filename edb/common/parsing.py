@@ -105,6 +105,41 @@ class Token(parsing.Token, metaclass=TokenMeta):
         self.clean_value = clean_value
         self.context = context
 
+    @classmethod
+    def from_span(cls, val, clean_value, source, start: int, end: int):
+        """Make a token with a context built on first access.
+
+        *source* is a ``(name, buffer)`` tuple shared by all tokens
+        of a parsed document, so the text of the document is fetched
+        once rather than for every token.  Productions decorated with
+        ``context.has_context`` look at the contexts of the first and
+        last tokens of their children, so most tokens still get one;
+        only the contexts of the tokens in between are never created.
+        """
+        token = cls(val, clean_value)
+        token._source = source
+        token._start = start
+        token._end = end
+        return token
+
+    @property
+    def context(self):
+        if self._context is None and self._source is not None:
+            name, buffer = self._source
+            self._context = ParserContext(
+                name=name,
+                buffer=buffer,
+                start=self._start,
+                end=self._end,
+            )
+            self._source = None
+        return self._context
+
+    @context.setter
+    def context(self, context):
+        self._context = context
+        self._source = None
+
     def __repr__(self):
         return '<Token %s "%s">' % (self.__class__._token, self.val)
 
@@ -269,6 +269,7 @@ def compile_ast_to_ir(
 
     ir_set = dispatch_mod.compile(tree, ctx=ctx)
     ir_expr = stmtctx_mod.fini_expression(ir_set, ctx=ctx)
+    ctx.env.type_ref_cache.publish(ctx.env.schema)
 
     if debug.flags.edgeql_compile or debug.flags.edgeql_compile_scope:
         debug.header('Scope Tree')
@@ -113,6 +113,39 @@ class PointerRefCache(Dict[irtyputils.PtrRefCacheKey, irast.BasePointerRef]):
         return self._rcache.get(ref)
 
 
+class TypeRefCache(Dict[irtyputils.TypeRefCacheKey, irast.TypeRef]):
+    """TypeRefs built by a compilation, backed by a shared cache."""
+
+    _shared: Optional[irtyputils.SharedTypeRefCache]
+
+    def __init__(
+        self,
+        shared: Optional[irtyputils.SharedTypeRefCache] = None,
+    ) -> None:
+        super().__init__()
+        self._shared = shared
+
+    def get(  # type: ignore[override]
+        self,
+        key: irtyputils.TypeRefCacheKey,
+        default: Optional[irast.TypeRef] = None,
+    ) -> Optional[irast.TypeRef]:
+        result = super().get(key)
+        if result is None and self._shared is not None:
+            result = self._shared.get(key)
+            if result is not None:
+                self[key] = result
+        return default if result is None else result
+
+    def publish(self, schema: s_schema.Schema) -> None:
+        """Add the TypeRefs built by the compilation to the shared cache.
+
+        *schema* is the schema the compilation ended with.
+        """
+        if self._shared is not None:
+            self._shared.update(self, schema=schema)
+
+
 # Volatility inference computes two volatility results:
 # A basic one, and one for consumption by materialization
 InferredVolatility = Union[
@@ -197,7 +230,7 @@ class Environment:
 
     # Caches for costly operations in edb.ir.typeutils
     ptr_ref_cache: PointerRefCache
-    type_ref_cache: Dict[irtyputils.TypeRefCacheKey, irast.TypeRef]
+    type_ref_cache: TypeRefCache
 
     dml_exprs: List[qlast.Base]
     """A list of DML expressions (statements and DML-containing
@@ -291,7 +324,7 @@ class Environment:
         self.schema_ref_exprs = {} if options.track_schema_ref_exprs else None
         self.created_schema_objects = set()
         self.ptr_ref_cache = PointerRefCache()
-        self.type_ref_cache = {}
+        self.type_ref_cache = TypeRefCache(options.typeref_cache)
         self.dml_exprs = []
         self.dml_stmts = []
         self.pointer_derivation_map = collections.defaultdict(list)
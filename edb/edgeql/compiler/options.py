@@ -32,6 +32,7 @@ if TYPE_CHECKING:
     from edb.schema import types as s_types
     from edb.schema import pointers as s_pointers
     from edb.ir import pathid
+    from edb.ir import typeutils as irtyputils
 
     SourceOrPathId = s_types.Type | s_pointers.Pointer | pathid.PathId
 
@@ -100,6 +101,9 @@ class GlobalCompilerOptions:
     # This this restoring a dump?
     dump_restore_mode: bool = False
 
+    #: TypeRefs shared with other compilations against the same schema.
+    typeref_cache: Optional[irtyputils.SharedTypeRefCache] = None
+
 
 @dataclass
 class CompilerOptions(GlobalCompilerOptions):
@@ -200,23 +200,27 @@ def _cst_to_ast(
     stack: List[rust_parser.CSTNode | rust_parser.Production] = [cst]
     result: List[Any] = []
 
-    while len(stack) > 0:
+    # All terminals share the text of the source, which is fetched
+    # once.  Their contexts are created when a production asks for them.
+    token_source = (filename, source.text())
+    make_token = parsing.Token.from_span
+    CSTNode = rust_parser.CSTNode
+
+    while stack:
         node = stack.pop()
 
-        if isinstance(node, rust_parser.CSTNode):
+        if isinstance(node, CSTNode):
             # this would be the body of the original recursion function
 
             if terminal := node.terminal:
                 # Terminal is simple: just convert to parsing.Token
-                context = parsing.ParserContext(
-                    name=filename,
-                    buffer=source.text(),
-                    start=terminal.start,
-                    end=terminal.end,
-                )
                 result.append(
-                    parsing.Token(
-                        terminal.text, terminal.value, context
+                    make_token(
+                        terminal.text,
+                        terminal.value,
+                        token_source,
+                        terminal.start,
+                        terminal.end,
                     )
                 )
 
@@ -225,24 +229,20 @@ def _cst_to_ast(
                 # call the appropriate method.
                 # (this is all in reverse, because stacks)
                 stack.append(production)
-                args = list(production.args)
-                args.reverse()
-                stack.extend(args)
+                stack.extend(reversed(production.args))
             else:
                 raise NotImplementedError(node)
 
         elif isinstance(node, rust_parser.Production):
             # production args are done, get them out of result stack
-            len_args = len(node.args)
-            split_at = len(result) - len_args
+            # (truncating it in place, rather than copying the whole
+            # stack for every production)
+            split_at = len(result) - len(node.args)
             args = result[split_at:]
-            result = result[0:split_at]
+            del result[split_at:]
 
             # find correct method to call
-            production_id = node.id
-            production = productions[production_id]
-
-            non_term_type, method = production
+            non_term_type, method = productions[node.id]
             sym = non_term_type()
             method(sym, *args)
 
@@ -26,6 +26,7 @@ from typing import (
 )
 
 import cython
+import hashlib
 import http
 import json
 import logging
@@ -58,6 +59,12 @@ _USER_ERRORS = (
     _graphql_rewrite.SyntaxError,
     _graphql_rewrite.NotFoundError,
 )
+_PERSISTED_QUERY_NOT_FOUND = json.dumps({
+    'errors': [{
+        'message': 'PersistedQueryNotFound',
+        'extensions': {'code': 'PERSISTED_QUERY_NOT_FOUND'},
+    }],
+}).encode()
 
 @cython.final
 cdef class CacheRedirect:
@@ -67,6 +74,58 @@ cdef class CacheRedirect:
         self.key_vars = key_vars
 
 
+@cython.final
+cdef class PersistedQuery:
+    # A GraphQL document registered by the client under its sha256 hash,
+    # along with the results of rewriting it for the operation names it
+    # was executed with.
+    cdef public str query
+    cdef public dict rewrites  # Dict[Optional[str], Tuple[Any, str]]
+
+    def __init__(self, query: str):
+        self.query = query
+        self.rewrites = {}
+
+
+@cython.final
+cdef class Operation:
+    # A GraphQL operation of a request, along with what is found out
+    # about it on its way to execution.
+    cdef public str query
+    cdef public object operation_name  # Optional[str]
+    cdef public object variables  # Optional[Dict[str, Any]]
+    cdef public object globals  # Optional[Dict[str, Any]]
+    cdef public PersistedQuery persisted
+
+    cdef public object rewritten
+    cdef public str prepared_query
+    cdef public dict vars
+    cdef public object key_var_names  # List[str]
+    cdef public tuple cache_key
+    cdef public object compiled  # QueryUnitGroup and TranspiledOperation
+    cdef public bint use_prep_stmt
+
+    def __init__(
+        self,
+        query: str,
+        operation_name: Optional[str],
+        variables: Optional[Dict[str, Any]],
+        globals: Optional[Dict[str, Any]],
+        persisted: Optional[PersistedQuery],
+    ):
+        self.query = query
+        self.operation_name = operation_name
+        self.variables = variables
+        self.globals = globals
+        self.persisted = persisted
+        self.compiled = None
+        self.use_prep_stmt = False
+
+
+class PersistedQueryNotFound(Exception):
+    pass
+
+
 CacheEntry = Union[
     CacheRedirect,
     Tuple[compiler.QueryUnitGroup, translator.TranspiledOperation],
@@ -91,30 +150,33 @@ async def handle_request(
         response.close_connection = True
         return
 
-    operation_name = None
-    variables = None
-    globals = None
-    deprecated_globals = None
-    query = None
+    server = tenant.server
+    op = None
+    batch = None
 
     try:
         if request.method == b'POST':
             if request.content_type and b'json' in request.content_type:
                 body = json.loads(request.body)
-                if not isinstance(body, dict):
-                    raise TypeError(
-                        'the body of the request must be a JSON object')
-                query = body.get('query')
-                operation_name = body.get('operationName')
-                variables = body.get('variables')
-                deprecated_globals = body.get('globals')
+                if isinstance(body, list):
+                    batch = _parse_batch(server, body)
+                else:
+                    op = _parse_json_operation(server, body)
             elif request.content_type == 'application/graphql':
-                query = request.body.decode('utf-8')
+                op = _parse_operation(
+                    server, request.body.decode('utf-8'),
+                    None, None, None, None)
             else:
                 raise TypeError(
                     'unable to interpret GraphQL POST request')
 
         elif request.method == b'GET':
+            query = None
+            operation_name = None
+            variables = None
+            deprecated_globals = None
+            extensions = None
+
             if request.url.query:
                 url_query = request.url.query.decode('ascii')
                 qs = urllib.parse.parse_qs(url_query)
@@ -143,44 +205,26 @@ async def handle_request(
                         raise TypeError(
                             '"globals" must be a JSON object')
 
-        else:
-            raise TypeError('expected a GET or a POST request')
-
-        if not query:
-            raise TypeError('invalid GraphQL request: query is missing')
-
-        if (operation_name is not None and
-                not isinstance(operation_name, str)):
-            raise TypeError('operationName must be a string')
-
-        if variables is not None and not isinstance(variables, dict):
-            raise TypeError('"variables" must be a JSON object')
-
-        # There are 2 ways of sending globals:
-        # 1) as 'globals' field (deprecated)
-        # 2) as part of 'variables' in the '__globals__' element
-        #
-        # If both ways are present they must match.
-        if variables is not None:
-            globals = variables.get('__globals__')
+                extensions = qs.get('extensions')
+                if extensions is not None:
+                    try:
+                        extensions = json.loads(extensions[0])
+                    except Exception:
+                        raise TypeError(
+                            '"extensions" must be a JSON object')
 
-        if globals is not None and not isinstance(globals, dict):
-            raise TypeError('"__globals__" must be a JSON object')
-        if (
-            deprecated_globals is not None and
-            not isinstance(deprecated_globals, dict)
-        ):
-            raise TypeError('"globals" must be a JSON object')
+            op = _parse_operation(
+                server, query, operation_name, variables,
+                deprecated_globals, extensions)
 
-        # Globals are dicts if they are present, make sure they are the same.
-        if (
-            globals is not None and deprecated_globals is not None and
-            globals != deprecated_globals
-        ):
-            raise ValueError('invalid "__globals__" and "globals": '
-                             'values must match when both are present')
+        else:
+            raise TypeError('expected a GET or a POST request')
 
-        globals = globals or deprecated_globals
+    except PersistedQueryNotFound:
+        response.status = http.HTTPStatus.OK
+        response.content_type = b'application/json'
+        response.body = _PERSISTED_QUERY_NOT_FOUND
+        return
 
     except Exception as ex:
         if debug.flags.server:
@@ -193,34 +237,180 @@ async def handle_request(
 
     response.status = http.HTTPStatus.OK
     response.content_type = b'application/json'
+
+    if batch is not None:
+        results = await _execute_batch(db, tenant, batch)
+        response.body = b'[' + b','.join(results) + b']'
+        return
+
+    json_writer = None
+    if response.stream is not None:
+        json_writer = execute.JSONStreamWriter(response.stream, elements=False)
+
     try:
-        result = await _execute(
-            db, tenant, query, operation_name, variables, globals)
+        result = await _execute(db, tenant, op, json_writer=json_writer)
     except Exception as ex:
-        if debug.flags.server:
-            markup.dump(ex)
-
-        if isinstance(ex, gql_errors.GraphQLError):
-            # XXX Fix this when LSP "location" objects are implemented
-            ex_type = errors.QueryError
+        err_dct = await _get_error(ex, db)
+        if (
+            json_writer is None
+            or not json_writer.write_error('errors', [err_dct])
+        ):
+            response.body = json.dumps({'errors': [err_dct]}).encode()
+    else:
+        if json_writer is None:
+            response.body = b'{"data":' + result + b'}'
         else:
-            ex = await execute.interpret_error(
-                ex, db, from_graphql=True
-            )
-            ex_type = type(ex)
+            body = json_writer.finish()
+            if body is not None:
+                response.body = body
+
+
+def _parse_batch(server, list body) -> List[Optional[Operation]]:
+    # The operations of a batch that refer to unknown persisted
+    # queries are None.
+    if not body:
+        raise TypeError('the batch of operations is empty')
+    if len(body) > edbdef.MAX_GRAPHQL_BATCH_SIZE:
+        raise TypeError(
+            f'the batch must have at most '
+            f'{edbdef.MAX_GRAPHQL_BATCH_SIZE} operations')
+
+    batch = []
+    for item in body:
+        try:
+            batch.append(_parse_json_operation(server, item))
+        except PersistedQueryNotFound:
+            batch.append(None)
+    return batch
+
+
+def _parse_json_operation(server, body: Any) -> Operation:
+    if not isinstance(body, dict):
+        raise TypeError(
+            'the body of the request must be a JSON object')
+    return _parse_operation(
+        server,
+        body.get('query'),
+        body.get('operationName'),
+        body.get('variables'),
+        body.get('globals'),
+        body.get('extensions'),
+    )
 
-        err_dct = {
-            'message': f'{ex_type.__name__}: {ex}',
-        }
 
-        if (isinstance(ex, errors.EdgeDBError) and
-                hasattr(ex, 'line') and
-                hasattr(ex, 'col')):
-            err_dct['locations'] = [{'line': ex.line, 'column': ex.col}]
+def _parse_operation(
+    server,
+    query: Any,
+    operation_name: Any,
+    variables: Any,
+    deprecated_globals: Any,
+    extensions: Any,
+) -> Operation:
+    persisted = None
+    if extensions is not None:
+        if not isinstance(extensions, dict):
+            raise TypeError('"extensions" must be a JSON object')
+        persisted_query = extensions.get('persistedQuery')
+        if persisted_query is not None:
+            persisted = _get_persisted_query(server, persisted_query, query)
+            if persisted is None:
+                raise PersistedQueryNotFound
+            query = persisted.query
+
+    if not query:
+        raise TypeError('invalid GraphQL request: query is missing')
+
+    if (operation_name is not None and
+            not isinstance(operation_name, str)):
+        raise TypeError('operationName must be a string')
+
+    if variables is not None and not isinstance(variables, dict):
+        raise TypeError('"variables" must be a JSON object')
+
+    # There are 2 ways of sending globals:
+    # 1) as 'globals' field (deprecated)
+    # 2) as part of 'variables' in the '__globals__' element
+    #
+    # If both ways are present they must match.
+    globals = None
+    if variables is not None:
+        globals = variables.get('__globals__')
+
+    if globals is not None and not isinstance(globals, dict):
+        raise TypeError('"__globals__" must be a JSON object')
+    if (
+        deprecated_globals is not None and
+        not isinstance(deprecated_globals, dict)
+    ):
+        raise TypeError('"globals" must be a JSON object')
+
+    # Globals are dicts if they are present, make sure they are the same.
+    if (
+        globals is not None and deprecated_globals is not None and
+        globals != deprecated_globals
+    ):
+        raise ValueError('invalid "__globals__" and "globals": '
+                         'values must match when both are present')
+
+    return Operation(
+        query,
+        operation_name,
+        variables,
+        globals or deprecated_globals,
+        persisted,
+    )
+
 
-        response.body = json.dumps({'errors': [err_dct]}).encode()
+def _get_persisted_query(
+    server,
+    persisted_query: Any,
+    query: Optional[str],
+) -> Optional[PersistedQuery]:
+    # Implements the "automatic persisted queries" protocol of Apollo:
+    # a request that has the "persistedQuery" extension and no query
+    # executes the document registered under the given hash, and
+    # a request that has both registers the query under the hash.
+    if not isinstance(persisted_query, dict):
+        raise TypeError('"persistedQuery" must be a JSON object')
+    if persisted_query.get('version') != 1:
+        raise TypeError('unsupported persisted query version')
+    sha256_hash = persisted_query.get('sha256Hash')
+    if not isinstance(sha256_hash, str):
+        raise TypeError('"sha256Hash" must be a string')
+    sha256_hash = sha256_hash.lower()
+
+    persisted_queries = server._graphql_persisted_queries
+    if not query:
+        return persisted_queries.get(sha256_hash, None)
+
+    if not isinstance(query, str):
+        raise TypeError('query must be a string')
+    if hashlib.sha256(query.encode('utf-8')).hexdigest() != sha256_hash:
+        raise ValueError('"sha256Hash" does not match the query')
+
+    persisted = persisted_queries.get(sha256_hash, None)
+    if persisted is None:
+        persisted = PersistedQuery(query)
+        persisted_queries[sha256_hash] = persisted
+    return persisted
+
+
+def _rewrite(operation_name: Optional[str], query: str):
+    # Returns the rewritten query and the text it is cached by, or
+    # (None, query) if the query can't be rewritten and has to be
+    # compiled as is.
+    try:
+        rewritten = _graphql_rewrite.rewrite(operation_name, query)
+    except _graphql_rewrite.QueryError as e:
+        raise errors.QueryError(e.args[0])
+    except Exception as e:
+        if isinstance(e, _USER_ERRORS):
+            logger.info("Error rewriting graphql query: %r", e)
+        else:
+            logger.warning("Error rewriting graphql query: %r", e)
+        return None, query
     else:
-        response.body = b'{"data":' + result + b'}'
+        return rewritten, rewritten.key
 
 
 async def compile(
@@ -250,9 +440,47 @@ async def compile(
     )
 
 
-async def _execute(db, tenant, query, operation_name, variables, globals):
-    dbver = db.dbver
-    query_cache = tenant.server._http_query_cache
+async def compile_batch(
+    dbview.Database db,
+    tenant,
+    requests: List[Tuple[Any, ...]],
+):
+    # Compiles several operations with a single call to the compiler
+    # pool, *requests* are the positional arguments of compile() after
+    # the tenant.  Returns the results or the exceptions.
+    server = tenant.server
+    compiler_pool = server.get_compiler_pool()
+    return await compiler_pool.compile_graphql_batch(
+        db.name,
+        db.user_schema_pickle,
+        tenant.get_global_schema_pickle(),
+        db.reflection_cache,
+        db.db_config,
+        db._index.get_compilation_system_config(),
+        requests,
+        client_id=tenant.client_id,
+    )
+
+
+cdef tuple _compile_args(Operation op):
+    if op.rewritten is not None:
+        return (
+            op.query,
+            op.rewritten.tokens(gql_lexer.TokenKind),
+            op.rewritten.substitutions,
+            op.operation_name,
+            op.vars,
+        )
+    else:
+        return (op.query, None, None, op.operation_name, op.vars)
+
+
+cdef _prepare(Operation op, query_cache, dbver):
+    # Rewrites the operation and looks it up in the query cache.
+    query = op.query
+    operation_name = op.operation_name
+    variables = op.variables
+    persisted = op.persisted
 
     if variables:
         for var_name in variables:
@@ -268,39 +496,43 @@ async def _execute(db, tenant, query, operation_name, variables, globals):
         print(query)
         print(f'variables: {variables}')
 
-    try:
-        rewritten = _graphql_rewrite.rewrite(operation_name, query)
-
+    if persisted is None:
+        rewritten, prepared_query = _rewrite(operation_name, query)
+    else:
+        # The rewrite of a registered document is kept along with it,
+        # so that neither the query text is tokenized again nor is
+        # a new copy of the cache key text made (and hashed).
+        rewrite = persisted.rewrites.get(operation_name)
+        if rewrite is None:
+            rewrite = _rewrite(operation_name, query)
+            if rewrite[0] is not None:
+                persisted.rewrites[operation_name] = rewrite
+        rewritten, prepared_query = rewrite
+
+    if rewritten is not None:
         vars = rewritten.variables.copy()
         if variables:
             vars.update(variables)
         key_var_names = rewritten.key_vars
-        # on bad queries the following line can trigger KeyError
-        key_vars = tuple(vars[k] for k in key_var_names)
-    except _graphql_rewrite.QueryError as e:
-        raise errors.QueryError(e.args[0])
-    except Exception as e:
-        if isinstance(e, _USER_ERRORS):
-            logger.info("Error rewriting graphql query: %r", e)
-        else:
+        try:
+            key_vars = tuple(vars[k] for k in key_var_names)
+        except KeyError as e:
+            # on bad queries the rewritten key vars may be missing
             logger.warning("Error rewriting graphql query: %r", e)
-        rewritten = None
-        rewrite_error = e
-        prepared_query = query
+            rewritten = None
+            prepared_query = query
+
+    if rewritten is None:
         vars = variables.copy() if variables else {}
         key_var_names = []
         key_vars = ()
-    else:
-        prepared_query = rewritten.key
-
-        if debug.flags.graphql_compile:
-            debug.header('GraphQL optimized query')
-            print(rewritten)
-            print(f'key_vars: {key_var_names}')
-            print(f'variables: {vars}')
+    elif debug.flags.graphql_compile:
+        debug.header('GraphQL optimized query')
+        print(rewritten)
+        print(f'key_vars: {key_var_names}')
+        print(f'variables: {vars}')
 
     cache_key = ('graphql', prepared_query, key_vars, operation_name, dbver)
-    use_prep_stmt = False
 
     entry: CacheEntry = None
     if query_cache_enabled:
@@ -311,49 +543,52 @@ async def _execute(db, tenant, query, operation_name, variables, globals):
         cache_key2 = (prepared_query, key_vars2, operation_name, dbver)
         entry = query_cache.get(cache_key2, None)
 
-    await db.introspection()
-
-    if entry is None:
-        if rewritten is not None:
-            qug, gql_op = await compile(
-                db,
-                tenant,
-                query,
-                rewritten.tokens(gql_lexer.TokenKind),
-                rewritten.substitutions,
-                operation_name,
-                vars,
-            )
-        else:
-            qug, gql_op = await compile(
-                db,
-                tenant,
-                query,
-                None,
-                None,
-                operation_name,
-                vars,
-            )
-
-        key_var_set = set(key_var_names)
-        if gql_op.cache_deps_vars and gql_op.cache_deps_vars != key_var_set:
-            key_var_set.update(gql_op.cache_deps_vars)
-            key_var_names = sorted(key_var_set)
-            redir = CacheRedirect(key_vars=key_var_names)
-            query_cache[cache_key] = redir
-            key_vars2 = tuple(vars[k] for k in key_var_names)
-            cache_key2 = (
-                'graphql', prepared_query, key_vars2, operation_name, dbver
-            )
-            query_cache[cache_key2] = qug, gql_op
-        else:
-            query_cache[cache_key] = qug, gql_op
-    else:
-        qug, gql_op = entry
+    op.rewritten = rewritten
+    op.prepared_query = prepared_query
+    op.vars = vars
+    op.key_var_names = key_var_names
+    op.cache_key = cache_key
+    if entry is not None:
+        op.compiled = entry
         # This is at least the second time this query is used
         # and it's safe to cache.
-        use_prep_stmt = True
+        op.use_prep_stmt = True
+
+
+cdef _store_compiled(Operation op, query_cache, dbver, compiled):
+    qug, gql_op = compiled
+    key_var_names = op.key_var_names
+    key_var_set = set(key_var_names)
+    if gql_op.cache_deps_vars and gql_op.cache_deps_vars != key_var_set:
+        key_var_set.update(gql_op.cache_deps_vars)
+        key_var_names = sorted(key_var_set)
+        redir = CacheRedirect(key_vars=key_var_names)
+        query_cache[op.cache_key] = redir
+        key_vars2 = tuple(op.vars[k] for k in key_var_names)
+        cache_key2 = (
+            'graphql', op.prepared_query, key_vars2, op.operation_name, dbver
+        )
+        query_cache[cache_key2] = qug, gql_op
+    else:
+        query_cache[op.cache_key] = qug, gql_op
+    op.compiled = compiled
+
+
+async def _execute(db, tenant, Operation op, *, json_writer=None):
+    dbver = db.dbver
+    query_cache = tenant.server._http_query_cache
+
+    _prepare(op, query_cache, dbver)
 
+    await db.introspection()
+
+    if op.compiled is None:
+        _store_compiled(
+            op, query_cache, dbver,
+            await compile(db, tenant, *_compile_args(op)),
+        )
+
+    qug, gql_op = op.compiled
     compiled = dbview.CompiledQuery(query_unit_group=qug)
 
     dbv = await tenant.new_dbview(
@@ -363,15 +598,171 @@ async def _execute(db, tenant, query, operation_name, variables, globals):
     )
 
     pgcon = await tenant.acquire_pgcon(db.name)
+    if json_writer is not None:
+        json_writer.attach(pgcon)
     try:
         return await execute.execute_json(
             pgcon,
             dbv,
             compiled,
-            variables={**gql_op.variables_desc, **vars},
-            globals_=globals or {},
-            fe_conn=None,
-            use_prep_stmt=use_prep_stmt,
+            variables={**gql_op.variables_desc, **op.vars},
+            globals_=op.globals or {},
+            fe_conn=json_writer,
+            use_prep_stmt=op.use_prep_stmt,
         )
+    finally:
+        if json_writer is not None:
+            json_writer.detach()
+        tenant.release_pgcon(db.name, pgcon)
+
+
+async def _execute_batch(db, tenant, list batch) -> List[bytes]:
+    # Executes the operations of a batch request and returns the
+    # response to each one of them.  Cache misses are compiled with
+    # a single call to the compiler pool and the operations are run
+    # over one backend connection, consecutive operations with the same
+    # globals in a single round trip.
+    cdef:
+        Operation op
+        ssize_t i, j
+        ssize_t n = len(batch)
+        list results = [None] * n
+        list misses = []
+
+    dbver = db.dbver
+    query_cache = tenant.server._http_query_cache
+
+    for i in range(n):
+        op = batch[i]
+        if op is None:
+            results[i] = _PERSISTED_QUERY_NOT_FOUND
+            continue
+        try:
+            _prepare(op, query_cache, dbver)
+        except Exception as ex:
+            results[i] = await _get_error_response(ex, db)
+        else:
+            if op.compiled is None:
+                misses.append(i)
+
+    await db.introspection()
+
+    if misses:
+        requests = [_compile_args(batch[i]) for i in misses]
+        try:
+            if len(requests) == 1:
+                compiled = [await compile(db, tenant, *requests[0])]
+            else:
+                compiled = await compile_batch(db, tenant, requests)
+        except Exception as ex:
+            compiled = [ex] * len(requests)
+
+        for i, result in zip(misses, compiled):
+            if isinstance(result, Exception):
+                results[i] = await _get_error_response(result, db)
+            else:
+                _store_compiled(batch[i], query_cache, dbver, result)
+
+    dbv = await tenant.new_dbview(
+        dbname=db.name,
+        query_cache=False,
+        protocol_version=edbdef.CURRENT_PROTOCOL,
+    )
+
+    pgcon = await tenant.acquire_pgcon(db.name)
+    try:
+        i = 0
+        while i < n:
+            if results[i] is not None:
+                i += 1
+                continue
+
+            op = batch[i]
+            compiled_queries = [_get_compiled_query(op)]
+            variables = [_get_variables(op)]
+            group = [i]
+            if execute.can_pipeline_json(compiled_queries[0]):
+                j = i + 1
+                while j < n and results[j] is None:
+                    compiled_query = _get_compiled_query(batch[j])
+                    if (
+                        (<Operation>batch[j]).globals != op.globals
+                        or not execute.can_pipeline_json(compiled_query)
+                    ):
+                        break
+                    compiled_queries.append(compiled_query)
+                    variables.append(_get_variables(batch[j]))
+                    group.append(j)
+                    j += 1
+
+            try:
+                if len(group) == 1:
+                    data = [await execute.execute_json(
+                        pgcon,
+                        dbv,
+                        compiled_queries[0],
+                        variables=variables[0],
+                        globals_=op.globals or {},
+                        use_prep_stmt=op.use_prep_stmt,
+                    )]
+                else:
+                    data = await execute.execute_json_pipeline(
+                        pgcon,
+                        dbv,
+                        compiled_queries,
+                        variables,
+                        globals_=op.globals or {},
+                    )
+            except Exception as ex:
+                data = [ex] * len(group)
+
+            for j, result in zip(group, data):
+                if isinstance(result, Exception):
+                    results[j] = await _get_error_response(result, db)
+                else:
+                    results[j] = b'{"data":' + result + b'}'
+
+            i = group[-1] + 1
     finally:
         tenant.release_pgcon(db.name, pgcon)
+
+    return results
+
+
+cdef _get_compiled_query(Operation op):
+    qug, _ = op.compiled
+    return dbview.CompiledQuery(query_unit_group=qug)
+
+
+cdef dict _get_variables(Operation op):
+    _, gql_op = op.compiled
+    return {**gql_op.variables_desc, **op.vars}
+
+
+async def _get_error(ex, db) -> Dict[str, Any]:
+    if debug.flags.server:
+        markup.dump(ex)
+
+    if isinstance(ex, gql_errors.GraphQLError):
+        # XXX Fix this when LSP "location" objects are implemented
+        ex_type = errors.QueryError
+    else:
+        ex = await execute.interpret_error(
+            ex, db, from_graphql=True
+        )
+        ex_type = type(ex)
+
+    err_dct = {
+        'message': f'{ex_type.__name__}: {ex}',
+    }
+
+    if (isinstance(ex, errors.EdgeDBError) and
+            hasattr(ex, 'line') and
+            hasattr(ex, 'col')):
+        err_dct['locations'] = [{'line': ex.line, 'column': ex.col}]
+
+    return err_dct
+
+
+async def _get_error_response(ex, db) -> bytes:
+    return json.dumps({'errors': [await _get_error(ex, db)]}).encode()
@@ -728,6 +728,15 @@ class PathId:
         """The namespace of this ``PathId``"""
         return self._namespace
 
+    @property
+    def namespaceless_key(self) -> Hashable:
+        """A key of this ``PathId`` that ignores namespaces.
+
+        Path ids that are equal after stripping any namespaces from
+        them have the same key.
+        """
+        return (self._norm_path, self._is_ptr)
+
     def _get_prefix(self, size: int) -> PathId:
         if size < 0:
             size = len(self._path) + size
@@ -105,6 +105,7 @@ class ScopeTreeNode:
         self.namespaces = set()
         self.is_group = False
         self._parent: Optional[weakref.ReferenceType[ScopeTreeNode]] = None
+        self._children_by_path: Dict[Hashable, List[ScopeTreeNode]] = {}
 
     FIELDS = (
         'unique_id', 'path_id', 'fenced', 'unnest_fence', 'factoring_fence',
@@ -115,14 +116,17 @@ class ScopeTreeNode:
     def __getstate__(self) -> Any:
         res = self.__dict__.copy()
         del res['_parent']
+        del res['_children_by_path']
         return res
 
     def __setstate__(self, state: Any) -> None:
         for f, val in state.items():
             setattr(self, f, val)
         self._parent = None
+        self._children_by_path = {}
         for child in self.children:
             child._parent = weakref.ref(self)
+            self._index_child(child)
 
     def __repr__(self) -> str:
         name = 'ScopeFenceNode' if self.fenced else 'ScopeTreeNode'
@@ -375,7 +379,8 @@ class ScopeTreeNode:
         performed.  For safe tree modification, use attach_subtree()""
         """
         if node.path_id is not None:
-            for child in self.children:
+            key = node.path_id.namespaceless_key
+            for child in self._children_by_path.get(key, ()):
                 if child.path_id == node.path_id:
                     raise errors.InvalidReferenceError(
                         f'{node.path_id} is already present in {self!r}',
@@ -791,6 +796,7 @@ class ScopeTreeNode:
         namespaces: Set[pathid.Namespace] = set()
         finfo = None
         found = None
+        key = path_id.namespaceless_key
 
         for node, ans in self.ancestors_and_namespaces:
             if (node.path_id is not None
@@ -798,9 +804,9 @@ class ScopeTreeNode:
                 found = node
                 break
 
-            for child in node.children:
-                if (child.path_id is not None
-                        and _paths_equal(child.path_id, path_id, namespaces)):
+            for child in node._children_by_path.get(key, ()):
+                assert child.path_id is not None
+                if _paths_equal(child.path_id, path_id, namespaces):
                     found = child
                     break
 
@@ -1050,13 +1056,35 @@ class ScopeTreeNode:
         if current_parent is not None:
             # Make sure no other node refers to us.
             current_parent.children.remove(self)
+            current_parent._unindex_child(self)
 
         if parent is not None:
             self._parent = weakref.ref(parent)
             parent.children.append(self)
+            parent._index_child(self)
         else:
             self._parent = None
 
+    # Children with path ids are indexed by PathId.namespaceless_key,
+    # which stays the same when namespaces are stripped from their
+    # path ids, so that find_visible_ex() doesn't have to compare
+    # every child of every ancestor to the path id being looked up.
+    # The lists of children in the index are in the order of
+    # self.children.
+
+    def _index_child(self, child: ScopeTreeNode) -> None:
+        if child.path_id is not None:
+            key = child.path_id.namespaceless_key
+            self._children_by_path.setdefault(key, []).append(child)
+
+    def _unindex_child(self, child: ScopeTreeNode) -> None:
+        if child.path_id is not None:
+            key = child.path_id.namespaceless_key
+            indexed = self._children_by_path[key]
+            indexed.remove(child)
+            if not indexed:
+                del self._children_by_path[key]
+
 
 class ScopeTreeNodeWithPathId(ScopeTreeNode):
 
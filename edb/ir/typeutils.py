@@ -51,6 +51,83 @@ PtrRefCache = dict[PtrRefCacheKey, 'irast.BasePointerRef']
 TypeRefCache = dict[TypeRefCacheKey, 'irast.TypeRef']
 
 
+class SharedTypeRefCache:
+    """A cache of TypeRefs shared between compilations against a schema.
+
+    TypeRefs are immutable and only depend on the schema, so the ones
+    built by a compilation for the types of *schema* can be reused by
+    any other compilation that starts with the same schema.  (PtrRefs
+    are not shared, because compilations update them as they derive
+    pointers and infer cardinality.)
+    """
+
+    def __init__(self, schema: s_schema.Schema) -> None:
+        self.schema = schema
+        self._typerefs: TypeRefCache = {}
+
+    def get(self, key: TypeRefCacheKey) -> Optional[irast.TypeRef]:
+        return self._typerefs.get(key)
+
+    def __contains__(self, key: TypeRefCacheKey) -> bool:
+        return key in self._typerefs
+
+    def __len__(self) -> int:
+        return len(self._typerefs)
+
+    def update(
+        self,
+        typerefs: Mapping[TypeRefCacheKey, irast.TypeRef],
+        *,
+        schema: s_schema.Schema,
+    ) -> None:
+        """Add the *typerefs* built by a compilation to the cache.
+
+        *schema* is the schema the compilation ended with.  Only the
+        TypeRefs describing types that it didn't change are added.
+        """
+        for key, typeref in typerefs.items():
+            if (
+                key not in self._typerefs
+                and self._is_unchanged(typeref, schema)
+            ):
+                self._typerefs[key] = typeref
+
+    def _is_unchanged(
+        self,
+        typeref: irast.TypeRef,
+        schema: s_schema.Schema,
+    ) -> bool:
+        seen = set()
+        stack = [typeref]
+        while stack:
+            t = stack.pop()
+            if t.id in seen:
+                continue
+            seen.add(t.id)
+
+            obj = self.schema.get_by_id(t.id, default=None)
+            if (
+                obj is None
+                or not schema.has_object(t.id)
+                or (
+                    self.schema.get_obj_data_raw(obj)
+                    is not schema.get_obj_data_raw(obj)
+                )
+            ):
+                return False
+
+            if t.material_type is not None:
+                stack.append(t.material_type)
+            if t.base_type is not None:
+                stack.append(t.base_type)
+            for refs in (t.children, t.ancestors, t.union, t.intersection):
+                if refs:
+                    stack.extend(refs)
+            stack.extend(t.subtypes)
+
+        return True
+
+
 def is_scalar(typeref: irast.TypeRef) -> bool:
     """Return True if *typeref* describes a scalar type."""
     return typeref.is_scalar
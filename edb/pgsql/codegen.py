@@ -140,6 +140,44 @@ class TranslationData:
         return self.source_start
 
 
+class ShiftedTranslationData:
+    """Translation data of a query obtained by replacing spans of both the
+    source and the output text of another query.
+
+    The spans are (start, old length, new length) triples in the order
+    of their positions in the text of the other query.
+    """
+
+    def __init__(
+        self,
+        data: TranslationData,
+        *,
+        source_spans: Sequence[Tuple[int, int, int]],
+        output_spans: Sequence[Tuple[int, int, int]],
+    ):
+        self.data = data
+        self.source_spans = source_spans
+        self.output_spans = output_spans
+
+    def translate(self, pos: int) -> int:
+        delta = 0
+        for start, old_len, new_len in self.output_spans:
+            if pos < start + delta:
+                break
+            if pos < start + delta + new_len:
+                pos = start + delta
+                break
+            delta += new_len - old_len
+        pos = self.data.translate(pos - delta)
+
+        delta = 0
+        for start, old_len, new_len in self.source_spans:
+            if pos < start + old_len:
+                break
+            delta += new_len - old_len
+        return pos + delta
+
+
 @dataclasses.dataclass(frozen=True)
 class SQLSource:
     text: str
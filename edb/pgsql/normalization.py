@@ -0,0 +1,334 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright 2024-present MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+"""Extraction of literals from SQL query text.
+
+SQL queries that differ only in the values of their literals share the
+same *normalized* text, in which every string and numeric literal is
+replaced with a placeholder denoting the type Postgres infers for it.
+The placeholders are themselves lexed as string literals, so no two
+queries that differ in anything but the values of their literals have
+the same normalized text.
+This is a lexical pass over the text only, it is up to the compiler to
+decide which of the literals can actually be substituted in a compiled
+query without recompiling it.
+"""
+
+
+from __future__ import annotations
+from typing import *
+
+import dataclasses
+import random
+import re
+
+from edb.common import ast
+
+from . import ast as pgast
+
+
+@dataclasses.dataclass(frozen=True)
+class NormalizedSQL:
+
+    key: str
+    """The query text with the literals replaced with placeholders."""
+
+    literals: Tuple[str, ...]
+    """The source text of the literals in the order of appearance."""
+
+    offsets: Tuple[int, ...]
+    """The offsets of the literals in the query text."""
+
+
+_INT4_MAX = 2 ** 31 - 1
+_INT8_MAX = 2 ** 63 - 1
+
+_token_re = re.compile(
+    r'''
+        (?P<ws> \s+ )
+      | (?P<line_comment> --[^\n]* )
+      | (?P<block_comment> /\* (?: [^/*] | /(?!\*) | \*(?!/) )* \*/ )
+      | (?P<string> '(?: [^'] | '' )*' )
+      | (?P<ident> [^\W\d][\w$]* )
+      | (?P<quoted_ident> "(?: [^"] | "" )*" )
+      | (?P<param> \$\d+ )
+      | (?P<dollar_quote> \$(?: [^\W\d]\w* )?\$ )
+      | (?P<number>
+            (?: \d+ (?: \.\d* )? | \.\d+ ) (?: [eE][+-]?\d+ )?
+        )
+      | (?P<other> [^\s'"$\w] )
+    ''',
+    re.X,
+)
+
+# A number directly followed by any of these is not a plain decimal
+# literal (e.g. it's a hex literal, or has digit separators).
+_number_suffix_re = re.compile(r'[\w$.]+')
+
+# A literal directly preceded by any of these (or by a letter or a
+# digit) is part of another token and is kept verbatim, e.g. `x.1` is
+# a field selection, and `E'...'` is an escape string.
+_LITERAL_PREFIXES = frozenset('_$".)]&')
+
+
+def normalize(text: str) -> Optional[NormalizedSQL]:
+    """Extract the literals from *text*.
+
+    Returns None if the text can't be reliably tokenized, for example if
+    it contains nested comments or dollar-quoted strings.
+    """
+    key: List[str] = []
+    literals: List[str] = []
+    offsets: List[int] = []
+
+    pos = 0
+    end = len(text)
+    match = _token_re.match
+    while pos < end:
+        m = match(text, pos)
+        if m is None:
+            # Unterminated string, identifier or comment.
+            return None
+
+        kind = m.lastgroup
+        token = m.group()
+        if kind == 'other' and text.startswith('/*', pos):
+            # Nested or unterminated comment.
+            return None
+        elif kind in ('string', 'number') and _is_prefixed(text, pos):
+            key.append(token)
+        elif kind == 'string':
+            key.append("'?s'")
+            literals.append(token)
+            offsets.append(pos)
+        elif kind == 'number':
+            suffix = _number_suffix_re.match(text, m.end())
+            if suffix is not None:
+                # Not a plain decimal literal, keep it verbatim.
+                token += suffix.group()
+                key.append(token)
+            else:
+                key.append(_number_placeholder(token))
+                literals.append(token)
+                offsets.append(pos)
+        elif kind == 'dollar_quote':
+            # Dollar-quoted strings are too rare in queries sent by
+            # clients to bother extracting them.
+            return None
+        else:
+            key.append(token)
+
+        pos += len(token)
+
+    return NormalizedSQL(
+        key=''.join(key),
+        literals=tuple(literals),
+        offsets=tuple(offsets),
+    )
+
+
+def _is_prefixed(text: str, pos: int) -> bool:
+    if pos == 0:
+        return False
+    prev = text[pos - 1]
+    return prev.isalnum() or prev in _LITERAL_PREFIXES
+
+
+def _number_placeholder(token: str) -> str:
+    if token.isdigit():
+        value = int(token)
+        if value <= _INT4_MAX:
+            return "'?i4'"
+        elif value <= _INT8_MAX:
+            return "'?i8'"
+    return "'?n'"
+
+
+# Casts the SQL compiler evaluates statically, so the result of the
+# compilation depends on the value of the cast literal.
+_EVALUATED_CASTS = frozenset({'regclass', 'bool', 'boolean'})
+
+# The number of sentinels is limited so that numeric ones fit into the
+# type of the literal they replace.
+_MAX_SENTINELS = 1000
+
+
+def find_extractable(
+    stmt: pgast.Base,
+    text: str,
+    normalized: NormalizedSQL,
+) -> Optional[Tuple[int, ...]]:
+    """Find the literals of *normalized* that the compiled *stmt* can have
+    replaced without compiling it again.
+
+    These are the string and numeric constants of *stmt* that are not
+    arguments of function calls or of casts that the compiler might
+    evaluate.  Returns None if the compiled query depends on the text of
+    the whole query.
+    """
+    locations: Set[int] = set()
+    if not _find_constants(stmt, locations, extractable=True):
+        return None
+
+    result = []
+    # Constant locations are offsets in the UTF-8 encoded text.
+    location = 0
+    prev_offset = 0
+    for i, offset in enumerate(normalized.offsets):
+        location += len(text[prev_offset:offset].encode('utf-8'))
+        prev_offset = offset
+        if location in locations:
+            result.append(i)
+            if len(result) == _MAX_SENTINELS:
+                break
+
+    return tuple(result)
+
+
+def _find_constants(
+    node: pgast.Base,
+    locations: Set[int],
+    *,
+    extractable: bool,
+) -> bool:
+    if isinstance(node, (pgast.StringConstant, pgast.NumericConstant)):
+        if extractable and node.context is not None:
+            locations.add(node.context.start)
+        return True
+    elif isinstance(node, pgast.FuncCall):
+        if node.name[-1] == 'current_query':
+            return False
+        extractable = False
+    elif isinstance(node, pgast.TypeCast):
+        if node.type_name.name[-1] in _EVALUATED_CASTS:
+            extractable = False
+
+    for _, value in ast.iter_fields(node, include_meta=False):
+        if isinstance(value, dict):
+            value = list(value.values())
+        if isinstance(value, (list, tuple)):
+            for item in value:
+                if ast.is_ast_node(item) and not _find_constants(
+                    item, locations, extractable=extractable
+                ):
+                    return False
+        elif ast.is_ast_node(value):
+            if not _find_constants(value, locations, extractable=extractable):
+                return False
+    return True
+
+
+@dataclasses.dataclass(frozen=True)
+class SentinelSQL:
+
+    text: str
+    """The query text with the literals replaced with sentinels."""
+
+    sentinels: Dict[str, int]
+    """Sentinels mapped to the indexes of the literals they replace."""
+
+    offsets: Tuple[int, ...]
+    """The offsets of the sentinels in the text."""
+
+    nonce: str
+    """The common part of all sentinels."""
+
+
+def substitute(
+    text: str,
+    normalized: NormalizedSQL,
+    indexes: Sequence[int],
+) -> SentinelSQL:
+    """Replace the literals at *indexes* with unique literals of the same
+    type, which can then be looked for in the compiled query.
+    """
+    while True:
+        nonce = f'{random.randrange(10 ** 6):06d}'
+        if nonce not in text:
+            break
+
+    parts = []
+    sentinels = {}
+    offsets = []
+    pos = 0
+    length = 0
+    for n, i in enumerate(indexes):
+        literal = normalized.literals[i]
+        offset = normalized.offsets[i]
+        if literal[0] == "'":
+            sentinel = f"'edb_lit_{nonce}_{n}'"
+        else:
+            placeholder = _number_placeholder(literal)
+            if placeholder == "'?i4'":
+                sentinel = f'1{nonce}{n:03d}'
+            elif placeholder == "'?i8'":
+                sentinel = f'1{nonce}{n:03d}000000000'
+            else:
+                sentinel = f'0.{nonce}{n:03d}1'
+        parts.append(text[pos:offset])
+        parts.append(sentinel)
+        length += offset - pos
+        offsets.append(length)
+        length += len(sentinel)
+        pos = offset + len(literal)
+        sentinels[sentinel] = i
+    parts.append(text[pos:])
+
+    return SentinelSQL(
+        text=''.join(parts),
+        sentinels=sentinels,
+        offsets=tuple(offsets),
+        nonce=nonce,
+    )
+
+
+def split(
+    text: str,
+    sentinel_sql: SentinelSQL,
+) -> Optional[Tuple[Tuple[str, ...], Tuple[int, ...], Tuple[int, ...]]]:
+    """Split *text* compiled from a query with sentinels on the sentinels.
+
+    Returns the fragments of the text between the sentinels, the indexes
+    of the literals replaced by the sentinels in the order they appear
+    in the text, and their offsets in the text.  Returns None unless
+    every sentinel appears in the text exactly once as a whole token.
+    """
+    sentinels = sentinel_sql.sentinels
+    if text.count(sentinel_sql.nonce) != len(sentinels):
+        return None
+
+    pattern = re.compile(
+        r'(?<![\w.])(?:'
+        + '|'.join(re.escape(s) for s in sentinels)
+        + r')(?![\w.])'
+    )
+    fragments = []
+    indexes = []
+    offsets = []
+    pos = 0
+    for m in pattern.finditer(text):
+        fragments.append(text[pos:m.start()])
+        indexes.append(sentinels[m.group()])
+        offsets.append(m.start())
+        pos = m.end()
+    fragments.append(text[pos:])
+
+    if len(set(indexes)) != len(sentinels):
+        return None
+    return tuple(fragments), tuple(indexes), tuple(offsets)
@@ -579,7 +579,7 @@ class RestoreReady(ServerMessage):
     mtype = MessageType('+')
     message_length = MessageLength
     annotations = Annotations
-    jobs = UInt16('Number of parallel jobs for restore, currently always "1"')
+    jobs = UInt16('Number of parallel jobs the server restores the data with')
 
 
 class DataElement(Struct):
@@ -773,7 +773,7 @@ class Restore(ClientMessage):
     message_length = MessageLength
     attributes = KeyValues
     jobs = UInt16(
-        'Number of parallel jobs for restore (only "1" is supported)')
+        'Number of parallel jobs for restore requested by the client')
     header_data = Bytes(
         'Original DumpHeader packet data excluding mtype and message_length')
 
@@ -49,6 +49,12 @@ from . import schema as s_schema
 from . import utils
 
 
+# The number of pairs of differently named objects that delta_objects()
+# compares exhaustively to detect renames.  Past that, only the pairs
+# that look alike are compared, see get_rename_candidates().
+MAX_RENAME_CANDIDATES = 10000
+
+
 def delta_objects(
     old_in: Iterable[so.Object_T],
     new_in: Iterable[so.Object_T],
@@ -62,12 +68,6 @@ def delta_objects(
 
     delta = DeltaRoot()
 
-    # TODO: Previously, we attempted to do an optimization based on
-    # computing a hash_criteria of each object, in order to discard
-    # unchanged objects. Because hash_criteria returns values that
-    # include schema objects, the optimization didn't work; it wasn't
-    # cheap, so I removed it. But the general idea is sound and should
-    # be revisited.
     old = {o.get_name(old_schema): o for o in old_in}
     new = {o.get_name(new_schema): o for o in new_in}
 
@@ -81,18 +81,6 @@ def delta_objects(
     # addressing in the future, but we fail to understand that for
     # other reasons also.
 
-    # Collect all the pairs of objects with the same name in both schemas.
-    pairs = [
-        (new[k], o) for k, o in old.items() if k in new
-    ]
-    # Then collect the cross product of all the other objects.
-    pairs.extend(
-        itertools.product(
-            [o for k, o in new.items() if k not in old],
-            [o for k, o in old.items() if k not in new],
-        )
-    )
-
     full_matrix: List[Tuple[so.Object_T, so.Object_T, float]] = []
 
     # If there are any renames that are already decided on, honor those first
@@ -134,6 +122,39 @@ def delta_objects(
         def can_delete(obj: so.Object_T, name: sn.Name) -> bool:
             return True
 
+    # Collect all the pairs of objects with the same name in both schemas.
+    # Pairs with the same fingerprint are known to compare equal (and
+    # so do all their children), so they are not compared at all and
+    # don't need an alter.
+    pairs: List[Tuple[so.Object_T, so.Object_T]] = []
+    unchanged: List[Tuple[so.Object_T, so.Object_T]] = []
+    for k, y in old.items():
+        x = new.get(k)
+        if x is None:
+            continue
+        if (
+            k not in renames_x
+            and k not in renames_y
+            and can_create(x, k)
+            and can_delete(y, k)
+            and context.is_unchanged(old_schema, y, new_schema, x)
+        ):
+            unchanged.append((x, y))
+        else:
+            pairs.append((x, y))
+    # Then collect the candidate renames among all the other objects.
+    pairs.extend(
+        get_rename_candidates(
+            [o for k, o in new.items() if k not in old],
+            [o for k, o in old.items() if k not in new],
+            context=context,
+            old_schema=old_schema,
+            new_schema=new_schema,
+            can_create=can_create,
+            can_delete=can_delete,
+        )
+    )
+
     for x, y in pairs:
         x_name = x.get_name(new_schema)
         y_name = y.get_name(old_schema)
@@ -193,7 +214,7 @@ def delta_objects(
             y_alter_variants[y] += 1
 
     alters = []
-    alter_pairs = []
+    alter_pairs = list(unchanged)
 
     if comparison_map:
         if issubclass(sclass, so.InheritingObject):
@@ -294,6 +315,110 @@ def delta_objects(
     return delta
 
 
+def get_rename_candidates(
+    new_objs: Sequence[so.Object_T],
+    old_objs: Sequence[so.Object_T],
+    *,
+    context: so.ComparisonContext,
+    old_schema: s_schema.Schema,
+    new_schema: s_schema.Schema,
+    can_create: Callable[[so.Object_T, sn.Name], bool],
+    can_delete: Callable[[so.Object_T, sn.Name], bool],
+) -> Iterable[Tuple[so.Object_T, so.Object_T]]:
+    """Return the pairs of new and old objects that might be a rename.
+
+    Normally that is every pair, but if there are more than
+    MAX_RENAME_CANDIDATES of them, the objects are put into blocks
+    by get_rename_blocking_keys() and only the objects sharing a block
+    are paired up.  Renames already decided on are always paired,
+    and so are the objects that guidance bans creating or deleting,
+    because they must be altered from or into something.
+    """
+    if len(new_objs) * len(old_objs) <= MAX_RENAME_CANDIDATES:
+        return itertools.product(new_objs, old_objs)
+
+    pairs: Dict[Tuple[so.Object_T, so.Object_T], None] = {}
+
+    blocks: Dict[Hashable, List[so.Object_T]] = collections.defaultdict(list)
+    new_by_name = {}
+    for x in new_objs:
+        x_name = x.get_name(new_schema)
+        new_by_name[x_name] = x
+        if not can_create(x, x_name):
+            pairs.update(dict.fromkeys((x, y) for y in old_objs))
+        for key in get_rename_blocking_keys(x, new_schema):
+            blocks[key].append(x)
+
+    for y in old_objs:
+        y_name = y.get_name(old_schema)
+        if not can_delete(y, y_name):
+            pairs.update(dict.fromkeys((x, y) for x in new_objs))
+            continue
+        rename = context.renames.get((type(y), y_name))
+        if rename is not None and rename.new_name in new_by_name:
+            pairs[new_by_name[rename.new_name], y] = None
+        keys = get_rename_blocking_keys(y, old_schema, context=context)
+        for key in keys:
+            for x in blocks.get(key, ()):
+                pairs[x, y] = None
+
+    return pairs.keys()
+
+
+def get_rename_blocking_keys(
+    obj: so.Object,
+    schema: s_schema.Schema,
+    *,
+    context: Optional[so.ComparisonContext] = None,
+) -> List[Hashable]:
+    """Return the keys of the rename candidate blocks of *obj*.
+
+    An object that is renamed usually keeps either its short name
+    (when it is moved to another module) or its shape: the names of its
+    children (such as pointers of an object type) and of its bases.
+    Both kinds of keys include the class, since objects of different
+    classes never compare as similar.
+
+    If *context* is passed, *obj* is from the old schema and the names
+    of its bases are taken after the renames already decided on.
+    """
+    def shortname(name: sn.Name) -> str:
+        name = sn.shortname_from_fullname(name)
+        return name.name if isinstance(name, sn.QualName) else str(name)
+
+    cls = type(obj)
+    keys: List[Hashable] = [
+        (cls, 'name', shortname(obj.get_name(schema))),
+    ]
+
+    shape: List[Hashable] = []
+    for field in cls.get_fields(sorted=True).values():
+        if field.compcoef is None:
+            continue
+        value = obj.get_field_value(schema, field.name)
+        if isinstance(value, so.ObjectIndexBase) and value:
+            shape.append((
+                field.name,
+                tuple(sorted(str(k) for k in value.keys(schema))),
+            ))
+
+    if isinstance(obj, so.InheritingObject):
+        bases = obj.get_bases(schema).objects(schema)
+        if bases:
+            shape.append(('bases', tuple(
+                shortname(
+                    context.get_obj_name(schema, base)
+                    if context is not None else base.get_name(schema)
+                )
+                for base in bases
+            )))
+
+    if shape:
+        keys.append((cls, 'shape', tuple(shape)))
+
+    return keys
+
+
 def sort_by_inheritance(
     schema: s_schema.Schema,
     objs: Iterable[so.InheritingObjectT],
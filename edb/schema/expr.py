@@ -149,6 +149,23 @@ class Expression(struct.MixedRTStruct, so.ObjectContainer, s_abc.Expression):
         else:
             return compcoef
 
+    @classmethod
+    def fingerprint_value(
+        cls,
+        value: Expression,
+        *,
+        schema: s_schema.Schema,
+        context: so.ComparisonContext,
+        refs: Set[Tuple[Type[so.Object], sn.Name]],
+    ) -> Any:
+        keys = value._refs_keys(schema)
+        refs.update(keys)
+        return (
+            cls.__name__,
+            value.text,
+            tuple(sorted((t.__name__, str(n)) for t, n in keys)),
+        )
+
     @classmethod
     def from_ast(
         cls: Type[Expression],
@@ -448,6 +465,21 @@ class ExpressionList(checked.FrozenCheckedList[Expression]):
 
         return basecoef + (1 - basecoef) * compcoef
 
+    @classmethod
+    def fingerprint_value(
+        cls,
+        value: ExpressionList,
+        *,
+        schema: s_schema.Schema,
+        context: so.ComparisonContext,
+        refs: Set[Tuple[Type[so.Object], sn.Name]],
+    ) -> Any:
+        return (cls.__name__, tuple(
+            Expression.fingerprint_value(
+                expr, schema=schema, context=context, refs=refs)
+            for expr in value
+        ))
+
 
 class ExpressionDict(checked.CheckedDict[str, Expression]):
 
@@ -514,6 +546,21 @@ class ExpressionDict(checked.CheckedDict[str, Expression]):
 
         return basecoef + (1 - basecoef) * compcoef
 
+    @classmethod
+    def fingerprint_value(
+        cls,
+        value: ExpressionDict,
+        *,
+        schema: s_schema.Schema,
+        context: so.ComparisonContext,
+        refs: Set[Tuple[Type[so.Object], sn.Name]],
+    ) -> Any:
+        return (cls.__name__, tuple(
+            (key, Expression.fingerprint_value(
+                expr, schema=schema, context=context, refs=refs))
+            for key, expr in sorted(value.items())
+        ))
+
 
 def imprint_expr_context(
     qltree: qlast_.Base,
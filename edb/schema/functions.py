@@ -735,6 +735,26 @@ class FuncParameterList(so.ObjectList[Parameter], ParameterLikeList):
 
         return 1.0
 
+    @classmethod
+    def fingerprint_value(
+        cls,
+        value: so.ObjectCollection[Parameter],
+        *,
+        schema: s_schema.Schema,
+        context: so.ComparisonContext,
+        refs: Set[Tuple[Type[so.Object], sn.Name]],
+    ) -> Any:
+        # Parameters are compared by their contents, like the objects
+        # of an ObjectIndex.
+        digests = []
+        for param in value.objects(schema):
+            fingerprint = context.get_fingerprint(schema, param)
+            if fingerprint.digest is None:
+                raise so.FingerprintUnavailableError
+            refs.update(fingerprint.refs)
+            digests.append(fingerprint.digest)
+        return (cls.__name__, tuple(digests))
+
 
 class VolatilitySubject(so.Object):
 
@@ -26,6 +26,8 @@ import collections.abc
 import copy
 import enum
 import functools
+import hashlib
+import pickle
 import uuid
 
 from edb import errors
@@ -195,12 +197,67 @@ class DescribeVisibilityPolicy(enum.IntEnum):
     )
 
 
+class Fingerprint(NamedTuple):
+    """A digest of the parts of an object that Object.compare() looks at.
+
+    Other objects are referred to by their type and name rather than by
+    id, and the children of the object in object indexes (such as the
+    pointers of an object type) by their own fingerprints, so an object
+    has the same fingerprint in any schema it is defined the same way in.
+    """
+
+    #: None if the contents of the object can't be reliably digested.
+    digest: Optional[bytes]
+    #: The types and names of the objects referred to by the object
+    #: and its children.
+    refs: FrozenSet[Tuple[Type[Object], sn.Name]]
+
+
+class FingerprintUnavailableError(Exception):
+    pass
+
+
+def fingerprint_value(
+    value: Any,
+    *,
+    schema: s_schema.Schema,
+    context: ComparisonContext,
+    refs: Set[Tuple[Type[Object], sn.Name]],
+) -> Any:
+    """Return a picklable representation of a field value for fingerprints.
+
+    Types that are compared by a ``compare_values`` method are
+    represented by their ``fingerprint_value`` method, the rest by their
+    value.  The types and names of the objects referred to by *value*
+    are added to *refs*.
+    """
+    fingerprinter = getattr(type(value), 'fingerprint_value', None)
+    if fingerprinter is not None:
+        return fingerprinter(value, schema=schema, context=context, refs=refs)
+    elif value is None or isinstance(value, (str, bytes, int, float)):
+        return value
+
+    def fp(v: Any) -> Any:
+        return fingerprint_value(v, schema=schema, context=context, refs=refs)
+
+    if isinstance(value, collections.abc.Set):
+        items = sorted((fp(v) for v in value), key=repr)
+    elif isinstance(value, collections.abc.Mapping):
+        items = sorted(((fp(k), fp(v)) for k, v in value.items()), key=repr)
+    elif isinstance(value, collections.abc.Sequence):
+        items = [fp(v) for v in value]
+    else:
+        return value
+    return (type(value).__name__, tuple(items))
+
+
 class ComparisonContext:
 
     renames: Dict[Tuple[Type[Object], sn.Name], sd.RenameObject[Object]]
     deletions: Dict[Tuple[Type[Object], sn.Name], sd.DeleteObject[Object]]
     guidance: Optional[DeltaGuidance]
     parent_ops: List[sd.ObjectCommand[Any]]
+    _fingerprints: Dict[Tuple[s_schema.Schema, Object], Fingerprint]
 
     def __init__(
         self,
@@ -216,6 +273,7 @@ class ComparisonContext:
         self.deletions = {}
         self.placeholder_ctr: Dict[str, int] = collections.Counter()
         self.parent_ops = []
+        self._fingerprints = {}
 
     def is_deleting(self, schema: s_schema.Schema, obj: Object) -> bool:
         return (type(obj), obj.get_name(schema)) in self.deletions
@@ -237,6 +295,45 @@ class ComparisonContext:
         else:
             return obj_name
 
+    def get_fingerprint(
+        self,
+        schema: s_schema.Schema,
+        obj: Object,
+    ) -> Fingerprint:
+        key = (schema, obj)
+        fingerprint = self._fingerprints.get(key)
+        if fingerprint is None:
+            # Break reference cycles, if there are any.
+            self._fingerprints[key] = Fingerprint(None, frozenset())
+            fingerprint = obj.get_fingerprint(schema, context=self)
+            self._fingerprints[key] = fingerprint
+        return fingerprint
+
+    def is_unchanged(
+        self,
+        old_schema: s_schema.Schema,
+        old: Object,
+        new_schema: s_schema.Schema,
+        new: Object,
+    ) -> bool:
+        """Return True if *old* is certain to compare equal to *new*.
+
+        That is the case when they have the same fingerprints, unless
+        any of the objects they refer to is being renamed or deleted.
+        """
+        if type(old) is not type(new):
+            return False
+        digest = self.get_fingerprint(old_schema, old).digest
+        if (
+            digest is None
+            or digest != self.get_fingerprint(new_schema, new).digest
+        ):
+            return False
+        refs = self.get_fingerprint(old_schema, old).refs
+        return not any(
+            ref in self.renames or ref in self.deletions for ref in refs
+        )
+
     def get_placeholder(self, prefix: str) -> str:
         ctr = self.placeholder_ctr[prefix]
         self.placeholder_ctr[prefix] += 1
@@ -1331,6 +1428,55 @@ class Object(s_abc.Object, ObjectContainer, metaclass=ObjectMeta):
 
         return similarity
 
+    def get_fingerprint(
+        self,
+        schema: s_schema.Schema,
+        *,
+        context: ComparisonContext,
+    ) -> Fingerprint:
+        """Compute the fingerprint of the object, see Fingerprint.
+
+        Use ComparisonContext.get_fingerprint() instead, which caches
+        the fingerprints.
+        """
+        cls = type(self)
+        refs: Set[Tuple[Type[Object], sn.Name]] = set()
+        data: List[Any] = [cls.__name__]
+        try:
+            for field in cls.get_fields(sorted=True).values():
+                if field.compcoef is None:
+                    continue
+                value = self.get_field_value(schema, field.name)
+                data.append((field.name, fingerprint_value(
+                    value, schema=schema, context=context, refs=refs)))
+            digest: Optional[bytes] = hashlib.blake2b(
+                pickle.dumps(data, pickle.HIGHEST_PROTOCOL),
+                digest_size=16,
+            ).digest()
+        except (
+            FingerprintUnavailableError,
+            FieldValueNotFoundError,
+            pickle.PicklingError,
+            AttributeError,
+            TypeError,
+        ):
+            digest = None
+        return Fingerprint(digest, frozenset(refs))
+
+    @classmethod
+    def fingerprint_value(
+        cls,
+        value: Object,
+        *,
+        schema: s_schema.Schema,
+        context: ComparisonContext,
+        refs: Set[Tuple[Type[Object], sn.Name]],
+    ) -> Any:
+        # References are compared by name, see compare_values().
+        name = value.get_name(schema)
+        refs.add((type(value), name))
+        return (type(value).__name__, str(name))
+
     def is_blocking_ref(
         self, schema: s_schema.Schema, reference: Object
     ) -> bool:
@@ -2498,6 +2644,25 @@ class ObjectCollection(
         else:
             return 1.0
 
+    @classmethod
+    def fingerprint_value(
+        cls,
+        value: ObjectCollection[Object_T],
+        *,
+        schema: s_schema.Schema,
+        context: ComparisonContext,
+        refs: Set[Tuple[Type[Object], sn.Name]],
+    ) -> Any:
+        names = [
+            Object.fingerprint_value(
+                obj, schema=schema, context=context, refs=refs)
+            for obj in value.objects(schema)
+        ]
+        if not issubclass(cls._container, tuple):
+            # The order of unordered collections doesn't matter.
+            names.sort()
+        return (cls.__name__, tuple(names))
+
     def as_shell(
         self,
         schema: s_schema.Schema,
@@ -2653,6 +2818,27 @@ class ObjectIndexBase(
 
         return basecoef + (1 - basecoef) * compcoef
 
+    @classmethod
+    def fingerprint_value(
+        cls,
+        value: ObjectCollection[Object_T],
+        *,
+        schema: s_schema.Schema,
+        context: ComparisonContext,
+        refs: Set[Tuple[Type[Object], sn.Name]],
+    ) -> Any:
+        # The objects in an index are compared by their contents, so
+        # their fingerprints are included instead of their names.
+        assert isinstance(value, ObjectIndexBase)
+        items = []
+        for key, obj in value.items(schema):
+            fingerprint = context.get_fingerprint(schema, obj)
+            if fingerprint.digest is None:
+                raise FingerprintUnavailableError
+            refs.update(fingerprint.refs)
+            items.append((str(key), fingerprint.digest))
+        return (cls.__name__, tuple(items))
+
     def add(
         self: OIBT, schema: s_schema.Schema, item: Object
     ) -> Tuple[s_schema.Schema, OIBT]:
@@ -2835,6 +3021,22 @@ class ObjectDict(
             our_schema=our_schema, their_schema=their_schema,
             context=context, compcoef=compcoef)
 
+    @classmethod
+    def fingerprint_value(
+        cls,
+        value: ObjectCollection[Object_T],
+        *,
+        schema: s_schema.Schema,
+        context: ComparisonContext,
+        refs: Set[Tuple[Type[Object], sn.Name]],
+    ) -> Any:
+        assert isinstance(value, ObjectDict)
+        return (
+            tuple(str(k) for k in value.keys(schema)),
+            super().fingerprint_value(
+                value, schema=schema, context=context, refs=refs),
+        )
+
     def __init__(
         self,
         _ids: Collection[uuid.UUID],
@@ -55,6 +55,12 @@ if TYPE_CHECKING:
         ],
     ]
 
+    # Per-map (updated items, deleted keys), see FlatSchema.get_delta().
+    SchemaDelta_T = Tuple[
+        Tuple[Tuple[Tuple[Any, Any], ...], Tuple[Any, ...]],
+        ...
+    ]
+
 EXT_MODULE = sn.UnqualName('ext')
 
 STD_MODULES = (
@@ -438,7 +444,18 @@ class Schema(abc.ABC):
     ) -> Optional[so.Object]:
         raise NotImplementedError
 
-    def _get_object_ids(self) -> Iterable[uuid.UUID]:
+    def _get_object_ids(
+        self,
+        *,
+        type: Optional[Type[so.Object]] = None,
+        modules: Optional[AbstractSet[str]] = None,
+    ) -> Iterable[uuid.UUID]:
+        """Return ids of schema objects.
+
+        If *type* or *modules* are specified, the result may be narrowed
+        down to (a superset of) the ids of objects of the given type or
+        in one of the given modules.
+        """
         raise NotImplementedError
 
     @abc.abstractmethod
@@ -511,7 +528,20 @@ class FlatSchema(Schema):
         uuid.UUID,
     ]
     _refs_to: Refs_T
+    # Secondary indexes of object ids by schema class name and by the
+    # module of the object name, used by get_objects().
+    _type_to_ids: immu.Map[str, immu.Map[uuid.UUID, None]]
+    _module_to_ids: immu.Map[str, immu.Map[uuid.UUID, None]]
     _generation: int
+    # Memoized results of _resolve_name(), see the module-level function.
+    # Kept on the instance, so that it goes away with the schema version.
+    _resolve_cache: Dict[
+        Tuple[
+            Union[str, sn.Name],
+            Optional[FrozenSet[Tuple[Optional[str], str]]],
+        ],
+        Tuple[sn.QualName, ...],
+    ]
 
     def __init__(self) -> None:
         self._id_to_data = immu.Map()
@@ -520,10 +550,149 @@ class FlatSchema(Schema):
         self._name_to_id = immu.Map()
         self._globalname_to_id = immu.Map()
         self._refs_to = immu.Map()
+        self._type_to_ids = immu.Map()
+        self._module_to_ids = immu.Map()
         self._generation = 0
+        self._resolve_cache = {}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state['_resolve_cache']
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._resolve_cache = {}
+        if '_type_to_ids' not in state:
+            # Pickled by a version without the secondary indexes.
+            self._type_to_ids, self._module_to_ids = self._build_indexes()
+
+    def _build_indexes(self) -> Tuple[
+        immu.Map[str, immu.Map[uuid.UUID, None]],
+        immu.Map[str, immu.Map[uuid.UUID, None]],
+    ]:
+        by_type: Dict[str, Dict[uuid.UUID, None]] = {}
+        by_module: Dict[str, Dict[uuid.UUID, None]] = {}
+        for obj_id, sclass_name in self._id_to_type.items():
+            by_type.setdefault(sclass_name, {})[obj_id] = None
+            module = _get_obj_module(
+                self._id_to_type, self._id_to_data, obj_id)
+            if module is not None:
+                by_module.setdefault(module, {})[obj_id] = None
+
+        return (
+            immu.Map((k, immu.Map(v)) for k, v in by_type.items()),
+            immu.Map((k, immu.Map(v)) for k, v in by_module.items()),
+        )
 
-    def _get_object_ids(self) -> Iterable[uuid.UUID]:
-        return self._id_to_type.keys()
+    def _get_object_ids(
+        self,
+        *,
+        type: Optional[Type[so.Object]] = None,
+        modules: Optional[AbstractSet[str]] = None,
+    ) -> Iterable[uuid.UUID]:
+        candidates = []
+        if type is not None:
+            candidates.append([
+                ids
+                for sclass_name, ids in self._type_to_ids.items()
+                if issubclass(
+                    so.ObjectMeta.get_schema_class(sclass_name), type)
+            ])
+        if modules:
+            candidates.append([
+                ids
+                for module in modules
+                if (ids := self._module_to_ids.get(module)) is not None
+            ])
+
+        if not candidates:
+            return self._id_to_type.keys()
+
+        # Both indexes give a superset of the result, so go with
+        # the smaller one.
+        return itertools.chain.from_iterable(
+            min(candidates, key=lambda c: sum(map(len, c))))
+
+    _delta_fields = (
+        '_id_to_data',
+        '_id_to_type',
+        '_name_to_id',
+        '_shortname_to_id',
+        '_globalname_to_id',
+        '_refs_to',
+    )
+
+    def get_delta(self, base: FlatSchema) -> SchemaDelta_T:
+        """Return the changes turning *base* into this schema.
+
+        The result is typically much smaller than the schema itself
+        and can be applied to a copy of *base* with :meth:`apply_delta`
+        (e.g. in another process) to reconstruct this schema.
+        """
+        delta = []
+        for field in self._delta_fields:
+            new = getattr(self, field)
+            old = getattr(base, field)
+            if new is old:
+                delta.append(((), ()))
+                continue
+
+            updated = tuple(
+                (k, v) for k, v in new.items() if old.get(k) is not v
+            )
+            deleted = tuple(k for k in old.keys() if k not in new)
+            delta.append((updated, deleted))
+
+        return tuple(delta)
+
+    def apply_delta(self, delta: SchemaDelta_T) -> FlatSchema:
+        """Return a copy of this schema with *delta* applied."""
+        maps = {}
+        for field, (updated, deleted) in zip(self._delta_fields, delta):
+            if not updated and not deleted:
+                continue
+            with getattr(self, field).mutate() as mm:
+                for k in deleted:
+                    del mm[k]
+                for k, v in updated:
+                    mm[k] = v
+                maps[field[1:]] = mm.finish()
+
+        # The secondary indexes are not part of the delta, update them
+        # for all objects with changed data.
+        id_to_data = maps.get('id_to_data', self._id_to_data)
+        id_to_type = maps.get('id_to_type', self._id_to_type)
+        type_to_ids = self._type_to_ids
+        module_to_ids = self._module_to_ids
+        data_updated, data_deleted = delta[0]
+        for obj_id in itertools.chain(
+            (k for k, _ in data_updated), data_deleted
+        ):
+            old_type = self._id_to_type.get(obj_id)
+            new_type = id_to_type.get(obj_id)
+            if old_type != new_type:
+                if old_type is not None:
+                    type_to_ids = _index_discard(type_to_ids, old_type, obj_id)
+                if new_type is not None:
+                    type_to_ids = _index_add(type_to_ids, new_type, obj_id)
+
+            old_module = _get_obj_module(
+                self._id_to_type, self._id_to_data, obj_id)
+            new_module = _get_obj_module(id_to_type, id_to_data, obj_id)
+            if old_module != new_module:
+                if old_module is not None:
+                    module_to_ids = _index_discard(
+                        module_to_ids, old_module, obj_id)
+                if new_module is not None:
+                    module_to_ids = _index_add(
+                        module_to_ids, new_module, obj_id)
+
+        return self._replace(
+            type_to_ids=type_to_ids,
+            module_to_ids=module_to_ids,
+            **maps,
+        )
 
     def _replace(
         self,
@@ -541,6 +710,12 @@ class FlatSchema(Schema):
             immu.Map[Tuple[Type[so.Object], sn.Name], uuid.UUID]
         ] = None,
         refs_to: Optional[Refs_T] = None,
+        type_to_ids: Optional[
+            immu.Map[str, immu.Map[uuid.UUID, None]]
+        ] = None,
+        module_to_ids: Optional[
+            immu.Map[str, immu.Map[uuid.UUID, None]]
+        ] = None,
     ) -> FlatSchema:
         new = FlatSchema.__new__(FlatSchema)
 
@@ -574,7 +749,18 @@ class FlatSchema(Schema):
         else:
             new._refs_to = refs_to
 
+        if type_to_ids is None:
+            new._type_to_ids = self._type_to_ids
+        else:
+            new._type_to_ids = type_to_ids
+
+        if module_to_ids is None:
+            new._module_to_ids = self._module_to_ids
+        else:
+            new._module_to_ids = module_to_ids
+
         new._generation = self._generation + 1
+        new._resolve_cache = {}
 
         return new
 
@@ -651,6 +837,23 @@ class FlatSchema(Schema):
 
         return name_to_id, shortname_to_id, globalname_to_id
 
+    def _update_module_index(
+        self,
+        obj_id: uuid.UUID,
+        old_name: Optional[sn.Name],
+        new_name: Optional[sn.Name],
+    ) -> immu.Map[str, immu.Map[uuid.UUID, None]]:
+        module_to_ids = self._module_to_ids
+        old_module = _get_name_module(old_name)
+        new_module = _get_name_module(new_name)
+        if old_module != new_module:
+            if old_module is not None:
+                module_to_ids = _index_discard(
+                    module_to_ids, old_module, obj_id)
+            if new_module is not None:
+                module_to_ids = _index_add(module_to_ids, new_module, obj_id)
+        return module_to_ids
+
     def update_obj(
         self,
         obj: so.Object,
@@ -673,6 +876,7 @@ class FlatSchema(Schema):
         name_to_id = None
         shortname_to_id = None
         globalname_to_id = None
+        module_to_ids = None
         orig_refs = {}
         new_refs = {}
 
@@ -688,6 +892,9 @@ class FlatSchema(Schema):
                         value
                     )
                 )
+                if obj_id in self._id_to_type:
+                    module_to_ids = self._update_module_index(
+                        obj_id, data[findex], value)
 
             if value is None:
                 if field in reducible_fields and field in object_ref_fields:
@@ -715,7 +922,8 @@ class FlatSchema(Schema):
                              shortname_to_id=shortname_to_id,
                              globalname_to_id=globalname_to_id,
                              id_to_data=id_to_data,
-                             refs_to=refs_to)
+                             refs_to=refs_to,
+                             module_to_ids=module_to_ids)
 
     def maybe_get_obj_data_raw(
         self,
@@ -761,11 +969,14 @@ class FlatSchema(Schema):
         name_to_id = None
         shortname_to_id = None
         globalname_to_id = None
+        module_to_ids = None
         if fieldname == 'name':
             old_name = data[findex]
             name_to_id, shortname_to_id, globalname_to_id = (
                 self._update_obj_name(obj_id, sclass, old_name, value)
             )
+            module_to_ids = self._update_module_index(
+                obj_id, old_name, value)
 
         data_list = list(data)
         data_list[findex] = value
@@ -793,6 +1004,7 @@ class FlatSchema(Schema):
             globalname_to_id=globalname_to_id,
             id_to_data=id_to_data,
             refs_to=refs_to,
+            module_to_ids=module_to_ids,
         )
 
     def unset_obj_field(
@@ -814,6 +1026,7 @@ class FlatSchema(Schema):
         name_to_id = None
         shortname_to_id = None
         globalname_to_id = None
+        module_to_ids = None
         orig_value = data[findex]
 
         if orig_value is None:
@@ -828,6 +1041,8 @@ class FlatSchema(Schema):
                     None
                 )
             )
+            module_to_ids = self._update_module_index(
+                obj_id, orig_value, None)
 
         data_list = list(data)
         data_list[findex] = None
@@ -850,6 +1065,7 @@ class FlatSchema(Schema):
             globalname_to_id=globalname_to_id,
             id_to_data=id_to_data,
             refs_to=refs_to,
+            module_to_ids=module_to_ids,
         )
 
     def _update_refs_to(
@@ -965,6 +1181,8 @@ class FlatSchema(Schema):
             shortname_to_id=shortname_to_id,
             globalname_to_id=globalname_to_id,
             refs_to=refs_to,
+            type_to_ids=_index_add(self._type_to_ids, sclass.__name__, id),
+            module_to_ids=self._update_module_index(id, None, name),
         )
 
         if (
@@ -1038,6 +1256,9 @@ class FlatSchema(Schema):
             id_to_data=self._id_to_data.delete(obj.id),
             id_to_type=self._id_to_type.delete(obj.id),
             refs_to=refs_to,
+            type_to_ids=_index_discard(
+                self._type_to_ids, self._id_to_type[obj.id], obj.id),
+            module_to_ids=self._update_module_index(obj.id, name, None),
         ))
 
         return self._replace(**updates)  # type: ignore
@@ -1060,6 +1281,30 @@ class FlatSchema(Schema):
         module_aliases: Optional[Mapping[Optional[str], str]],
         disallow_module: Optional[Callable[[str], bool]],
     ) -> Any:
+        if disallow_module is None:
+            fqnames = _resolve_name(
+                self,
+                name,
+                None if module_aliases is None
+                else frozenset(module_aliases.items()),
+            )
+        else:
+            fqnames = self._resolve_name(name, module_aliases, disallow_module)
+
+        for fqname in fqnames:
+            result = getter(self, fqname)
+            if result is not None:
+                return result
+
+        return default
+
+    def _resolve_name(
+        self,
+        name: Union[str, sn.Name],
+        module_aliases: Optional[Mapping[Optional[str], str]],
+        disallow_module: Optional[Callable[[str], bool]],
+    ) -> Tuple[sn.QualName, ...]:
+        """Return fully-qualified names to look *name* up by, in order."""
         if isinstance(name, str):
             name = sn.name_from_string(name)
         shortname = name.name
@@ -1067,18 +1312,14 @@ class FlatSchema(Schema):
         orig_module = module
 
         if module == '__std__':
-            fqname = sn.QualName('std', shortname)
-            result = getter(self, fqname)
-            if result is not None:
-                return result
-            else:
-                return default
+            return (sn.QualName('std', shortname),)
 
+        fqnames = []
         alias_hit = local = False
         if module and module.startswith('__current__::'):
             local = True
             if not module_aliases or None not in module_aliases:
-                return default
+                return ()
             cur_module = module_aliases[None]
             module = f'{cur_module}::{module.removeprefix("__current__::")}'
         elif module_aliases is not None:
@@ -1094,10 +1335,7 @@ class FlatSchema(Schema):
                 module = fq_module + sep + rest
 
         if module is not None:
-            fqname = sn.QualName(module, shortname)
-            result = getter(self, fqname)
-            if result is not None:
-                return result
+            fqnames.append(sn.QualName(module, shortname))
 
         # Try something in std, but only if there isn't a module clash
         if not local and (
@@ -1110,12 +1348,9 @@ class FlatSchema(Schema):
             )
         ):
             mod_name = 'std' if orig_module is None else f'std::{orig_module}'
-            fqname = sn.QualName(mod_name, shortname)
-            result = getter(self, fqname)
-            if result is not None:
-                return result
+            fqnames.append(sn.QualName(mod_name, shortname))
 
-        return default
+        return tuple(fqnames)
 
     def get_functions(
         self,
@@ -1469,9 +1704,14 @@ class FlatSchema(Schema):
         type: Optional[Type[so.Object_T]] = None,
         extra_filters: Iterable[Callable[[Schema, so.Object], bool]] = (),
     ) -> SchemaIterator[so.Object_T]:
+        if included_modules:
+            included_modules = frozenset(included_modules)
         return SchemaIterator[so.Object_T](
             self,
-            self._id_to_type,
+            self._get_object_ids(
+                type=type,
+                modules=_get_module_names(included_modules),
+            ),
             exclude_stdlib=exclude_stdlib,
             exclude_global=exclude_global,
             exclude_internal=exclude_internal,
@@ -1501,6 +1741,58 @@ class FlatSchema(Schema):
 EMPTY_SCHEMA = FlatSchema()
 
 
+def _index_add(
+    index: immu.Map[str, immu.Map[uuid.UUID, None]],
+    key: str,
+    obj_id: uuid.UUID,
+) -> immu.Map[str, immu.Map[uuid.UUID, None]]:
+    ids = index.get(key)
+    if ids is None:
+        return index.set(key, immu.Map(((obj_id, None),)))
+    else:
+        return index.set(key, ids.set(obj_id, None))
+
+
+def _index_discard(
+    index: immu.Map[str, immu.Map[uuid.UUID, None]],
+    key: str,
+    obj_id: uuid.UUID,
+) -> immu.Map[str, immu.Map[uuid.UUID, None]]:
+    ids = index[key].delete(obj_id)
+    if ids:
+        return index.set(key, ids)
+    else:
+        return index.delete(key)
+
+
+def _get_name_module(name: Optional[sn.Name]) -> Optional[str]:
+    if isinstance(name, sn.QualName):
+        return name.module
+    else:
+        return None
+
+
+def _get_obj_module(
+    id_to_type: immu.Map[uuid.UUID, str],
+    id_to_data: immu.Map[uuid.UUID, Tuple[Any, ...]],
+    obj_id: uuid.UUID,
+) -> Optional[str]:
+    sclass_name = id_to_type.get(obj_id)
+    data = id_to_data.get(obj_id)
+    if sclass_name is None or data is None:
+        return None
+    sclass = so.ObjectMeta.get_schema_class(sclass_name)
+    return _get_name_module(data[sclass.get_schema_field('name').index])
+
+
+def _get_module_names(
+    modules: Optional[Iterable[sn.Name]],
+) -> Optional[FrozenSet[str]]:
+    if not modules:
+        return None
+    return frozenset(str(m) for m in modules)
+
+
 def upgrade_schema(schema: FlatSchema) -> FlatSchema:
     """Repair a schema object serialized by an older patch version
 
@@ -1638,11 +1930,16 @@ class ChainedSchema(Schema):
         self._top_schema = top_schema
         self._global_schema = global_schema
 
-    def _get_object_ids(self) -> Iterable[uuid.UUID]:
+    def _get_object_ids(
+        self,
+        *,
+        type: Optional[Type[so.Object]] = None,
+        modules: Optional[AbstractSet[str]] = None,
+    ) -> Iterable[uuid.UUID]:
         return itertools.chain(
-            self._base_schema._get_object_ids(),
-            self._top_schema._get_object_ids(),
-            self._global_schema._get_object_ids(),
+            self._base_schema._get_object_ids(type=type, modules=modules),
+            self._top_schema._get_object_ids(type=type, modules=modules),
+            self._global_schema._get_object_ids(type=type, modules=modules),
         )
 
     def get_top_schema(self) -> Schema:
@@ -2083,9 +2380,14 @@ class ChainedSchema(Schema):
         type: Optional[Type[so.Object_T]] = None,
         extra_filters: Iterable[Callable[[Schema, so.Object], bool]] = (),
     ) -> SchemaIterator[so.Object_T]:
+        if included_modules:
+            included_modules = frozenset(included_modules)
         return SchemaIterator[so.Object_T](
             self,
-            self._get_object_ids(),
+            self._get_object_ids(
+                type=type,
+                modules=_get_module_names(included_modules),
+            ),
             exclude_global=exclude_global,
             exclude_stdlib=exclude_stdlib,
             exclude_internal=exclude_internal,
@@ -2110,6 +2412,29 @@ class ChainedSchema(Schema):
         return migration
 
 
+def _resolve_name(
+    schema: FlatSchema,
+    name: Union[str, sn.Name],
+    module_aliases: Optional[FrozenSet[Tuple[Optional[str], str]]],
+) -> Tuple[sn.QualName, ...]:
+    # Name resolution only depends on the (immutable) schema, so it is
+    # memoized for repeated lookups of the same names while compiling.
+    # The cache lives on the schema itself: a global one would keep
+    # old schema versions alive.
+    key = (name, module_aliases)
+    try:
+        return schema._resolve_cache[key]
+    except KeyError:
+        pass
+    fqnames = schema._resolve_name(
+        name,
+        None if module_aliases is None else dict(module_aliases),
+        None,
+    )
+    schema._resolve_cache[key] = fqnames
+    return fqnames
+
+
 @functools.lru_cache()
 def _get_functions(
     schema: FlatSchema,
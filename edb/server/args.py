@@ -44,6 +44,7 @@ RAM_MIB_PER_CONN = 100
 TLS_CERT_FILE_NAME = "edbtlscert.pem"
 TLS_KEY_FILE_NAME = "edbprivkey.pem"
 JWS_KEY_FILE_NAME = "edbjwskeys.pem"
+PERSISTENT_QUERY_CACHE_FILE_NAME = "edbquerycache.sqlite"
 
 
 logger = logging.getLogger('edb.server')
@@ -225,10 +226,16 @@ class ServerConfig(NamedTuple):
     daemon_group: str
     runstate_dir: pathlib.Path
     max_backend_connections: Optional[int]
+    backend_min_idle_connections: Mapping[Optional[str], int]
     compiler_pool_size: int
     compiler_pool_mode: CompilerPoolMode
     compiler_pool_addr: str
     compiler_pool_tenant_cache_size: int
+    compiler_pool_shared_schema: bool
+    persistent_query_cache_size: int
+    persistent_query_cache_file: Optional[pathlib.Path]
+    query_result_cache_size: int
+    query_result_cache_ttl: float
     echo_runtime_info: bool
     emit_server_status: str
     temp_dir: bool
@@ -368,6 +375,21 @@ def _validate_max_backend_connections(ctx, param, value):
     return value
 
 
+def _validate_backend_min_idle_connections(ctx, param, value):
+    result: dict[Optional[str], int] = {}
+    for item in value:
+        branch, sep, num = item.rpartition('=')
+        try:
+            nconns = int(num)
+        except ValueError:
+            nconns = -1
+        if nconns < 0 or (sep and not branch):
+            raise click.BadParameter(
+                f'{item!r} is not a valid [BRANCH=]NUM value')
+        result[branch if sep else None] = nconns
+    return result
+
+
 def compute_default_max_backend_connections() -> int:
     total_mem = psutil.virtual_memory().total
     total_mem_mb = total_mem // MIB
@@ -700,6 +722,14 @@ _server_options = [
              f'Postgres or pg_settings.max_connections for remote Postgres, '
              f'minus the NUM of --reserved-pg-connections.',
         callback=_validate_max_backend_connections),
+    click.option(
+        '--backend-min-idle-connections', type=str, metavar='[BRANCH=]NUM',
+        multiple=True, callback=_validate_backend_min_idle_connections,
+        help='The minimum NUM of idle backend connections to keep open for '
+             'each branch, or for the given BRANCH only.  These connections '
+             'are opened when the branch is loaded and are never closed '
+             'for being unused.  Can be specified multiple times.  '
+             'Defaults to 0.'),
     click.option(
         '--compiler-pool-size', type=int,
         callback=_validate_compiler_pool_size),
@@ -731,6 +761,44 @@ _server_options = [
              "cache their schemas, "
              "only used when --compiler-pool-mode=fixed_multi_tenant"
     ),
+    click.option(
+        "--compiler-pool-shared-schema",
+        is_flag=True,
+        envvar="EDGEDB_SERVER_COMPILER_POOL_SHARED_SCHEMA",
+        cls=EnvvarResolver,
+        help="Load the standard library schema once in the template "
+             "process of the local compiler pool, so that the workers "
+             "forked from it start out sharing those pages copy-on-write "
+             "instead of each unpickling a private copy.  Pages a worker "
+             "touches may still become private over time.",
+    ),
+    click.option(
+        '--persistent-query-cache-size', type=int, default=0, metavar='NUM',
+        envvar="EDGEDB_SERVER_PERSISTENT_QUERY_CACHE_SIZE",
+        help='The maximum NUM of compiled queries to keep in a persistent '
+             'on-disk cache, which is used to warm up the query caches '
+             'after a restart.  0 (default) disables the persistent cache.'),
+    click.option(
+        '--persistent-query-cache-file', type=PathPath(), metavar='PATH',
+        envvar="EDGEDB_SERVER_PERSISTENT_QUERY_CACHE_FILE",
+        help='Path to the persistent query cache file (defaults to a file '
+             'in the instance data directory).'),
+    click.option(
+        '--query-result-cache-size', type=int, default=0, metavar='NUM',
+        envvar="EDGEDB_SERVER_QUERY_RESULT_CACHE_SIZE",
+        help='The maximum NUM of results of read-only queries to keep in '
+             'memory per branch, so that repeated queries are answered '
+             'without running them again.  0 (default) disables the '
+             'result cache.'),
+    click.option(
+        '--query-result-cache-ttl', type=float, metavar='SECONDS',
+        default=defines.DEFAULT_QUERY_RESULT_CACHE_TTL,
+        envvar="EDGEDB_SERVER_QUERY_RESULT_CACHE_TTL",
+        help='The maximum time in SECONDS a cached query result is served '
+             'for.  Writes made through this server invalidate the cached '
+             'results of the affected object types immediately, the TTL '
+             'bounds the staleness caused by all other changes.  Defaults '
+             f'to {defines.DEFAULT_QUERY_RESULT_CACHE_TTL}.'),
     click.option(
         '--echo-runtime-info', type=bool, default=False, is_flag=True,
         help='[DEPREATED, use --emit-server-status] '
@@ -1233,6 +1301,26 @@ def parse_args(**kwargs: Any):
             abort('The -D and --multitenant-config-file options '
                   'are mutually exclusive.')
 
+    if kwargs['persistent_query_cache_size'] < 0:
+        abort('--persistent-query-cache-size must not be negative')
+    if (
+        kwargs['persistent_query_cache_size']
+        and not kwargs['persistent_query_cache_file']
+    ):
+        if kwargs['data_dir']:
+            kwargs['persistent_query_cache_file'] = (
+                kwargs['data_dir'] / PERSISTENT_QUERY_CACHE_FILE_NAME
+            )
+        else:
+            abort('--persistent-query-cache-size requires either the '
+                  'instance data directory (-D) or '
+                  '--persistent-query-cache-file to be specified')
+
+    if kwargs['query_result_cache_size'] < 0:
+        abort('--query-result-cache-size must not be negative')
+    if kwargs['query_result_cache_ttl'] <= 0:
+        abort('--query-result-cache-ttl must be greater than 0')
+
     if kwargs['tls_key_file'] and not kwargs['tls_cert_file']:
         abort('When --tls-key-file is set, --tls-cert-file must also be set.')
 
@@ -1346,6 +1434,7 @@ def parse_args(**kwargs: Any):
             "bootstrap_command_file",
             "instance_name",
             "max_backend_connections",
+            "backend_min_idle_connections",
             "readiness_state_file",
             "jwt_sub_allowlist_file",
             "jwt_revocation_list_file",
@@ -0,0 +1,276 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright 2024-present MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+"""On-disk cache of compiled queries that survives server restarts.
+
+Entries are pickled QueryUnitGroups keyed on a digest of the query
+cache key.  Each entry is tagged with the database name and the schema
+version it was compiled against, so that the query caches of a database
+can be warmed up with the entries matching its current schema when the
+server starts or re-introspects the database.
+
+All file I/O, as well as pickling, unpickling and hashing of the
+entries, happens in a dedicated thread, writes are batched.
+"""
+
+
+from __future__ import annotations
+from typing import *
+
+import asyncio
+import concurrent.futures
+import hashlib
+import logging
+import pathlib
+import pickle
+import sqlite3
+import time
+import uuid
+
+from edb import buildmeta
+
+
+logger = logging.getLogger('edb.server')
+
+# Delay before buffered entries are written out.
+FLUSH_DELAY = 5.0
+# Maximum number of buffered entries; new entries are dropped above it.
+MAX_PENDING = 10_000
+# Version of the layout of the cache file.
+FORMAT_VERSION = 2
+
+# A cache key: a tuple of primitive values that are stable across
+# server restarts.
+Key = Tuple[Hashable, ...]
+
+
+class PersistentQueryCache:
+
+    _conn: Optional[sqlite3.Connection]
+    _pending: list[tuple[Key, str, str, Any, float]]
+    _flush_handle: Optional[asyncio.TimerHandle]
+    _flush_task: Optional[asyncio.Task[None]]
+
+    def __init__(self, path: pathlib.Path, *, max_entries: int) -> None:
+        if max_entries <= 0:
+            raise ValueError(
+                f'max_entries is expected to be greater than 0, '
+                f'got {max_entries}')
+
+        self._path = path
+        self._max_entries = max_entries
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='edb-query-cache')
+        self._conn = None
+        self._pending = []
+        self._flush_handle = None
+        self._flush_task = None
+
+    @property
+    def max_entries(self) -> int:
+        return self._max_entries
+
+    def open(self) -> None:
+        self._executor.submit(self._open).result()
+
+    async def close(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        await self.flush()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._close)
+        self._executor.shutdown()
+
+    async def load(
+        self,
+        dbname: str,
+        schema_version: uuid.UUID,
+    ) -> dict[Key, Any]:
+        """Return the entries compiled against *schema_version*."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self._load, dbname, str(schema_version))
+
+    def store(
+        self,
+        dbname: str,
+        schema_version: uuid.UUID,
+        key: Key,
+        compiled: Any,
+    ) -> None:
+        # *compiled* is pickled later in the executor thread, so it
+        # must not be mutated after it is stored.
+        if len(self._pending) >= MAX_PENDING:
+            return
+
+        self._pending.append(
+            (key, dbname, str(schema_version), compiled, time.time()))
+
+        if self._flush_handle is None and self._flush_task is None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(
+                FLUSH_DELAY, self._schedule_flush)
+
+    async def flush(self) -> None:
+        if self._flush_task is not None:
+            await self._flush_task
+        if self._pending:
+            pending, self._pending = self._pending, []
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._executor, self._write, pending)
+
+    def _schedule_flush(self) -> None:
+        self._flush_handle = None
+        self._flush_task = asyncio.create_task(self._flush())
+
+    async def _flush(self) -> None:
+        try:
+            pending, self._pending = self._pending, []
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._executor, self._write, pending)
+        except Exception:
+            logger.exception('could not write the persistent query cache')
+        finally:
+            self._flush_task = None
+
+    # The methods below run in the executor thread.
+
+    def _open(self) -> None:
+        conn = sqlite3.connect(self._path, check_same_thread=False)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS meta (
+                    name TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                )
+            ''')
+
+            # Compiled queries are only valid for the catalog version
+            # they were compiled by.
+            version = (
+                f'{buildmeta.EDGEDB_CATALOG_VERSION}-{FORMAT_VERSION}')
+            row = conn.execute(
+                "SELECT value FROM meta WHERE name = 'version'"
+            ).fetchone()
+            if row is None or row[0] != version:
+                conn.execute('DROP TABLE IF EXISTS queries')
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta (name, value) "
+                    "VALUES ('version', ?)",
+                    (version,),
+                )
+
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS queries (
+                    digest BLOB PRIMARY KEY,
+                    key BLOB NOT NULL,
+                    dbname TEXT NOT NULL,
+                    schema_version TEXT NOT NULL,
+                    data BLOB NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            ''')
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS queries_db_idx
+                ON queries (dbname, schema_version)
+            ''')
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS queries_last_used_idx
+                ON queries (last_used)
+            ''')
+            conn.commit()
+        except BaseException:
+            conn.close()
+            raise
+
+        self._conn = conn
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _load(self, dbname: str, schema_version: str) -> dict[Key, Any]:
+        assert self._conn is not None
+        with self._conn:
+            # Entries compiled against other versions of the schema
+            # can never be used again.
+            self._conn.execute(
+                'DELETE FROM queries '
+                'WHERE dbname = ? AND schema_version != ?',
+                (dbname, schema_version),
+            )
+            self._conn.execute(
+                'UPDATE queries SET last_used = ? '
+                'WHERE dbname = ? AND schema_version = ?',
+                (time.time(), dbname, schema_version),
+            )
+            rows = self._conn.execute(
+                'SELECT key, data FROM queries '
+                'WHERE dbname = ? AND schema_version = ?',
+                (dbname, schema_version),
+            ).fetchall()
+
+        entries = {}
+        for key, data in rows:
+            try:
+                entries[pickle.loads(key)] = pickle.loads(data)
+            except Exception:
+                # Unpickling fails if the compiler data structures
+                # changed without a catalog version bump.
+                continue
+        return entries
+
+    def _write(
+        self,
+        entries: list[tuple[Key, str, str, Any, float]],
+    ) -> None:
+        assert self._conn is not None
+        rows = []
+        for key, dbname, schema_version, compiled, last_used in entries:
+            pickled_key = pickle.dumps(key, -1)
+            digest = hashlib.blake2b(pickled_key)
+            digest.update(dbname.encode())
+            rows.append((
+                digest.digest(),
+                pickled_key,
+                dbname,
+                schema_version,
+                pickle.dumps(compiled, -1),
+                last_used,
+            ))
+
+        with self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO queries '
+                '(digest, key, dbname, schema_version, data, last_used) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                rows,
+            )
+            # Evict the least recently used entries above the size cap.
+            self._conn.execute(
+                'DELETE FROM queries WHERE digest IN ('
+                '  SELECT digest FROM queries ORDER BY last_used DESC '
+                '  LIMIT -1 OFFSET ?'
+                ')',
+                (self._max_entries,),
+            )
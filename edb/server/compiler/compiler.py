@@ -33,6 +33,7 @@ import immutables
 
 from edb import errors
 
+from edb.common import lru
 from edb.common.typeutils import not_none
 
 from edb.server import defines
@@ -49,6 +50,7 @@ from edb.edgeql import qltypes
 
 from edb.ir import staeval as ireval
 from edb.ir import ast as irast
+from edb.ir import typeutils as irtyputils
 
 from edb.schema import ddl as s_ddl
 from edb.schema import delta as s_delta
@@ -60,11 +62,13 @@ from edb.schema import modules as s_mod
 from edb.schema import name as s_name
 from edb.schema import objects as s_obj
 from edb.schema import objtypes as s_objtypes
+from edb.schema import operators as s_oper
 from edb.schema import pointers as s_pointers
 from edb.schema import reflection as s_refl
 from edb.schema import roles as s_role
 from edb.schema import schema as s_schema
 from edb.schema import types as s_types
+from edb.schema import version as s_ver
 
 from edb.pgsql import ast as pgast
 from edb.pgsql import compiler as pg_compiler
@@ -90,6 +94,10 @@ if TYPE_CHECKING:
 
 EMPTY_MAP: immutables.Map[Any, Any] = immutables.Map()
 
+# The number of schema versions to keep shared TypeRef caches for,
+# see CompilerState.get_typeref_cache().
+TYPEREF_CACHES_SIZE = 16
+
 
 @dataclasses.dataclass(frozen=True)
 class CompilerDatabaseState:
@@ -395,6 +403,29 @@ class CompilerState:
             self.std_schema, self.config_spec
         )
 
+    @functools.cached_property
+    def _typeref_caches(self) -> lru.LRUMapping:
+        return lru.LRUMapping(maxsize=TYPEREF_CACHES_SIZE)
+
+    def get_typeref_cache(
+        self,
+        base_schema: s_schema.FlatSchema,
+        user_schema: s_schema.FlatSchema,
+        global_schema: s_schema.FlatSchema,
+    ) -> irtyputils.SharedTypeRefCache:
+        # Schemas are immutable, so every version of a schema is
+        # a different object.  The cache keeps the schema alive, so
+        # the ids are not reused while the cache is around.
+        key = (id(base_schema), id(user_schema), id(global_schema))
+        cache = self._typeref_caches.get(key)
+        if cache is None:
+            cache = irtyputils.SharedTypeRefCache(
+                s_schema.ChainedSchema(
+                    base_schema, user_schema, global_schema)
+            )
+            self._typeref_caches[key] = cache
+        return cache
+
 
 class Compiler:
 
@@ -538,6 +569,7 @@ class Compiler:
         from edb.pgsql import parser as pg_parser
         from edb.pgsql import resolver as pg_resolver
         from edb.pgsql import codegen as pg_codegen
+        from edb.pgsql import normalization as pg_normalization
 
         @functools.cache
         def parse_search_path(search_path_str: str) -> list[str]:
@@ -584,6 +616,64 @@ class Compiler:
         pg_gen_source = functools.partial(
             pg_codegen.generate_source, pretty=False)
 
+        def compile_template(
+            stmt: pgast.Base,
+            normalized: pg_normalization.NormalizedSQL,
+            unit_ctor: Callable[..., dbstate.SQLQueryUnit],
+        ) -> Optional[dbstate.SQLQueryUnit]:
+            # Compile the query with its extractable literals replaced
+            # with sentinels, so that queries differing only in those
+            # can be instantiated from the result without compiling them.
+            extractable = pg_normalization.find_extractable(
+                stmt, query_str, normalized)
+            if not extractable:
+                return None
+
+            sentinel_sql = pg_normalization.substitute(
+                query_str, normalized, extractable)
+            try:
+                sentinel_stmts = pg_parser.parse(sentinel_sql.text)
+                if len(sentinel_stmts) != 1:
+                    return None
+                source = translate_query(sentinel_stmts[0])
+            except Exception:
+                # Leave reporting the error to the regular compilation
+                # of the query.
+                return None
+
+            orig_text = pg_gen_source(sentinel_stmts[0])
+            query_split = pg_normalization.split(source.text, sentinel_sql)
+            orig_split = pg_normalization.split(orig_text, sentinel_sql)
+            if query_split is None or orig_split is None:
+                # Some of the literals were evaluated by the compiler.
+                return None
+
+            sentinels = [''] * len(normalized.literals)
+            for sentinel, i in sentinel_sql.sentinels.items():
+                sentinels[i] = sentinel
+            extracted = set(extractable)
+            template = dbstate.SQLTemplate(
+                unit=unit_ctor(
+                    query=source.text,
+                    orig_query=orig_text,
+                    translation_data=source.translation_data,
+                    stmt_name=compute_stmt_name(source.text).encode("utf-8"),
+                ),
+                sentinels=tuple(sentinels),
+                fixed=tuple(
+                    i for i in range(len(normalized.literals))
+                    if i not in extracted
+                ),
+                query=query_split[0],
+                query_literals=query_split[1],
+                query_offsets=query_split[2],
+                orig_query=orig_split[0],
+                orig_query_literals=orig_split[1],
+                source_literals=extractable,
+                source_offsets=sentinel_sql.offsets,
+            )
+            return template.instantiate(normalized.literals)
+
         # frontend-only settings (key) and their mutability (value)
         fe_settings_mutable = {
             'search_path': True,
@@ -591,6 +681,13 @@ class Compiler:
             'server_version_num': False,
         }
         stmts = pg_parser.parse(query_str)
+        normalized = None
+        if len(stmts) == 1 and isinstance(
+            stmts[0],
+            (pgast.SelectStmt, pgast.InsertStmt, pgast.UpdateStmt,
+             pgast.DeleteStmt),
+        ):
+            normalized = pg_normalization.normalize(query_str)
         sql_units = []
         for stmt in stmts:
             orig_text = pg_gen_source(stmt)
@@ -786,17 +883,25 @@ class Compiler:
                 # just ignore
                 unit = unit_ctor(query="DO $$ BEGIN END $$;")
             else:
-                source = translate_query(stmt)
-                unit = unit_ctor(
-                    query=source.text,
-                    translation_data=source.translation_data,
-                )
+                templated = None
+                if normalized is not None and normalized.literals:
+                    templated = compile_template(stmt, normalized, unit_ctor)
+                if templated is not None:
+                    unit = templated
+                else:
+                    source = translate_query(stmt)
+                    unit = unit_ctor(
+                        query=source.text,
+                        translation_data=source.translation_data,
+                    )
 
             if debug.flags.sql_output:
                 debug.header('SQL Output')
                 debug.dump_code(unit.query, lexer='sql')
 
-            unit.stmt_name = compute_stmt_name(unit.query).encode("utf-8")
+            if unit.template is None:
+                unit.stmt_name = compute_stmt_name(
+                    unit.query).encode("utf-8")
 
             tx_state.apply(unit)
             sql_units.append(unit)
@@ -1006,6 +1111,8 @@ class Compiler:
             ext_config_settings=ext_config_settings,
             protocol_version=defines.CURRENT_PROTOCOL,
             state_serializer=state_serializer,
+            schema_version=_get_schema_version(
+                self.state.std_schema, user_schema),
         )
 
     def make_state_serializer(
@@ -1710,6 +1817,11 @@ def _compile_ql_query(
     schema = current_tx.get_schema(base_schema)
 
     options = _get_compile_options(ctx, is_explain=is_explain)
+    options.typeref_cache = ctx.compiler_state.get_typeref_cache(
+        base_schema,
+        current_tx.get_user_schema(),
+        current_tx.get_global_schema(),
+    )
     ir = qlcompiler.compile_ast_to_ir(
         ql,
         schema=schema,
@@ -1744,6 +1856,10 @@ def _compile_ql_query(
 
     sql_bytes = sql_text.encode(defines.EDGEDB_ENCODING)
 
+    write_refs = None
+    if ir.dml_exprs:
+        write_refs = _get_write_refs(schema, ir)
+
     globals = None
     if ir.globals:
         globals = [
@@ -1804,6 +1920,9 @@ def _compile_ql_query(
         cacheable=cacheable,
         has_dml=bool(ir.dml_exprs),
         query_asts=query_asts,
+        schema_refs=frozenset(obj.id for obj in ir.schema_refs),
+        volatility=ir.volatility,
+        write_refs=write_refs,
     )
 
 
@@ -2381,6 +2500,10 @@ def _try_compile(
 
         _check_force_database_error(stmt_ctx, stmt)
 
+        # Capture the transaction before compiling the statement,
+        # since COMMIT replaces it with a new one.
+        stmt_tx = ctx.state.current_tx()
+
         comp, capabilities = _compile_dispatch_ql(
             stmt_ctx,
             stmt,
@@ -2433,6 +2556,9 @@ def _try_compile(
             unit.in_type_id = comp.in_type_id
 
             unit.cacheable = comp.cacheable
+            unit.schema_refs = comp.schema_refs
+            unit.volatility = comp.volatility
+            unit.write_refs = comp.write_refs
 
             if comp.is_explain:
                 unit.is_explain = True
@@ -2594,6 +2720,27 @@ def _try_compile(
         else:  # pragma: no cover
             raise errors.InternalServerError('unknown compile state')
 
+        if final_user_schema is not None and unit.user_schema is not None:
+            initial_user_schema = stmt_tx.get_initial_user_schema()
+            assert isinstance(final_user_schema, s_schema.FlatSchema)
+            deltas = stmt_tx.get_schema_deltas(final_user_schema)
+            if deltas is not None:
+                unit.affected_obj_ids = _get_affected_object_ids(
+                    ctx.compiler_state.std_schema,
+                    stmt_tx.get_global_schema(),
+                    initial_user_schema,
+                    final_user_schema,
+                    deltas,
+                )
+            unit.user_schema_version = _get_schema_version(
+                ctx.compiler_state.std_schema, final_user_schema)
+            unit.user_schema_delta = _get_user_schema_delta(
+                ctx,
+                initial_user_schema,
+                final_user_schema,
+                unit.user_schema,
+            )
+
         if unit.in_type_args:
             unit.in_type_args_real_count = sum(
                 len(p.sub_params[0]) if p.sub_params else 1
@@ -3048,6 +3195,199 @@ def _extract_extensions(
     return names, settings
 
 
+def _get_schema_version(
+    std_schema: s_schema.Schema,
+    user_schema: s_schema.Schema,
+) -> Optional[uuid.UUID]:
+    schema = s_schema.ChainedSchema(
+        std_schema, user_schema, s_schema.EMPTY_SCHEMA)
+    ver = schema.get_global(
+        s_ver.SchemaVersion, '__schema_version__', default=None)
+    if ver is None:
+        return None
+    return ver.get_version(schema)
+
+
+def _get_user_schema_delta(
+    ctx: CompileContext,
+    old_schema: s_schema.Schema,
+    new_schema: s_schema.Schema,
+    new_schema_pickle: bytes,
+) -> Optional[Tuple[uuid.UUID, bytes]]:
+    if not (
+        isinstance(old_schema, s_schema.FlatSchema)
+        and isinstance(new_schema, s_schema.FlatSchema)
+    ):
+        return None
+
+    base_version = _get_schema_version(
+        ctx.compiler_state.std_schema, old_schema)
+    if base_version is None:
+        return None
+
+    delta = pickle.dumps(new_schema.get_delta(old_schema), -1)
+    # Large changes (e.g. an initial migration) are cheaper
+    # to ship as a full schema.
+    if len(delta) * 2 > len(new_schema_pickle):
+        return None
+
+    return base_version, delta
+
+
+# Referrer fields that must not propagate a change to the referring
+# object: queries touching a link target or a subtype reference the
+# target or the subtype directly, and changes to inherited fields
+# alter the descendants explicitly.
+_NON_PROPAGATING_REF_FIELDS = frozenset({'target', 'bases', 'ancestors'})
+
+
+def _get_affected_object_ids(
+    std_schema: s_schema.FlatSchema,
+    global_schema: s_schema.FlatSchema,
+    old_user_schema: s_schema.FlatSchema,
+    new_user_schema: s_schema.FlatSchema,
+    deltas: Sequence[s_delta.Command],
+) -> Optional[FrozenSet[uuid.UUID]]:
+    """Return ids of schema objects affected by a user schema change.
+
+    *deltas* are the delta commands that turned *old_user_schema* into
+    *new_user_schema*.  An object is affected if a command created,
+    altered or dropped it or another function or operator of the same
+    name, if it is an ancestor of such an object, or if it refers to an
+    affected object (e.g. an object type owning an altered access
+    policy).  Returns None if the change may alter name resolution in
+    a way that cannot be tracked, in which case all compiled queries
+    must be discarded.
+    """
+    cmds: List[s_delta.ObjectCommand[s_obj.Object]] = []
+    stack: List[s_delta.Command] = list(deltas)
+    while stack:
+        cmd = stack.pop()
+        if isinstance(cmd, s_delta.ObjectCommand):
+            if issubclass(cmd.get_schema_metaclass(), s_mod.Module):
+                # Creating or dropping a module changes the resolution
+                # of qualified names referring to std submodules.
+                return None
+            cmds.append(cmd)
+        stack.extend(cmd.get_subcommands())
+
+    affected: Set[uuid.UUID] = set()
+
+    for user_schema in (old_user_schema, new_user_schema):
+        schema = s_schema.ChainedSchema(
+            std_schema, user_schema, global_schema)
+        objs: List[s_obj.Object] = []
+        for cmd in cmds:
+            mcls = cmd.get_schema_metaclass()
+            names = [cmd.classname]
+            if isinstance(cmd, s_delta.RenameObject):
+                names.append(cmd.new_name)
+            for name in names:
+                obj: Optional[s_obj.Object]
+                if not isinstance(name, s_name.QualName):
+                    obj = schema.get_global(mcls, name, default=None)
+                    if obj is not None:
+                        objs.append(obj)
+                    continue
+
+                obj = schema.get(name, default=None)
+                if obj is not None:
+                    objs.append(obj)
+
+                # A new or dropped overload changes the resolution of
+                # calls to the other functions or operators of the same
+                # name, and a new name may shadow a std object.
+                shortname = s_name.shortname_from_fullname(name)
+                assert isinstance(shortname, s_name.QualName)
+                if issubclass(mcls, s_func.Function):
+                    objs.extend(schema.get_functions(shortname, default=()))
+                elif issubclass(mcls, s_oper.Operator):
+                    objs.extend(schema.get_operators(shortname, default=()))
+                if user_schema is new_user_schema:
+                    std_name = s_name.QualName('std', shortname.name)
+                    std_obj = std_schema.get(std_name, default=None)
+                    if std_obj is not None:
+                        objs.append(std_obj)
+                    objs.extend(
+                        std_schema.get_functions(std_name, default=()))
+
+        seen: Set[uuid.UUID] = set()
+        while objs:
+            obj = objs.pop()
+            if obj.id in seen:
+                continue
+            seen.add(obj.id)
+            affected.add(obj.id)
+            if isinstance(obj, s_obj.InheritingObject):
+                affected.update(
+                    a.id for a in obj.get_ancestors(schema).objects(schema))
+            for (_, field), referrers in schema.get_referrers_ex(obj).items():
+                if field not in _NON_PROPAGATING_REF_FIELDS:
+                    objs.extend(referrers)
+
+    return frozenset(affected)
+
+
+def _get_write_refs(
+    schema: s_schema.Schema,
+    ir: irast.Statement,
+) -> Optional[FrozenSet[uuid.UUID]]:
+    """Return ids of object types whose data a DML query may modify.
+
+    Modifying an object type changes the data visible through its
+    ancestors and, for UPDATE and DELETE, its descendants.  Deleting an
+    object also deletes or unlinks the objects related to it according
+    to the deletion policies of links, which Postgres does without the
+    query referring to those types.  Returns None if the modified types
+    cannot be determined from the query: when it calls a function that
+    modifies data, or when a trigger may run.
+    """
+    if any(isinstance(expr, qlast.FunctionCall) for expr in ir.dml_exprs):
+        return None
+
+    written: Set[uuid.UUID] = set()
+    objs = [
+        obj for obj in ir.schema_refs
+        if isinstance(obj, s_objtypes.ObjectType)
+    ]
+    while objs:
+        obj = objs.pop()
+        if obj.id in written:
+            continue
+        written.add(obj.id)
+        if obj.get_triggers(schema).objects(schema):
+            return None
+
+        objs.extend(obj.get_ancestors(schema).objects(schema))
+        objs.extend(obj.descendants(schema))
+
+        for ptr in obj.get_pointers(schema).objects(schema):
+            if not isinstance(ptr, s_links.Link):
+                continue
+            target = ptr.get_target(schema)
+            on_source_delete = ptr.get_on_source_delete(schema)
+            if (
+                isinstance(target, s_objtypes.ObjectType)
+                and on_source_delete != qltypes.LinkSourceDeleteAction.Allow
+            ):
+                objs.append(target)
+
+        for link in schema.get_referrers(
+            obj, scls_type=s_links.Link, field_name='target'
+        ):
+            source = link.get_source(schema)
+            if (
+                isinstance(source, s_objtypes.ObjectType)
+                and link.get_on_target_delete(schema) not in (
+                    qltypes.LinkTargetDeleteAction.Restrict,
+                    qltypes.LinkTargetDeleteAction.DeferredRestrict,
+                )
+            ):
+                objs.append(source)
+
+    return frozenset(written)
+
+
 def _extract_roles(
     global_schema: s_schema.Schema
 ) -> immutables.Map[str, immutables.Map[str, Any]]:
@@ -22,6 +22,7 @@ from typing import *  # NoQA
 
 import dataclasses
 import enum
+import hashlib
 import time
 import uuid
 
@@ -108,6 +109,17 @@ class Query(BaseQuery):
     query_asts: Any = None
     append_rollback: bool = False
 
+    # Ids of the schema objects the query was compiled against,
+    # or None if the dependencies are unknown.
+    schema_refs: Optional[FrozenSet[uuid.UUID]] = None
+
+    # Volatility of the query result, or None if unknown.
+    volatility: Optional[qltypes.Volatility] = None
+
+    # Ids of the object types whose data the query may modify, or None
+    # if they are unknown or the query does not modify data.
+    write_refs: Optional[FrozenSet[uuid.UUID]] = None
+
 
 @dataclasses.dataclass(frozen=True)
 class SimpleQuery(BaseQuery):
@@ -324,6 +336,29 @@ class QueryUnit:
     global_schema: Optional[bytes] = None
     roles: immutables.Map[str, immutables.Map[str, Any]] | None = None
 
+    # If present along with *user_schema*, contains the ids of schema
+    # objects affected by the schema change.  Compiled queries that
+    # do not depend on any of them remain valid with the new schema.
+    # If None, all previously compiled queries must be discarded.
+    affected_obj_ids: Optional[FrozenSet[uuid.UUID]] = None
+    # If present along with *user_schema*, the version of the new schema.
+    user_schema_version: Optional[uuid.UUID] = None
+    # If present along with *user_schema*, the version of the schema
+    # the change was applied to and the pickled FlatSchema delta from
+    # it, which lets compiler workers avoid unpickling the full schema.
+    user_schema_delta: Optional[Tuple[uuid.UUID, bytes]] = None
+
+    # Ids of the schema objects this unit was compiled against,
+    # or None if the dependencies are unknown.
+    schema_refs: Optional[FrozenSet[uuid.UUID]] = None
+
+    # Volatility of the query result, or None if unknown.
+    volatility: Optional[qltypes.Volatility] = None
+
+    # Ids of the object types whose data the query may modify, or None
+    # if they are unknown or the query does not modify data.
+    write_refs: Optional[FrozenSet[uuid.UUID]] = None
+
     is_explain: bool = False
     query_asts: Any = None
     append_rollback: bool = False
@@ -372,6 +407,10 @@ class QueryUnitGroup:
 
     state_serializer: Optional[sertypes.StateSerializer] = None
 
+    # Ids of the schema objects any query unit in this group depends on,
+    # or None if the dependencies of some unit are unknown.
+    schema_refs: Optional[FrozenSet[uuid.UUID]] = frozenset()
+
     def __iter__(self) -> Iterator[QueryUnit]:
         return iter(self.units)
 
@@ -401,6 +440,11 @@ class QueryUnitGroup:
             if self.globals is None:
                 self.globals = []
             self.globals.extend(query_unit.globals)
+        if self.schema_refs is not None:
+            if query_unit.schema_refs is None:
+                self.schema_refs = None
+            else:
+                self.schema_refs |= query_unit.schema_refs
 
         self.units.append(query_unit)
 
@@ -471,6 +515,98 @@ class SQLQueryUnit:
     command_tag: bytes = b""
     """If frontend_only is True, only issue CommandComplete with this tag."""
 
+    template: Optional[SQLTemplate] = None
+    """The template this query unit was instantiated from, if any."""
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class SQLTemplate:
+    """A compiled SQL query with some of its literals taken out.
+
+    Queries that differ from the one the template was compiled from only
+    in the values of the extracted literals are instantiated from it
+    without compiling them.
+    """
+
+    unit: SQLQueryUnit
+    """Query unit compiled from the query with sentinels in place of the
+    extracted literals."""
+
+    sentinels: Tuple[str, ...]
+    """Sentinels by the index of the literal they replace, or an empty
+    string for literals that are not extracted."""
+
+    fixed: Tuple[int, ...]
+    """Indexes of the literals that are not extracted."""
+
+    query: Tuple[str, ...]
+    query_literals: Tuple[int, ...]
+    query_offsets: Tuple[int, ...]
+    """Fragments of the translated query between the sentinels, the
+    indexes of the literals the sentinels replace, and their offsets."""
+
+    orig_query: Tuple[str, ...]
+    orig_query_literals: Tuple[int, ...]
+    """Fragments of the original query between the sentinels and the
+    indexes of the literals the sentinels replace."""
+
+    source_literals: Tuple[int, ...]
+    source_offsets: Tuple[int, ...]
+    """Indexes of the literals replaced in the query source text and the
+    offsets of the sentinels in it."""
+
+    def instantiate(self, literals: Sequence[str]) -> SQLQueryUnit:
+        unit = self.unit
+
+        translation_data = unit.translation_data
+        if translation_data is not None:
+            translation_data = pgcodegen.ShiftedTranslationData(
+                translation_data,
+                source_spans=self._spans(
+                    self.source_offsets, self.source_literals, literals),
+                output_spans=self._spans(
+                    self.query_offsets, self.query_literals, literals),
+            )
+
+        stmt_hash = hashlib.sha1(unit.stmt_name)
+        for i in self.query_literals:
+            stmt_hash.update(b"\0")
+            stmt_hash.update(literals[i].encode("utf-8"))
+
+        return dataclasses.replace(
+            unit,
+            query=_join_fragments(self.query, self.query_literals, literals),
+            orig_query=_join_fragments(
+                self.orig_query, self.orig_query_literals, literals),
+            translation_data=translation_data,  # type: ignore
+            stmt_name=f"edb{stmt_hash.hexdigest()}".encode("utf-8"),
+            template=self,
+        )
+
+    def _spans(
+        self,
+        offsets: Tuple[int, ...],
+        indexes: Tuple[int, ...],
+        literals: Sequence[str],
+    ) -> Tuple[Tuple[int, int, int], ...]:
+        sentinels = self.sentinels
+        return tuple(
+            (offset, len(sentinels[i]), len(literals[i]))
+            for offset, i in zip(offsets, indexes)
+        )
+
+
+def _join_fragments(
+    fragments: Tuple[str, ...],
+    indexes: Tuple[int, ...],
+    literals: Sequence[str],
+) -> str:
+    parts = [fragments[0]]
+    for fragment, i in zip(fragments[1:], indexes):
+        parts.append(literals[i])
+        parts.append(fragment)
+    return "".join(parts)
+
 
 @dataclasses.dataclass
 class ParsedDatabase:
@@ -481,6 +617,8 @@ class ParsedDatabase:
     protocol_version: defines.ProtocolVersion
     state_serializer: sertypes.StateSerializer
 
+    schema_version: Optional[uuid.UUID] = None
+
 
 SQLSettings = immutables.Map[Optional[str], Optional[str | list[str]]]
 DEFAULT_SQL_SETTINGS: SQLSettings = immutables.Map()
@@ -635,6 +773,12 @@ class TransactionState(NamedTuple):
     tx: Transaction
     migration_state: Optional[MigrationState] = None
     migration_rewrite_state: Optional[MigrationRewriteState] = None
+    # (user schema before, user schema after, delta) of the deltas
+    # applied in this transaction.
+    schema_deltas: Tuple[
+        Tuple[s_schema.FlatSchema, s_schema.FlatSchema, s_delta.Command],
+        ...
+    ] = ()
 
 
 class Transaction:
@@ -771,12 +915,37 @@ class Transaction:
     def get_user_schema(self) -> s_schema.FlatSchema:
         return self._current.user_schema
 
+    def get_initial_user_schema(self) -> s_schema.FlatSchema:
+        return self._state0.user_schema
+
     def get_user_schema_if_updated(self) -> Optional[s_schema.FlatSchema]:
         if self._current.user_schema is self._state0.user_schema:
             return None
         else:
             return self._current.user_schema
 
+    def get_schema_deltas(
+        self,
+        user_schema: s_schema.FlatSchema,
+    ) -> Optional[Tuple[s_delta.Command, ...]]:
+        """Return the deltas that turned the initial user schema into
+        *user_schema*.
+
+        Returns None if the user schema was also changed by other means
+        (e.g. by a migration block or schema repair), or if it is not
+        the current user schema of the transaction.
+        """
+        current = self._state0.user_schema
+        deltas = []
+        for before, after, delta in self._current.schema_deltas:
+            if before is not current:
+                return None
+            deltas.append(delta)
+            current = after
+        if current is not user_schema:
+            return None
+        return tuple(deltas)
+
     def get_global_schema(self) -> s_schema.FlatSchema:
         return self._current.global_schema
 
@@ -815,15 +984,25 @@ class Transaction:
     def get_migration_rewrite_state(self) -> Optional[MigrationRewriteState]:
         return self._current.migration_rewrite_state
 
-    def update_schema(self, new_schema: s_schema.Schema) -> None:
+    def update_schema(
+        self,
+        new_schema: s_schema.Schema,
+        *,
+        delta: Optional[s_delta.Command] = None,
+    ) -> None:
         assert isinstance(new_schema, s_schema.ChainedSchema)
         user_schema = new_schema.get_top_schema()
         assert isinstance(user_schema, s_schema.FlatSchema)
         global_schema = new_schema.get_global_schema()
         assert isinstance(global_schema, s_schema.FlatSchema)
+        schema_deltas = self._current.schema_deltas
+        if delta is not None:
+            schema_deltas += (
+                (self._current.user_schema, user_schema, delta),)
         self._current = self._current._replace(
             user_schema=user_schema,
             global_schema=global_schema,
+            schema_deltas=schema_deltas,
         )
 
     def update_modaliases(
@@ -159,7 +159,7 @@ def compile_and_apply_ddl_stmt(
                     mstate = mstate._replace(last_proposed=None)
 
         current_tx.update_migration_state(mstate)
-        current_tx.update_schema(schema)
+        current_tx.update_schema(schema, delta=delta)
 
         return dbstate.DDLQuery(
             sql=(b'SELECT LIMIT 0',),
@@ -186,7 +186,7 @@ def compile_and_apply_ddl_stmt(
         context = _new_delta_context(ctx)
         schema = delta.apply(schema, context=context)
 
-        current_tx.update_schema(schema)
+        current_tx.update_schema(schema, delta=delta)
 
         return dbstate.DDLQuery(
             sql=(b'SELECT LIMIT 0',),
@@ -332,7 +332,7 @@ def _process_delta(
     assert isinstance(pgdelta, pg_delta.DeltaRoot)
     context = _new_delta_context(ctx)
     schema = pgdelta.apply(schema, context)
-    current_tx.update_schema(schema)
+    current_tx.update_schema(schema, delta=pgdelta)
 
     if debug.flags.delta_pgsql_plan:
         debug.header('PgSQL Delta Plan')
@@ -68,6 +68,9 @@ def __init_worker__(
         refl_schema,
         schema_class_layout,
     ) = pickle.loads(init_args_pickled)
+    if std_schema is None:
+        std_schema, refl_schema, schema_class_layout = (
+            worker_proc.get_shared_schema())
 
     INITED = True
     BACKEND_RUNTIME_PARAMS = backend_runtime_params
@@ -255,7 +258,32 @@ def compile_graphql(
     global clients
     client_schema = clients[client_id]
     db = client_schema.dbs[dbname]
+    return _compile_graphql(client_schema, db, *compile_args, **compile_kwargs)
 
+
+def compile_graphql_batch(
+    client_id: int,
+    dbname: str,
+    requests: list[tuple[Any, ...]],
+):
+    client_schema = clients[client_id]
+    db = client_schema.dbs[dbname]
+    results: list[Any] = []
+    for compile_args in requests:
+        try:
+            results.append(_compile_graphql(client_schema, db, *compile_args))
+        except Exception as ex:
+            worker_proc.prepare_exception(ex)
+            results.append(ex)
+    return results
+
+
+def _compile_graphql(
+    client_schema: ClientSchema,
+    db: state.DatabaseState,
+    *compile_args: Any,
+    **compile_kwargs: Any,
+):
     gql_op = graphql.compile_graphql(
         STD_SCHEMA,
         db.user_schema,
@@ -329,6 +357,8 @@ def call_for_client(client_id, pickled_schema, invalidation, msg, *args):
         meth = compile_notebook
     elif methname == "compile_graphql":
         meth = compile_graphql
+    elif methname == "compile_graphql_batch":
+        meth = compile_graphql_batch
     elif methname == "compile_sql":
         meth = compile_sql
     else:
@@ -35,7 +35,9 @@ import sys
 import time
 
 import immutables
+import psutil
 
+from edb import errors
 from edb.common import debug
 
 from edb.pgsql import params as pgparams
@@ -44,16 +46,37 @@ from edb.server import args as srvargs
 from edb.server import dbview
 from edb.server import defines
 from edb.server import metrics
+from edb.server.connpool import predictor
+from edb.server.connpool import rolavg
 
 from . import amsg
 from . import queue
+from . import scaling
+from . import scheduler
 from . import state
 
 
 PROCESS_INITIAL_RESPONSE_TIMEOUT: float = 60.0
 KILL_TIMEOUT: float = 10.0
-ADAPTIVE_SCALE_UP_WAIT_TIME: float = 3.0
+# The on-demand pool adds workers when compile requests wait for one
+# longer than this on average, or when a single request waits this long.
+ADAPTIVE_SCALE_UP_WAIT_TIME: float = 0.5
 ADAPTIVE_SCALE_DOWN_WAIT_TIME: float = 60.0
+# The on-demand pool doesn't add workers if their total resident memory
+# would exceed this fraction of the memory of the machine.
+ADAPTIVE_MAX_RSS_FRACTION: float = 0.5
+# Seconds the measured total resident memory of the workers is reused
+# for, unless workers come or go.
+ADAPTIVE_RSS_SAMPLE_INTERVAL: float = 5.0
+# Seconds without compile requests after which the next request is
+# considered to start a new burst of them, and the number of regular
+# intervals between bursts required to fork workers ahead of the next.
+ADAPTIVE_MIN_BURST_GAP: float = 1.0
+ADAPTIVE_MIN_BURST_HISTORY: int = 3
+ADAPTIVE_MAX_BURST_JITTER: float = 0.25
+# Fork workers for a predicted burst this many average fork times early.
+ADAPTIVE_PREFORK_LEAD_SPAWN_TIMES: float = 3.0
+ADAPTIVE_MIN_SPAWN_TIME: float = 0.1
 WORKER_PKG: str = __name__.rpartition('.')[0] + '.'
 
 
@@ -158,13 +181,18 @@ class Worker(BaseWorker):
     def get_pid(self):
         return self._pid
 
-    def close(self):
+    def close(self, *, graceful: bool = False):
         if self._closed:
             return
         self._closed = True
         self._manager._stats_killed += 1
         self._manager._workers.pop(self._pid, None)
         self._manager._report_worker(self, action="kill")
+        if graceful:
+            # The worker exits normally once its connection is closed,
+            # so the template process doesn't start it again.
+            self._con.abort()
+            return
         try:
             os.kill(self._pid, signal.SIGTERM)
         except ProcessLookupError:
@@ -173,9 +201,12 @@ class Worker(BaseWorker):
 
 class AbstractPool:
     _dbindex: dbview.DatabaseIndex | None = None
+    # Whether workers accept a schema delta in place of a user schema.
+    _supports_schema_deltas: bool = True
 
     def __init__(self, *, loop, **kwargs):
         self._loop = loop
+        self._schema_deltas: dict[str, tuple[bytes, bytes, bytes]] = {}
         self._init_args = self._init(kwargs)
 
     def _init(self, kwargs: dict[str, Any]) -> None:
@@ -189,14 +220,15 @@ class AbstractPool:
         assert self._dbindex is not None
         return self._make_init_args(*self._dbindex.get_cached_compiler_args())
 
+    def _get_schema_init_args(self):
+        return self._std_schema, self._refl_schema, self._schema_class_layout
+
     @functools.lru_cache(1)
     def _make_init_args(self, dbs, global_schema_pickle, system_config):
         init_args = (
             dbs,
             self._backend_runtime_params,
-            self._std_schema,
-            self._refl_schema,
-            self._schema_class_layout,
+            *self._get_schema_init_args(),
             global_schema_pickle,
             system_config,
         )
@@ -212,6 +244,47 @@ class AbstractPool:
     def get_template_pid(self):
         return None
 
+    def register_schema_delta(
+        self,
+        dbname: str,
+        base_schema_pickle: bytes,
+        user_schema_pickle: bytes,
+        delta_pickle: bytes,
+    ) -> None:
+        """Record that *delta_pickle* turns the base schema into the new one.
+
+        Workers still holding *base_schema_pickle* of *dbname* are then
+        sent the delta instead of the full *user_schema_pickle*.  Only
+        the latest schema change of each database is kept.
+        """
+        if self._supports_schema_deltas:
+            self._schema_deltas[dbname] = (
+                base_schema_pickle, user_schema_pickle, delta_pickle)
+
+    def notify_schema_changed(self, dbname: str) -> None:
+        """Tell the pool that the schema of *dbname* was changed.
+
+        The queries of the database compiled for the old schema are
+        going to be compiled again, likely many of them at once.
+        """
+        pass
+
+    def _get_user_schema_arg(
+        self,
+        dbname,
+        worker_schema_pickle,
+        user_schema_pickle,
+    ):
+        delta = self._schema_deltas.get(dbname)
+        if (
+            delta is not None
+            and delta[0] is worker_schema_pickle
+            and delta[1] is user_schema_pickle
+        ):
+            return state.PickledSchemaDelta(delta[2])
+        else:
+            return user_schema_pickle
+
     async def _compute_compile_preargs(
         self,
         method_name: str,
@@ -301,7 +374,8 @@ class AbstractPool:
             }
         else:
             if worker_db.user_schema_pickle is not user_schema_pickle:
-                preargs.append(user_schema_pickle)
+                preargs.append(self._get_user_schema_arg(
+                    dbname, worker_db.user_schema_pickle, user_schema_pickle))
                 to_update['user_schema_pickle'] = user_schema_pickle
             else:
                 preargs.append(None)
@@ -361,7 +435,11 @@ class AbstractPool:
         *compile_args,
         **compiler_args,
     ):
-        worker = await self._acquire_worker(**compiler_args)
+        worker = await self._acquire_worker(
+            dbname=dbname,
+            user_schema_pickle=user_schema_pickle,
+            **compiler_args,
+        )
         try:
             preargs, sync_state = await self._compute_compile_preargs(
                 "compile",
@@ -389,7 +467,7 @@ class AbstractPool:
             self._release_worker(worker)
 
     async def compile_in_tx(
-        self, txid, pickled_state, state_id, *compile_args
+        self, txid, pickled_state, state_id, *compile_args, **compiler_args
     ):
         # When we compile a query, the compiler returns a tuple:
         # a QueryUnit and the state the compiler is in if it's in a
@@ -413,7 +491,8 @@ class AbstractPool:
         # stored in edgecon; we never modify it, so `is` is sufficient and
         # is faster than `==`.
         worker = await self._acquire_worker(
-            condition=lambda w: (w._last_pickled_state is pickled_state)
+            condition=lambda w: (w._last_pickled_state is pickled_state),
+            **compiler_args,
         )
 
         if worker._last_pickled_state is pickled_state:
@@ -451,7 +530,11 @@ class AbstractPool:
         *compile_args,
         **compiler_args,
     ):
-        worker = await self._acquire_worker(**compiler_args)
+        worker = await self._acquire_worker(
+            dbname=dbname,
+            user_schema_pickle=user_schema_pickle,
+            **compiler_args,
+        )
         try:
             preargs, sync_state = await self._compute_compile_preargs(
                 "compile_notebook",
@@ -484,7 +567,11 @@ class AbstractPool:
         *compile_args,
         **compiler_args,
     ):
-        worker = await self._acquire_worker(**compiler_args)
+        worker = await self._acquire_worker(
+            dbname=dbname,
+            user_schema_pickle=user_schema_pickle,
+            **compiler_args,
+        )
         try:
             preargs, sync_state = await self._compute_compile_preargs(
                 "compile_graphql",
@@ -506,6 +593,43 @@ class AbstractPool:
         finally:
             self._release_worker(worker)
 
+    async def compile_graphql_batch(
+        self,
+        dbname,
+        user_schema_pickle,
+        global_schema_pickle,
+        reflection_cache,
+        database_config,
+        system_config,
+        requests,
+        **compiler_args,
+    ):
+        worker = await self._acquire_worker(
+            dbname=dbname,
+            user_schema_pickle=user_schema_pickle,
+            **compiler_args,
+        )
+        try:
+            preargs, sync_state = await self._compute_compile_preargs(
+                "compile_graphql_batch",
+                worker,
+                dbname,
+                user_schema_pickle,
+                global_schema_pickle,
+                reflection_cache,
+                database_config,
+                system_config,
+            )
+
+            return await worker.call(
+                *preargs,
+                requests,
+                sync_state=sync_state
+            )
+
+        finally:
+            self._release_worker(worker)
+
     async def compile_sql(
         self,
         dbname,
@@ -517,7 +641,11 @@ class AbstractPool:
         *compile_args,
         **compiler_args,
     ):
-        worker = await self._acquire_worker(**compiler_args)
+        worker = await self._acquire_worker(
+            dbname=dbname,
+            user_schema_pickle=user_schema_pickle,
+            **compiler_args,
+        )
         try:
             preargs, sync_state = await self._compute_compile_preargs(
                 "compile_sql",
@@ -660,6 +788,8 @@ class BaseLocalPool(
 
     _worker_class = Worker
     _worker_mod = "worker"
+    # The standard input of the template process.
+    _template_stdin = subprocess.DEVNULL
     _workers_queue: queue.WorkerQueue[Worker]
     _workers: Dict[int, Worker]
 
@@ -668,11 +798,14 @@ class BaseLocalPool(
         *,
         runstate_dir,
         pool_size,
+        shared_schema=False,
         **kwargs,
     ):
         super().__init__(**kwargs)
 
         self._runstate_dir = runstate_dir
+        self._shared_schema = shared_schema
+        self._shared_schema_path = None
 
         self._poolsock_name = os.path.join(self._runstate_dir, 'ipc')
         assert len(self._poolsock_name) <= (
@@ -746,15 +879,43 @@ class BaseLocalPool(
             raise RuntimeError(
                 'the compiler pool has already been started once')
 
-        self._workers_queue = queue.WorkerQueue(self._loop)
+        self._workers_queue = queue.WorkerQueue(
+            self._loop,
+            max_queued_per_client=defines.COMPILER_POOL_MAX_QUEUED_PER_CLIENT,
+        )
 
         await self._server.start()
         self._running = True
 
+        if self._shared_schema:
+            self._write_shared_schema()
+
         await self._start()
 
         await self._wait_ready()
 
+    def _write_shared_schema(self):
+        # Publish a snapshot of the immutable schemas for the template
+        # process to load before forking, so that the workers inherit it
+        # copy-on-write instead of each unpickling the init args.
+        path = os.path.join(self._runstate_dir, 'compiler-schema.pickle')
+        data = pickle.dumps(
+            (self._std_schema, self._refl_schema, self._schema_class_layout),
+            -1,
+        )
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._shared_schema_path = path
+
+    def _get_schema_init_args(self):
+        if self._shared_schema_path is not None:
+            # Workers are all forked from a template process that
+            # loaded these from the shared schema snapshot.
+            return None, None, None
+        return super()._get_schema_init_args()
+
     async def _wait_ready(self):
         await asyncio.wait_for(
             self._ready_evt.wait(),
@@ -784,12 +945,21 @@ class BaseLocalPool(
             cmdline.extend([
                 '--numproc', str(numproc),
             ])
+        if self._shared_schema_path is not None:
+            if not numproc:
+                # A standalone worker would have to load its own copy,
+                # but the init args no longer carry the std schema.
+                raise RuntimeError(
+                    'the shared schema snapshot requires a template process')
+            cmdline.extend([
+                '--shared-schema', self._shared_schema_path,
+            ])
 
         transport, _ = await self._loop.subprocess_exec(
             lambda: self,
             *cmdline,
             env=env,
-            stdin=subprocess.DEVNULL,
+            stdin=self._template_stdin if numproc else subprocess.DEVNULL,
             stdout=None,
             stderr=None,
         )
@@ -806,11 +976,20 @@ class BaseLocalPool(
         await self._server.stop()
         self._server = None
 
-        self._workers_queue = queue.WorkerQueue(self._loop)
+        self._workers_queue = queue.WorkerQueue(
+            self._loop,
+            max_queued_per_client=defines.COMPILER_POOL_MAX_QUEUED_PER_CLIENT,
+        )
         self._workers.clear()
 
         await self._stop()
 
+        if self._shared_schema_path is not None:
+            try:
+                os.unlink(self._shared_schema_path)
+            except FileNotFoundError:
+                pass
+
     async def _stop(self):
         raise NotImplementedError
 
@@ -832,19 +1011,74 @@ class BaseLocalPool(
     async def _acquire_worker(
         self, *, condition=None, weighter=None, **compiler_args
     ):
-        while (
-            worker := await self._workers_queue.acquire(
-                condition=condition, weighter=weighter
-            )
-        ).get_pid() not in self._workers:
-            # The worker was disconnected; skip to the next one.
-            pass
+        # Compile requests are queued per client (tenant and database),
+        # so that a client flooding the pool can't starve the others.
+        client_id = compiler_args.get("client_id")
+        dbname = compiler_args.get("dbname")
+        if client_id is None and dbname is None:
+            client_key = None
+        else:
+            client_key = (client_id, dbname)
+        if condition is None and weighter is None:
+            weighter = self._get_affinity_weighter(client_key, compiler_args)
+
+        started_at = time.monotonic()
+        try:
+            while (
+                worker := await self._workers_queue.acquire(
+                    condition=condition,
+                    weighter=weighter,
+                    client_key=client_key,
+                )
+            ).get_pid() not in self._workers:
+                # The worker was disconnected; skip to the next one.
+                self._workers_queue.discard(worker)
+        except scheduler.QueueFull:
+            metrics.compiler_pool_queue_rejections.inc()
+            raise errors.BackendUnavailableError(
+                "too many queries of this database are waiting to be "
+                "compiled, try again later"
+            ) from None
+        metrics.compiler_pool_queue_wait_duration.observe(
+            time.monotonic() - started_at)
         return worker
 
+    def _get_affinity_weighter(self, client_key, compiler_args):
+        # Compile requests go to the free worker that already has the
+        # schema of the database, so it doesn't have to be sent and
+        # unpickled again.  A request never waits for such a worker to
+        # be released though, any free worker is better than none.
+        dbname = compiler_args.get("dbname")
+        if dbname is None:
+            return None
+        return functools.partial(
+            self._affinity_weighter,
+            dbname,
+            compiler_args.get("user_schema_pickle"),
+        )
+
+    def _affinity_weighter(self, dbname, user_schema_pickle, worker):
+        worker_db = worker._dbs.get(dbname)
+        return (
+            worker_db is not None
+            and worker_db.user_schema_pickle is user_schema_pickle,
+            worker_db is not None,
+            self._affinity(dbname, worker),
+        )
+
+    def _affinity(self, key, worker) -> int:
+        # Rendezvous hashing: every key ranks the workers in an order of
+        # its own, so that the requests of a database that no free
+        # worker has the schema of go to the same few workers instead
+        # of spreading the schema over all of them.
+        return hash((key, worker.get_pid()))
+
     def _release_worker(self, worker, *, put_in_front: bool = True):
         # Skip disconnected workers
         if worker.get_pid() in self._workers:
             self._workers_queue.release(worker, put_in_front=put_in_front)
+        else:
+            self._workers_queue.discard(worker)
 
     def get_debug_info(self):
         return dict(
@@ -933,57 +1167,102 @@ class FixedPool(BaseLocalPool):
 
 
 @srvargs.CompilerPoolMode.OnDemand.assign_implementation
-class SimpleAdaptivePool(BaseLocalPool):
+class SimpleAdaptivePool(FixedPool):
+    # The template process starts with the minimum number of workers and
+    # forks another one for every byte written to its standard input, so
+    # new workers share its memory and are ready in no time.  The pool
+    # forks workers when compile requests wait for one for too long, and
+    # ahead of the predicted bursts of compile requests and of the
+    # recompilations after schema changes, as long as the workers don't
+    # take too much memory.  Idle workers are stopped after a while.
+    _template_stdin = subprocess.PIPE
+
     def __init__(self, *, pool_size, **kwargs):
         super().__init__(pool_size=1, **kwargs)
-        self._worker_transports = {}
-        self._expected_num_workers = 0
-        self._scale_down_handle = None
         self._max_num_workers = pool_size
-
-    async def _start(self):
-        async with asyncio.TaskGroup() as g:
-            for _i in range(self._pool_size):
-                g.create_task(self._create_worker())
+        # The times the workers being forked were requested at.
+        self._pending_spawns: collections.deque[float] = collections.deque()
+        self._spawn_time_avg = rolavg.RollingAverage(history_size=10)
+        self._scale_down_handle = None
+        self._prefork_handle = None
+        self._prefork_size = 0
+        # The total RSS of the workers, their number and the time it was
+        # measured at.
+        self._workers_rss: Optional[Tuple[int, int, float]] = None
+        self._policy = scaling.ScalingPolicy(
+            min_workers=self._pool_size,
+            max_workers=pool_size,
+            wait_slo=ADAPTIVE_SCALE_UP_WAIT_TIME,
+            max_rss=psutil.virtual_memory().total * ADAPTIVE_MAX_RSS_FRACTION,
+            peak_ttl=ADAPTIVE_SCALE_DOWN_WAIT_TIME,
+        )
+        self._predictor = predictor.BurstPredictor(
+            history_size=10,
+            min_gap=ADAPTIVE_MIN_BURST_GAP,
+            min_history=ADAPTIVE_MIN_BURST_HISTORY,
+            max_jitter=ADAPTIVE_MAX_BURST_JITTER,
+        )
 
     async def _stop(self):
-        self._expected_num_workers = 0
-        transports, self._worker_transports = self._worker_transports, {}
-        for transport in transports.values():
-            await transport._wait()
-            transport.close()
+        if self._scale_down_handle is not None:
+            self._scale_down_handle.cancel()
+            self._scale_down_handle = None
+        if self._prefork_handle is not None:
+            self._prefork_handle.cancel()
+            self._prefork_handle = None
+        await super()._stop()
+
+    def _worker_attached(self):
+        if self._pending_spawns:
+            self._spawn_time_avg.add(
+                time.monotonic() - self._pending_spawns.popleft())
+        # Replace the workers of a previous template process one by one.
+        self._server.kill_outdated_worker(self._template_proc_version)
+
+    def process_exited(self):
+        # The new template process starts with the minimum number of
+        # workers, the workers it was asked to fork are gone.
+        self._pending_spawns.clear()
+        super().process_exited()
+
+    def notify_schema_changed(self, dbname: str) -> None:
+        if self._running:
+            # Have as many workers as were recently busy at once.
+            self._scale_up(
+                self._policy.get_peak(time.monotonic()), "schema_change")
 
     async def _acquire_worker(
         self, *, condition=None, weighter=None, **compiler_args
     ):
         scale_up_handle = None
-        if (
-            self._running
-            and self._workers_queue.qsize() == 0
-            and (
-                len(self._workers)
-                == self._expected_num_workers
-                < self._max_num_workers
-            )
-        ):
-            scale_up_handle = self._loop.call_later(
-                ADAPTIVE_SCALE_UP_WAIT_TIME, self._maybe_scale_up
-            )
+        if self._running:
+            self._observe_demand()
+            if self._workers_queue.qsize() == 0:
+                if self._policy.is_slo_breached():
+                    self._scale_up(self._count_demand() + 1, "latency")
+                else:
+                    scale_up_handle = self._loop.call_later(
+                        ADAPTIVE_SCALE_UP_WAIT_TIME, self._maybe_scale_up
+                    )
         if self._scale_down_handle is not None:
             self._scale_down_handle.cancel()
             self._scale_down_handle = None
+        started_at = time.monotonic()
         try:
-            return await super()._acquire_worker(
+            worker = await super()._acquire_worker(
                 condition=condition, weighter=weighter, **compiler_args
             )
         finally:
             if scale_up_handle is not None:
                 scale_up_handle.cancel()
+        self._policy.on_wait(time.monotonic() - started_at)
+        return worker
 
     def _release_worker(self, worker, *, put_in_front: bool = True):
         if self._scale_down_handle is not None:
             self._scale_down_handle.cancel()
             self._scale_down_handle = None
+        self._predictor.on_release(time.monotonic())
         super()._release_worker(worker, put_in_front=put_in_front)
         if (
             self._running and
@@ -995,64 +1274,128 @@ class SimpleAdaptivePool(BaseLocalPool):
                 self._scale_down,
             )
 
-    def worker_disconnected(self, pid):
-        num_workers_before = len(self._workers)
-        super().worker_disconnected(pid)
-        trans = self._worker_transports.pop(pid, None)
-        if trans:
-            trans.close()
-        if not self._running:
+    def _count_demand(self) -> int:
+        # The number of compile requests being served or waiting.
+        return (
+            len(self._workers)
+            - self._workers_queue.qsize()
+            + self._workers_queue.count_waiters()
+        )
+
+    def _observe_demand(self) -> None:
+        # Feed the demand for workers to the scaling policy and the burst
+        # predictor, and when a new burst starts, schedule forking the
+        # workers before the next one if the load looks periodic.
+        now = time.monotonic()
+        nconcurrent = self._count_demand() + 1
+        self._policy.on_demand(now, nconcurrent)
+        if not self._predictor.on_acquire(now, nconcurrent):
             return
-        if len(self._workers) < self._pool_size:
-            # The auto-scaler will not scale down below the pool_size, so we
-            # should restart the unexpectedly-exited worker process.
-            logger.warning(
-                "Compiler worker process[%d] exited unexpectedly; "
-                "start a new one now.", pid
-            )
-            self._loop.create_task(self._create_worker())
-            self._expected_num_workers = len(self._workers)
-        elif num_workers_before == self._expected_num_workers:
-            # This is likely the case when a worker died unexpectedly, and we
-            # don't want to restart the worker because the auto-scaler will
-            # start a new one again if necessary.
-            self._expected_num_workers = len(self._workers)
 
-    def process_exited(self):
-        if self._running:
-            for pid, transport in list(self._worker_transports.items()):
-                if transport.is_closing():
-                    self._worker_transports.pop(pid, None)
+        prediction = self._predictor.predict()
+        if prediction is None:
+            return
+
+        expected_at, nworkers = prediction
+        lead = (
+            max(self._spawn_time_avg.avg(), ADAPTIVE_MIN_SPAWN_TIME) *
+            ADAPTIVE_PREFORK_LEAD_SPAWN_TIMES +
+            self._predictor.get_jitter()
+        )
+        delay = expected_at - lead - now
+        if delay <= 0:
+            return
+
+        if self._prefork_handle is not None:
+            self._prefork_handle.cancel()
+        self._prefork_size = nworkers
+        self._prefork_handle = self._loop.call_later(
+            delay, self._prefork, nworkers)
 
-    async def _create_worker(self):
-        # Creates a single compiler worker process.
-        transport = await self._create_compiler_process()
-        self._worker_transports[transport.get_pid()] = transport
-        self._expected_num_workers += 1
+    def _prefork(self, nworkers: int) -> None:
+        self._prefork_handle = None
+        if self._running:
+            self._scale_up(nworkers, "burst")
 
     def _maybe_scale_up(self):
         if not self._running:
             return
         logger.info(
-            "A compile request has waited for more than %d seconds, "
-            "spawn a new compiler worker process now.",
+            "A compile request has waited for more than %s seconds, "
+            "fork more compiler worker processes now.",
             ADAPTIVE_SCALE_UP_WAIT_TIME,
         )
-        self._loop.create_task(self._create_worker())
+        self._scale_up(self._count_demand(), "latency")
+
+    def _scale_up(self, nwanted: int, decision: str) -> None:
+        # Fork workers for the pool to have `nwanted` of them.
+        if self._template_transport is None:
+            return
+        n, capped = self._policy.count_new_workers(
+            nworkers=len(self._workers),
+            npending=len(self._pending_spawns),
+            nwanted=nwanted,
+            total_rss=self._get_workers_rss(),
+        )
+        if capped:
+            metrics.compiler_pool_scaling_decisions.inc(1.0, "memory_capped")
+            logger.debug(
+                "Not forking more compiler worker processes to limit "
+                "their total memory usage."
+            )
+        if n <= 0:
+            return
+        logger.debug(
+            "Forking %d compiler worker process%s (%s).",
+            n, "es" if n > 1 else "", decision,
+        )
+        metrics.compiler_pool_scaling_decisions.inc(1.0, decision)
+        self._pending_spawns.extend([time.monotonic()] * n)
+        self._template_transport.get_pipe_transport(0).write(b"+" * n)
+
+    def _get_workers_rss(self) -> int:
+        # Memory shared with the template process is counted once per
+        # worker, which overestimates the total.  Measuring it takes a
+        # system call per worker, and it's needed on every scale up, so
+        # the last measurement is reused for a while.
+        now = time.monotonic()
+        if self._workers_rss is not None:
+            rss, nworkers, measured_at = self._workers_rss
+            if (
+                nworkers == len(self._workers)
+                and now - measured_at < ADAPTIVE_RSS_SAMPLE_INTERVAL
+            ):
+                return rss
+
+        rss = 0
+        for pid in self._workers:
+            try:
+                rss += psutil.Process(pid).memory_info().rss
+            except psutil.NoSuchProcess:
+                pass
+        metrics.compiler_processes_rss.set(rss)
+        self._workers_rss = (rss, len(self._workers), now)
+        return rss
 
     def _scale_down(self):
         self._scale_down_handle = None
-        if not self._running or len(self._workers) <= self._pool_size:
+        if not self._running:
+            return
+        num_workers = self._pool_size
+        if self._prefork_handle is not None:
+            # Keep the workers a predicted burst is going to need.
+            num_workers = max(num_workers, self._prefork_size)
+        if len(self._workers) <= num_workers:
             return
         logger.info(
             "The compiler pool is not used in %d seconds, scaling down to %d.",
-            ADAPTIVE_SCALE_DOWN_WAIT_TIME, self._pool_size,
+            ADAPTIVE_SCALE_DOWN_WAIT_TIME, num_workers,
         )
-        self._expected_num_workers = self._pool_size
+        metrics.compiler_pool_scaling_decisions.inc(1.0, "scale_down")
         for worker in sorted(
             self._workers.values(), key=lambda w: w._last_used
-        )[:-self._pool_size]:
-            worker.close()
+        )[:-num_workers]:
+            worker.close(graceful=True)
 
 
 class RemoteWorker(BaseWorker):
@@ -1075,6 +1418,8 @@ class RemoteWorker(BaseWorker):
 
 @srvargs.CompilerPoolMode.Remote.assign_implementation
 class RemotePool(AbstractPool):
+    _supports_schema_deltas = False
+
     def __init__(self, *, address, pool_size, **kwargs):
         super().__init__(**kwargs)
         self._pool_addr = address
@@ -1193,9 +1538,9 @@ class RemotePool(AbstractPool):
         self._semaphore.release()
 
     async def compile_in_tx(
-        self, txid, pickled_state, state_id, *compile_args
+        self, txid, pickled_state, state_id, *compile_args, **compiler_args
     ):
-        worker = await self._acquire_worker()
+        worker = await self._acquire_worker(**compiler_args)
         try:
             return await worker.call(
                 'compile_in_tx',
@@ -1332,6 +1677,7 @@ class MultiTenantPool(FixedPool):
     _worker_class = MultiTenantWorker  # type: ignore
     _worker_mod = "multitenant_worker"
     _workers: Dict[int, MultiTenantWorker]  # type: ignore
+    _supports_schema_deltas = False
 
     def __init__(self, *, cache_size, **kwargs):
         super().__init__(**kwargs)
@@ -1349,27 +1695,55 @@ class MultiTenantPool(FixedPool):
     def _get_init_args(self):
         init_args = (
             self._backend_runtime_params,
-            self._std_schema,
-            self._refl_schema,
-            self._schema_class_layout,
+            *self._get_schema_init_args(),
         )
         return init_args, pickle.dumps(init_args, -1)
 
-    def _weighter(self, client_id: int, worker: MultiTenantWorker):
+    def _get_affinity_weighter(self, client_key, compiler_args):
+        client_id = compiler_args.get("client_id")
+        if client_id is None:
+            return None
+        return functools.partial(
+            self._weighter,
+            client_id,
+            compiler_args.get("dbname"),
+            compiler_args.get("user_schema_pickle"),
+        )
+
+    def _weighter(
+        self,
+        client_id: int,
+        dbname: str | None,
+        user_schema_pickle: bytes | None,
+        worker: MultiTenantWorker,
+    ):
+        # Prefer the workers having the current schema of the database,
+        # then any schema of it, then any schema of the tenant; among
+        # the workers without the tenant, the ones with room for it.
         tenant_schema = worker.get_tenant_schema(client_id)
+        if tenant_schema is None:
+            return (
+                0,
+                self._cache_size - worker.cache_size(),
+                self._affinity(client_id, worker),
+            )
+        worker_db = tenant_schema.dbs.get(dbname)
+        if worker_db is None:
+            level = 1
+        elif worker_db.user_schema_pickle is not user_schema_pickle:
+            level = 2
+        else:
+            level = 3
         return (
-            bool(tenant_schema),
-            worker.last_used(client_id)
-            if tenant_schema
-            else self._cache_size - worker.cache_size(),
+            level,
+            worker.last_used(client_id),
+            self._affinity(client_id, worker),
         )
 
     async def _acquire_worker(
         self, *, condition=None, weighter=None, **compiler_args
     ):
         client_id = compiler_args.get("client_id")
-        if weighter is None and client_id is not None:
-            weighter = functools.partial(self._weighter, client_id)
         rv = await super()._acquire_worker(
             condition=condition, weighter=weighter, **compiler_args
         )
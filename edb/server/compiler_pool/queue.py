@@ -20,8 +20,11 @@ from __future__ import annotations
 
 import asyncio
 import collections
+import time
 import typing
 
+from . import scheduler
+
 
 W = typing.TypeVar('W')
 W2 = typing.TypeVar('W2', contravariant=True)
@@ -37,59 +40,76 @@ class WorkerQueue(typing.Generic[W]):
 
     loop: asyncio.AbstractEventLoop
 
-    _waiters: typing.Deque[asyncio.Future[None]]
+    _waiters: scheduler.FairQueue[asyncio.Future[None]]
     _queue: typing.Deque[W]
+    _acquired: typing.Dict[W, typing.Tuple[typing.Hashable, float]]
 
     def __init__(
         self,
         loop: asyncio.AbstractEventLoop,
+        *,
+        max_queued_per_client: int = 2 ** 31,
     ) -> None:
         self._loop = loop
-        self._waiters = collections.deque()
+        # Waiters of different clients are woken up in a fair order
+        # rather than in the order they came in, see FairQueue.
+        self._waiters = scheduler.FairQueue(
+            max_queued_per_flow=max_queued_per_client)
         self._queue = collections.deque()
+        self._acquired = {}
 
     async def acquire(
         self,
         *,
         condition: typing.Optional[_AcquireCondition[W]]=None,
         weighter=None,
+        client_key: typing.Hashable=None,
     ) -> W:
         # There can be a race between a waiter scheduled for to wake up
         # and a worker being stolen (due to quota being enforced,
         # for example).  In which case the waiter might get finally
         # woken up with an empty queue -- hence we use a `while` loop here.
-        attempts = 0
+        entry = None
         while not self._queue:
             waiter = self._loop.create_future()
 
-            attempts += 1
-            if attempts > 1:
+            if entry is not None:
                 # If the waiter was woken up only to discover that
                 # it needs to wait again, we don't want it to lose
                 # its place in the waiters queue.
-                self._waiters.appendleft(waiter)
+                self._waiters.requeue(entry, waiter)
             else:
-                # On the first attempt the waiter goes to the end
-                # of the waiters queue.
-                self._waiters.append(waiter)
+                # On the first attempt the waiter gets queued behind
+                # the other waiters of the same client.  Raises
+                # scheduler.QueueFull if the client has too many.
+                entry = self._waiters.push(client_key, waiter)
 
             try:
                 await waiter
-            except Exception:
+            except BaseException:
+                # Including cancellation: a stale entry would count
+                # against the limit of queued requests of the client.
                 if not waiter.done():
                     waiter.cancel()
-                try:
-                    self._waiters.remove(waiter)
-                except ValueError:
-                    # The waiter could be removed from self._waiters
-                    # by a previous release() call.
-                    pass
+                # The waiter could be removed from self._waiters
+                # by a previous release() call.
+                self._waiters.remove(entry)
                 if self._queue and not waiter.cancelled():
                     # We were woken up by release(), but can't take
                     # the call.  Wake up the next in line.
                     self._wakeup_next_waiter()
                 raise
 
+        worker = self._take(condition, weighter)
+        self._acquired[worker] = (client_key, time.monotonic())
+        self._waiters.start(client_key)
+        return worker
+
+    def _take(
+        self,
+        condition: typing.Optional[_AcquireCondition[W]],
+        weighter,
+    ) -> W:
         if len(self._queue) > 1:
             if condition is not None:
                 for w in self._queue:
@@ -112,12 +132,23 @@ class WorkerQueue(typing.Generic[W]):
         return self._queue.popleft()
 
     def release(self, worker: W, *, put_in_front: bool=True) -> None:
+        acquired = self._acquired.pop(worker, None)
+        if acquired is not None:
+            client_key, acquired_at = acquired
+            self._waiters.finish(client_key, time.monotonic() - acquired_at)
         if put_in_front:
             self._queue.appendleft(worker)
         else:
             self._queue.append(worker)
         self._wakeup_next_waiter()
 
+    def discard(self, worker: W) -> None:
+        # Forget about an acquired worker that won't be released.
+        acquired = self._acquired.pop(worker, None)
+        if acquired is not None:
+            client_key, acquired_at = acquired
+            self._waiters.finish(client_key, time.monotonic() - acquired_at)
+
     def qsize(self) -> int:
         return len(self._queue)
 
@@ -125,8 +156,7 @@ class WorkerQueue(typing.Generic[W]):
         return len(self._waiters)
 
     def _wakeup_next_waiter(self) -> None:
-        while self._waiters:
-            waiter = self._waiters.popleft()
+        while (waiter := self._waiters.pop()) is not None:
             if not waiter.done():
                 waiter.set_result(None)
                 break
@@ -0,0 +1,100 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright 2024-present MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from __future__ import annotations
+
+import typing
+
+from edb.server.connpool import rolavg
+
+
+class ScalingPolicy:
+    # Decides how many compiler workers the adaptive pool should have.
+    #
+    # The pool scales up when compile requests wait for a worker longer
+    # than `wait_slo` seconds on average, up to `max_workers` workers and
+    # as long as the workers are expected to take no more than `max_rss`
+    # bytes of memory in total.  It also keeps track of the peak number
+    # of concurrent compile requests seen in the last `peak_ttl` seconds,
+    # which is how many workers the pool should have to handle a storm
+    # of recompilations after a schema change.
+
+    __slots__ = (
+        '_min_workers', '_max_workers', '_wait_slo', '_max_rss',
+        '_peak_ttl', '_waits', '_peak', '_peak_at',
+    )
+
+    _waits: rolavg.RollingAverage
+
+    def __init__(
+        self,
+        *,
+        min_workers: int,
+        max_workers: int,
+        wait_slo: float,
+        max_rss: float,
+        peak_ttl: float,
+        history_size: int = 20,
+    ) -> None:
+        self._min_workers = min_workers
+        self._max_workers = max_workers
+        self._wait_slo = wait_slo
+        self._max_rss = max_rss
+        self._peak_ttl = peak_ttl
+        self._waits = rolavg.RollingAverage(history_size=history_size)
+        self._peak = 0
+        self._peak_at = 0.0
+
+    def on_wait(self, duration: float) -> None:
+        # Record the time a compile request waited for a worker.
+        self._waits.add(duration)
+
+    def is_slo_breached(self) -> bool:
+        return self._waits.avg() > self._wait_slo
+
+    def on_demand(self, now: float, nconcurrent: int) -> None:
+        # Record that `nconcurrent` compile requests are in flight.
+        if nconcurrent >= self._peak or now - self._peak_at > self._peak_ttl:
+            self._peak = nconcurrent
+            self._peak_at = now
+
+    def get_peak(self, now: float) -> int:
+        if now - self._peak_at > self._peak_ttl:
+            return self._min_workers
+        return max(self._peak, self._min_workers)
+
+    def count_new_workers(
+        self,
+        *,
+        nworkers: int,
+        npending: int,
+        nwanted: int,
+        total_rss: float,
+    ) -> typing.Tuple[int, bool]:
+        # Returns how many workers to spawn for the pool to have `nwanted`
+        # of them, given that it has `nworkers` and `npending` are being
+        # spawned, and whether the number was limited by the RSS cap.
+        n = min(nwanted, self._max_workers) - nworkers - npending
+        if n <= 0:
+            return 0, False
+        if nworkers and total_rss:
+            per_worker = total_rss / nworkers
+            room = int((self._max_rss - total_rss) / per_worker) - npending
+            if room < n:
+                return max(room, 0), True
+        return n, False
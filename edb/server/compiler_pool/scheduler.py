@@ -0,0 +1,161 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright 2024-present MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from __future__ import annotations
+
+import heapq
+import typing
+
+
+T = typing.TypeVar('T')
+
+
+class QueueFull(Exception):
+    pass
+
+
+class _Flow:
+
+    __slots__ = ('finish', 'cost', 'queued', 'active')
+
+    def __init__(self, finish: float, cost: float) -> None:
+        # Virtual time at which the last queued request of the flow is
+        # expected to be served.
+        self.finish = finish
+        # Moving average of the time it takes to serve a request.
+        self.cost = cost
+        self.queued = 0
+        self.active = 0
+
+
+class Entry(typing.Generic[T]):
+
+    __slots__ = ('tag', 'seq', 'key', 'item', 'queued')
+
+    def __init__(self, tag: float, seq: int, key: typing.Hashable, item: T):
+        self.tag = tag
+        self.seq = seq
+        self.key = key
+        self.item = item
+        self.queued = False
+
+    def __lt__(self, other: Entry[T]) -> bool:
+        return (self.tag, self.seq) < (other.tag, other.seq)
+
+
+class FairQueue(typing.Generic[T]):
+    # Start-time fair queueing of requests of different flows (clients).
+    #
+    # Every queued request is tagged with the virtual time at which it
+    # should start, which is the time the previous request of its flow
+    # is expected to finish, or the current virtual time if the flow has
+    # nothing queued.  Requests are served in the order of their tags,
+    # so each flow with queued requests gets an equal share of the
+    # service time, no matter how many requests it has queued.  Flows
+    # are charged the average time it takes to serve their requests, so
+    # clients with expensive requests get to go less often.
+
+    _flows: dict[typing.Hashable, _Flow]
+    _heap: list[Entry[T]]
+
+    def __init__(
+        self,
+        *,
+        max_queued_per_flow: int,
+        cost_decay: float = 0.2,
+    ) -> None:
+        self._max_queued_per_flow = max_queued_per_flow
+        self._cost_decay = cost_decay
+        self._flows = {}
+        self._heap = []
+        self._seq = 0
+        self._vtime = 0.0
+        self._avg_cost = 0.0
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def _get_flow(self, key: typing.Hashable) -> _Flow:
+        flow = self._flows.get(key)
+        if flow is None:
+            # New flows start with the average cost of all requests;
+            # the cost can't be zero for the tags to make progress.
+            flow = _Flow(self._vtime, self._avg_cost or 1e-3)
+            self._flows[key] = flow
+        return flow
+
+    def _maybe_forget(self, key: typing.Hashable, flow: _Flow) -> None:
+        if not flow.queued and not flow.active and flow.finish <= self._vtime:
+            del self._flows[key]
+
+    def push(self, key: typing.Hashable, item: T) -> Entry[T]:
+        # Requests without a flow key are the server's own and are
+        # never rejected.
+        flow = self._get_flow(key)
+        if key is not None and flow.queued >= self._max_queued_per_flow:
+            raise QueueFull(key)
+        tag = max(self._vtime, flow.finish)
+        flow.finish = tag + flow.cost
+        self._seq += 1
+        entry = Entry(tag, self._seq, key, item)
+        self._push(flow, entry)
+        return entry
+
+    def requeue(self, entry: Entry[T], item: T) -> None:
+        # Put a request back into the queue keeping its place.
+        entry.item = item
+        self._push(self._get_flow(entry.key), entry)
+
+    def _push(self, flow: _Flow, entry: Entry[T]) -> None:
+        flow.queued += 1
+        entry.queued = True
+        self._len += 1
+        heapq.heappush(self._heap, entry)
+
+    def remove(self, entry: Entry[T]) -> None:
+        # Entries are removed from the heap lazily by pop().
+        if entry.queued:
+            entry.queued = False
+            self._len -= 1
+            flow = self._flows[entry.key]
+            flow.queued -= 1
+            self._maybe_forget(entry.key, flow)
+
+    def pop(self) -> typing.Optional[T]:
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            if entry.queued:
+                self.remove(entry)
+                if entry.tag > self._vtime:
+                    self._vtime = entry.tag
+                return entry.item
+        return None
+
+    def start(self, key: typing.Hashable) -> None:
+        self._get_flow(key).active += 1
+
+    def finish(self, key: typing.Hashable, duration: float) -> None:
+        flow = self._flows.get(key)
+        if flow is None:
+            return
+        decay = self._cost_decay
+        flow.cost += (duration - flow.cost) * decay
+        self._avg_cost += (duration - self._avg_cost) * decay
+        flow.active -= 1
+        self._maybe_forget(key, flow)
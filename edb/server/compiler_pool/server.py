@@ -323,12 +323,20 @@ class MultiSchemaPool(pool_mod.FixedPool):
             return False
 
     def _weighter(self, client_id, worker: Worker):
+        # Prefer the workers in sync with the client, then the ones
+        # having any schema of it; among the workers without it, the
+        # ones with room for it.
         client_schema = worker.get_client_schema(client_id)
+        if client_schema is None:
+            return (
+                0,
+                self._cache_size - worker.cache_size(),
+                self._affinity(client_id, worker),
+            )
         return (
-            bool(client_schema),
-            worker.last_used(client_id)
-            if client_schema
-            else self._cache_size - worker.cache_size(),
+            2 if client_schema is self._clients.get(client_id) else 1,
+            worker.last_used(client_id),
+            self._affinity(client_id, worker),
         )
 
     async def _call_for_client(
@@ -450,6 +458,7 @@ class MultiSchemaPool(pool_mod.FixedPool):
                 "compile",
                 "compile_notebook",
                 "compile_graphql",
+                "compile_graphql_batch",
                 "compile_sql",
             }:
                 pickled = await self._call_for_client(
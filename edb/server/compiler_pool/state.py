@@ -44,6 +44,12 @@ class PickledDatabaseState(typing.NamedTuple):
     database_config: immutables.Map[str, config.SettingValue]
 
 
+class PickledSchemaDelta(typing.NamedTuple):
+    # Pickled result of FlatSchema.get_delta() against the user schema
+    # the worker currently holds.
+    delta_pickle: bytes
+
+
 class FailedStateSync(Exception):
     pass
 
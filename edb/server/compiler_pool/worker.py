@@ -67,6 +67,9 @@ def __init_worker__(
         global_schema_pickle,
         system_config,
     ) = pickle.loads(init_args_pickled)
+    if std_schema is None:
+        std_schema, refl_schema, schema_class_layout = (
+            worker_proc.get_shared_schema())
 
     INITED = True
     DBS = immutables.Map(
@@ -103,7 +106,7 @@ def __init_worker__(
 
 def __sync__(
     dbname: str,
-    user_schema: Optional[bytes],
+    user_schema: Optional[bytes | state.PickledSchemaDelta],
     reflection_cache: Optional[bytes],
     global_schema: Optional[bytes],
     database_config: Optional[bytes],
@@ -132,7 +135,10 @@ def __sync__(
         else:
             updates = {}
 
-            if user_schema is not None:
+            if isinstance(user_schema, state.PickledSchemaDelta):
+                updates['user_schema'] = db.user_schema.apply_delta(
+                    pickle.loads(user_schema.delta_pickle))
+            elif user_schema is not None:
                 updates['user_schema'] = pickle.loads(user_schema)
             if reflection_cache is not None:
                 updates['reflection_cache'] = pickle.loads(reflection_cache)
@@ -158,7 +164,7 @@ def __sync__(
 
 def compile(
     dbname: str,
-    user_schema: Optional[bytes],
+    user_schema: Optional[bytes | state.PickledSchemaDelta],
     reflection_cache: Optional[bytes],
     global_schema: Optional[bytes],
     database_config: Optional[bytes],
@@ -207,7 +213,7 @@ def compile_in_tx(cstate, *args, **kwargs):
 
 def compile_notebook(
     dbname: str,
-    user_schema: Optional[bytes],
+    user_schema: Optional[bytes | state.PickledSchemaDelta],
     reflection_cache: Optional[bytes],
     global_schema: Optional[bytes],
     database_config: Optional[bytes],
@@ -237,7 +243,7 @@ def compile_notebook(
 
 def compile_graphql(
     dbname: str,
-    user_schema: Optional[bytes],
+    user_schema: Optional[bytes | state.PickledSchemaDelta],
     reflection_cache: Optional[bytes],
     global_schema: Optional[bytes],
     database_config: Optional[bytes],
@@ -254,6 +260,47 @@ def compile_graphql(
         system_config,
     )
 
+    return _compile_graphql(db, *compile_args, **compile_kwargs)
+
+
+def compile_graphql_batch(
+    dbname: str,
+    user_schema: Optional[bytes | state.PickledSchemaDelta],
+    reflection_cache: Optional[bytes],
+    global_schema: Optional[bytes],
+    database_config: Optional[bytes],
+    system_config: Optional[bytes],
+    requests: list[tuple[Any, ...]],
+) -> list[
+    tuple[compiler.QueryUnitGroup, graphql.TranspiledOperation] | Exception
+]:
+    # Compiles several GraphQL operations, each given as the positional
+    # arguments of compile_graphql().  A failure to compile one of them
+    # is returned in place of its result.
+    db = __sync__(
+        dbname,
+        user_schema,
+        reflection_cache,
+        global_schema,
+        database_config,
+        system_config,
+    )
+
+    results: list[Any] = []
+    for compile_args in requests:
+        try:
+            results.append(_compile_graphql(db, *compile_args))
+        except Exception as ex:
+            worker_proc.prepare_exception(ex)
+            results.append(ex)
+    return results
+
+
+def _compile_graphql(
+    db: state.DatabaseState,
+    *compile_args: Any,
+    **compile_kwargs: Any,
+) -> tuple[compiler.QueryUnitGroup, graphql.TranspiledOperation]:
     gql_op = graphql.compile_graphql(
         STD_SCHEMA,
         db.user_schema,
@@ -292,7 +339,7 @@ def compile_graphql(
 
 def compile_sql(
     dbname: str,
-    user_schema: Optional[bytes],
+    user_schema: Optional[bytes | state.PickledSchemaDelta],
     reflection_cache: Optional[bytes],
     global_schema: Optional[bytes],
     database_config: Optional[bytes],
@@ -336,6 +383,8 @@ def get_handler(methname):
             meth = compile_notebook
         elif methname == "compile_graphql":
             meth = compile_graphql
+        elif methname == "compile_graphql_batch":
+            meth = compile_graphql_batch
         elif methname == "compile_sql":
             meth = compile_sql
         else:
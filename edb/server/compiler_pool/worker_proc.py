@@ -21,6 +21,7 @@ import argparse
 import gc
 import os
 import pickle
+import select
 import signal
 import time
 import traceback
@@ -37,6 +38,10 @@ from . import amsg
 # is less than NUM_SPAWNS_RESET_INTERVAL seconds.
 NUM_SPAWNS_RESET_INTERVAL = 1
 
+# (std_schema, refl_schema, schema_class_layout) loaded by the template
+# process from the snapshot published by the pool, if any.
+SHARED_SCHEMA = None
+
 
 def worker(sockname, version_serial, get_handler):
     con = amsg.WorkerConnection(sockname, version_serial)
@@ -102,6 +107,19 @@ def clear_exception_frames(er):
     _clear_exception_frames(er, visited)
 
 
+def load_shared_schema(path):
+    global SHARED_SCHEMA
+    with open(path, 'rb') as f:
+        SHARED_SCHEMA = pickle.load(f)
+
+
+def get_shared_schema():
+    if SHARED_SCHEMA is None:
+        raise RuntimeError(
+            'the compiler worker was started without a shared schema')
+    return SHARED_SCHEMA
+
+
 def listen_for_debugger():
     if debug.flags.pydebug_listen:
         import debugpy
@@ -113,9 +131,18 @@ def main(get_handler):
     parser.add_argument("--sockname")
     parser.add_argument("--numproc")
     parser.add_argument("--version-serial", type=int)
+    parser.add_argument("--shared-schema")
     args = parser.parse_args()
 
     ql_parser.preload_spec()
+    if args.shared_schema:
+        if args.numproc is None:
+            parser.error('--shared-schema requires --numproc')
+        # Unpickle once in the template process, before freezing the GC
+        # and forking: the workers then start out sharing these pages
+        # copy-on-write.  Pages still become private as they are written
+        # to, e.g. by refcount updates of the objects a worker touches.
+        load_shared_schema(args.shared_schema)
     gc.freeze()
 
     listen_for_debugger()
@@ -125,18 +152,26 @@ def main(get_handler):
         run_worker(args.sockname, args.version_serial, get_handler)
         return
 
-    numproc = int(args.numproc)
-    assert numproc >= 1
+    if _run_template(int(args.numproc)):
+        # child process - clear the SIGTERM handler for potential Rust impl
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        run_worker(args.sockname, args.version_serial, get_handler)
 
-    # Abort the template process if more than `max_worker_spawns`
-    # new workers are created continuously - it probably means the
-    # worker cannot start correctly.
-    max_worker_spawns = numproc * 2
+
+def _run_template(numproc: int) -> bool:
+    """Fork *numproc* worker processes and restart them if they crash.
+
+    Another worker is forked for every byte read from the standard input,
+    which the pool can use to scale up without starting a new process
+    from scratch.  Returns True in the worker processes, and False in
+    the template process once all of the workers ended normally.
+    """
+    assert numproc >= 1
 
     children = set()
     continuous_num_spawns = 0
 
-    for _ in range(int(args.numproc)):
+    for _ in range(numproc):
         # spawn initial workers
         if pid := os.fork():
             # main process
@@ -144,15 +179,53 @@ def main(get_handler):
             continuous_num_spawns += 1
         else:
             # child process
-            break
-    else:
-        # main process - redirect SIGTERM to SystemExit and wait for children
-        signal.signal(signal.SIGTERM, lambda *_: exit(os.EX_OK))
-        last_spawn_timestamp = time.monotonic()
+            _init_worker_stdin()
+            return True
+
+    # main process - redirect SIGTERM to SystemExit and wait for children
+    signal.signal(signal.SIGTERM, lambda *_: exit(os.EX_OK))
+    # Have select() below woken up by exiting children.
+    wakeup_r, wakeup_w = os.pipe()
+    os.set_blocking(wakeup_w, False)
+    signal.set_wakeup_fd(wakeup_w)
+    signal.signal(signal.SIGCHLD, lambda *_: None)
+    fds = [wakeup_r, 0]
+    last_spawn_timestamp = time.monotonic()
+
+    def fork() -> bool:
+        if pid := os.fork():
+            # main process
+            children.add(pid)
+            return False
+        else:
+            # child process
+            signal.set_wakeup_fd(-1)
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            os.close(wakeup_r)
+            os.close(wakeup_w)
+            _init_worker_stdin()
+            return True
+
+    try:
+        while children:
+            readable, _, _ = select.select(fds, [], [])
+
+            if 0 in readable:
+                requests = os.read(0, 4096)
+                if not requests:
+                    # The pool doesn't (or no longer) request workers.
+                    fds.remove(0)
+                for _ in requests:
+                    if fork():
+                        return True
+
+            if wakeup_r in readable:
+                os.read(wakeup_r, 4096)
 
-        try:
             while children:
-                pid, status = os.wait()
+                pid, status = os.waitpid(-1, os.WNOHANG)
+                if not pid:
+                    break
                 children.remove(pid)
                 ec = os.waitstatus_to_exitcode(status)
                 if ec > 0 or -ec not in {0, signal.SIGINT}:
@@ -163,38 +236,42 @@ def main(get_handler):
                         continuous_num_spawns = 0
                     last_spawn_timestamp = now
                     continuous_num_spawns += 1
+                    # Abort the template process if more than twice as
+                    # many new workers as it manages are created
+                    # continuously - it probably means the worker cannot
+                    # start correctly.
+                    max_worker_spawns = max(numproc, len(children) + 1) * 2
                     if continuous_num_spawns > max_worker_spawns:
                         # GOTCHA: we shouldn't return here because we need the
                         # exception handler below to clean up the workers
                         exit(os.EX_UNAVAILABLE)
 
-                    if pid := os.fork():
-                        # main process
-                        children.add(pid)
-                    else:
-                        # child process
-                        break
-            else:
-                # main process - all children ended normally
-                return
-        except BaseException as e:  # includes SystemExit and KeyboardInterrupt
-            # main process - kill and wait for the remaining workers to exit
-            try:
-                signal.signal(signal.SIGTERM, signal.SIG_DFL)
-                for pid in children:
-                    try:
-                        os.kill(pid, signal.SIGTERM)
-                    except OSError:
-                        pass
+                    if fork():
+                        return True
+
+        # main process - all children ended normally
+        return False
+    except BaseException as e:  # includes SystemExit and KeyboardInterrupt
+        # main process - kill and wait for the remaining workers to exit
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            for pid in children:
                 try:
-                    while children:
-                        pid, status = os.wait()
-                        children.discard(pid)
+                    os.kill(pid, signal.SIGTERM)
                 except OSError:
                     pass
-            finally:
-                raise e
-
-    # child process - clear the SIGTERM handler for potential Rust impl
-    signal.signal(signal.SIGTERM, signal.SIG_DFL)
-    run_worker(args.sockname, args.version_serial, get_handler)
+            try:
+                while children:
+                    pid, status = os.wait()
+                    children.discard(pid)
+            except OSError:
+                pass
+        finally:
+            raise e
+
+
+def _init_worker_stdin() -> None:
+    # Workers must not hold on to the template's control pipe.
+    fd = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(fd, 0)
+    os.close(fd)
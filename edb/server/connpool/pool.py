@@ -26,6 +26,7 @@ import collections
 import dataclasses
 import time
 
+from . import predictor
 from . import rolavg
 
 
@@ -35,6 +36,21 @@ MIN_LOG_TIME_THRESHOLD = 1
 CONNECT_FAILURE_RETRIES = 3
 MIN_IDLE_TIME_BEFORE_GC = 120
 
+# Seconds without connection acquisitions after which the next acquisition
+# is considered to start a new burst of load on the database.
+MIN_BURST_GAP = 1
+# Number of regular intervals between bursts required to predict the next
+# burst, and the maximum average deviation of those intervals relative to
+# their average for the load to be considered regular.
+MIN_BURST_HISTORY = 3
+MAX_BURST_JITTER = 0.25
+# Pre-open connections this many average connect times before the
+# predicted start of a burst.
+WARMUP_LEAD_CONNECT_TIMES = 3
+# Number of the most recently used idle connections searched for one
+# that already has the session state requested by acquire().
+MAX_STATE_SEARCH_DEPTH = 16
+
 logger = logging.getLogger("edb.server")
 
 CP1 = typing.TypeVar('CP1', covariant=True)
@@ -96,6 +112,9 @@ class ConnectionState:
     in_use_since: float = 0
     in_use: bool = False
     in_stack_since: float = 0
+    # Fingerprint of the session state the connection was released with,
+    # as reported by the user of the pool.
+    session_state: typing.Optional[typing.Hashable] = None
 
 
 class Block(typing.Generic[C]):
@@ -228,7 +247,12 @@ class Block(typing.Generic[C]):
 
         return self.conn_stack.popleft()
 
-    async def try_acquire(self, *, attempts: int = 1) -> typing.Optional[C]:
+    async def try_acquire(
+        self,
+        *,
+        attempts: int = 1,
+        state: typing.Optional[typing.Hashable] = None,
+    ) -> typing.Optional[C]:
         self.conn_waiters_num += 1
         try:
             # Skip the waiters' queue if we can grab a connection from the
@@ -272,23 +296,49 @@ class Block(typing.Generic[C]):
             # woken up with an empty queue -- hence the 'try'.
             # acquire will put a while loop around this
 
-            # Yield the most recently used connection from the top of the stack
             if self.conn_stack:
-                return self.conn_stack.pop()
+                return self._pop_conn(state)
             else:
                 return None
         finally:
             self.conn_waiters_num -= 1
 
-    async def acquire(self) -> C:
+    def _pop_conn(self, state: typing.Optional[typing.Hashable]) -> C:
+        # Yield the most recently used connection from the top of the stack,
+        # unless one of the few connections below it already has the
+        # requested session state, which saves restoring the state.
+        if state is not None:
+            stack = self.conn_stack
+            top = len(stack) - 1
+            for i in range(top, max(top - MAX_STATE_SEARCH_DEPTH, -1), -1):
+                conn = stack[i]
+                if self.conns[conn].session_state == state:
+                    if i != top:
+                        del stack[i]
+                        return conn
+                    break
+        return self.conn_stack.pop()
+
+    async def acquire(
+        self,
+        state: typing.Optional[typing.Hashable] = None,
+    ) -> C:
         attempts = 1
-        while (c := await self.try_acquire(attempts=attempts)) is None:
+        while (
+            c := await self.try_acquire(attempts=attempts, state=state)
+        ) is None:
             attempts += 1
         return c
 
-    def release(self, conn: C) -> None:
+    def release(
+        self,
+        conn: C,
+        state: typing.Optional[typing.Hashable] = None,
+    ) -> None:
         # Put the connection (back) to the top of the stack,
         self.conn_stack.append(conn)
+        # remember its session state,
+        self.conns[conn].session_state = state
         # refresh the timestamp,
         self.conns[conn].in_stack_since = time.monotonic()
         # and call the queue.
@@ -677,6 +727,11 @@ class Pool(BasePool[C]):
     _gc_interval: float  # minimum seconds between GC runs
     _gc_requests: int  # number of GC requests
 
+    _min_idle_conns: int  # default number of idle connections to keep
+    _db_min_idle_conns: typing.Dict[str, int]  # per-database overrides
+    _predictors: typing.Dict[str, predictor.BurstPredictor]
+    _warmups: typing.Dict[str, asyncio.TimerHandle]
+
     def __init__(
         self,
         *,
@@ -685,6 +740,8 @@ class Pool(BasePool[C]):
         max_capacity: int,
         stats_collector: typing.Optional[StatsCollector]=None,
         min_idle_time_before_gc: float = MIN_IDLE_TIME_BEFORE_GC,
+        min_idle_conns: int = 0,
+        predictive_warmup: bool = True,
     ) -> None:
         super().__init__(
             connect=connect,
@@ -704,6 +761,34 @@ class Pool(BasePool[C]):
         self._gc_interval = min_idle_time_before_gc
         self._gc_requests = 0
 
+        self._min_idle_conns = min_idle_conns
+        self._db_min_idle_conns = {}
+        self._predictive_warmup = predictive_warmup
+        self._predictors = {}
+        self._warmups = {}
+
+    def set_min_idle_conns(
+        self,
+        dbname: str,
+        nconns: typing.Optional[int],
+    ) -> None:
+        # Set the number of idle connections to keep open for the given
+        # database, or reset it to the pool-wide default if `nconns` is None.
+        if nconns is None:
+            self._db_min_idle_conns.pop(dbname, None)
+        else:
+            self._db_min_idle_conns[dbname] = nconns
+
+    def get_min_idle_conns(self, dbname: str) -> int:
+        return self._db_min_idle_conns.get(dbname, self._min_idle_conns)
+
+    def ensure_min_idle_conns(self, dbname: str) -> None:
+        # Open the idle connections required for the given database, if
+        # the pool has room for them.  Later on, these connections are not
+        # garbage-collected even if they stay unused.
+        if min_idle := self.get_min_idle_conns(dbname):
+            self._open_spare_conns(self._get_block(dbname), min_idle)
+
     def _maybe_schedule_tick(self) -> None:
         if self._first_tick:
             self._first_tick = False
@@ -1060,10 +1145,17 @@ class Pool(BasePool[C]):
 
         return None, None
 
-    async def _acquire(self, dbname: str) -> C:
+    async def _acquire(
+        self,
+        dbname: str,
+        state: typing.Optional[typing.Hashable],
+    ) -> C:
         block = self._get_block(dbname)
         block.suppressed = False
 
+        if self._predictive_warmup:
+            self._observe_demand(block)
+
         room_for_new_conns = self._cur_capacity < self._max_capacity
         block_nconns = block.count_conns()
 
@@ -1089,7 +1181,11 @@ class Pool(BasePool[C]):
                 # Block has no connections at all, or not enough connections.
                 self._schedule_new_conn(block)
 
-            return await block.acquire()
+            if min_idle := self.get_min_idle_conns(dbname):
+                # Replace the idle connection we're about to take.
+                self._open_spare_conns(block, min_idle + 1)
+
+            return await block.acquire(state)
 
         if not block_nconns:
             # This is a block without any connections.
@@ -1097,15 +1193,74 @@ class Pool(BasePool[C]):
             # reallocated for this block.
             if not self._try_steal_conn(block):
                 self._new_blocks_waitlist[block] = True
-            return await block.acquire()
+            return await block.acquire(state)
 
         if block_nconns < block.quota:
             # Let's see if we can steal a connection from some block
             # that's over quota and open a new one.
             self._try_steal_conn(block)
-            return await block.acquire()
+            return await block.acquire(state)
 
-        return await block.acquire()
+        return await block.acquire(state)
+
+    def _open_spare_conns(self, block: Block[C], nspare: int) -> None:
+        # Open new connections until the block has at least `nspare`
+        # connections available to new acquisitions, without taking any
+        # connections from other blocks.
+        while (
+            not self._is_starving and
+            self._cur_capacity < self._max_capacity and
+            block.count_approx_available_conns() < nspare
+        ):
+            self._schedule_new_conn(block, 'pre-established')
+
+    def _observe_demand(self, block: Block[C]) -> None:
+        # Feed the connection demand of the block to its burst predictor,
+        # and when a new burst starts, schedule pre-opening connections
+        # before the next one if the load looks periodic.
+        dbname = block.dbname
+        pred = self._predictors.get(dbname)
+        if pred is None:
+            pred = self._predictors[dbname] = predictor.BurstPredictor(
+                history_size=10,
+                min_gap=MIN_BURST_GAP,
+                min_history=MIN_BURST_HISTORY,
+                max_jitter=MAX_BURST_JITTER,
+            )
+
+        now = time.monotonic()
+        nconcurrent = block.conn_acquired_num + block.count_waiters() + 1
+        if not pred.on_acquire(now, nconcurrent):
+            return
+
+        prediction = pred.predict()
+        if prediction is None:
+            return
+
+        expected_at, nconns = prediction
+        lead = (
+            max(self._conntime_avg.avg(), MIN_CONN_TIME_THRESHOLD) *
+            WARMUP_LEAD_CONNECT_TIMES +
+            pred.get_jitter()
+        )
+        delay = expected_at - lead - now
+        if delay <= 0:
+            # Bursts are so frequent that the connections opened for
+            # this burst are going to be reused anyway.
+            return
+
+        if (handle := self._warmups.pop(dbname, None)) is not None:
+            handle.cancel()
+        self._warmups[dbname] = self._get_loop().call_later(
+            delay, self._warm_up, dbname, nconns)
+
+    def _warm_up(self, dbname: str, nconns: int) -> None:
+        self._warmups.pop(dbname, None)
+        block = self._get_block(dbname)
+        if block.suppressed:
+            return
+        self._log_to_snapshot(dbname=dbname, event='warm-up', value=nconns)
+        self._open_spare_conns(block, nconns)
 
     def _run_gc(self) -> None:
         loop = self._get_loop()
@@ -1129,14 +1284,25 @@ class Pool(BasePool[C]):
         # within 1-2 GC intervals.
         only_older_than = time.monotonic() - self._gc_interval
         for block in self._blocks.values():
-            while (conn := block.try_steal(only_older_than)) is not None:
+            min_idle = self.get_min_idle_conns(block.dbname)
+            while (
+                block.count_queued_conns() > min_idle and
+                (conn := block.try_steal(only_older_than)) is not None
+            ):
                 self._schedule_discard(block, conn)
 
-    async def acquire(self, dbname: str) -> C:
+    async def acquire(
+        self,
+        dbname: str,
+        *,
+        state: typing.Optional[typing.Hashable] = None,
+    ) -> C:
+        # If *state* is given, an idle connection that was released with
+        # the same session state is preferred.
         self._nacquires += 1
         self._maybe_schedule_tick()
         try:
-            conn = await self._acquire(dbname)
+            conn = await self._acquire(dbname, state)
         finally:
             self._nacquires -= 1
 
@@ -1148,7 +1314,14 @@ class Pool(BasePool[C]):
 
         return conn
 
-    def release(self, dbname: str, conn: C, *, discard: bool=False) -> None:
+    def release(
+        self,
+        dbname: str,
+        conn: C,
+        *,
+        discard: bool=False,
+        state: typing.Optional[typing.Hashable]=None,
+    ) -> None:
         try:
             block = self._blocks[dbname]
         except KeyError:
@@ -1171,11 +1344,15 @@ class Pool(BasePool[C]):
                 f'never acquired from the pool'
             ) from None
 
+        now = time.monotonic()
         block.dec_acquire_counter()
-        block.querytime_avg.add(time.monotonic() - conn_state.in_use_since)
+        block.querytime_avg.add(now - conn_state.in_use_since)
         conn_state.in_use = False
         conn_state.in_use_since = 0
 
+        if (pred := self._predictors.get(dbname)) is not None:
+            pred.on_release(now)
+
         self._maybe_schedule_tick()
 
         if not self._maybe_free_conn(block, conn):
@@ -1187,7 +1364,7 @@ class Pool(BasePool[C]):
                 self._schedule_new_conn(block)
                 return
 
-            block.release(conn)
+            block.release(conn, state)
 
             # Only request for GC if the connection is released unused
             self._gc_requests += 1
@@ -1197,6 +1374,12 @@ class Pool(BasePool[C]):
                 self._get_loop().call_later(self._gc_interval, self._run_gc)
 
     async def prune_inactive_connections(self, dbname: str) -> None:
+        # Forget the load history of the database, the database is likely
+        # being dropped or is no longer accepting connections.
+        self._predictors.pop(dbname, None)
+        if (handle := self._warmups.pop(dbname, None)) is not None:
+            handle.cancel()
+
         try:
             block = self._blocks[dbname]
         except KeyError:
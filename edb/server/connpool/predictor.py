@@ -0,0 +1,116 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright 2024-present MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from __future__ import annotations
+
+import typing
+
+from . import rolavg
+
+
+class BurstPredictor:
+    # Predicts the next burst of connection demand of a database.
+    #
+    # A burst starts with the first connection acquisition after the database
+    # had no connection acquisitions for at least `min_gap` seconds, and lasts
+    # until the next burst starts.  If the recent bursts started at regular
+    # intervals, the next burst is expected one average interval after the
+    # last one, and is expected to need as many concurrent connections as the
+    # recent bursts needed on average.
+
+    __slots__ = (
+        '_min_gap', '_min_history', '_max_jitter',
+        '_intervals', '_jitter', '_peaks',
+        '_nbursts', '_burst_started_at', '_last_active_at', '_peak',
+    )
+
+    _intervals: rolavg.RollingAverage
+    _jitter: rolavg.RollingAverage
+    _peaks: rolavg.RollingAverage
+
+    _nbursts: int
+    _burst_started_at: float
+    _last_active_at: float
+    _peak: int
+
+    def __init__(
+        self,
+        *,
+        history_size: int,
+        min_gap: float,
+        min_history: int,
+        max_jitter: float,
+    ) -> None:
+        self._min_gap = min_gap
+        self._min_history = min_history
+        self._max_jitter = max_jitter
+
+        self._intervals = rolavg.RollingAverage(history_size=history_size)
+        self._jitter = rolavg.RollingAverage(history_size=history_size)
+        self._peaks = rolavg.RollingAverage(history_size=history_size)
+
+        self._nbursts = 0
+        self._burst_started_at = 0
+        self._last_active_at = 0
+        self._peak = 0
+
+    def on_acquire(self, now: float, nconcurrent: int) -> bool:
+        # Record a connection request while `nconcurrent` requests (including
+        # this one) are in flight.  Returns True if it starts a new burst.
+        new_burst = (
+            nconcurrent <= 1 and
+            (not self._nbursts or now - self._last_active_at >= self._min_gap)
+        )
+
+        if new_burst:
+            if self._nbursts:
+                interval = now - self._burst_started_at
+                if self._nbursts > 1:
+                    self._jitter.add(abs(interval - self._intervals.avg()))
+                self._intervals.add(interval)
+                self._peaks.add(self._peak)
+            self._nbursts += 1
+            self._burst_started_at = now
+            self._peak = 0
+
+        if nconcurrent > self._peak:
+            self._peak = nconcurrent
+        self._last_active_at = now
+        return new_burst
+
+    def on_release(self, now: float) -> None:
+        self._last_active_at = now
+
+    def predict(self) -> typing.Optional[typing.Tuple[float, int]]:
+        # Returns the expected start time of the next burst and the number of
+        # connections it is expected to need, or None if the bursts aren't
+        # regular enough to be predicted.
+        if self._nbursts <= self._min_history:
+            return None
+
+        interval = self._intervals.avg()
+        if self._jitter.avg() > interval * self._max_jitter:
+            return None
+
+        return (
+            self._burst_started_at + interval,
+            max(round(self._peaks.avg()), 1),
+        )
+
+    def get_jitter(self) -> float:
+        return self._jitter.avg()
@@ -20,5 +20,8 @@
 from __future__ import annotations
 
 from .dbview import DatabaseIndex, Database, DatabaseConnectionView
+from .result_cache import ResultCache
 
-__all__ = ('DatabaseIndex', 'Database', 'DatabaseConnectionView')
+__all__ = (
+    'DatabaseIndex', 'Database', 'DatabaseConnectionView', 'ResultCache',
+)
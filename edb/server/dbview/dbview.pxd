@@ -77,6 +77,10 @@ cdef class Database:
     cdef:
         object _eql_to_compiled
         object _sql_to_compiled
+        dict _pending_compiles
+        dict _persisted_queries
+        object _persistent_config_key
+        object _persistent_config_src
         DatabaseIndex _index
         object _views
         object _introspection_lock
@@ -90,11 +94,16 @@ cdef class Database:
         readonly object reflection_cache
         readonly object backend_ids
         readonly object extensions
+        readonly object schema_version
+        readonly object result_cache
 
     cdef schedule_config_update(self)
 
     cdef _invalidate_caches(self)
+    cdef _evict_affected_queries(self, int old_dbver, affected_obj_ids)
     cdef _cache_compiled_query(self, key, compiled, int dbver)
+    cdef _persistent_cache_key(self, key)
+    cdef _lookup_persisted_query(self, key)
     cdef _new_view(self, query_cache, protocol_version)
     cdef _remove_view(self, view)
     cdef _update_backend_ids(self, new_types)
@@ -106,6 +115,9 @@ cdef class Database:
         reflection_cache=?,
         backend_ids=?,
         db_config=?,
+        affected_obj_ids=?,
+        schema_version=?,
+        schema_delta=?,
     )
     cdef get_state_serializer(self, protocol_version)
     cpdef set_state_serializer(self, protocol_version, serializer)
@@ -145,12 +157,14 @@ cdef class DatabaseConnectionView:
         object _in_tx_user_config_spec
         object _in_tx_global_schema_pickle
         object _in_tx_new_types
+        object _in_tx_write_refs
         int _in_tx_dbver
         bint _in_tx
         bint _in_tx_with_ddl
         bint _in_tx_with_sysconfig
         bint _in_tx_with_dbconfig
         bint _in_tx_with_set
+        bint _in_tx_with_writes
         bint _tx_error
 
         uint64_t _capability_mask
@@ -161,6 +175,8 @@ cdef class DatabaseConnectionView:
         object __weakref__
 
     cdef _reset_tx_state(self)
+    cdef _on_data_write(self, query_unit)
+    cdef _commit_data_writes(self)
 
     cdef clear_tx_error(self)
     cdef rollback_tx_to_savepoint(self, name)
@@ -192,6 +208,9 @@ cdef class DatabaseConnectionView:
         global_schema,
         roles,
         cached_reflection,
+        affected_obj_ids,
+        schema_version,
+        schema_delta,
     )
 
     cdef get_user_config_spec(self)
@@ -161,6 +161,7 @@ cdef class Database:
         object backend_ids,
         object extensions,
         object ext_config_settings,
+        object schema_version,
     ):
         self.name = name
 
@@ -176,6 +177,18 @@ cdef class Database:
             maxsize=defines._MAX_QUERIES_CACHE)
         self._sql_to_compiled = lru.LRUMapping(
             maxsize=defines._MAX_QUERIES_CACHE)
+        # Futures of the compilations currently in progress, keyed like
+        # _eql_to_compiled plus the dbver, for coalescing identical
+        # concurrent compile requests.
+        self._pending_compiles = {}
+        # Compiled queries loaded from the persistent query cache,
+        # keyed on `_persistent_cache_key()`.  Entries are moved into
+        # `_eql_to_compiled` on first use.
+        self._persisted_queries = {}
+        # The part of `_persistent_cache_key()` derived from the
+        # config, and the config objects it was derived from.
+        self._persistent_config_key = None
+        self._persistent_config_src = None
 
         self.db_config = db_config
         self.user_schema_pickle = user_schema_pickle
@@ -184,6 +197,8 @@ cdef class Database:
         self.reflection_cache = reflection_cache
         self.backend_ids = backend_ids
         self.extensions = extensions
+        self.schema_version = schema_version
+        self.result_cache = index._server.new_query_result_cache()
 
     @property
     def server(self):
@@ -204,15 +219,38 @@ cdef class Database:
         reflection_cache=None,
         backend_ids=None,
         db_config=None,
+        affected_obj_ids=None,
+        schema_version=None,
+        schema_delta=None,
     ):
         if new_schema_pickle is None:
             raise AssertionError('new_schema is not supposed to be None')
 
+        if (
+            schema_delta is not None
+            and self.user_schema_pickle is not None
+            and self.schema_version is not None
+            and schema_delta[0] == self.schema_version
+        ):
+            # Let the compiler workers holding the current schema
+            # catch up by applying the delta instead of unpickling
+            # the new schema from scratch.
+            self.server.get_compiler_pool().register_schema_delta(
+                self.name,
+                self.user_schema_pickle,
+                new_schema_pickle,
+                schema_delta[1],
+            )
+
+        old_dbver = self.dbver
         self.dbver = next_dbver()
+        schema_changed = self.user_schema_pickle is not None
 
         self.user_schema_pickle = new_schema_pickle
         self.extensions = extensions
         self.user_config_spec = config.FlatSpec(*ext_config_settings)
+        self.schema_version = schema_version
+        self._persisted_queries = {}
 
         if backend_ids is not None:
             self.backend_ids = backend_ids
@@ -220,7 +258,15 @@ cdef class Database:
             self.reflection_cache = reflection_cache
         if db_config is not None:
             self.db_config = db_config
-        self._invalidate_caches()
+        if affected_obj_ids is None:
+            self._invalidate_caches()
+        else:
+            self._evict_affected_queries(old_dbver, affected_obj_ids)
+
+        if schema_changed:
+            # The clients are about to recompile the evicted queries all
+            # at once, let the compiler pool get ready for that.
+            self.server.get_compiler_pool().notify_schema_changed(self.name)
 
     cdef _update_backend_ids(self, new_types):
         self.backend_ids.update(new_types)
@@ -228,6 +274,30 @@ cdef class Database:
     cdef _invalidate_caches(self):
         self._eql_to_compiled.clear()
         self._sql_to_compiled.clear()
+        if self.result_cache is not None:
+            self.result_cache.clear()
+        self._index.invalidate_caches()
+
+    cdef _evict_affected_queries(self, int old_dbver, affected_obj_ids):
+        # Only evict compiled queries depending on the schema objects
+        # affected by the schema change, the rest are carried over to
+        # the new dbver.  Iterating in LRU order and re-inserting the
+        # surviving entries preserves their relative recency.
+        for key in list(self._eql_to_compiled):
+            compiled, dbver = self._eql_to_compiled[key]
+            schema_refs = compiled.schema_refs
+            if (
+                dbver != old_dbver
+                or schema_refs is None
+                or not schema_refs.isdisjoint(affected_obj_ids)
+            ):
+                del self._eql_to_compiled[key]
+            else:
+                self._eql_to_compiled[key] = compiled, self.dbver
+
+        self._sql_to_compiled.clear()
+        if self.result_cache is not None:
+            self.result_cache.clear()
         self._index.invalidate_caches()
 
     cdef _cache_compiled_query(
@@ -243,7 +313,86 @@ cdef class Database:
 
         self._eql_to_compiled[key] = compiled, dbver
 
-    def cache_compiled_sql(self, key, compiled: list[str]):
+        if dbver == self.dbver and self.schema_version is not None:
+            cache = self.server.persistent_query_cache
+            if cache is not None:
+                persistent_key = self._persistent_cache_key(key)
+                if persistent_key is not None:
+                    # The cache pickles the entries in its own thread.
+                    cache.store(
+                        self.name,
+                        self.schema_version,
+                        persistent_key,
+                        compiled,
+                    )
+
+    cdef _persistent_cache_key(self, key):
+        # The in-memory cache key is not stable across server restarts,
+        # so build a tuple of its primitive parts instead.  Queries
+        # compiled with a non-default session config are not persisted.
+        query_req, modaliases, session_config = key
+        if session_config:
+            return None
+
+        index = self._index
+        config_src = (index._comp_sys_config, self.db_config)
+        if (
+            self._persistent_config_src is None
+            or self._persistent_config_src[0] is not config_src[0]
+            or self._persistent_config_src[1] is not config_src[1]
+        ):
+            comp_db_config = config.get_compilation_config(
+                self.db_config, spec=index._sys_config_spec)
+            self._persistent_config_key = (
+                tuple(sorted(
+                    (k, repr(v.value))
+                    for k, v in index._comp_sys_config.items()
+                )),
+                tuple(sorted(
+                    (k, repr(v.value)) for k, v in comp_db_config.items()
+                )),
+            )
+            self._persistent_config_src = config_src
+
+        return (
+            query_req.source.cache_key(),
+            query_req.protocol_version,
+            query_req.output_format,
+            query_req.input_format,
+            query_req.expect_one,
+            query_req.implicit_limit,
+            query_req.inline_typeids,
+            query_req.inline_typenames,
+            query_req.inline_objectids,
+            tuple(sorted((k or '', v) for k, v in modaliases.items())),
+            self._persistent_config_key,
+        )
+
+    cdef _lookup_persisted_query(self, key):
+        persistent_key = self._persistent_cache_key(key)
+        if persistent_key is None:
+            return None
+        query_unit_group = self._persisted_queries.pop(persistent_key, None)
+        if query_unit_group is None:
+            return None
+
+        self._eql_to_compiled[key] = query_unit_group, self.dbver
+        metrics.edgeql_query_persistent_cache_hits.inc(
+            1.0, self.tenant.get_instance_name())
+        return query_unit_group
+
+    async def load_persisted_queries(self):
+        cache = self.server.persistent_query_cache
+        schema_version = self.schema_version
+        if cache is None or schema_version is None:
+            return
+
+        entries = await cache.load(self.name, schema_version)
+        # The schema could have changed while we were loading.
+        if self.schema_version == schema_version:
+            self._persisted_queries = entries
+
+    def cache_compiled_sql(self, key, compiled):
         existing, dbver = self._sql_to_compiled.get(key, DICTDEFAULT)
         if existing is not None and dbver == self.dbver:
             # We already have a cached query for a more recent DB version.
@@ -340,6 +489,8 @@ cdef class DatabaseConnectionView:
         self._in_tx_with_sysconfig = False
         self._in_tx_with_dbconfig = False
         self._in_tx_with_set = False
+        self._in_tx_with_writes = False
+        self._in_tx_write_refs = set()
         self._in_tx_user_schema_pickle = None
         self._in_tx_global_schema_pickle = None
         self._in_tx_new_types = {}
@@ -348,6 +499,30 @@ cdef class DatabaseConnectionView:
         self._tx_error = False
         self._in_tx_dbver = 0
 
+    cdef _on_data_write(self, query_unit):
+        # Record data modifications for the invalidation of the query
+        # result cache.  Writes made in a transaction only become visible
+        # to others when it is committed.
+        if (
+            self._db.result_cache is None
+            or not query_unit.capabilities & enums.Capability.MODIFICATIONS
+        ):
+            return
+
+        if self._in_tx:
+            self._in_tx_with_writes = True
+            if self._in_tx_write_refs is not None:
+                if query_unit.write_refs is None:
+                    self._in_tx_write_refs = None
+                else:
+                    self._in_tx_write_refs.update(query_unit.write_refs)
+        else:
+            self._db.result_cache.on_write(query_unit.write_refs)
+
+    cdef _commit_data_writes(self):
+        if self._in_tx_with_writes and self._db.result_cache is not None:
+            self._db.result_cache.on_write(self._in_tx_write_refs)
+
     cdef clear_tx_error(self):
         self._tx_error = False
 
@@ -703,6 +878,10 @@ cdef class DatabaseConnectionView:
                 return self._in_tx_dbver
             return self._db.dbver
 
+    property result_cache:
+        def __get__(self):
+            return self._db.result_cache
+
     @property
     def server(self):
         return self._db._index._server
@@ -738,6 +917,9 @@ cdef class DatabaseConnectionView:
         if query_unit_group is not None and qu_dbver != self._db.dbver:
             query_unit_group = None
 
+        if query_unit_group is None and self._db._persisted_queries:
+            query_unit_group = self._db._lookup_persisted_query(key)
+
         return query_unit_group
 
     cdef tx_error(self):
@@ -803,6 +985,8 @@ cdef class DatabaseConnectionView:
     cdef on_success(self, query_unit, new_types):
         side_effects = 0
 
+        self._on_data_write(query_unit)
+
         if not self._in_tx:
             if new_types:
                 self._db._update_backend_ids(new_types)
@@ -814,7 +998,10 @@ cdef class DatabaseConnectionView:
                     query_unit.ext_config_settings,
                     pickle.loads(query_unit.cached_reflection)
                         if query_unit.cached_reflection is not None
-                        else None
+                        else None,
+                    affected_obj_ids=query_unit.affected_obj_ids,
+                    schema_version=query_unit.user_schema_version,
+                    schema_delta=query_unit.user_schema_delta,
                 )
                 side_effects |= SideEffects.SchemaChanges
             if query_unit.system_config:
@@ -856,7 +1043,10 @@ cdef class DatabaseConnectionView:
                     query_unit.ext_config_settings,
                     pickle.loads(query_unit.cached_reflection)
                         if query_unit.cached_reflection is not None
-                        else None
+                        else None,
+                    affected_obj_ids=query_unit.affected_obj_ids,
+                    schema_version=query_unit.user_schema_version,
+                    schema_delta=query_unit.user_schema_delta,
                 )
                 side_effects |= SideEffects.SchemaChanges
             if self._in_tx_with_sysconfig:
@@ -872,6 +1062,7 @@ cdef class DatabaseConnectionView:
                 self._db._index.update_global_schema(query_unit.global_schema)
                 self._db.tenant.set_roles(query_unit.roles)
 
+            self._commit_data_writes()
             self._reset_tx_state()
 
         elif query_unit.tx_rollback:
@@ -891,6 +1082,9 @@ cdef class DatabaseConnectionView:
         global_schema,
         roles,
         cached_reflection,
+        affected_obj_ids,
+        schema_version,
+        schema_delta,
     ):
         assert self._in_tx
         side_effects = 0
@@ -908,7 +1102,10 @@ cdef class DatabaseConnectionView:
                 ext_config_settings,
                 pickle.loads(cached_reflection)
                     if cached_reflection is not None
-                    else None
+                    else None,
+                affected_obj_ids=affected_obj_ids,
+                schema_version=schema_version,
+                schema_delta=schema_delta,
             )
             side_effects |= SideEffects.SchemaChanges
         if self._in_tx_with_sysconfig:
@@ -924,6 +1121,7 @@ cdef class DatabaseConnectionView:
             self._db._index.update_global_schema(global_schema)
             self._db.tenant.set_roles(roles)
 
+        self._commit_data_writes()
         self._reset_tx_state()
         return side_effects
 
@@ -983,7 +1181,15 @@ cdef class DatabaseConnectionView:
             dbver = self._db.dbver
 
             try:
-                query_unit_group = await self._compile(query_req)
+                if (
+                    cached_globally
+                    or not self._query_cache_enabled
+                    or self.in_tx()
+                ):
+                    query_unit_group = await self._compile(query_req)
+                else:
+                    query_unit_group, cached = await self._compile_coalesced(
+                        query_req, dbver)
             except (errors.EdgeQLSyntaxError, errors.InternalServerError):
                 raise
             except errors.EdgeDBError:
@@ -1038,6 +1244,43 @@ cdef class DatabaseConnectionView:
             extra_blobs=source.extra_blobs(),
         )
 
+    async def _compile_coalesced(
+        self,
+        query_req: QueryRequestInfo,
+        dbver,
+    ):
+        # Concurrent cache misses of the same query outside of
+        # transactions are compiled only once: later callers wait
+        # for the result of the first compilation.  Returns the
+        # compiled query and whether it came from another caller.
+        key = (
+            query_req, self.get_modaliases(), self.get_session_config(), dbver
+        )
+        pending = self._db._pending_compiles
+        fut = pending.get(key)
+        if fut is not None:
+            query_unit_group = await asyncio.shield(fut)
+            # Only cacheable results are independent of the connection
+            # state, anything else must be compiled by this connection.
+            if query_unit_group is not None and query_unit_group.cacheable:
+                metrics.edgeql_query_compilations_coalesced.inc(
+                    1.0, self.tenant.get_instance_name())
+                return query_unit_group, True
+            return await self._compile(query_req), False
+
+        fut = asyncio.get_running_loop().create_future()
+        pending[key] = fut
+        query_unit_group = None
+        try:
+            query_unit_group = await self._compile(query_req)
+        finally:
+            # On errors waiters get None and compile the query themselves.
+            fut.set_result(query_unit_group)
+            if pending.get(key) is fut:
+                del pending[key]
+
+        return query_unit_group, False
+
     async def _compile(
         self,
         query_req: QueryRequestInfo,
@@ -1061,6 +1304,8 @@ cdef class DatabaseConnectionView:
                     query_req.inline_objectids,
                     query_req.input_format is compiler.InputFormat.JSON,
                     self.in_tx_error(),
+                    client_id=self.tenant.client_id,
+                    dbname=self.dbname,
                 )
             else:
                 result = await compiler_pool.compile(
@@ -1221,6 +1466,7 @@ cdef class DatabaseIndex:
         backend_ids,
         extensions,
         ext_config_settings,
+        schema_version=None,
     ):
         cdef Database db
         db = self._dbs.get(dbname)
@@ -1232,6 +1478,7 @@ cdef class DatabaseIndex:
                 reflection_cache,
                 backend_ids,
                 db_config,
+                schema_version=schema_version,
             )
         else:
             db = Database(
@@ -1243,6 +1490,7 @@ cdef class DatabaseIndex:
                 backend_ids=backend_ids,
                 extensions=extensions,
                 ext_config_settings=ext_config_settings,
+                schema_version=schema_version,
             )
             self._dbs[dbname] = db
         return db
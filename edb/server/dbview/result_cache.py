@@ -0,0 +1,124 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright 2024-present MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+"""Cache of the results of read-only queries of a database."""
+
+
+from __future__ import annotations
+from typing import *
+
+import time
+import uuid
+
+from edb.common import lru
+
+
+class ResultCache:
+
+    # Entries are invalidated lazily.  Every write recorded with
+    # `on_write()` gets the next number of a write sequence, and the
+    # cache remembers the last write to every object type (or to
+    # all of them if the written types are unknown).  An entry is valid
+    # as long as none of the types it was read from was written after
+    # the result was obtained, which is tracked by the write sequence
+    # number taken *before* running the query, so that writes racing
+    # with the query invalidate its result too.
+
+    __slots__ = (
+        '_entries', '_ttl', '_max_entry_size',
+        '_write_seq', '_last_write', '_last_global_write',
+    )
+
+    def __init__(
+        self,
+        *,
+        maxsize: int,
+        ttl: float,
+        max_entry_size: int,
+    ) -> None:
+        self._entries = lru.LRUMapping(maxsize=maxsize)
+        self._ttl = ttl
+        self._max_entry_size = max_entry_size
+        self._write_seq = 0
+        self._last_write: dict[uuid.UUID, int] = {}
+        self._last_global_write = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def write_seq(self) -> int:
+        return self._write_seq
+
+    def _is_written_after(
+        self, refs: FrozenSet[uuid.UUID], seq: int
+    ) -> bool:
+        if self._last_global_write > seq:
+            return True
+        last_write = self._last_write
+        for ref in refs:
+            if last_write.get(ref, 0) > seq:
+                return True
+        return False
+
+    def get(self, key: Hashable, dbver: int) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        entry_dbver, refs, seq, expires_at, data = entry
+        if (
+            entry_dbver != dbver
+            or time.monotonic() >= expires_at
+            or self._is_written_after(refs, seq)
+        ):
+            del self._entries[key]
+            return None
+        return data
+
+    def put(
+        self,
+        key: Hashable,
+        dbver: int,
+        refs: FrozenSet[uuid.UUID],
+        data: bytes,
+        seq: int,
+    ) -> bool:
+        # `seq` is the value of `write_seq()` before the query was run.
+        if len(data) > self._max_entry_size:
+            return False
+        if self._is_written_after(refs, seq):
+            return False
+        expires_at = time.monotonic() + self._ttl
+        self._entries[key] = (dbver, refs, seq, expires_at, data)
+        return True
+
+    def on_write(self, refs: Optional[Iterable[uuid.UUID]]) -> None:
+        # `refs` of None means that any object type could be written.
+        self._write_seq += 1
+        if refs is None:
+            self._last_global_write = self._write_seq
+            # No entry can survive a global write, so there's no need
+            # to keep the rest of the write history either.
+            self._last_write.clear()
+            self._entries.clear()
+        else:
+            for ref in refs:
+                self._last_write[ref] = self._write_seq
+
+    def clear(self) -> None:
+        self._entries.clear()
@@ -54,6 +54,10 @@ BACKEND_COMPILER_TEMPLATE_PROC_RESTART_INTERVAL = 1
 
 _MAX_QUERIES_CACHE = 1000
 
+# Max number of compile requests of a single client (a database of a
+# tenant) waiting for a compiler worker before new ones are rejected.
+COMPILER_POOL_MAX_QUEUED_PER_CLIENT = 1000
+
 _QUERY_ROLLING_AVG_LEN = 10
 _QUERIES_ROLLING_AVG_LEN = 300
 
@@ -70,6 +74,29 @@ MAX_RUNSTATE_DIR_PATH = 104 - MAX_UNIX_SOCKET_PATH_LENGTH - 1
 
 HTTP_PORT_QUERY_CACHE_SIZE = 1000
 
+# The maximum number of GraphQL documents registered by their hash
+# ("persisted queries") the server keeps.
+GRAPHQL_PERSISTED_QUERIES_SIZE = 1000
+
+# The maximum number of operations in a batched GraphQL request.
+MAX_GRAPHQL_BATCH_SIZE = 100
+
+# The size of the body of an HTTP query response at which the server
+# starts sending it with the chunked transfer encoding while the rest
+# of it is still being received from the backend.
+HTTP_RESPONSE_STREAM_THRESHOLD = 64 * 1024
+
+# The default time in seconds a cached query result is served for, and
+# the maximum size in bytes of a query result that is cached.
+DEFAULT_QUERY_RESULT_CACHE_TTL = 60
+MAX_QUERY_RESULT_CACHE_ENTRY_SIZE = 1024 * 1024
+
+# The number of backend connections a dump uses to read the data in
+# parallel unless the client asks for a specific number, and the upper
+# limit on the number of connections a single dump or restore may use.
+DEFAULT_DUMP_JOBS = 4
+MAX_DUMP_RESTORE_JOBS = 16
+
 # The time in seconds the EdgeDB server shall wait between retries to connect
 # to the system database after the connection was broken during runtime.
 SYSTEM_DB_RECONNECT_INTERVAL = 1
@@ -87,3 +114,7 @@ _TLS_CERT_RELOAD_EXP_INTERVAL = 0.1
 
 PGEXT_POSTGRES_VERSION = "13.9"
 PGEXT_POSTGRES_VERSION_NUM = 130009
+
+# Number of compiled statements cached by every SQL connection, on top
+# of the cache shared by all connections to a database.
+PGEXT_CONNECTION_SQL_CACHE_SIZE = 100
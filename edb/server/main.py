@@ -210,6 +210,7 @@ async def _run_server(
             instance_name=args.instance_name,
             max_backend_connections=args.max_backend_connections,
             backend_adaptive_ha=args.backend_adaptive_ha,
+            backend_min_idle_connections=args.backend_min_idle_connections,
         )
         tenant.set_reloadable_files(
             readiness_state_file=args.readiness_state_file,
@@ -222,6 +223,7 @@ async def _run_server(
             compiler_pool_size=args.compiler_pool_size,
             compiler_pool_mode=args.compiler_pool_mode,
             compiler_pool_addr=args.compiler_pool_addr,
+            compiler_pool_shared_schema=args.compiler_pool_shared_schema,
             nethosts=args.bind_addresses,
             netport=args.port,
             listen_sockets=tuple(s for ss in sockets.values() for s in ss),
@@ -240,6 +242,10 @@ async def _run_server(
             disable_dynamic_system_config=args.disable_dynamic_system_config,
             compiler_state=compiler_state,
             tenant=tenant,
+            persistent_query_cache_size=args.persistent_query_cache_size,
+            persistent_query_cache_file=args.persistent_query_cache_file,
+            query_result_cache_size=args.query_result_cache_size,
+            query_result_cache_ttl=args.query_result_cache_ttl,
             use_monitor_fs=args.reload_config_files in [
                 srvargs.ReloadTrigger.Default,
                 srvargs.ReloadTrigger.FileSystemEvent,
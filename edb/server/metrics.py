@@ -32,6 +32,29 @@ current_compiler_processes = registry.new_gauge(
     'Current number of active compiler processes.'
 )
 
+compiler_pool_queue_wait_duration = registry.new_histogram(
+    'compiler_pool_queue_wait_duration',
+    'Time compile requests wait for a compiler process.',
+    unit=prom.Unit.SECONDS,
+)
+
+compiler_pool_queue_rejections = registry.new_counter(
+    'compiler_pool_queue_rejections_total',
+    'Number of compile requests rejected due to too many queued requests.',
+)
+
+compiler_pool_scaling_decisions = registry.new_labeled_counter(
+    'compiler_pool_scaling_decisions_total',
+    'Number of times the on-demand compiler pool was resized.',
+    labels=('decision',),
+)
+
+compiler_processes_rss = registry.new_gauge(
+    'compiler_processes_rss',
+    'Total resident memory of the compiler processes.',
+    unit=prom.Unit.BYTES,
+)
+
 total_backend_connections = registry.new_labeled_counter(
     'backend_connections_total',
     'Total number of backend connections established.',
@@ -57,6 +80,27 @@ backend_connection_establishment_latency = registry.new_labeled_histogram(
     labels=('tenant',),
 )
 
+backend_connection_wait_duration = registry.new_labeled_histogram(
+    'backend_connection_wait_duration',
+    'Time spent waiting for a backend connection from the pool.',
+    unit=prom.Unit.SECONDS,
+    labels=('tenant',),
+)
+
+backend_connection_state_hits = registry.new_labeled_counter(
+    'backend_connection_state_hits_total',
+    'Number of backend connections acquired with the requested session '
+    'state already set.',
+    labels=('tenant',),
+)
+
+backend_connection_state_misses = registry.new_labeled_counter(
+    'backend_connection_state_misses_total',
+    'Number of backend connections acquired that need the requested '
+    'session state to be restored.',
+    labels=('tenant',),
+)
+
 backend_connection_aborted = registry.new_labeled_counter(
     'backend_connections_aborted_total',
     'Number of aborted backend connections.',
@@ -94,6 +138,36 @@ edgeql_query_compilations = registry.new_labeled_counter(
     labels=('tenant', 'path')
 )
 
+edgeql_query_compilations_coalesced = registry.new_labeled_counter(
+    'edgeql_query_compilations_coalesced_total',
+    'Number of query compilations served by a concurrent identical one.',
+    labels=('tenant',),
+)
+
+edgeql_query_persistent_cache_hits = registry.new_labeled_counter(
+    'edgeql_query_persistent_cache_hits_total',
+    'Number of compiled queries loaded from the persistent query cache.',
+    labels=('tenant',),
+)
+
+sql_query_compilations = registry.new_labeled_counter(
+    'sql_query_compilations_total',
+    'Number of compiled/cached SQL queries or scripts.',
+    labels=('tenant', 'path')
+)
+
+query_result_cache_hits = registry.new_labeled_counter(
+    'query_result_cache_hits_total',
+    'Number of queries answered from the query result cache.',
+    labels=('tenant',),
+)
+
+query_result_cache_misses = registry.new_labeled_counter(
+    'query_result_cache_misses_total',
+    'Number of cacheable queries not found in the query result cache.',
+    labels=('tenant',),
+)
+
 edgeql_query_compilation_duration = registry.new_labeled_histogram(
     'edgeql_query_compilation_duration',
     'Time it takes to compile an EdgeQL query or script.',
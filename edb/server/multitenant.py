@@ -58,6 +58,7 @@ TenantConfig = TypedDict(
         "max-backend-connections": int,
         "tenant-id": str,
         "backend-adaptive-ha": bool,
+        "backend-min-idle-connections": int,
         "jwt-sub-allowlist-file": str,
         "jwt-revocation-list-file": str,
         "readiness-state-file": str,
@@ -229,6 +230,9 @@ class MultiTenantServer(server.BaseServer):
             instance_name=conf["instance-name"],
             max_backend_connections=max_conns,
             backend_adaptive_ha=conf.get("backend-adaptive-ha", False),
+            backend_min_idle_connections={
+                None: conf.get("backend-min-idle-connections", 0),
+            },
         )
         tenant.set_reloadable_files(
             readiness_state_file=conf.get("readiness-state-file"),
@@ -398,6 +402,7 @@ async def run_server(
             compiler_pool_size=args.compiler_pool_size,
             compiler_pool_mode=srvargs.CompilerPoolMode.MultiTenant,
             compiler_pool_addr=args.compiler_pool_addr,
+            compiler_pool_shared_schema=args.compiler_pool_shared_schema,
             compiler_pool_tenant_cache_size=(
                 args.compiler_pool_tenant_cache_size
             ),
@@ -163,6 +163,14 @@ cdef class PGConnection:
         object bind_datas, bytes state,
         ssize_t start, ssize_t end, int dbver, object parse_array
     )
+    cdef send_query_pipeline(
+        self, list query_units, list bind_datas, bytes state,
+        int dbver, list parse_array, bint state_sync=*
+    )
+    cdef bint _write_query_unit(
+        self, WriteBuffer out, object query_unit, WriteBuffer bind_data,
+        int dbver, set parsed
+    )
 
     cdef _rewrite_copy_data(
         self,
@@ -173,6 +181,7 @@ cdef class PGConnection:
         tuple elide_cols,
         dict type_id_map,
         tuple data_mending_desc,
+        bint first,
     )
 
     cdef _mend_copy_datum(
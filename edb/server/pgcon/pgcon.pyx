@@ -733,7 +733,10 @@ cdef class PGConnection:
         finally:
             await self.after_command()
 
-    async def wait_for_sync(self):
+    async def wait_for_sync(self, bytes stmt_name=None, int dbver=0):
+        # *stmt_name* is the name of the statement that was parsed before
+        # the Sync, if any; it is recorded as prepared once the backend
+        # confirms it.
         error = None
         try:
             while True:
@@ -746,6 +749,10 @@ cdef class PGConnection:
                     # ErrorResponse
                     er_cls, fields = self.parse_error_message()
                     error = er_cls(fields=fields)
+                elif mtype == b'1' and stmt_name is not None:
+                    # ParseComplete
+                    self.buffer.discard_message()
+                    self.prep_stmts[stmt_name] = dbver
                 else:
                     if not self.parse_notification():
                         if PG_DEBUG or self.debug:
@@ -932,9 +939,6 @@ cdef class PGConnection:
         # the query_unit_group, indicating if each unit is freshly parsed
         cdef:
             WriteBuffer out
-            WriteBuffer buf
-            WriteBuffer bind_data
-            bytes stmt_name
             ssize_t idx = start
 
         out = WriteBuffer.new()
@@ -949,28 +953,100 @@ cdef class PGConnection:
                 raise RuntimeError(
                     "CONFIGURE INSTANCE command is not allowed in scripts"
                 )
-            stmt_name = query_unit.sql_hash
-            if stmt_name:
-                assert len(query_unit.sql) == 1
-                # The same EdgeQL query may show up twice in the same script.
-                # We just need to know and skip if we've already parsed the
-                # same query within current send batch, because self.prep_stmts
-                # will be updated before the next batch, with maybe a different
-                # dbver after DDL.
-                if stmt_name not in parsed and self.before_prepare(
-                    stmt_name, dbver, out
-                ):
-                    buf = WriteBuffer.new_message(b'P')
-                    buf.write_bytestring(stmt_name)
-                    buf.write_bytestring(query_unit.sql[0])
-                    buf.write_int16(0)
-                    out.write_buffer(buf.end_message())
-                    parse_array[idx] = True
-                    parsed.add(stmt_name)
+            if self._write_query_unit(
+                out, query_unit, bind_data, dbver, parsed
+            ):
+                parse_array[idx] = True
+            idx += 1
+
+        if sync:
+            self.write_sync(out)
+        else:
+            out.write_bytes(FLUSH_MESSAGE)
+
+        self.write(out)
+
+    cdef send_query_pipeline(
+        self, list query_units, list bind_datas, bytes state,
+        int dbver, list parse_array, bint state_sync=False
+    ):
+        # Send independent queries in one go, each followed by a SYNC,
+        # so that every query runs in its own implicit transaction.
+        # With *state_sync* the state is restored in a transaction of its
+        # own too, so that it survives a failure of the first query.
+        cdef:
+            WriteBuffer out
+            ssize_t idx = 0
+
+        out = WriteBuffer.new()
+        parsed = set()
+
+        if state is not None:
+            self._build_apply_state_req(state, out)
+            if state_sync:
+                self.write_sync(out)
+
+        for query_unit, bind_data in zip(query_units, bind_datas):
+            if self._write_query_unit(
+                out, query_unit, bind_data, dbver, parsed
+            ):
+                parse_array[idx] = True
+            self.write_sync(out)
+            idx += 1
+
+        self.write(out)
+
+    cdef bint _write_query_unit(
+        self, WriteBuffer out, object query_unit, WriteBuffer bind_data,
+        int dbver, set parsed
+    ):
+        # Returns True if the unit's statement is going to be parsed.
+        cdef:
+            WriteBuffer buf
+            bytes stmt_name
+            bint parse = False
+
+        stmt_name = query_unit.sql_hash
+        if stmt_name:
+            assert len(query_unit.sql) == 1
+            # The same EdgeQL query may show up twice in the same script.
+            # We just need to know and skip if we've already parsed the
+            # same query within current send batch, because self.prep_stmts
+            # will be updated before the next batch, with maybe a different
+            # dbver after DDL.
+            if stmt_name not in parsed and self.before_prepare(
+                stmt_name, dbver, out
+            ):
+                buf = WriteBuffer.new_message(b'P')
+                buf.write_bytestring(stmt_name)
+                buf.write_bytestring(query_unit.sql[0])
+                buf.write_int16(0)
+                out.write_buffer(buf.end_message())
+                parse = True
+                parsed.add(stmt_name)
+
+            buf = WriteBuffer.new_message(b'B')
+            buf.write_bytestring(b'')  # portal name
+            buf.write_bytestring(stmt_name)
+            buf.write_buffer(bind_data)
+            out.write_buffer(buf.end_message())
+
+            buf = WriteBuffer.new_message(b'E')
+            buf.write_bytestring(b'')  # portal name
+            buf.write_int32(0)  # limit: 0 - return all rows
+            out.write_buffer(buf.end_message())
+
+        else:
+            for sql in query_unit.sql:
+                buf = WriteBuffer.new_message(b'P')
+                buf.write_bytestring(b'')  # statement name
+                buf.write_bytestring(sql)
+                buf.write_int16(0)
+                out.write_buffer(buf.end_message())
 
                 buf = WriteBuffer.new_message(b'B')
                 buf.write_bytestring(b'')  # portal name
-                buf.write_bytestring(stmt_name)
+                buf.write_bytestring(b'')  # statement name
                 buf.write_buffer(bind_data)
                 out.write_buffer(buf.end_message())
 
@@ -979,33 +1055,7 @@ cdef class PGConnection:
                 buf.write_int32(0)  # limit: 0 - return all rows
                 out.write_buffer(buf.end_message())
 
-            else:
-                for sql in query_unit.sql:
-                    buf = WriteBuffer.new_message(b'P')
-                    buf.write_bytestring(b'')  # statement name
-                    buf.write_bytestring(sql)
-                    buf.write_int16(0)
-                    out.write_buffer(buf.end_message())
-
-                    buf = WriteBuffer.new_message(b'B')
-                    buf.write_bytestring(b'')  # portal name
-                    buf.write_bytestring(b'')  # statement name
-                    buf.write_buffer(bind_data)
-                    out.write_buffer(buf.end_message())
-
-                    buf = WriteBuffer.new_message(b'E')
-                    buf.write_bytestring(b'')  # portal name
-                    buf.write_int32(0)  # limit: 0 - return all rows
-                    out.write_buffer(buf.end_message())
-
-            idx += 1
-
-        if sync:
-            self.write_sync(out)
-        else:
-            out.write_bytes(FLUSH_MESSAGE)
-
-        self.write(out)
+        return parse
 
     async def force_error(self):
         self.before_command()
@@ -2380,7 +2430,10 @@ cdef class PGConnection:
             self.transport.resume_reading()
             await self.after_command()
 
-    async def _restore(self, restore_block, bytes data, dict type_map):
+    async def _restore(self, restore_block, list fragments, dict type_map):
+        # The *fragments* of the block, which must follow each other, are
+        # loaded with a single COPY.  The header of the COPY stream is
+        # only ever prepended to the first one.
         cdef:
             WriteBuffer buf
             WriteBuffer qbuf
@@ -2389,6 +2442,8 @@ cdef class PGConnection:
             char* cbuf
             ssize_t clen
             ssize_t ncols
+            bytes data
+            bint first = True
 
         qbuf = WriteBuffer.new_message(b'Q')
         qbuf.write_bytestring(restore_block.sql_copy_stmt)
@@ -2423,33 +2478,41 @@ cdef class PGConnection:
         if er is not None:
             raise er[0](fields=er[1])
 
-        buf = WriteBuffer.new()
-        cpython.PyBytes_AsStringAndSize(data, &cbuf, &clen)
-        if (
+        rewrite = (
             restore_block.compat_elided_cols
             or any(desc for desc in restore_block.data_mending_desc)
-        ):
-            self._rewrite_copy_data(
-                buf,
-                cbuf,
-                clen,
-                ncols,
-                restore_block.data_mending_desc,
-                type_map,
-                restore_block.compat_elided_cols,
-            )
-        else:
-            if cbuf[0] != b'd':
-                raise RuntimeError('unexpected dump data message structure')
-            ln = <uint32_t>hton.unpack_int32(cbuf + 1)
-            buf.write_byte(b'd')
-            buf.write_int32(ln + len(COPY_SIGNATURE) + 8)
-            buf.write_bytes(COPY_SIGNATURE)
-            buf.write_int32(0)
-            buf.write_int32(0)
-            buf.write_cstr(cbuf + 5, clen - 5)
+        )
+        for data in fragments:
+            buf = WriteBuffer.new()
+            cpython.PyBytes_AsStringAndSize(data, &cbuf, &clen)
+            if rewrite:
+                self._rewrite_copy_data(
+                    buf,
+                    cbuf,
+                    clen,
+                    ncols,
+                    restore_block.data_mending_desc,
+                    type_map,
+                    restore_block.compat_elided_cols,
+                    first,
+                )
+            elif first:
+                if cbuf[0] != b'd':
+                    raise RuntimeError(
+                        'unexpected dump data message structure')
+                ln = <uint32_t>hton.unpack_int32(cbuf + 1)
+                buf.write_byte(b'd')
+                buf.write_int32(ln + len(COPY_SIGNATURE) + 8)
+                buf.write_bytes(COPY_SIGNATURE)
+                buf.write_int32(0)
+                buf.write_int32(0)
+                buf.write_cstr(cbuf + 5, clen - 5)
+            else:
+                # Subsequent fragments continue the same COPY stream.
+                buf.write_cstr(cbuf, clen)
 
-        self.write(buf)
+            self.write(buf)
+            first = False
 
         qbuf = WriteBuffer.new_message(b'c')
         qbuf.end_message()
@@ -2483,8 +2546,12 @@ cdef class PGConnection:
         tuple data_mending_desc,
         dict type_id_map,
         tuple elided_cols,
+        bint first,
     ):
-        """Rewrite the binary COPY stream."""
+        """Rewrite the binary COPY stream.
+
+        The COPY signature is prepended if *first* is set.
+        """
         cdef:
             FRBuffer rbuf
             FRBuffer datum_buf
@@ -2496,7 +2563,6 @@ cdef class PGConnection:
             char copy_msg_byte
             int16_t copy_msg_ncols
             const char *datum
-            bint first = True
             bint received_eof = False
 
         real_ncols = ncols + len(elided_cols)
@@ -2668,10 +2734,10 @@ cdef class PGConnection:
 
         wbuf.write_frbuf(rbuf)
 
-    async def restore(self, restore_block, bytes data, dict type_map):
+    async def restore(self, restore_block, list fragments, dict type_map):
         self.before_command()
         try:
-            await self._restore(restore_block, data, type_map)
+            await self._restore(restore_block, fragments, type_map)
         finally:
             await self.after_command()
 
@@ -78,6 +78,10 @@ cdef class EdgeConnection(frontend.FrontendConnection):
     cdef inline dbview.DatabaseConnectionView get_dbview(self)
 
     cdef dbview.QueryRequestInfo parse_execute_request(self)
+    cdef _get_session_state(self, dbview.DatabaseConnectionView dbv)
+    cdef bint _is_read_only(self, query_unit_group)
+    cdef bint _can_pipeline(self, compiled, bytes in_tid, bytes out_tid)
+    cdef bint _can_cache_result(self, query_unit_group)
     cdef parse_output_format(self, bytes mode)
     cdef parse_cardinality(self, bytes card)
     cdef char render_cardinality(self, query_unit) except -1
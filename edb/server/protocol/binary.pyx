@@ -66,7 +66,9 @@ from edb.server.compiler import errormech
 from edb.server.compiler import enums
 from edb.server.compiler import sertypes
 
+from edb.server.protocol cimport args_ser
 from edb.server.protocol cimport auth_helpers
+from edb.server.protocol import dump_compression
 from edb.server.protocol import execute
 from edb.server.protocol cimport frontend
 from edb.server.pgcon cimport pgcon
@@ -75,6 +77,8 @@ from edb.server import metrics
 
 from edb.schema import objects as s_obj
 
+from edb.pgsql import common as pg_common
+
 from edb import errors
 from edb.errors import base as base_errors, EdgeQLSyntaxError
 from edb.common import debug
@@ -113,6 +117,8 @@ DEF QUERY_HEADER_ALLOW_CAPABILITIES = 0xFF04
 DEF QUERY_HEADER_EXPLICIT_OBJECTIDS = 0xFF05
 
 DEF QUERY_HEADER_DUMP_SECRETS = 0xFF10
+DEF QUERY_HEADER_DUMP_COMPRESSION = 0xFF11
+DEF QUERY_HEADER_DUMP_JOBS = 0xFF12
 
 DEF SERVER_HEADER_CAPABILITIES = 0x1001
 
@@ -137,6 +143,15 @@ def parse_catalog_version_header(value: bytes) -> uint64_t:
     return catver
 
 
+def unwrap_task_group_error(ex):
+    # The jobs of a dump or restore run in a TaskGroup, which wraps their
+    # errors into an ExceptionGroup.  Report the error that made it fail,
+    # as a single job would have.
+    while isinstance(ex, BaseExceptionGroup):
+        ex = ex.exceptions[0]
+    return ex
+
+
 cdef inline bint parse_boolean(value: bytes, header: str):
     cdef bytes lower = value.lower()
     if lower == b'true':
@@ -149,6 +164,43 @@ cdef inline bint parse_boolean(value: bytes, header: str):
         )
 
 
+@cython.final
+cdef class ResultRecorder(frontend.AbstractFrontendConnection):
+    # Passes the data messages of a query result through to the client
+    # while keeping a copy of them for the query result cache, unless
+    # the result turns out to be too large to be cached.
+
+    cdef:
+        frontend.AbstractFrontendConnection fe_conn
+        WriteBuffer buf
+        ssize_t max_size
+
+    def __cinit__(
+        self,
+        frontend.AbstractFrontendConnection fe_conn,
+        ssize_t max_size,
+    ):
+        self.fe_conn = fe_conn
+        self.buf = WriteBuffer.new()
+        self.max_size = max_size
+
+    cdef write(self, WriteBuffer data):
+        if self.buf is not None:
+            if self.buf.len() + data.len() > self.max_size:
+                self.buf = None
+            else:
+                self.buf.write_buffer(data)
+        self.fe_conn.write(data)
+
+    cdef flush(self):
+        self.fe_conn.flush()
+
+    cdef get_data(self):
+        if self.buf is None:
+            return None
+        return bytes(self.buf)
+
+
 cdef class EdgeConnection(frontend.FrontendConnection):
 
     def __init__(
@@ -479,7 +531,7 @@ cdef class EdgeConnection(frontend.FrontendConnection):
             raise ConnectionAbortedError
 
         dbv = self.get_dbview()
-        conn = await self.get_pgcon()
+        conn = await self.get_pgcon(self._get_session_state(dbv))
 
         try:
             await execute.execute_script(
@@ -492,6 +544,13 @@ cdef class EdgeConnection(frontend.FrontendConnection):
         finally:
             self.maybe_release_pgcon(conn)
 
+    cdef _get_session_state(self, dbview.DatabaseConnectionView dbv):
+        # The backend session state the query is going to need, so that
+        # a connection that already has it can be picked from the pool.
+        if dbv.in_tx():
+            return None
+        return dbv.serialize_state()
+
     def _tokenize(self, eql: bytes) -> edgeql.Source:
         text = eql.decode('utf-8')
         if debug.flags.edgeql_disable_normalization:
@@ -736,7 +795,7 @@ cdef class EdgeConnection(frontend.FrontendConnection):
             pgcon.PGConnection conn
 
         dbv = self.get_dbview()
-        conn = await self.get_pgcon()
+        conn = await self.get_pgcon(self._get_session_state(dbv))
         try:
             await execute.execute(
                 conn,
@@ -852,6 +911,17 @@ cdef class EdgeConnection(frontend.FrontendConnection):
         self.flush()
 
     async def execute(self):
+        compiled, in_tid, out_tid, args = await self._parse_execute()
+
+        if (
+            self._can_pipeline(compiled, in_tid, out_tid)
+            and self.buffer.take_message_type(b'O')
+        ):
+            await self._execute_pipeline(compiled, args)
+        else:
+            await self._execute_compiled(compiled, in_tid, out_tid, args)
+
+    async def _parse_execute(self):
         cdef:
             dbview.QueryRequestInfo query_req
             dbview.DatabaseConnectionView _dbview
@@ -912,6 +982,24 @@ cdef class EdgeConnection(frontend.FrontendConnection):
             "disabled by the client",
         )
 
+        if self.debug:
+            self.debug_print('EXECUTE', query_req.source.text())
+
+        return compiled, in_tid, out_tid, args
+
+    async def _execute_compiled(
+        self,
+        dbview.CompiledQuery compiled,
+        bytes in_tid,
+        bytes out_tid,
+        bytes args,
+    ):
+        cdef:
+            dbview.DatabaseConnectionView _dbview
+
+        _dbview = self.get_dbview()
+        query_unit_group = compiled.query_unit_group
+
         if query_unit_group.in_type_id != in_tid:
             self.write(self.make_command_data_description_msg(compiled))
             raise errors.ParameterTypeMismatchError(
@@ -924,9 +1012,6 @@ cdef class EdgeConnection(frontend.FrontendConnection):
             # so provide one.
             self.write(self.make_command_data_description_msg(compiled))
 
-        if self.debug:
-            self.debug_print('EXECUTE', query_req.source.text())
-
         force_script = any(x.needs_readback for x in query_unit_group)
         if (
             _dbview.in_tx_error()
@@ -935,6 +1020,8 @@ cdef class EdgeConnection(frontend.FrontendConnection):
         ):
             assert len(query_unit_group) == 1
             await self._execute_rollback(compiled)
+        elif self._can_cache_result(query_unit_group):
+            await self._execute_cached(compiled, args)
         elif len(query_unit_group) > 1 or force_script:
             await self._execute_script(compiled, args)
         else:
@@ -947,7 +1034,10 @@ cdef class EdgeConnection(frontend.FrontendConnection):
         if self._cancelled:
             raise ConnectionAbortedError
 
-        if _dbview.is_state_desc_changed():
+        self._complete_execute(compiled)
+
+    def _complete_execute(self, compiled):
+        if self.get_dbview().is_state_desc_changed():
             self.write(self.make_state_data_description_msg())
         self.write(
             self.make_command_complete_msg(
@@ -957,6 +1047,175 @@ cdef class EdgeConnection(frontend.FrontendConnection):
         )
         self.flush()
 
+    cdef bint _is_read_only(self, query_unit_group):
+        # Whether the query is a single SELECT-like statement that runs
+        # outside of a transaction and has no effect other than its result.
+        if (
+            len(query_unit_group) != 1
+            or query_unit_group.capabilities
+            or self.get_dbview().in_tx()
+        ):
+            return False
+
+        query_unit = query_unit_group[0]
+        return bool(
+            query_unit.sql
+            and not query_unit.needs_readback
+            and not query_unit.is_explain
+            and not query_unit.config_ops
+            and not query_unit.append_rollback
+        )
+
+    cdef bint _can_pipeline(self, compiled, bytes in_tid, bytes out_tid):
+        # Only read-only queries are pipelined: executing the ones that
+        # follow a failed query is harmless, and their results are simply
+        # not sent to the client.
+        query_unit_group = compiled.query_unit_group
+        return (
+            query_unit_group.in_type_id == in_tid
+            and query_unit_group.out_type_id == out_tid
+            and self._is_read_only(query_unit_group)
+        )
+
+    cdef bint _can_cache_result(self, query_unit_group):
+        # Volatile queries may return a different result every time,
+        # and the results of queries with unknown dependencies can't
+        # be invalidated on writes.
+        if (
+            self.get_dbview().result_cache is None
+            or not self._is_read_only(query_unit_group)
+        ):
+            return False
+
+        query_unit = query_unit_group[0]
+        return (
+            query_unit.volatility is not None
+            and not query_unit.volatility.is_volatile()
+            and query_unit.schema_refs is not None
+        )
+
+    async def _execute_cached(self, dbview.CompiledQuery compiled, args):
+        cdef:
+            dbview.DatabaseConnectionView dbv
+            pgcon.PGConnection conn
+            WriteBuffer bind_data
+            WriteBuffer buf
+            ResultRecorder recorder
+
+        dbv = self.get_dbview()
+        result_cache = dbv.result_cache
+        query_unit = compiled.query_unit_group[0]
+        state = dbv.serialize_state()
+        # Globals are passed as query arguments, and so are part of
+        # the key along with the session config in the state.
+        bind_data = args_ser.recode_bind_args(dbv, compiled, args)
+        key = (query_unit.sql, query_unit.out_type_id, bytes(bind_data), state)
+        dbver = dbv.dbver
+
+        data = result_cache.get(key, dbver)
+        if data is not None:
+            metrics.query_result_cache_hits.inc(1.0, self.get_tenant_label())
+            state_serializer = compiled.query_unit_group.state_serializer
+            if state_serializer is not None:
+                dbv.set_state_serializer(state_serializer)
+            buf = WriteBuffer.new()
+            buf.write_bytes(data)
+            self.write(buf)
+            return
+
+        metrics.query_result_cache_misses.inc(1.0, self.get_tenant_label())
+        # Writes that happen while the query is running may or may not
+        # be seen by it, so the result is only cached if there are none.
+        seq = result_cache.write_seq()
+        recorder = ResultRecorder(
+            self, edbdef.MAX_QUERY_RESULT_CACHE_ENTRY_SIZE)
+
+        conn = await self.get_pgcon(state)
+        try:
+            await execute.execute(
+                conn,
+                dbv,
+                compiled,
+                args,
+                fe_conn=recorder,
+                use_prep_stmt=bool(query_unit.sql_hash),
+            )
+        finally:
+            self.maybe_release_pgcon(conn)
+
+        data = recorder.get_data()
+        if data is not None:
+            result_cache.put(key, dbver, query_unit.schema_refs, data, seq)
+
+    async def _execute_pipeline(self, dbview.CompiledQuery compiled, args):
+        # The client has sent more Execute messages without waiting for
+        # the results of this one.  Run as many of them as possible with
+        # a single round trip to the backend; the Execute message
+        # following *compiled* has already been taken from the buffer.
+        cdef:
+            dbview.DatabaseConnectionView _dbview
+
+        _dbview = self.get_dbview()
+        state = _dbview.serialize_state()
+        batch = [compiled]
+        bind_datas = [args_ser.recode_bind_args(_dbview, compiled, args)]
+        pending = None
+
+        try:
+            while True:
+                compiled, in_tid, out_tid, args = await self._parse_execute()
+                if (
+                    not self._can_pipeline(compiled, in_tid, out_tid)
+                    or _dbview.serialize_state() != state
+                ):
+                    pending = (compiled, in_tid, out_tid, args)
+                    break
+
+                # Globals are passed as query arguments, so the arguments
+                # must be encoded with the state of their own message.
+                batch.append(compiled)
+                bind_datas.append(
+                    args_ser.recode_bind_args(_dbview, compiled, args))
+
+                if (
+                    len(batch) == MAX_EXECUTE_PIPELINE_DEPTH
+                    or not self.buffer.take_message_type(b'O')
+                ):
+                    break
+        except Exception:
+            await self._run_pipeline(batch, bind_datas, state)
+            raise
+
+        await self._run_pipeline(batch, bind_datas, state)
+
+        if pending is not None:
+            await self._execute_compiled(*pending)
+
+    async def _run_pipeline(self, list batch, list bind_datas, bytes state):
+        # The dbview already has the state of the message following the
+        # batch, so the state of the batch is passed along explicitly.
+        cdef:
+            dbview.DatabaseConnectionView dbv
+            pgcon.PGConnection conn
+
+        dbv = self.get_dbview()
+        conn = await self.get_pgcon(state)
+        try:
+            await execute.execute_pipeline(
+                conn,
+                dbv,
+                batch,
+                bind_datas,
+                state,
+                fe_conn=self,
+                on_complete=self._complete_execute,
+            )
+        finally:
+            self.maybe_release_pgcon(conn)
+
+        if self._cancelled:
+            raise ConnectionAbortedError
+
     async def sync(self):
         self.buffer.consume_message()
         self.write(self.sync_status())
@@ -1259,6 +1518,17 @@ cdef class EdgeConnection(frontend.FrontendConnection):
 
         headers = self.parse_headers()
         include_secrets = headers.get(QUERY_HEADER_DUMP_SECRETS) == b'\x01'
+        compression = dump_compression.negotiate(
+            headers.get(QUERY_HEADER_DUMP_COMPRESSION))
+        jobs_header = headers.get(QUERY_HEADER_DUMP_JOBS)
+        if jobs_header is None:
+            njobs = edbdef.DEFAULT_DUMP_JOBS
+        elif len(jobs_header) == 2:
+            njobs = int.from_bytes(jobs_header, 'big')
+        else:
+            raise errors.BinaryProtocolError(
+                f'DUMP_JOBS header must be exactly 2 bytes'
+            )
 
         self.buffer.finish_message()
 
@@ -1274,6 +1544,8 @@ cdef class EdgeConnection(frontend.FrontendConnection):
         dbname = _dbview.dbname
         tenant = self.tenant
         pgcon = await tenant.acquire_pgcon(dbname)
+        worker_pgcons = []
+        dumped = False
         self._in_dump_restore = True
         try:
             # To avoid having races, we want to:
@@ -1283,8 +1555,8 @@ cdef class EdgeConnection(frontend.FrontendConnection):
             #   2. in the compiler process we connect to that transaction
             #      and re-introspect the schema in it.
             #
-            #   3. all dump worker pg connection would work on the same
-            #      connection.
+            #   3. all dump worker pg connections import the snapshot
+            #      of that transaction.
             #
             # This guarantees that every pg connection and the compiler work
             # with the same DB state.
@@ -1365,52 +1637,70 @@ cdef class EdgeConnection(frontend.FrontendConnection):
             self.flush()
 
             blocks_queue = collections.deque(blocks)
-            output_queue = asyncio.Queue(maxsize=2)
+            njobs = max(
+                min(self._get_dump_restore_jobs(njobs), len(blocks)), 1)
+
+            if njobs > 1:
+                # Read the data over several backend connections, all
+                # looking at the snapshot of the main dump transaction.
+                snapshot_id = await pgcon.sql_fetch_val(
+                    b'SELECT pg_export_snapshot();')
+                snapshot_id = pg_common.quote_literal(snapshot_id.decode())
+                for _ in range(njobs - 1):
+                    worker_pgcon = await tenant.acquire_pgcon(dbname)
+                    worker_pgcons.append(worker_pgcon)
+                    await worker_pgcon.sql_execute(
+                        f'''START TRANSACTION
+                                ISOLATION LEVEL REPEATABLE READ
+                                READ ONLY;
+                            SET TRANSACTION SNAPSHOT {snapshot_id};
+                            SET LOCAL idle_in_transaction_session_timeout = 0;
+                            SET LOCAL statement_timeout = 0;
+                        '''.encode(),
+                    )
 
-            async with asyncio.TaskGroup() as g:
-                g.create_task(pgcon.dump(
-                    blocks_queue,
-                    output_queue,
-                    DUMP_BLOCK_SIZE,
-                ))
-
-                nstops = 0
-                while True:
-                    if self._cancelled:
-                        raise ConnectionAbortedError
-
-                    out = await output_queue.get()
-                    if out is None:
-                        nstops += 1
-                        if nstops == 1:
-                            # we only have one worker right now
-                            break
-                    else:
-                        block, block_num, data = out
-
-                        msg_buf = WriteBuffer.new_message(b'=')
-                        msg_buf.write_int16(4)  # number of headers
-
-                        msg_buf.write_int16(DUMP_HEADER_BLOCK_TYPE)
-                        msg_buf.write_len_prefixed_bytes(
-                            DUMP_HEADER_BLOCK_TYPE_DATA)
-                        msg_buf.write_int16(DUMP_HEADER_BLOCK_ID)
-                        msg_buf.write_len_prefixed_bytes(
-                            block.schema_object_id.bytes)
-                        msg_buf.write_int16(DUMP_HEADER_BLOCK_NUM)
-                        msg_buf.write_len_prefixed_bytes(
-                            str(block_num).encode())
-                        msg_buf.write_int16(DUMP_HEADER_BLOCK_DATA)
-                        msg_buf.write_len_prefixed_buffer(data)
-
-                        self._transport.write(memoryview(msg_buf.end_message()))
-                        if self._write_waiter:
-                            await self._write_waiter
+            output_queue = asyncio.Queue(maxsize=2 * njobs)
+
+            try:
+                async with asyncio.TaskGroup() as g:
+                    for worker_pgcon in (pgcon, *worker_pgcons):
+                        if compression is not None:
+                            # Compress the fragments in threads, so that it
+                            # is not bound by a single core.  There is one
+                            # compressor per connection, as the fragments
+                            # of a block must stay in order.
+                            data_queue = asyncio.Queue(maxsize=2)
+                            g.create_task(self._compress_dump_blocks(
+                                data_queue,
+                                output_queue,
+                                compression,
+                            ))
+                        else:
+                            data_queue = output_queue
 
+                        g.create_task(worker_pgcon.dump(
+                            blocks_queue,
+                            data_queue,
+                            DUMP_BLOCK_SIZE,
+                        ))
+
+                    await self._write_dump_blocks(
+                        output_queue, njobs, compression)
+            except BaseExceptionGroup as ex:
+                raise unwrap_task_group_error(ex)
+
+            for worker_pgcon in worker_pgcons:
+                await worker_pgcon.sql_execute(b"ROLLBACK;")
             await pgcon.sql_execute(b"ROLLBACK;")
+            dumped = True
 
         finally:
             self._in_dump_restore = False
+            for worker_pgcon in worker_pgcons:
+                # Don't return connections with a possibly open
+                # transaction to the pool.
+                tenant.release_pgcon(
+                    dbname, worker_pgcon, discard=not dumped)
             tenant.release_pgcon(dbname, pgcon)
 
         msg_buf = WriteBuffer.new_message(b'C')
@@ -1422,6 +1712,72 @@ cdef class EdgeConnection(frontend.FrontendConnection):
         self.write(msg_buf.end_message())
         self.flush()
 
+    async def _write_dump_blocks(self, output_queue, njobs, compression):
+        cdef WriteBuffer msg_buf
+
+        nstops = 0
+        while True:
+            if self._cancelled:
+                raise ConnectionAbortedError
+
+            out = await output_queue.get()
+            if out is None:
+                nstops += 1
+                if nstops == njobs:
+                    break
+                continue
+
+            block, block_num, data = out
+
+            msg_buf = WriteBuffer.new_message(b'=')
+            # number of headers
+            msg_buf.write_int16(4 if compression is None else 5)
+
+            msg_buf.write_int16(DUMP_HEADER_BLOCK_TYPE)
+            msg_buf.write_len_prefixed_bytes(DUMP_HEADER_BLOCK_TYPE_DATA)
+            msg_buf.write_int16(DUMP_HEADER_BLOCK_ID)
+            msg_buf.write_len_prefixed_bytes(block.schema_object_id.bytes)
+            msg_buf.write_int16(DUMP_HEADER_BLOCK_NUM)
+            msg_buf.write_len_prefixed_bytes(str(block_num).encode())
+            if compression is not None:
+                msg_buf.write_int16(DUMP_HEADER_BLOCK_COMPRESSION)
+                msg_buf.write_len_prefixed_bytes(compression)
+                msg_buf.write_int16(DUMP_HEADER_BLOCK_DATA)
+                msg_buf.write_len_prefixed_bytes(data)
+            else:
+                msg_buf.write_int16(DUMP_HEADER_BLOCK_DATA)
+                msg_buf.write_len_prefixed_buffer(data)
+
+            self._transport.write(memoryview(msg_buf.end_message()))
+            if self._write_waiter:
+                await self._write_waiter
+
+    def _get_dump_restore_jobs(self, requested):
+        # Don't let a single dump or restore take away the backend
+        # connections needed to serve the regular traffic.
+        return max(1, min(
+            requested,
+            edbdef.MAX_DUMP_RESTORE_JOBS,
+            self.tenant.suggested_client_pool_size // 10,
+        ))
+
+    async def _compress_dump_blocks(self, input_queue, output_queue, algo):
+        loop = asyncio.get_running_loop()
+        while True:
+            out = await input_queue.get()
+            if out is None:
+                await output_queue.put(None)
+                return
+
+            block, block_num, data = out
+            view = memoryview(data)
+            try:
+                data = await loop.run_in_executor(
+                    None, dump_compression.compress, algo, view)
+            finally:
+                view.release()
+            await output_queue.put((block, block_num, data))
+
     async def _execute_utility_stmt(self, eql: str, pgcon):
         cdef dbview.DatabaseConnectionView _dbview
 
@@ -1461,7 +1817,6 @@ cdef class EdgeConnection(frontend.FrontendConnection):
     async def restore(self):
         cdef:
             WriteBuffer msg_buf
-            char mtype
             dbview.DatabaseConnectionView _dbview
 
         _dbview = self.get_dbview()
@@ -1473,7 +1828,7 @@ cdef class EdgeConnection(frontend.FrontendConnection):
             await _dbview.reload_state_serializer()
 
         self.reject_headers()
-        self.buffer.read_int16()  # discard -j level
+        requested_jobs = self.buffer.read_int16()
 
         # Now parse the embedded dump header message:
 
@@ -1528,6 +1883,8 @@ cdef class EdgeConnection(frontend.FrontendConnection):
         dbname = _dbview.dbname
         tenant = self.tenant
         pgcon = await tenant.acquire_pgcon(dbname)
+        worker_pgcons = []
+        schema_committed = False
 
         self._in_dump_restore = True
         try:
@@ -1602,77 +1959,96 @@ cdef class EdgeConnection(frontend.FrontendConnection):
 
             await pgcon.sql_execute(disable_trigger_q.encode())
 
+            # Maintaining the indexes row by row is much slower than
+            # building them once the data is loaded.
+            deferred_indexes = await self._defer_restore_indexes(
+                pgcon, tables)
+
+            njobs = max(min(
+                self._get_dump_restore_jobs(requested_jobs),
+                len(restore_blocks),
+            ), 1)
+
+            if njobs > 1:
+                # The other backend connections must see the restored
+                # schema, so it has to be committed before the data is
+                # loaded, and the restore is not atomic anymore.
+                await self._execute_utility_stmt('COMMIT', pgcon)
+                schema_committed = True
+                for _ in range(njobs - 1):
+                    worker_pgcons.append(await tenant.acquire_pgcon(dbname))
+                for worker_pgcon in (pgcon, *worker_pgcons):
+                    await worker_pgcon.sql_execute(
+                        b'''
+                            START TRANSACTION;
+                            SET LOCAL idle_in_transaction_session_timeout = 0;
+                            SET LOCAL statement_timeout = 0;
+                        ''',
+                    )
+
             # Send "RestoreReadyMessage"
             msg = WriteBuffer.new_message(b'+')
             msg.write_int16(0)  # no headers
-            msg.write_int16(1)  # -j1
+            msg.write_int16(njobs)  # -j level
             self.write(msg.end_message())
             self.flush()
 
-            while True:
-                if not self.buffer.take_message():
-                    # Don't report idling when restoring a dump.
-                    # This is an edge case and the client might be
-                    # legitimately slow.
-                    await self.wait_for_message(report_idling=False)
-                mtype = self.buffer.get_message_type()
-
-                if mtype == b'=':
-                    block_type = None
-                    block_id = None
-                    block_num = None
-                    block_data = None
-
-                    num_headers = self.buffer.read_int16()
-                    for _ in range(num_headers):
-                        header = self.buffer.read_int16()
-                        if header == DUMP_HEADER_BLOCK_TYPE:
-                            block_type = self.buffer.read_len_prefixed_bytes()
-                        elif header == DUMP_HEADER_BLOCK_ID:
-                            block_id = self.buffer.read_len_prefixed_bytes()
-                            block_id = pg_UUID(block_id)
-                        elif header == DUMP_HEADER_BLOCK_NUM:
-                            block_num = self.buffer.read_len_prefixed_bytes()
-                        elif header == DUMP_HEADER_BLOCK_DATA:
-                            block_data = self.buffer.read_len_prefixed_bytes()
-
-                    self.buffer.finish_message()
-
-                    if (block_type is None or block_id is None
-                            or block_num is None or block_data is None):
-                        raise errors.ProtocolError('incomplete data block')
-
-                    restore_block = restore_blocks[block_id]
-                    type_id_map = self._build_type_id_map_for_restore_mending(
-                        restore_block)
-                    self._transport.pause_reading()
-                    await pgcon.restore(restore_block, block_data, type_id_map)
-                    self._transport.resume_reading()
-
-                elif mtype == b'.':
-                    self.buffer.finish_message()
-                    break
+            if worker_pgcons:
+                await self._restore_data_parallel(
+                    (pgcon, *worker_pgcons), restore_blocks)
 
-                else:
-                    self.fallthrough()
+                for worker_pgcon in (pgcon, *worker_pgcons):
+                    await worker_pgcon.sql_execute(b'COMMIT')
+                await self._create_deferred_restore_indexes(
+                    (pgcon, *worker_pgcons), deferred_indexes)
 
-            for repopulate_unit in repopulate_units:
-                await pgcon.sql_execute(repopulate_unit.encode())
+                await pgcon.sql_execute(b'START TRANSACTION')
+                for repopulate_unit in repopulate_units:
+                    await pgcon.sql_execute(repopulate_unit.encode())
+                await pgcon.sql_execute(enable_trigger_q.encode())
+                await pgcon.sql_execute(b'COMMIT')
+            else:
+                await self._restore_data(pgcon, restore_blocks)
 
-            await pgcon.sql_execute(enable_trigger_q.encode())
+                await self._create_deferred_restore_indexes(
+                    (pgcon,), deferred_indexes)
+
+                for repopulate_unit in repopulate_units:
+                    await pgcon.sql_execute(repopulate_unit.encode())
+
+                await pgcon.sql_execute(enable_trigger_q.encode())
 
         except Exception:
-            await pgcon.sql_execute(b'ROLLBACK')
-            _dbview.abort_tx()
+            if schema_committed:
+                # The connections may be stuck in the middle of a COPY,
+                # close them to have their transactions rolled back.
+                for worker_pgcon in (pgcon, *worker_pgcons):
+                    if not worker_pgcon.is_healthy():
+                        worker_pgcon.abort()
+                await self._undo_restore_setup(
+                    dbname, enable_trigger_q, deferred_indexes)
+            else:
+                await pgcon.sql_execute(b'ROLLBACK')
+                _dbview.abort_tx()
             raise
 
         else:
-            await self._execute_utility_stmt('COMMIT', pgcon)
+            if not schema_committed:
+                await self._execute_utility_stmt('COMMIT', pgcon)
 
         finally:
             self._transport.resume_reading()
             self._in_dump_restore = False
-            tenant.release_pgcon(dbname, pgcon)
+            for worker_pgcon in worker_pgcons:
+                # Don't return connections with a possibly open
+                # transaction to the pool.
+                tenant.release_pgcon(
+                    dbname,
+                    worker_pgcon,
+                    discard=(
+                        worker_pgcon.in_tx() or not worker_pgcon.connected),
+                )
+            tenant.release_pgcon(dbname, pgcon, discard=not pgcon.connected)
 
         execute.signal_side_effects(_dbview, dbview.SideEffects.SchemaChanges)
         await tenant.introspect_db(dbname)
@@ -1691,6 +2067,296 @@ cdef class EdgeConnection(frontend.FrontendConnection):
         self.write(msg.end_message())
         self.flush()
 
+    async def _read_restore_blocks(self, restore_blocks, put):
+        # Read the data blocks sent by the client until RestoreEof,
+        # and pass each of them to `put`.
+        cdef:
+            char mtype
+
+        while True:
+            if not self.buffer.take_message():
+                # Don't report idling when restoring a dump.
+                # This is an edge case and the client might be
+                # legitimately slow.
+                await self.wait_for_message(report_idling=False)
+            mtype = self.buffer.get_message_type()
+
+            if mtype == b'=':
+                block_type = None
+                block_id = None
+                block_num = None
+                block_data = None
+                block_compression = None
+
+                num_headers = self.buffer.read_int16()
+                for _ in range(num_headers):
+                    header = self.buffer.read_int16()
+                    if header == DUMP_HEADER_BLOCK_TYPE:
+                        block_type = self.buffer.read_len_prefixed_bytes()
+                    elif header == DUMP_HEADER_BLOCK_ID:
+                        block_id = self.buffer.read_len_prefixed_bytes()
+                        block_id = pg_UUID(block_id)
+                    elif header == DUMP_HEADER_BLOCK_NUM:
+                        block_num = self.buffer.read_len_prefixed_bytes()
+                    elif header == DUMP_HEADER_BLOCK_DATA:
+                        block_data = self.buffer.read_len_prefixed_bytes()
+                    elif header == DUMP_HEADER_BLOCK_COMPRESSION:
+                        block_compression = (
+                            self.buffer.read_len_prefixed_bytes())
+
+                self.buffer.finish_message()
+
+                if (block_type is None or block_id is None
+                        or block_num is None or block_data is None):
+                    raise errors.ProtocolError('incomplete data block')
+
+                try:
+                    block_num = int(block_num)
+                except ValueError:
+                    raise errors.ProtocolError(
+                        'invalid data block number') from None
+
+                await put(
+                    restore_blocks[block_id],
+                    block_num,
+                    block_data,
+                    block_compression,
+                )
+
+            elif mtype == b'.':
+                self.buffer.finish_message()
+                return
+
+            else:
+                self.fallthrough()
+
+    async def _restore_data(self, pgcon, restore_blocks):
+        # Load the data over a single connection, without any extra tasks.
+        # Consecutive fragments of the same block are still sent as one
+        # COPY.
+        batch = []
+        batch_size = 0
+
+        async def put(
+            restore_block, block_num, block_data, block_compression
+        ):
+            nonlocal batch_size
+            if batch and (
+                not self._continues_restore_batch(
+                    batch, restore_block, block_num)
+                or batch_size >= RESTORE_BATCH_SIZE
+            ):
+                self._transport.pause_reading()
+                await self._restore_batch(pgcon, batch)
+                self._transport.resume_reading()
+                batch.clear()
+                batch_size = 0
+            batch.append(
+                (restore_block, block_num, block_data, block_compression))
+            batch_size += len(block_data)
+
+        await self._read_restore_blocks(restore_blocks, put)
+        if batch:
+            await self._restore_batch(pgcon, batch)
+
+    async def _restore_data_parallel(self, pgcons, restore_blocks):
+        # All fragments of a block go to the same worker connection,
+        # and new blocks to the least loaded one.
+        worker_queues = [asyncio.Queue(maxsize=2) for _ in pgcons]
+        worker_loads = [0] * len(pgcons)
+        block_workers = {}
+
+        async def put(
+            restore_block, block_num, block_data, block_compression
+        ):
+            block_id = restore_block.schema_object_id
+            worker = block_workers.get(block_id)
+            if worker is None:
+                worker = worker_loads.index(min(worker_loads))
+                block_workers[block_id] = worker
+            worker_loads[worker] += len(block_data)
+
+            self._transport.pause_reading()
+            await worker_queues[worker].put(
+                (restore_block, block_num, block_data, block_compression))
+            self._transport.resume_reading()
+
+        try:
+            async with asyncio.TaskGroup() as g:
+                for pgcon, worker_queue in zip(pgcons, worker_queues):
+                    g.create_task(self._restore_blocks(pgcon, worker_queue))
+
+                await self._read_restore_blocks(restore_blocks, put)
+
+                for worker_queue in worker_queues:
+                    await worker_queue.put(None)
+        except BaseExceptionGroup as ex:
+            raise unwrap_task_group_error(ex)
+
+    async def _restore_blocks(self, pgcon, queue):
+        pending = None
+        while True:
+            if pending is not None:
+                item, pending = pending, None
+            else:
+                item = await queue.get()
+            if item is None:
+                return
+
+            # Load the following fragments of the same block that are
+            # already queued together with this one.
+            batch = [item]
+            batch_size = len(item[2])
+            while batch_size < RESTORE_BATCH_SIZE and not queue.empty():
+                item = queue.get_nowait()
+                if item is None or not self._continues_restore_batch(
+                    batch, item[0], item[1]
+                ):
+                    pending = item
+                    break
+                batch.append(item)
+                batch_size += len(item[2])
+
+            await self._restore_batch(pgcon, batch)
+
+    def _continues_restore_batch(self, batch, restore_block, block_num):
+        # Only the last fragment of a block ends with the trailer of the
+        # binary COPY stream, so a single COPY can only load fragments
+        # that follow each other.  Fragments received out of order start
+        # a new COPY.
+        last_block, last_num = batch[-1][:2]
+        return last_block is restore_block and last_num + 1 == block_num
+
+    async def _restore_batch(self, pgcon, batch):
+        loop = asyncio.get_running_loop()
+        restore_block = batch[0][0]
+        fragments = []
+        for _, _, block_data, block_compression in batch:
+            if block_compression is not None:
+                block_data = await loop.run_in_executor(
+                    None,
+                    dump_compression.decompress,
+                    block_compression,
+                    block_data,
+                )
+            fragments.append(block_data)
+
+        type_id_map = self._build_type_id_map_for_restore_mending(
+            restore_block)
+        await pgcon.restore(restore_block, fragments, type_id_map)
+
+    async def _defer_restore_indexes(self, pgcon, tables):
+        # Drop the secondary indexes and the unique and exclusion
+        # constraints of the restored tables, and return the DDL
+        # recreating them grouped by table.
+        if not tables:
+            return {}
+
+        tables_sql = ', '.join(pg_common.quote_literal(t) for t in tables)
+        result = await pgcon.sql_fetch_val(
+            f'''
+                SELECT coalesce(json_agg(json_build_array(
+                    d.tbl, d.drop_sql, d.create_sql
+                )), '[]')
+                FROM (
+                    SELECT
+                        c.conrelid::regclass::text AS tbl,
+                        format(
+                            'ALTER TABLE %s DROP CONSTRAINT %I',
+                            c.conrelid::regclass, c.conname
+                        ) AS drop_sql,
+                        format(
+                            'ALTER TABLE %s ADD CONSTRAINT %I %s',
+                            c.conrelid::regclass, c.conname,
+                            pg_get_constraintdef(c.oid)
+                        ) AS create_sql
+                    FROM pg_constraint AS c
+                    WHERE
+                        c.conrelid = ANY(ARRAY[{tables_sql}]::regclass[])
+                        AND c.contype IN ('u', 'x')
+                        AND NOT EXISTS (
+                            SELECT FROM pg_constraint AS f
+                            WHERE f.contype = 'f' AND f.conindid = c.conindid
+                        )
+
+                    UNION ALL
+
+                    SELECT
+                        i.indrelid::regclass::text,
+                        format('DROP INDEX %s', i.indexrelid::regclass),
+                        pg_get_indexdef(i.indexrelid)
+                    FROM pg_index AS i
+                    WHERE
+                        i.indrelid = ANY(ARRAY[{tables_sql}]::regclass[])
+                        AND NOT i.indisprimary
+                        AND NOT EXISTS (
+                            SELECT FROM pg_constraint AS c
+                            WHERE c.conindid = i.indexrelid
+                        )
+                ) AS d
+            '''.encode(),
+        )
+
+        deferred = {}
+        drop_sql = []
+        for table, drop, create in json.loads(result):
+            drop_sql.append(drop)
+            deferred.setdefault(table, []).append(create)
+        if drop_sql:
+            await pgcon.sql_execute(';'.join(drop_sql).encode())
+        return deferred
+
+    async def _create_deferred_restore_indexes(self, pgcons, deferred):
+        # Indexes of different tables are built concurrently on
+        # all of the given connections.  The statements are removed
+        # from `deferred` as they succeed, so that whatever is left
+        # can still be recreated after a failure.
+        jobs = [[] for _ in pgcons]
+        for i, create_sql in enumerate(deferred.values()):
+            jobs[i % len(pgcons)].append(create_sql)
+
+        async def create(con, job):
+            for create_sql in job:
+                while create_sql:
+                    await con.sql_execute(create_sql[0].encode())
+                    del create_sql[0]
+
+        if len(pgcons) == 1:
+            await create(pgcons[0], jobs[0])
+            return
+
+        try:
+            async with asyncio.TaskGroup() as g:
+                for con, job in zip(pgcons, jobs):
+                    if job:
+                        g.create_task(create(con, job))
+        except BaseExceptionGroup as ex:
+            raise unwrap_task_group_error(ex)
+
+    async def _undo_restore_setup(self, dbname, enable_trigger_q, deferred):
+        # A failed parallel restore has already committed the schema
+        # along with the disabled triggers and the dropped indexes and
+        # constraints.  Put those back, so that the partially restored
+        # database is not left without them.
+        pgcon = None
+        try:
+            pgcon = await self.tenant.acquire_pgcon(dbname)
+            await pgcon.sql_execute(b'START TRANSACTION')
+            await pgcon.sql_execute(enable_trigger_q.encode())
+            for create_sql in deferred.values():
+                for sql in create_sql:
+                    await pgcon.sql_execute(sql.encode())
+            await pgcon.sql_execute(b'COMMIT')
+        except Exception:
+            # Report the error of the restore itself to the client.
+            logger.exception(
+                'could not re-enable the triggers and recreate the indexes '
+                'of database %r after a failed restore', dbname)
+        finally:
+            if pgcon is not None:
+                self.tenant.release_pgcon(
+                    dbname, pgcon, discard=pgcon.in_tx())
+
     def _build_type_id_map_for_restore_mending(self, restore_block):
         type_map = {}
         descriptor_stack = []
@@ -17,7 +17,14 @@
 #
 
 
+# Maximum number of consecutive Execute messages run with a single
+# round trip to the backend.
+DEF MAX_EXECUTE_PIPELINE_DEPTH = 64
+
 DEF DUMP_BLOCK_SIZE = 1024 * 1024 * 10
+# Consecutive fragments of a block are restored with a single COPY
+# up to this many bytes.
+DEF RESTORE_BATCH_SIZE = 1024 * 1024 * 64
 
 DEF DUMP_HEADER_BLOCK_TYPE = 101
 DEF DUMP_HEADER_BLOCK_TYPE_INFO = b'I'
@@ -31,3 +38,4 @@ DEF DUMP_HEADER_SERVER_CATALOG_VERSION = 105
 DEF DUMP_HEADER_BLOCK_ID = 110
 DEF DUMP_HEADER_BLOCK_NUM = 111
 DEF DUMP_HEADER_BLOCK_DATA = 112
+DEF DUMP_HEADER_BLOCK_COMPRESSION = 113
@@ -0,0 +1,110 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright 2024-present MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+"""Compression of dump data blocks.
+
+Clients opt into compression by listing the algorithms they accept in
+the DUMP_COMPRESSION header of the Dump message; the server picks the
+first one it supports.  Support for each algorithm depends on whether
+the corresponding optional package is installed.
+"""
+
+
+from __future__ import annotations
+from typing import *
+
+from edb import errors
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None  # type: ignore
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None  # type: ignore
+
+
+ZSTD_LEVEL = 3
+
+
+def _zstd_compress(data: Any) -> bytes:
+    assert zstandard is not None
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+
+
+def _zstd_decompress(data: bytes) -> bytes:
+    assert zstandard is not None
+    # Frames produced by ZstdCompressor.compress() record the content size.
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+def _lz4_compress(data: Any) -> bytes:
+    assert lz4 is not None
+    return lz4.frame.compress(data)
+
+
+def _lz4_decompress(data: bytes) -> bytes:
+    assert lz4 is not None
+    return lz4.frame.decompress(data)
+
+
+Compressor = Callable[[Any], bytes]
+Decompressor = Callable[[bytes], bytes]
+
+ALGORITHMS: dict[bytes, tuple[Compressor, Decompressor]] = {}
+if zstandard is not None:
+    ALGORITHMS[b'zstd'] = (_zstd_compress, _zstd_decompress)
+if lz4 is not None:
+    ALGORITHMS[b'lz4'] = (_lz4_compress, _lz4_decompress)
+
+
+def negotiate(requested: Optional[bytes]) -> Optional[bytes]:
+    """Pick the compression algorithm for a dump.
+
+    *requested* is the comma-separated list of algorithms accepted by
+    the client in the order of preference.
+    """
+    if not requested:
+        return None
+    for name in requested.split(b','):
+        name = name.strip().lower()
+        if name in ALGORITHMS:
+            return name
+    return None
+
+
+def compress(algorithm: bytes, data: Any) -> bytes:
+    return ALGORITHMS[algorithm][0](data)
+
+
+def decompress(algorithm: bytes, data: bytes) -> bytes:
+    try:
+        decompressor = ALGORITHMS[algorithm][1]
+    except KeyError:
+        raise errors.ProtocolError(
+            f'dump block is compressed with an unsupported algorithm: '
+            f'{algorithm.decode("utf-8", "replace")!r}'
+        ) from None
+    try:
+        return decompressor(data)
+    except Exception as e:
+        raise errors.ProtocolError(
+            f'could not decompress dump block: {e}') from e
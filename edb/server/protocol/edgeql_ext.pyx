@@ -122,12 +122,23 @@ async def handle_request(
 
     response.status = http.HTTPStatus.OK
     response.content_type = b'application/json'
+
+    # Large results are sent while they are being fetched, one element
+    # of the result array after another, if the client supports it.
+    json_writer = None
+    output_format = compiler.OutputFormat.JSON
+    if response.stream is not None:
+        json_writer = execute.JSONStreamWriter(response.stream, elements=True)
+        output_format = compiler.OutputFormat.JSON_ELEMENTS
+
     try:
         result = await execute.parse_execute_json(
             db,
             query,
             variables=variables or {},
             globals_=globals_,
+            output_format=output_format,
+            json_writer=json_writer,
         )
     except Exception as ex:
         if debug.flags.server:
@@ -141,6 +152,15 @@ async def handle_request(
             'code': ex.get_code(),
         }
 
-        response.body = json.dumps({'error': err_dct}).encode()
+        if (
+            json_writer is None
+            or not json_writer.write_error('error', err_dct)
+        ):
+            response.body = json.dumps({'error': err_dct}).encode()
     else:
-        response.body = b'{"data":' + result + b'}'
+        if json_writer is None:
+            response.body = b'{"data":' + result + b'}'
+        else:
+            body = json_writer.finish()
+            if body is not None:
+                response.body = body
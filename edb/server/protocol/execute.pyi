@@ -20,12 +20,30 @@ from typing import (
     Any,
     Mapping,
     Optional,
+    overload,
 )
 import immutables
 
 from edb.server import compiler
 from edb.server.dbview import dbview
 
+class JSONStreamWriter:
+    def __init__(self, stream: Any, *, elements: bool) -> None:
+        ...
+
+    def attach(self, be_conn: Any) -> None:
+        ...
+
+    def detach(self) -> None:
+        ...
+
+    def finish(self) -> Optional[bytes]:
+        ...
+
+    def write_error(self, key: str, error: Any) -> bool:
+        ...
+
+@overload
 async def parse_execute_json(
     db: dbview.Database,
     query: str,
@@ -36,9 +54,25 @@ async def parse_execute_json(
     query_cache_enabled: Optional[bool] = None,
     cached_globally: bool = False,
     use_metrics: bool = True,
+    json_writer: None = None,
 ) -> bytes:
     ...
 
+@overload
+async def parse_execute_json(
+    db: dbview.Database,
+    query: str,
+    *,
+    variables: Mapping[str, Any] = immutables.Map(),
+    globals_: Optional[Mapping[str, Any]] = None,
+    output_format: compiler.OutputFormat = compiler.OutputFormat.JSON,
+    query_cache_enabled: Optional[bool] = None,
+    cached_globally: bool = False,
+    use_metrics: bool = True,
+    json_writer: JSONStreamWriter,
+) -> None:
+    ...
+
 async def interpret_error(
     exc: Exception,
     db: dbview.Database,
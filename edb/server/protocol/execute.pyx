@@ -18,6 +18,7 @@
 
 from typing import (
     Any,
+    Callable,
     Mapping,
     Optional,
 )
@@ -33,6 +34,11 @@ import logging
 
 import immutables
 
+cimport cython
+cimport cpython
+
+from libc.stdint cimport int32_t
+
 from edb import errors
 from edb.common import debug
 
@@ -46,7 +52,15 @@ from edb.server.compiler import errormech
 from edb.server.dbview cimport dbview
 from edb.server.protocol cimport args_ser
 from edb.server.protocol cimport frontend
-from edb.server.pgproto.pgproto cimport WriteBuffer
+from edb.server.pgproto cimport hton
+from edb.server.pgproto.pgproto cimport (
+    WriteBuffer,
+
+    FRBuffer,
+    frb_init,
+    frb_read,
+    frb_get_len,
+)
 from edb.server.pgcon cimport pgcon
 from edb.server.pgcon import errors as pgerror
 
@@ -232,13 +246,15 @@ async def execute_script(
         ssize_t sent = 0
         bint in_tx, sync, no_sync
         object user_schema, extensions, ext_config_settings, cached_reflection
-        object global_schema, roles
+        object global_schema, roles, affected_obj_ids, schema_version
+        object schema_delta
         WriteBuffer bind_data
         int dbver = dbv.dbver
         bint parse
 
     user_schema = extensions = ext_config_settings = cached_reflection = None
-    global_schema = roles = None
+    global_schema = roles = affected_obj_ids = schema_version = None
+    schema_delta = None
     unit_group = compiled.query_unit_group
 
     sync = False
@@ -314,6 +330,9 @@ async def execute_script(
                     extensions = query_unit.extensions
                     ext_config_settings = query_unit.ext_config_settings
                     cached_reflection = query_unit.cached_reflection
+                    affected_obj_ids = query_unit.affected_obj_ids
+                    schema_version = query_unit.user_schema_version
+                    schema_delta = query_unit.user_schema_delta
 
                 if query_unit.global_schema:
                     global_schema = query_unit.global_schema
@@ -383,6 +402,9 @@ async def execute_script(
                 global_schema,
                 roles,
                 cached_reflection,
+                affected_obj_ids,
+                schema_version,
+                schema_delta,
             )
             if side_effects:
                 signal_side_effects(dbv, side_effects)
@@ -399,6 +421,85 @@ async def execute_script(
     return data
 
 
+async def execute_pipeline(
+    be_conn: pgcon.PGConnection,
+    dbv: dbview.DatabaseConnectionView,
+    list compiled,
+    list bind_datas,
+    bytes state,
+    *,
+    fe_conn: frontend.AbstractFrontendConnection,
+    on_complete: Callable[[dbview.CompiledQuery], None],
+):
+    # Executes independent read-only queries with a single round trip to
+    # the backend.  Every query runs in its own implicit transaction, and
+    # *on_complete* is called as soon as its results are sent to the
+    # client.  The results of the queries following a failed one are
+    # discarded.  *state* is the session state the queries were sent
+    # with, as the state of *dbv* may already be the one of the message
+    # following them.
+    cdef:
+        bytes orig_state = state
+        int dbver = dbv.dbver
+        list units
+        list parse_array
+
+    assert not dbv.in_tx()
+    if be_conn.last_state == state:
+        state = None
+
+    units = [c.query_unit_group[0] for c in compiled]
+    parse_array = [False] * len(units)
+
+    async with be_conn.parse_execute_script_context():
+        be_conn.send_query_pipeline(
+            units, bind_datas, state, dbver, parse_array)
+
+        try:
+            for idx, query_unit in enumerate(units):
+                if fe_conn.cancelled:
+                    raise ConnectionAbortedError
+
+                dbv.start(query_unit)
+                try:
+                    if idx == 0 and state is not None:
+                        await be_conn.wait_for_state_resp(state, state_sync=0)
+
+                    for sql in query_unit.sql:
+                        await be_conn.wait_for_command(
+                            query_unit, parse_array[idx], dbver,
+                            ignore_data=query_unit.output_format == FMT_NONE,
+                            fe_conn=fe_conn,
+                        )
+                    await be_conn.wait_for_sync()
+                except Exception:
+                    dbv.on_error()
+                    raise
+                else:
+                    side_effects = dbv.on_success(query_unit, None)
+                    if side_effects:
+                        signal_side_effects(dbv, side_effects)
+                    if idx == 0 and state is not None:
+                        be_conn.last_state = orig_state
+
+                on_complete(compiled[idx])
+
+        except Exception:
+            # Skip the rest of the pipeline.  The backend still runs the
+            # queries following the failed one, so the statements they
+            # prepare must be recorded, or the next Parse of them fails.
+            while be_conn.waiting_for_sync:
+                idx = len(units) - be_conn.waiting_for_sync
+                try:
+                    await be_conn.wait_for_sync(
+                        units[idx].sql_hash if parse_array[idx] else None,
+                        dbver,
+                    )
+                except pgerror.BackendError:
+                    pass
+            raise
+
+
 async def execute_system_config(
     conn: pgcon.PGConnection,
     dbv: dbview.DatabaseConnectionView,
@@ -500,13 +601,17 @@ async def parse_execute_json(
     query_cache_enabled: Optional[bool] = None,
     cached_globally: bool = False,
     use_metrics: bool = True,
-) -> bytes:
+    json_writer: Optional[JSONStreamWriter] = None,
+) -> Optional[bytes]:
     # WARNING: only set cached_globally to True when the query is
     # strictly referring to only shared stable objects in user schema
     # or anything from std schema, for example:
     #     YES:  select ext::auth::UIConfig { ... }
     #     NO:   select default::User { ... }
 
+    cdef:
+        dbview.DatabaseConnectionView dbv
+
     if query_cache_enabled is None:
         query_cache_enabled = not (
             debug.flags.disable_qcache or debug.flags.edgeql_compile)
@@ -532,7 +637,9 @@ async def parse_execute_json(
         use_metrics=use_metrics,
     )
 
-    pgcon = await tenant.acquire_pgcon(db.name)
+    pgcon = await tenant.acquire_pgcon(db.name, state=dbv.serialize_state())
+    if json_writer is not None:
+        json_writer.attach(pgcon)
     try:
         return await execute_json(
             pgcon,
@@ -540,8 +647,11 @@ async def parse_execute_json(
             compiled,
             variables=variables,
             globals_=globals_,
+            fe_conn=json_writer,
         )
     finally:
+        if json_writer is not None:
+            json_writer.detach()
         tenant.release_pgcon(db.name, pgcon)
 
 
@@ -555,24 +665,10 @@ async def execute_json(
     fe_conn: Optional[frontend.AbstractFrontendConnection] = None,
     use_prep_stmt: bint = False,
 ) -> bytes:
-    dbv.set_globals(immutables.Map({
-        "__::__edb_json_globals__": config.SettingValue(
-            name="__::__edb_json_globals__",
-            value=_encode_json_value(globals_),
-            source='global',
-            scope=qltypes.ConfigScope.GLOBAL,
-        )
-    }))
+    _set_json_globals(dbv, globals_)
 
     qug = compiled.query_unit_group
-
-    args = []
-    if qug.in_type_args:
-        for param in qug.in_type_args:
-            value = variables.get(param.name)
-            args.append(value)
-
-    bind_args = _encode_args(args)
+    bind_args = _encode_json_args(qug, variables)
 
     force_script = any(x.needs_readback for x in qug)
     if len(qug) > 1 or force_script:
@@ -602,6 +698,258 @@ async def execute_json(
         return None
 
 
+def can_pipeline_json(compiled: dbview.CompiledQuery) -> bool:
+    # Whether the JSON query can be run by execute_json_pipeline().
+    qug = compiled.query_unit_group
+    if len(qug) != 1:
+        return False
+    query_unit = qug[0]
+    return bool(
+        query_unit.sql
+        and not query_unit.needs_readback
+        and not query_unit.is_explain
+        and not query_unit.ddl_stmt_id
+        and not query_unit.system_config
+        and not query_unit.config_ops
+        and not query_unit.create_db
+        and not query_unit.drop_db
+        and not query_unit.tx_id
+        and query_unit.is_transactional
+    )
+
+
+async def execute_json_pipeline(
+    be_conn: pgcon.PGConnection,
+    dbv: dbview.DatabaseConnectionView,
+    list compiled,
+    list variables,
+    globals_: Optional[Mapping[str, Any]] = None,
+) -> list:
+    # Executes independent JSON queries that share the globals with
+    # a single round trip to the backend.  Every query runs in its own
+    # implicit transaction and, unlike in execute_pipeline(), a failed
+    # query doesn't affect the others: the returned list has either
+    # the result or the exception of every query.  The queries must
+    # pass can_pipeline_json().
+    cdef:
+        bytes state = None
+        int dbver
+        list units
+        list bind_datas
+        list parse_array
+        list results
+        ssize_t remaining
+
+    assert not dbv.in_tx()
+    _set_json_globals(dbv, globals_)
+    dbver = dbv.dbver
+    state = dbv.serialize_state()
+    if be_conn.last_state == state:
+        state = None
+
+    units = []
+    bind_datas = []
+    for c, vars in zip(compiled, variables):
+        qug = c.query_unit_group
+        units.append(qug[0])
+        bind_datas.append(args_ser.recode_bind_args(
+            dbv, c, _encode_json_args(qug, vars)))
+    parse_array = [False] * len(units)
+    results = []
+
+    async with be_conn.parse_execute_script_context():
+        be_conn.send_query_pipeline(
+            units, bind_datas, state, dbver, parse_array, state_sync=True)
+
+        try:
+            if state is not None:
+                await be_conn.wait_for_state_resp(state, state_sync=1)
+
+            for idx, query_unit in enumerate(units):
+                remaining = len(units) - idx - 1
+                dbv.start(query_unit)
+                try:
+                    data = await be_conn.wait_for_command(
+                        query_unit, parse_array[idx], dbver,
+                        ignore_data=False,
+                    )
+                    await be_conn.wait_for_sync()
+                except pgerror.BackendError as ex:
+                    dbv.on_error()
+                    # Skip the rest of the failed query.
+                    while be_conn.waiting_for_sync > remaining:
+                        try:
+                            await be_conn.wait_for_sync()
+                        except pgerror.BackendError:
+                            pass
+                    results.append(ex)
+                    continue
+                except Exception:
+                    dbv.on_error()
+                    raise
+
+                side_effects = dbv.on_success(query_unit, None)
+                if side_effects:
+                    signal_side_effects(dbv, side_effects)
+
+                if not data or len(data) > 1 or len(data[0]) != 1:
+                    results.append(errors.InternalServerError(
+                        f'received incorrect response data for a JSON query'))
+                else:
+                    results.append(data[0][0])
+
+        except Exception:
+            # Skip the rest of the pipeline.  The backend still runs the
+            # queries following the failed one, so the statements they
+            # prepare must be recorded, or the next Parse of them fails.
+            # The state is synced before the first query.
+            while be_conn.waiting_for_sync:
+                idx = len(units) - be_conn.waiting_for_sync
+                stmt_name = None
+                if idx >= 0 and parse_array[idx]:
+                    stmt_name = units[idx].sql_hash
+                try:
+                    await be_conn.wait_for_sync(stmt_name, dbver)
+                except pgerror.BackendError:
+                    pass
+            raise
+
+    return results
+
+
+@cython.final
+cdef class JSONStreamWriter(frontend.AbstractFrontendConnection):
+    # Sends the result of a JSON query as the body of an HTTP response
+    # while the rows arrive from the backend, see `HttpResponseStream`.
+    # The body is `{"data": <result>}` where the result is either the
+    # array of the rows of a JSON_ELEMENTS query, or the single value
+    # returned by a JSON query.  Small bodies are not streamed at all,
+    # `finish()` returns them to be sent as a regular response instead.
+    #
+    # While the client isn't reading the response fast enough, reading
+    # from the backend connection is paused, so that neither of them
+    # has to buffer more than the socket buffers of the other.
+
+    cdef:
+        object stream
+        pgcon.PGConnection be_conn
+        bint elements
+        bint first_row
+        bint reading_paused
+        list chunks
+        ssize_t size
+
+    def __cinit__(self, stream, *, bint elements):
+        self.stream = stream
+        self.be_conn = None
+        self.elements = elements
+        self.first_row = True
+        self.reading_paused = False
+        self.chunks = [b'{"data":[' if elements else b'{"data":']
+        self.size = 0
+
+    @property
+    def cancelled(self):
+        return self.stream.is_closed()
+
+    def attach(self, pgcon.PGConnection be_conn):
+        self.be_conn = be_conn
+
+    def detach(self):
+        self._resume_reading()
+        self.be_conn = None
+
+    def _on_drained(self, fut):
+        self._resume_reading()
+
+    cdef _resume_reading(self):
+        if self.reading_paused:
+            self.reading_paused = False
+            if self.be_conn is not None and self.be_conn.transport is not None:
+                self.be_conn.transport.resume_reading()
+
+    cdef _append(self, bytes data):
+        self.chunks.append(data)
+        self.size += len(data)
+
+    cdef _send(self):
+        self.stream.write(b''.join(self.chunks))
+        self.chunks = []
+        self.size = 0
+
+        waiter = self.stream.get_write_waiter()
+        if (
+            waiter is not None
+            and not self.reading_paused
+            and self.be_conn is not None
+            and self.be_conn.transport is not None
+        ):
+            self.reading_paused = True
+            self.be_conn.transport.pause_reading()
+            waiter.add_done_callback(self._on_drained)
+
+    cdef write(self, WriteBuffer buf):
+        cdef:
+            FRBuffer rbuf
+            bytes data = bytes(buf)
+            int32_t msg_len
+            int32_t col_len
+
+        frb_init(
+            &rbuf,
+            cpython.PyBytes_AS_STRING(data),
+            cpython.Py_SIZE(data))
+
+        while frb_get_len(&rbuf):
+            # Only DataRow messages with a single column are redirected
+            # here, see `PGConnection.parse_execute()`.
+            frb_read(&rbuf, 1)  # message type
+            msg_len = hton.unpack_int32(frb_read(&rbuf, 4))
+            frb_read(&rbuf, 2)  # number of columns
+            col_len = hton.unpack_int32(frb_read(&rbuf, 4))
+            if col_len != msg_len - 10:
+                raise errors.InternalServerError(
+                    f'received incorrect response data for a JSON query')
+
+            if self.elements and not self.first_row:
+                self._append(b',')
+            self.first_row = False
+            self._append(cpython.PyBytes_FromStringAndSize(
+                frb_read(&rbuf, col_len), col_len))
+
+        if self.size >= edbdef.HTTP_RESPONSE_STREAM_THRESHOLD:
+            self._send()
+
+    cdef flush(self):
+        pass
+
+    def finish(self):
+        # Returns the whole body if it hasn't been streamed.
+        if not self.elements and self.first_row:
+            raise errors.InternalServerError(
+                f'received incorrect response data for a JSON query')
+        self._append(b']}' if self.elements else b'}')
+        if not self.stream.is_started():
+            return b''.join(self.chunks)
+        self._send()
+        return None
+
+    def write_error(self, str key, error):
+        # Completes the streamed body with an error.  Returns False if
+        # nothing was sent yet, and the error should be sent as a regular
+        # response instead.
+        if not self.stream.is_started():
+            return False
+        if self.elements:
+            self._append(b']')
+        self._append(
+            b',' + json.dumps(key).encode() + b':'
+            + json.dumps(error).encode() + b'}'
+        )
+        self._send()
+        return True
+
+
 class DecimalEncoder(json.JSONEncoder):
     def encode(self, obj):
         if isinstance(obj, dict):
@@ -618,6 +966,30 @@ class DecimalEncoder(json.JSONEncoder):
         return super().encode(obj)
 
 
+cdef _set_json_globals(
+    dbview.DatabaseConnectionView dbv,
+    object globals_,
+):
+    dbv.set_globals(immutables.Map({
+        "__::__edb_json_globals__": config.SettingValue(
+            name="__::__edb_json_globals__",
+            value=_encode_json_value(globals_),
+            source='global',
+            scope=qltypes.ConfigScope.GLOBAL,
+        )
+    }))
+
+
+cdef bytes _encode_json_args(object qug, object variables):
+    args = []
+    if qug.in_type_args:
+        for param in qug.in_type_args:
+            value = variables.get(param.name)
+            args.append(value)
+
+    return _encode_args(args)
+
+
 cdef bytes _encode_json_value(object val):
     jarg = json.dumps(val, cls=DecimalEncoder)
 
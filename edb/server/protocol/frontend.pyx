@@ -108,7 +108,7 @@ cdef class FrontendConnection(AbstractFrontendConnection):
             # fail all tests if this ever happens.
             self.abort_pinned_pgcon()
 
-    async def get_pgcon(self) -> pgcon.PGConnection:
+    async def get_pgcon(self, bytes state=None) -> pgcon.PGConnection:
         if self._cancelled or self._pgcon_released_in_connection_lost:
             raise RuntimeError(
                 'cannot acquire a pgconn; the connection is closed')
@@ -125,7 +125,7 @@ cdef class FrontendConnection(AbstractFrontendConnection):
                 return self._pinned_pgcon
             if self._pinned_pgcon is not None:
                 raise RuntimeError('there is already a pinned pgcon')
-            conn = await self.tenant.acquire_pgcon(self.dbname)
+            conn = await self.tenant.acquire_pgcon(self.dbname, state=state)
             self._pinned_pgcon = conn
             conn.pinned_by = self
             return conn
@@ -61,6 +61,7 @@ cdef class PgConnection(frontend.FrontendConnection):
         dict sql_prepared_stmts
         dict sql_prepared_stmts_map
         dict wrapping_prepared_stmts
+        object compiled_sql
         bint ignore_till_sync
 
         object sslctx
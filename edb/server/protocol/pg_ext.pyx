@@ -23,7 +23,6 @@ import contextlib
 import copy
 import encodings.aliases
 import logging
-import hashlib
 import json
 import os
 import sys
@@ -35,9 +34,12 @@ from libc.stdint cimport int32_t, int16_t, uint32_t
 
 from edb import errors
 from edb.common import debug
+from edb.common import lru
+from edb.pgsql import normalization
 from edb.pgsql.parser import exceptions as parser_errors
 from edb.server import args as srvargs
 from edb.server import defines
+from edb.server import metrics
 from edb.server.compiler import dbstate
 from edb.server.pgcon import errors as pgerror
 from edb.server.pgcon.pgcon cimport PGAction, PGMessage
@@ -350,6 +352,9 @@ cdef class PgConnection(frontend.FrontendConnection):
         # Tracks prepared statements of operations
         # on *other* prepared statements.
         self.wrapping_prepared_stmts = {}
+        # Compiled statements by their text, see `compile()`.
+        self.compiled_sql = lru.LRUMapping(
+            maxsize=defines.PGEXT_CONNECTION_SQL_CACHE_SIZE)
         self.ignore_till_sync = False
 
         self.sslctx = sslctx
@@ -1422,10 +1427,24 @@ cdef class PgConnection(frontend.FrontendConnection):
         if self.debug:
             self.debug_print("Compile", query_str)
         fe_settings = dbv.current_fe_settings()
-        key = (hashlib.sha1(query_str.encode("utf-8")).digest(), fe_settings)
+        dbver = self.database.dbver
+        # Clients tend to send the same few statements over and over
+        # again, so look them up by their text in the connection first.
+        key = (query_str, fe_settings)
         if not ignore_cache:
-            result = self.database.lookup_compiled_sql(key)
+            entry = self.compiled_sql.get(key)
+            if entry is not None and entry[1] == dbver:
+                metrics.sql_query_compilations.inc(
+                    1.0, self.get_tenant_label(), 'cache')
+                return entry[0]
+        normalized = normalization.normalize(query_str)
+        if not ignore_cache:
+            result, path = self._lookup_compiled_sql(
+                key, normalized, fe_settings)
             if result is not None:
+                metrics.sql_query_compilations.inc(
+                    1.0, self.get_tenant_label(), path)
+                self.compiled_sql[key] = (result, dbver)
                 return result
         compiler_pool = self.server.get_compiler_pool()
         result = await compiler_pool.compile_sql(
@@ -1442,11 +1461,60 @@ cdef class PgConnection(frontend.FrontendConnection):
             self.username,
             client_id=self.tenant.client_id,
         )
-        self.database.cache_compiled_sql(key, result)
+        metrics.sql_query_compilations.inc(
+            1.0, self.get_tenant_label(), 'compiler')
+        self._cache_compiled_sql(key, normalized, fe_settings, result)
+        self.compiled_sql[key] = (result, dbver)
         if self.debug:
             self.debug_print("Compile result", result)
         return result
 
+    def _lookup_compiled_sql(self, key, normalized, fe_settings):
+        # Queries that only differ in the values of their literals are
+        # cached under their normalized text, which maps to the indexes
+        # of the literals the compiled query depends on.  These are
+        # then looked up along with the values of those literals.
+        if normalized is None:
+            return self.database.lookup_compiled_sql(key), 'cache'
+        fixed = self.database.lookup_compiled_sql(
+            (normalized.key, fe_settings))
+        if fixed is None:
+            return None, None
+        literals = normalized.literals
+        result = self.database.lookup_compiled_sql((
+            normalized.key,
+            fe_settings,
+            fixed,
+            tuple(literals[i] for i in fixed),
+        ))
+        if isinstance(result, dbstate.SQLTemplate):
+            return [result.instantiate(literals)], 'normalized'
+        return result, 'cache'
+
+    def _cache_compiled_sql(self, key, normalized, fe_settings, result):
+        if normalized is None:
+            self.database.cache_compiled_sql(key, result)
+            return
+        literals = normalized.literals
+        template = result[0].template if len(result) == 1 else None
+        if template is not None:
+            fixed = template.fixed
+            compiled = template
+        else:
+            fixed = tuple(range(len(literals)))
+            compiled = result
+        self.database.cache_compiled_sql(
+            (normalized.key, fe_settings), fixed)
+        self.database.cache_compiled_sql(
+            (
+                normalized.key,
+                fe_settings,
+                fixed,
+                tuple(literals[i] for i in fixed),
+            ),
+            compiled,
+        )
+
     def _validate_prepare_stmt(self, qu):
         assert qu.prepare is not None
         stmt_name = qu.prepare.stmt_name
@@ -20,6 +20,10 @@
 from edb.server.protocol cimport binary
 
 
+cdef class HttpProtocol
+cdef class HttpResponseStream
+
+
 cdef class HttpRequest:
 
     cdef:
@@ -45,6 +49,16 @@ cdef class HttpResponse:
         public bytes content_type
         public dict custom_headers
         public bytes body
+        public HttpResponseStream stream
+
+
+cdef class HttpResponseStream:
+
+    cdef:
+        HttpProtocol protocol
+        HttpRequest request
+        HttpResponse response
+        bint started
 
 
 cdef class HttpProtocol:
@@ -63,6 +77,7 @@ cdef class HttpProtocol:
         bint external_auth
         bint respond_hsts
         bint is_tls
+        object write_waiter
         object binary_endpoint_security
         object http_endpoint_security
         object tenant
@@ -74,6 +89,9 @@ cdef class HttpProtocol:
     cdef _bad_request(self, HttpRequest request, HttpResponse response,
                       str message)
     cdef _return_binary_error(self, binary.EdgeConnection proto)
+    cdef list _make_head(self, bytes req_version, bytes resp_status,
+                         bytes content_type, dict custom_headers,
+                         bytes length_header, bint close_connection)
     cdef _write(self, bytes req_version, bytes resp_status,
                 bytes content_type, dict custom_headers, bytes body,
                 bint close_connection)
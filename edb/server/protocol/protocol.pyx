@@ -87,6 +87,67 @@ cdef class HttpResponse:
         self.custom_headers = {}
         self.body = b''
         self.close_connection = False
+        self.stream = None
+
+
+cdef class HttpResponseStream:
+    # Sends the response body with the chunked transfer encoding while it
+    # is being produced.  The status line and the headers are only sent
+    # along with the first chunk, so the response may still be replaced,
+    # e.g. with an error, until then.
+
+    def __cinit__(
+        self,
+        HttpProtocol protocol,
+        HttpRequest request,
+        HttpResponse response,
+    ):
+        self.protocol = protocol
+        self.request = request
+        self.response = response
+        self.started = False
+
+    def is_started(self):
+        return self.started
+
+    def is_closed(self):
+        return self.protocol.transport is None
+
+    def get_write_waiter(self):
+        # Returns a future that is done when the client is ready to receive
+        # more data, or None if it is ready already.
+        waiter = self.protocol.write_waiter
+        if waiter is None or waiter.done():
+            return None
+        return waiter
+
+    def write(self, bytes data):
+        cdef:
+            HttpProtocol protocol = self.protocol
+            HttpResponse response = self.response
+
+        if protocol.transport is None:
+            raise ConnectionAbortedError
+        if not data:
+            return
+
+        chunk = [f'{len(data):x}\r\n'.encode(), data, b'\r\n']
+        if not self.started:
+            self.started = True
+            chunk = protocol._make_head(
+                self.request.version,
+                f'{response.status.value} {response.status.phrase}'.encode(),
+                response.content_type,
+                response.custom_headers,
+                b'Transfer-Encoding: chunked',
+                response.close_connection,
+            ) + chunk
+        protocol.transport.writelines(chunk)
+
+    def finish(self):
+        assert self.started
+        if self.protocol.transport is not None:
+            self.protocol.transport.write(b'0\r\n\r\n')
 
 
 cdef class HttpProtocol:
@@ -120,6 +181,7 @@ cdef class HttpProtocol:
         self.respond_hsts = False  # redirect non-TLS HTTP clients to TLS URL
 
         self.is_tls = False
+        self.write_waiter = None
 
     def connection_made(self, transport):
         self.transport = transport
@@ -127,12 +189,18 @@ cdef class HttpProtocol:
     def connection_lost(self, exc):
         self.transport = None
         self.unprocessed = None
+        # Wake up the streamed responses waiting for the client.
+        self.resume_writing()
 
     def pause_writing(self):
-        pass
+        if self.write_waiter and not self.write_waiter.done():
+            return
+        self.write_waiter = self.loop.create_future()
 
     def resume_writing(self):
-        pass
+        if not self.write_waiter or self.write_waiter.done():
+            return
+        self.write_waiter.set_result(True)
 
     def eof_received(self):
         pass
@@ -314,15 +382,13 @@ cdef class HttpProtocol:
         else:
             self.transport.resume_reading()
 
-    cdef _write(self, bytes req_version, bytes resp_status,
-                bytes content_type, dict custom_headers, bytes body,
-                bint close_connection):
-        if self.transport is None:
-            return
+    cdef list _make_head(self, bytes req_version, bytes resp_status,
+                         bytes content_type, dict custom_headers,
+                         bytes length_header, bint close_connection):
         data = [
             b'HTTP/', req_version, b' ', resp_status, b'\r\n',
             b'Content-Type: ', content_type, b'\r\n',
-            b'Content-Length: ', f'{len(body)}'.encode(), b'\r\n',
+            length_header, b'\r\n',
         ]
 
         for key, value in custom_headers.items():
@@ -340,6 +406,21 @@ cdef class HttpProtocol:
         if close_connection:
             data.append(b'Connection: close\r\n')
         data.append(b'\r\n')
+        return data
+
+    cdef _write(self, bytes req_version, bytes resp_status,
+                bytes content_type, dict custom_headers, bytes body,
+                bint close_connection):
+        if self.transport is None:
+            return
+        data = self._make_head(
+            req_version,
+            resp_status,
+            content_type,
+            custom_headers,
+            b'Content-Length: ' + f'{len(body)}'.encode(),
+            close_connection,
+        )
         if body:
             data.append(body)
         self.transport.write(b''.join(data))
@@ -461,19 +542,32 @@ cdef class HttpProtocol:
                     f"value: {self.http_endpoint_security}"
                 )
 
+        if request.version == b'1.1':
+            # Chunked transfer encoding is only available since HTTP/1.1.
+            response.stream = HttpResponseStream(self, request, response)
+
         try:
             await self.handle_request(request, response)
-        except errors.AvailabilityError as ex:
-            self._close_with_error(
-                b"503 Service Unavailable",
-                f'{type(ex).__name__}: {ex}'.encode(),
-            )
-            return
         except Exception as ex:
-            self.unhandled_exception(b"500 Internal Server Error", ex)
+            if response.stream is not None and response.stream.started:
+                # Part of the response is already sent, so the only way
+                # to signal the error is to break the connection.
+                if debug.flags.server:
+                    markup.dump(ex)
+                self.close()
+            elif isinstance(ex, errors.AvailabilityError):
+                self._close_with_error(
+                    b"503 Service Unavailable",
+                    f'{type(ex).__name__}: {ex}'.encode(),
+                )
+            else:
+                self.unhandled_exception(b"500 Internal Server Error", ex)
             return
 
-        self.write(request, response)
+        if response.stream is not None and response.stream.started:
+            response.stream.finish()
+        else:
+            self.write(request, response)
         self.in_response = False
 
         if response.close_connection or not request.should_keep_alive:
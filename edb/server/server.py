@@ -54,6 +54,7 @@ from edb.server import cache
 from edb.server import config
 from edb.server import compiler_pool
 from edb.server import daemon
+from edb.server import dbview
 from edb.server import defines
 from edb.server import protocol
 from edb.server import tenant as edbtenant
@@ -129,6 +130,7 @@ class BaseServer:
         compiler_pool_addr,
         nethosts,
         netport,
+        compiler_pool_shared_schema: bool = False,
         listen_sockets: tuple[socket.socket, ...] = (),
         testmode: bool = False,
         daemonized: bool = False,
@@ -146,6 +148,10 @@ class BaseServer:
         disable_dynamic_system_config: bool = False,
         compiler_state: edbcompiler.CompilerState,
         use_monitor_fs: bool = False,
+        persistent_query_cache_size: int = 0,
+        persistent_query_cache_file: Optional[pathlib.Path] = None,
+        query_result_cache_size: int = 0,
+        query_result_cache_ttl: float = defines.DEFAULT_QUERY_RESULT_CACHE_TTL,
     ):
         self.__loop = asyncio.get_running_loop()
         self._use_monitor_fs = use_monitor_fs
@@ -172,9 +178,20 @@ class BaseServer:
         self._compiler_pool_size = compiler_pool_size
         self._compiler_pool_mode = compiler_pool_mode
         self._compiler_pool_addr = compiler_pool_addr
+        self._compiler_pool_shared_schema = compiler_pool_shared_schema
         self._system_compile_cache = lru.LRUMapping(
             maxsize=defines._MAX_QUERIES_CACHE
         )
+        self._persistent_query_cache = None
+        if persistent_query_cache_size > 0:
+            assert persistent_query_cache_file is not None
+            self._persistent_query_cache = cache.PersistentQueryCache(
+                persistent_query_cache_file,
+                max_entries=persistent_query_cache_size,
+            )
+            self._persistent_query_cache.open()
+        self._query_result_cache_size = query_result_cache_size
+        self._query_result_cache_ttl = query_result_cache_ttl
 
         self._listen_sockets = listen_sockets
         if listen_sockets:
@@ -206,6 +223,8 @@ class BaseServer:
 
         self._http_query_cache = cache.StatementsCache(
             maxsize=defines.HTTP_PORT_QUERY_CACHE_SIZE)
+        self._graphql_persisted_queries = cache.StatementsCache(
+            maxsize=defines.GRAPHQL_PERSISTED_QUERIES_SIZE)
 
         self._http_last_minute_requests = windowedsum.WindowedSum()
         self._http_request_logger = None
@@ -425,6 +444,19 @@ class BaseServer:
     def system_compile_cache(self):
         return self._system_compile_cache
 
+    @property
+    def persistent_query_cache(self) -> cache.PersistentQueryCache | None:
+        return self._persistent_query_cache
+
+    def new_query_result_cache(self) -> dbview.ResultCache | None:
+        if self._query_result_cache_size <= 0:
+            return None
+        return dbview.ResultCache(
+            maxsize=self._query_result_cache_size,
+            ttl=self._query_result_cache_ttl,
+            max_entry_size=defines.MAX_QUERY_RESULT_CACHE_ENTRY_SIZE,
+        )
+
     def _idle_gc_collector(self):
         try:
             self._idle_gc_handler = None
@@ -489,6 +521,8 @@ class BaseServer:
         )
         if self._compiler_pool_mode == srvargs.CompilerPoolMode.Remote:
             args['address'] = self._compiler_pool_addr
+        else:
+            args['shared_schema'] = self._compiler_pool_shared_schema
         return args
 
     async def _destroy_compiler_pool(self):
@@ -994,6 +1028,10 @@ class BaseServer:
             conn.stop()
         self._pgext_conns.clear()
 
+        if self._persistent_query_cache is not None:
+            await self._persistent_query_cache.close()
+            self._persistent_query_cache = None
+
     async def serve_forever(self):
         await self._stop_evt.wait()
 
@@ -112,6 +112,7 @@ class Tenant(ha_base.ClusterProtocol):
         instance_name: str,
         max_backend_connections: int,
         backend_adaptive_ha: bool = False,
+        backend_min_idle_connections: Mapping[Optional[str], int] | None = None,
     ):
         self._cluster = cluster
         self._tenant_id = self.get_backend_runtime_params().tenant_id
@@ -154,7 +155,11 @@ class Tenant(ha_base.ClusterProtocol):
             disconnect=self._pg_disconnect,
             # 1 connection is reserved for the system DB
             max_capacity=max_backend_connections - 1,
+            min_idle_conns=(backend_min_idle_connections or {}).get(None, 0),
         )
+        for dbname, nconns in (backend_min_idle_connections or {}).items():
+            if dbname is not None:
+                self._pg_pool.set_min_idle_conns(dbname, nconns)
         self._pg_unavailable_msg = None
         self._block_new_connections = set()
         self._report_config_data = {}
@@ -681,25 +686,48 @@ class Tenant(ha_base.ClusterProtocol):
         if msg is None or self._pg_unavailable_msg is None:
             self._pg_unavailable_msg = msg
 
-    async def acquire_pgcon(self, dbname: str) -> pgcon.PGConnection:
+    async def acquire_pgcon(
+        self,
+        dbname: str,
+        *,
+        state: Optional[bytes] = None,
+    ) -> pgcon.PGConnection:
+        # *state* is the serialized session state the connection is going
+        # to be used with, if known; connections that already have it set
+        # are preferred.
         if self._pg_unavailable_msg is not None:
             raise errors.BackendUnavailableError(
                 "Postgres is not available: " + self._pg_unavailable_msg
             )
 
-        for _ in range(self._pg_pool.max_capacity):
-            conn = await self._pg_pool.acquire(dbname)
-            if conn.is_healthy():
-                return conn
+        started_at = time.monotonic()
+        try:
+            for _ in range(self._pg_pool.max_capacity):
+                conn = await self._pg_pool.acquire(dbname, state=state)
+                if conn.is_healthy():
+                    if state is None:
+                        pass
+                    elif conn.last_state == state:
+                        metrics.backend_connection_state_hits.inc(
+                            1.0, self._instance_name)
+                    else:
+                        metrics.backend_connection_state_misses.inc(
+                            1.0, self._instance_name)
+                    return conn
+                else:
+                    logger.warning(
+                        "Acquired an unhealthy pgcon; discard now.")
+                    self._pg_pool.release(dbname, conn, discard=True)
             else:
-                logger.warning("Acquired an unhealthy pgcon; discard now.")
-                self._pg_pool.release(dbname, conn, discard=True)
-        else:
-            # This is unlikely to happen, but we defer to the caller to retry
-            # when it does happen
-            raise errors.BackendUnavailableError(
-                "No healthy backend connection available at the moment, "
-                "please try again."
+                # This is unlikely to happen, but we defer to the caller to
+                # retry when it does happen
+                raise errors.BackendUnavailableError(
+                    "No healthy backend connection available at the moment, "
+                    "please try again."
+                )
+        finally:
+            metrics.backend_connection_wait_duration.observe(
+                time.monotonic() - started_at, self._instance_name
             )
 
     def release_pgcon(
@@ -714,7 +742,8 @@ class Tenant(ha_base.ClusterProtocol):
                 logger.warning("Released an unhealthy pgcon; discard now.")
             discard = True
         try:
-            self._pg_pool.release(dbname, conn, discard=discard)
+            self._pg_pool.release(
+                dbname, conn, discard=discard, state=conn.last_state)
         except Exception:
             metrics.background_errors.inc(
                 1.0, self._instance_name, "release_pgcon"
@@ -894,11 +923,14 @@ class Tenant(ha_base.ClusterProtocol):
             backend_ids=backend_ids,
             extensions=extensions,
             ext_config_settings=parsed_db.ext_config_settings,
+            schema_version=parsed_db.schema_version,
         )
         db.set_state_serializer(
             parsed_db.protocol_version,
             parsed_db.state_serializer,
         )
+        await db.load_persisted_queries()
+        self._pg_pool.ensure_min_idle_conns(dbname)
 
     async def _early_introspect_db(self, dbname: str) -> None:
         """We need to always introspect the extensions for each database.
@@ -107,7 +107,8 @@ class EdgeQLTestCase(BaseHttpExtensionTest):
             )
             resp_data = json.loads(response.read())
 
-        if 'data' in resp_data:
+        # A streamed response may have a part of the data before the error.
+        if 'error' not in resp_data:
             return resp_data['data']
 
         err = resp_data['error']
@@ -0,0 +1,454 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright 2024-present MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Microbenchmarks of the compiler hot paths."""
+
+from __future__ import annotations
+from typing import *
+
+import ast
+import contextlib
+import pathlib
+import statistics
+import sys
+import time
+
+import click
+
+from edb.tools.edb import edbcommands
+
+
+TESTS_DIR = pathlib.Path(__file__).parent.parent.parent / 'tests'
+SCHEMAS_DIR = TESTS_DIR / 'schemas'
+
+LOOKUP_QUERIES = [
+    'SELECT User { name }',
+    'SELECT Issue { name, body, owner: { name }, status: { name } }',
+    'SELECT Issue FILTER .number = "1" AND .status.name = "Open"',
+    'SELECT count(Issue) + len(User.name)',
+    'SELECT (Issue.name, to_str(Issue.time_estimate) ?? "")',
+    'WITH x := (SELECT User LIMIT 1) SELECT x.todo { name }',
+]
+
+
+@edbcommands.group('bench')
+def bench() -> None:
+    """Run compiler microbenchmarks."""
+
+
+def _load_schema(schema_file: pathlib.Path) -> Any:
+    return _load_sdl(schema_file.read_text())
+
+
+def _load_sdl(source: str) -> Any:
+    from edb.edgeql import parser as qlparser
+    from edb.schema import ddl as s_ddl
+    from edb.testbase import lang as tb
+
+    sdl = qlparser.parse_sdl(f'module default {{ {source} }}')
+    std_schema = tb._load_std_schema()
+    return s_ddl.apply_sdl(
+        sdl,
+        base_schema=std_schema,
+        current_schema=std_schema,
+    )
+
+
+def _timeit(fn: Callable[[], Any], *, number: int, repeat: int) -> float:
+    """Return the median time of a single *fn* call in microseconds."""
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        for _ in range(number):
+            fn()
+        timings.append((time.perf_counter() - started_at) / number)
+    return statistics.median(timings) * 1e6
+
+
+def _report(name: str, baseline: float, optimized: float) -> None:
+    click.echo(
+        f'{name:<24} {baseline:>12.2f}us {optimized:>12.2f}us '
+        f'{baseline / optimized:>8.2f}x'
+    )
+
+
+def _report_header(baseline: str, optimized: str) -> None:
+    click.echo(f'{"":<24} {baseline:>14} {optimized:>14} {"speedup":>9}')
+
+
+@contextlib.contextmanager
+def _uncached_name_resolution() -> Iterator[None]:
+    from edb.schema import schema as s_schema
+
+    cached = s_schema._resolve_name
+
+    def resolve(schema, name, module_aliases):  # type: ignore
+        return schema._resolve_name(
+            name,
+            None if module_aliases is None else dict(module_aliases),
+            None,
+        )
+
+    s_schema._resolve_name = resolve
+    try:
+        yield
+    finally:
+        s_schema._resolve_name = cached
+
+
+@bench.command('schema-lookup')
+@click.option(
+    '--schema', 'schema_file',
+    type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path),
+    default=SCHEMAS_DIR / 'issues.esdl',
+    show_default=True,
+    help='SDL file with the contents of the "default" module',
+)
+@click.option('--number', default=20, show_default=True,
+              help='Number of iterations in a single timing run')
+@click.option('--repeat', default=5, show_default=True,
+              help='Number of timing runs to take the median of')
+def schema_lookup(schema_file: pathlib.Path, number: int, repeat: int) -> None:
+    """Benchmark schema name resolution with and without the cache."""
+    from edb.edgeql import compiler as qlcompiler
+    from edb.edgeql import parser as qlparser
+    from edb.schema import name as sn
+    from edb.schema import objtypes as s_objtypes
+
+    schema = _load_schema(schema_file)
+    modaliases = {None: 'default'}
+    names = [
+        obj.get_name(schema).name
+        for obj in schema.get_objects(
+            type=s_objtypes.ObjectType,
+            included_modules=(sn.UnqualName('default'),),
+        )
+    ]
+    names += ['str', 'int64', 'len', 'count', 'std::datetime', 'cal::x']
+
+    def lookups() -> None:
+        for name in names:
+            schema.get(name, default=None, module_aliases=modaliases)
+            schema.get_functions(name, default=(), module_aliases=modaliases)
+
+    qltrees = [qlparser.parse_query(q) for q in LOOKUP_QUERIES]
+    options = qlcompiler.CompilerOptions(modaliases=modaliases)
+
+    def compile() -> None:
+        for qltree in qltrees:
+            qlcompiler.compile_ast_to_ir(qltree, schema, options=options)
+
+    _report_header('uncached', 'cached')
+    for name, fn in [('name lookups', lookups), ('compile_ast_to_ir', compile)]:
+        fn()
+        with _uncached_name_resolution():
+            baseline = _timeit(fn, number=number, repeat=repeat)
+        optimized = _timeit(fn, number=number, repeat=repeat)
+        _report(name, baseline, optimized)
+
+
+@contextlib.contextmanager
+def _exhaustive_rename_detection() -> Iterator[None]:
+    from edb.schema import delta as sd
+
+    limit = sd.MAX_RENAME_CANDIDATES
+    sd.MAX_RENAME_CANDIDATES = sys.maxsize
+    try:
+        yield
+    finally:
+        sd.MAX_RENAME_CANDIDATES = limit
+
+
+def _gen_renames_sdl(count: int, *, prefix: str) -> str:
+    types = []
+    for i in range(count):
+        base = f' extending {prefix}{i - 1}' if i % 4 else ''
+        types.append(
+            f'type {prefix}{i}{base} {{ '
+            f'property p{i} -> str; '
+            f'property q{i} -> int64; '
+            f'}}'
+        )
+    return '\n'.join(types)
+
+
+@bench.command('schema-renames')
+@click.option('--count', default=1000, show_default=True,
+              help='Number of renamed object types')
+@click.option('--number', default=1, show_default=True,
+              help='Number of iterations in a single timing run')
+@click.option('--repeat', default=3, show_default=True,
+              help='Number of timing runs to take the median of')
+@click.option('--no-baseline', is_flag=True,
+              help='Skip the (quadratic) exhaustive rename detection')
+def schema_renames(
+    count: int, number: int, repeat: int, no_baseline: bool
+) -> None:
+    """Benchmark schema diffing of a schema with renamed types.
+
+    Every object type of the old schema is renamed in the new one,
+    so each of them is a candidate rename of every other.
+    """
+    from edb.schema import ddl as s_ddl
+    from edb.schema import name as sn
+
+    old_schema = _load_sdl(_gen_renames_sdl(count, prefix='Old'))
+    new_schema = _load_sdl(_gen_renames_sdl(count, prefix='New'))
+
+    def diff() -> None:
+        s_ddl.delta_schemas(
+            old_schema,
+            new_schema,
+            included_modules=(sn.UnqualName('default'),),
+            linearize_delta=False,
+        )
+
+    _report_header('exhaustive', 'blocked')
+    if no_baseline:
+        baseline = float('nan')
+    else:
+        with _exhaustive_rename_detection():
+            baseline = _timeit(diff, number=number, repeat=repeat)
+    optimized = _timeit(diff, number=number, repeat=repeat)
+    _report(f'delta_schemas ({count})', baseline, optimized)
+
+
+def _get_test_queries(test_file: pathlib.Path) -> List[str]:
+    """Return the queries of the docstring tests in *test_file*."""
+    queries = []
+    module = ast.parse(test_file.read_text())
+    for node in ast.walk(module):
+        if (
+            isinstance(node, ast.FunctionDef)
+            and node.name.startswith('test_')
+            and (doc := ast.get_docstring(node)) is not None
+        ):
+            query, sep, _ = doc.partition('% OK %')
+            if sep:
+                queries.append(query)
+    return queries
+
+
+@bench.command('typeref-cache')
+@click.option(
+    '--schema', 'schema_file',
+    type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path),
+    default=SCHEMAS_DIR / 'cards_ir_inference.esdl',
+    show_default=True,
+    help='SDL file with the contents of the "default" module',
+)
+@click.option(
+    '--tests', 'test_file',
+    type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path),
+    default=TESTS_DIR / 'test_edgeql_ir_card_inference.py',
+    show_default=True,
+    help='Test module with the queries to compile in its docstring tests',
+)
+@click.option('--number', default=3, show_default=True,
+              help='Number of iterations in a single timing run')
+@click.option('--repeat', default=5, show_default=True,
+              help='Number of timing runs to take the median of')
+def typeref_cache(
+    schema_file: pathlib.Path,
+    test_file: pathlib.Path,
+    number: int,
+    repeat: int,
+) -> None:
+    """Benchmark query compilation with and without shared TypeRefs."""
+    from edb import errors
+    from edb.edgeql import compiler as qlcompiler
+    from edb.edgeql import parser as qlparser
+    from edb.ir import typeutils as irtyputils
+
+    schema = _load_schema(schema_file)
+    modaliases = {None: 'default'}
+
+    qltrees = []
+    for query in _get_test_queries(test_file):
+        try:
+            qltree = qlparser.parse_query(query)
+            qlcompiler.compile_ast_to_ir(
+                qltree,
+                schema,
+                options=qlcompiler.CompilerOptions(modaliases=modaliases),
+            )
+        except errors.EdgeDBError:
+            continue
+        qltrees.append(qltree)
+
+    def compile(
+        typeref_cache: Optional[irtyputils.SharedTypeRefCache],
+    ) -> Callable[[], None]:
+        def run() -> None:
+            for qltree in qltrees:
+                options = qlcompiler.CompilerOptions(
+                    modaliases=modaliases,
+                    typeref_cache=typeref_cache,
+                )
+                qlcompiler.compile_ast_to_ir(qltree, schema, options=options)
+        return run
+
+    baseline_fn = compile(None)
+    optimized_fn = compile(irtyputils.SharedTypeRefCache(schema))
+    # Warm up the shared cache, as a compiler process would be.
+    optimized_fn()
+
+    _report_header('per-compile', 'shared')
+    baseline = _timeit(baseline_fn, number=number, repeat=repeat)
+    optimized = _timeit(optimized_fn, number=number, repeat=repeat)
+    _report(f'{len(qltrees)} queries', baseline, optimized)
+
+
+@contextlib.contextmanager
+def _unindexed_scope_lookups() -> Iterator[None]:
+    from edb.ir import pathid
+
+    # With the same key for all path ids, the scope tree nodes
+    # have all their children in one list, and so scan all of them.
+    key = pathid.PathId.namespaceless_key
+    pathid.PathId.namespaceless_key = None  # type: ignore
+    try:
+        yield
+    finally:
+        pathid.PathId.namespaceless_key = key  # type: ignore
+
+
+def _gen_shape_query(depth: int, width: int) -> str:
+    def shape(level: int) -> str:
+        elements = ['name', 'body', 'number']
+        elements += [
+            f'c{level}_{i} := .name ++ .body ++ <str>{i}'
+            for i in range(width)
+        ]
+        elements += [
+            f'o{level}_{i} := .owner {{ name, n := .name ++ <str>{i} }}'
+            for i in range(width)
+        ]
+        if level < depth:
+            elements.append(f'related_to: {shape(level + 1)}')
+        return '{ ' + ', '.join(elements) + ' }'
+
+    return f'SELECT Issue {shape(0)}'
+
+
+@bench.command('scope-tree')
+@click.option(
+    '--schema', 'schema_file',
+    type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path),
+    default=SCHEMAS_DIR / 'issues.esdl',
+    show_default=True,
+    help='SDL file with the contents of the "default" module',
+)
+@click.option('--depth', default=8, show_default=True,
+              help='Nesting depth of the shape of the query')
+@click.option('--width', default=20, show_default=True,
+              help='Number of computed elements at each level of the shape')
+@click.option('--number', default=1, show_default=True,
+              help='Number of iterations in a single timing run')
+@click.option('--repeat', default=5, show_default=True,
+              help='Number of timing runs to take the median of')
+def scope_tree(
+    schema_file: pathlib.Path,
+    depth: int,
+    width: int,
+    number: int,
+    repeat: int,
+) -> None:
+    """Benchmark compilation of a large shape query.
+
+    Compares the scope tree visibility lookups by an index of path ids
+    with scanning all the children of the scope tree nodes.
+    """
+    from edb.edgeql import compiler as qlcompiler
+    from edb.edgeql import parser as qlparser
+
+    schema = _load_schema(schema_file)
+    qltree = qlparser.parse_query(_gen_shape_query(depth, width))
+    options = qlcompiler.CompilerOptions(modaliases={None: 'default'})
+
+    def compile() -> None:
+        qlcompiler.compile_ast_to_ir(qltree, schema, options=options)
+
+    _report_header('scan', 'indexed')
+    compile()
+    with _unindexed_scope_lookups():
+        baseline = _timeit(compile, number=number, repeat=repeat)
+    optimized = _timeit(compile, number=number, repeat=repeat)
+    _report(f'shape {depth}x{width}', baseline, optimized)
+
+
+@bench.command('parse')
+@click.option(
+    '--schemas', 'schemas_dir',
+    type=click.Path(exists=True, file_okay=False, path_type=pathlib.Path),
+    default=SCHEMAS_DIR,
+    show_default=True,
+    help='Directory with the .esdl and .edgeql files to parse',
+)
+@click.option('--number', default=3, show_default=True,
+              help='Number of iterations in a single timing run')
+@click.option('--repeat', default=5, show_default=True,
+              help='Number of timing runs to take the median of')
+def parse(schemas_dir: pathlib.Path, number: int, repeat: int) -> None:
+    """Benchmark the EdgeQL parser throughput.
+
+    Reports the time of parsing all SDL schemas and EdgeQL scripts of
+    a directory, and of just converting their concrete syntax trees
+    into ASTs.
+    """
+    from edb.edgeql import parser as qlparser
+    from edb.edgeql import tokenizer as qltokenizer
+    from edb.edgeql.parser.grammar import tokens as qltokens
+
+    qlparser.preload_spec()
+
+    sources = []
+    for path in sorted(schemas_dir.iterdir()):
+        if path.suffix == '.esdl':
+            text = f'module default {{ {path.read_text()} }}'
+            sources.append((qltokens.T_STARTSDLDOCUMENT, text))
+        elif path.suffix == '.edgeql':
+            sources.append((qltokens.T_STARTBLOCK, path.read_text()))
+
+    # Skip the files that are not valid on their own.
+    parsed = []
+    for start_token, text in list(sources):
+        source = qltokenizer.Source.from_string(text)
+        result, productions = qlparser.rust_parser.parse(
+            start_token.__name__[2:], source.tokens())
+        if result.errors:
+            sources.remove((start_token, text))
+        else:
+            parsed.append((result.out, productions, source))
+
+    def parse_all() -> None:
+        for start_token, text in sources:
+            qlparser.parse(start_token, text)
+
+    def cst_to_ast_all() -> None:
+        for cst, productions, source in parsed:
+            qlparser._cst_to_ast(cst, productions, source, None)
+
+    size = sum(len(text.encode('utf-8')) for _, text in sources)
+    click.echo(f'{len(sources)} files, {size / 1024:.0f} KiB')
+    for name, fn in [('parse', parse_all), ('cst-to-ast', cst_to_ast_all)]:
+        elapsed = _timeit(fn, number=number, repeat=repeat)
+        click.echo(
+            f'{name:<24} {elapsed:>12.2f}us '
+            f'{size / elapsed:>10.2f}MB/s'
+        )
@@ -71,4 +71,5 @@ from . import gen_test_dumps  # noqa
 from . import gen_sql_introspection  # noqa
 from . import gen_rust_ast  # noqa
 from . import parser_demo  # noqa
+from . import bench  # noqa
 from .profiling import cli as prof_cli  # noqa
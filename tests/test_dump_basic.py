@@ -17,13 +17,29 @@
 #
 
 import hashlib
+import io
 import os
 import random
 import tempfile
 
+import edgedb
+
+from edb import errors
+from edb import protocol
+from edb.common import binwrapper
+from edb.protocol import protocol as protocol_con  # type: ignore
+from edb.server.protocol import dump_compression
 from edb.testbase import server as tb
 
 
+class _Dump(protocol.ClientMessage):
+    # The Dump message with the headers that the server reads from it.
+
+    mtype = protocol.MessageType('>')
+    message_length = protocol.MessageLength
+    headers = protocol.KeyValues
+
+
 class TestDumpBasics(tb.DatabaseTestCase, tb.CLITestCaseMixin):
     DEFAULT_MODULE = 'test'
 
@@ -118,3 +134,292 @@ class TestDumpBasics(tb.DatabaseTestCase, tb.CLITestCaseMixin):
         finally:
             await con2.aclose()
             await tb.drop_db(self.con, restored_dbname)
+
+
+class TestDumpRestoreJobs(tb.DatabaseTestCase):
+    DEFAULT_MODULE = 'test'
+
+    TRANSACTION_ISOLATION = False
+
+    SETUP = '''
+        CREATE TYPE test::Owner {
+            CREATE REQUIRED PROPERTY name -> std::str {
+                CREATE CONSTRAINT std::exclusive;
+            };
+        };
+        CREATE TYPE test::Item {
+            CREATE REQUIRED PROPERTY idx -> std::int64;
+            CREATE LINK owner -> test::Owner;
+            CREATE INDEX ON (.idx);
+        };
+        FOR i IN {1, 2, 3} UNION (
+            INSERT test::Owner { name := 'owner' ++ <str>i }
+        );
+        FOR i IN std::range_unpack(range(0, 1000)) UNION (
+            INSERT test::Item {
+                idx := i,
+                owner := (SELECT test::Owner FILTER .name = 'owner1'),
+            }
+        );
+
+        # Dumped in several fragments.
+        CREATE TYPE test::Blob {
+            CREATE REQUIRED PROPERTY idx -> std::int64;
+            CREATE REQUIRED PROPERTY data -> std::bytes;
+        };
+        FOR i IN std::range_unpack(range(0, 24)) UNION (
+            INSERT test::Blob {
+                idx := i,
+                data := std::to_bytes(
+                    <str>i ++ std::str_repeat('x', 1_000_000)),
+            }
+        );
+    '''
+
+    BLOCK_ID = 110
+    BLOCK_NUM = 111
+    BLOCK_COMPRESSION = 113
+
+    def _encode(self, msg):
+        # The data of a server message as the Restore messages embed it,
+        # without the message type and length.
+        buf = io.BytesIO()
+        type(msg).dump(msg, binwrapper.BinWrapper(buf))
+        return buf.getvalue()
+
+    async def _connect_proto(self, dbname):
+        con = await protocol_con.new_connection(
+            **self.get_connect_args(database=dbname))
+        await con.connect()
+        return con
+
+    def _get_header(self, block, code):
+        for header in block.attributes:
+            if header.code == code:
+                return header.value
+        return None
+
+    def _get_fragments(self, blocks):
+        # The fragment numbers of each block in the order of the dump.
+        fragments = {}
+        for block in blocks:
+            fragments.setdefault(
+                self._get_header(block, self.BLOCK_ID), []
+            ).append(int(self._get_header(block, self.BLOCK_NUM)))
+        return fragments
+
+    async def _dump(self, headers=None):
+        con = await self._connect_proto(self.get_database_name())
+        try:
+            if headers:
+                dump = _Dump(headers=[
+                    protocol.KeyValue(code=code, value=value)
+                    for code, value in headers.items()
+                ])
+            else:
+                dump = protocol.Dump(annotations=[])
+            await con.send(dump, protocol.Sync())
+            header = await con.recv_match(protocol.DumpHeader)
+            blocks = []
+            while True:
+                msg = await con.recv()
+                if isinstance(msg, protocol.CommandComplete):
+                    break
+                self.assertIsInstance(msg, protocol.DumpBlock)
+                blocks.append(msg)
+            await con.recv_match(protocol.ReadyForCommand)
+        finally:
+            await con.aclose()
+        return header, blocks
+
+    async def _start_restore(self, con, header, jobs):
+        await con.send(protocol.Restore(
+            attributes=[],
+            jobs=jobs,
+            header_data=self._encode(header),
+        ))
+        ready = await con.recv_match(protocol.RestoreReady)
+        return ready.jobs
+
+    async def _with_restored_db(self, test):
+        if not self.has_create_database:
+            self.skipTest('create database is not supported by the backend')
+
+        dbname = f'{self.get_database_name()}_restored'
+        await self.con.execute(f'CREATE DATABASE {dbname}')
+        try:
+            await test(dbname)
+        finally:
+            await tb.drop_db(self.con, dbname)
+
+    async def test_dump_restore_parallel_01(self):
+        header, blocks = await self._dump()
+
+        async def test(dbname):
+            con = await self._connect_proto(dbname)
+            try:
+                jobs = await self._start_restore(con, header, jobs=4)
+                self.assertGreaterEqual(jobs, 1)
+                for block in blocks:
+                    await con.send(protocol.RestoreBlock(
+                        block_data=self._encode(block)))
+                await con.send(protocol.RestoreEof())
+                await con.recv_match(
+                    protocol.CommandComplete,
+                    _ignore_msg=protocol.StateDataDescription,
+                    status='RESTORE',
+                )
+            finally:
+                await con.aclose()
+
+            con2 = await self.connect(database=dbname)
+            try:
+                self.assertEqual(
+                    await con2.query_single('''
+                        SELECT count(test::Item FILTER .owner.name = 'owner1')
+                    '''),
+                    1000,
+                )
+                self.assertEqual(
+                    await con2.query_single('SELECT count(test::Owner)'), 3)
+
+                # The deferred constraints and the triggers are back.
+                with self.assertRaises(edgedb.ConstraintViolationError):
+                    await con2.execute(
+                        "INSERT test::Owner { name := 'owner2' }")
+                with self.assertRaises(edgedb.ConstraintViolationError):
+                    await con2.execute(
+                        "DELETE test::Owner FILTER .name = 'owner1'")
+            finally:
+                await con2.aclose()
+
+        await self._with_restored_db(test)
+
+    async def test_dump_restore_parallel_02(self):
+        # A parallel restore failing after the schema was committed.
+        header, blocks = await self._dump()
+
+        async def test(dbname):
+            con = await self._connect_proto(dbname)
+            try:
+                jobs = await self._start_restore(con, header, jobs=4)
+                if jobs < 2:
+                    self.skipTest('the server restores with a single job')
+                for block in blocks:
+                    await con.send(protocol.RestoreBlock(
+                        block_data=self._encode(block)))
+                # A data block without any headers.
+                await con.send(protocol.RestoreBlock(block_data=b'\0\0'))
+                err = await con.recv_match(
+                    protocol.ErrorResponse,
+                    message='incomplete data block',
+                )
+                self.assertNotEqual(
+                    err.error_code, errors.InternalServerError.get_code())
+            finally:
+                await con.aclose()
+
+            con2 = await self.connect(database=dbname)
+            try:
+                # The data is rolled back, but the committed schema still
+                # has its constraints, indexes and triggers.
+                self.assertEqual(
+                    await con2.query_single('SELECT count(test::Item)'), 0)
+                await con2.execute('''
+                    INSERT test::Item {
+                        idx := 1,
+                        owner := (INSERT test::Owner { name := 'owner1' }),
+                    };
+                ''')
+                with self.assertRaises(edgedb.ConstraintViolationError):
+                    await con2.execute(
+                        "INSERT test::Owner { name := 'owner1' }")
+                with self.assertRaises(edgedb.ConstraintViolationError):
+                    await con2.execute(
+                        "DELETE test::Owner FILTER .name = 'owner1'")
+            finally:
+                await con2.aclose()
+
+        await self._with_restored_db(test)
+
+    async def _restore_blobs(self, dbname, header, blocks, jobs):
+        con = await self._connect_proto(dbname)
+        try:
+            await self._start_restore(con, header, jobs=jobs)
+            for block in blocks:
+                await con.send(protocol.RestoreBlock(
+                    block_data=self._encode(block)))
+            await con.send(protocol.RestoreEof())
+            await con.recv_match(
+                protocol.CommandComplete,
+                _ignore_msg=protocol.StateDataDescription,
+                status='RESTORE',
+            )
+        finally:
+            await con.aclose()
+
+        con2 = await self.connect(database=dbname)
+        try:
+            self.assertEqual(
+                await con2.query_single('''
+                    SELECT count(test::Blob FILTER .data = std::to_bytes(
+                        <str>.idx ++ std::str_repeat('x', 1_000_000)))
+                '''),
+                24,
+            )
+        finally:
+            await con2.aclose()
+
+    async def test_dump_restore_compressed(self):
+        if not dump_compression.ALGORITHMS:
+            self.skipTest('no dump compression algorithm is available')
+
+        algo = next(iter(dump_compression.ALGORITHMS))
+        header, blocks = await self._dump({
+            0xFF11: algo,
+            0xFF12: (4).to_bytes(2, 'big'),
+        })
+        for block in blocks:
+            self.assertEqual(
+                self._get_header(block, self.BLOCK_COMPRESSION), algo)
+
+        # The fragments are compressed concurrently, but the ones of
+        # the same block are still dumped in order.
+        fragments = self._get_fragments(blocks)
+        self.assertGreater(max(map(len, fragments.values())), 1)
+        for nums in fragments.values():
+            self.assertEqual(nums, list(range(len(nums))))
+
+        for jobs in (1, 4):
+            with self.subTest(jobs=jobs):
+                await self._with_restored_db(
+                    lambda dbname: self._restore_blobs(
+                        dbname, header, blocks, jobs))
+
+    async def test_dump_restore_out_of_order(self):
+        header, blocks = await self._dump()
+        fragments = self._get_fragments(blocks)
+        self.assertGreater(max(map(len, fragments.values())), 2)
+
+        by_block = {}
+        for block in blocks:
+            by_block.setdefault(
+                self._get_header(block, self.BLOCK_ID), []).append(block)
+
+        orders = {
+            'reversed': blocks[::-1],
+            # The last fragment, with the COPY trailer, is not the last
+            # one sent.
+            'rotated': [
+                block
+                for block_fragments in by_block.values()
+                for block in block_fragments[1:] + block_fragments[:1]
+            ],
+        }
+
+        for order, ordered_blocks in orders.items():
+            for jobs in (1, 4):
+                with self.subTest(order=order, jobs=jobs):
+                    await self._with_restored_db(
+                        lambda dbname: self._restore_blobs(
+                            dbname, header, ordered_blocks, jobs))
@@ -21,6 +21,7 @@ import os.path
 
 from edb.testbase import lang as tb
 from edb.ir import pathid
+from edb.ir import scopetree
 from edb.ir import typeutils as irtyputils
 from edb.schema import name as s_name
 from edb.schema import pointers as s_pointers
@@ -248,3 +249,32 @@ class TestEdgeQLIRPathID(tb.BaseEdgeQLCompilerTest):
             ptr_1, base_1, base_2, permissive_ptr_path=True)
 
         self.assertEqual(repr(ptr_2), repr(ptr_1b))
+
+    def test_edgeql_ir_pathid_namespaceless_key(self):
+        pid = self.mk_path('User', 'deck')
+        ns_pid = self.mk_path('User', 'deck', ns={'ns1'})
+
+        self.assertNotEqual(pid, ns_pid)
+        self.assertEqual(pid.namespaceless_key, ns_pid.namespaceless_key)
+        self.assertNotEqual(
+            pid.namespaceless_key, self.mk_path('User').namespaceless_key)
+        self.assertNotEqual(
+            pid.namespaceless_key, pid.ptr_path().namespaceless_key)
+
+        # Scope tree nodes are found by their key, and the namespaces
+        # are stripped as the lookup goes up the tree.
+        root = scopetree.ScopeTreeNode(fenced=True)
+        node = scopetree.ScopeTreeNode(path_id=ns_pid)
+        root.attach_child(node)
+        branch = root.attach_branch()
+        branch.add_namespaces({'ns1'})
+        leaf = branch.attach_branch()
+
+        self.assertIs(leaf.find_visible(pid), node)
+        self.assertIsNone(root.find_visible(pid))
+
+        node.remove()
+        self.assertIsNone(leaf.find_visible(pid))
+        branch.attach_child(node)
+        self.assertIsNone(leaf.find_visible(pid))
+        self.assertIs(leaf.find_visible(ns_pid), node)
@@ -24,6 +24,7 @@ from edb.testbase import lang as tb
 
 from edb.edgeql import compiler
 from edb.edgeql import parser as qlparser
+from edb.ir import typeutils as irtyputils
 
 
 class TestEdgeQLTypeInference(tb.BaseEdgeQLCompilerTest):
@@ -120,3 +121,21 @@ class TestEdgeQLTypeInference(tb.BaseEdgeQLCompilerTest):
 % OK %
         __derived__::(default:Card | default:User)
         """
+
+    def test_edgeql_ir_type_inference_shared_typeref_cache(self):
+        cache = irtyputils.SharedTypeRefCache(self.schema)
+        options = compiler.CompilerOptions(
+            modaliases={None: 'default'},
+            typeref_cache=cache,
+        )
+        card = self.schema.get('default::Card')
+        key = (card.id, False, False)
+
+        qltree = qlparser.parse_query('SELECT Card { name }')
+        ir1 = compiler.compile_ast_to_ir(qltree, self.schema, options=options)
+        self.assertIs(ir1.expr.typeref.real_material_type, cache.get(key))
+        # The view type derived by the compilation is not shared.
+        self.assertNotIn((ir1.expr.typeref.id, False, False), cache)
+
+        ir2 = compiler.compile_ast_to_ir(qltree, self.schema, options=options)
+        self.assertIs(ir2.expr.typeref.real_material_type, cache.get(key))
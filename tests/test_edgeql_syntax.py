@@ -23,7 +23,9 @@ import unittest  # NOQA
 from edb import errors
 
 from edb.testbase import lang as tb
+from edb.edgeql import ast as qlast
 from edb.edgeql import generate_source as edgeql_to_source
+from edb.edgeql import parser as qlparser
 from edb.edgeql import tokenizer
 from edb.edgeql.parser import grammar as qlgrammar
 from edb.tools import test
@@ -6308,6 +6310,24 @@ aa';
         crEAte something;
         """
 
+    def test_edgeql_syntax_context_01(self):
+        # Token contexts are created lazily, make sure that the ones
+        # that end up in the AST point to the right place.
+        source = 'SELECT foo + bar;\nSELECT "baz";'
+        first, second = qlparser.parse_block(source)
+
+        binop = first.result
+        self.assertIsInstance(binop, qlast.BinOp)
+        self.assertEqual(
+            source[binop.context.start:binop.context.end], 'foo + bar')
+        self.assertEqual(
+            source[binop.left.context.start:binop.left.context.end], 'foo')
+        self.assertEqual(
+            source[binop.right.context.start:binop.right.context.end],
+            'bar')
+        self.assertIs(binop.context.buffer, second.result.context.buffer)
+        self.assertEqual(second.result.context.start_point.line, 2)
+
 
 class TestEdgeQLNormalization(EdgeQLSyntaxTest):
 
@@ -297,6 +297,26 @@ class TestHttpEdgeQL(tb.EdgeQLTestCase):
                 r'''SELECT <positive_int_t>-1''',
             )
 
+    def test_http_edgeql_query_stream_01(self):
+        req_data = {
+            'query': 'select range_unpack(range(0, 50000))',
+        }
+        req = urllib.request.Request(self.http_addr, method='POST')
+        req.add_header('Content-Type', 'application/json')
+        req.add_header('Authorization', self.make_auth_header())
+        response = urllib.request.urlopen(
+            req, json.dumps(req_data).encode(), context=self.tls_context
+        )
+        self.assertEqual(response.headers['Transfer-Encoding'], 'chunked')
+        resp_data = json.loads(response.read())
+        self.assertEqual(resp_data, {'data': list(range(50000))})
+
+        # Small results are sent in one piece.
+        self.assert_edgeql_query_result(
+            'select range_unpack(range(0, 3))',
+            [0, 1, 2],
+        )
+
     def test_http_edgeql_query_globals_01(self):
         Q = r'''select GlobalTest { gstr, garray, gid, gdef, gdef2 }'''
 
@@ -367,6 +387,39 @@ class TestHttpEdgeQL(tb.EdgeQLTestCase):
                 use_http_post=use_http_post,
             )
 
+    async def test_http_edgeql_session_state_01(self):
+        # The backend connections for HTTP queries are picked from the
+        # pool by the serialized session state.  Make the pool also hold
+        # connections released by a session with a non-default config.
+        await self.con.execute('''
+            CONFIGURE SESSION SET query_execution_timeout :=
+                <duration>'1 hour';
+        ''')
+        try:
+            for use_http_post in [True, False]:
+                self.assertTrue(await self.con.query_single('''
+                    SELECT cfg::Config.query_execution_timeout
+                        = <duration>'1 hour'
+                '''))
+                self.assert_edgeql_query_result(
+                    r'''
+                        SELECT cfg::Config.query_execution_timeout
+                            = <duration>'0s'
+                    ''',
+                    [True],
+                    use_http_post=use_http_post,
+                )
+                self.assert_edgeql_query_result(
+                    r'''select get_glob()''',
+                    ['foo'],
+                    globals={'default::test_global_str': 'foo'},
+                    use_http_post=use_http_post,
+                )
+        finally:
+            await self.con.execute('''
+                CONFIGURE SESSION RESET query_execution_timeout;
+            ''')
+
     def test_http_edgeql_query_func_01(self):
         Q = r'''select id_func('foo')'''
 
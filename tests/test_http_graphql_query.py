@@ -17,6 +17,7 @@
 #
 
 
+import hashlib
 import json
 import os
 import uuid
@@ -161,6 +162,209 @@ class TestGraphQLFunctional(tb.GraphQLTestCase):
             with self.assertRaises(OSError):
                 self.http_con_request(con, {}, path='non-existant')
 
+    def test_graphql_http_persisted_query_01(self):
+        query = '''
+            query settings($value: String) {
+                Setting(filter: {value: {eq: $value}}) {
+                    value
+                }
+            }
+        '''
+        sha256_hash = hashlib.sha256(query.encode()).hexdigest()
+        extensions = json.dumps({
+            'persistedQuery': {'version': 1, 'sha256Hash': sha256_hash},
+        })
+        headers = {'Authorization': self.make_auth_header()}
+
+        with self.http_con() as con:
+            data, _, status = self.http_con_request(
+                con,
+                {
+                    'extensions': extensions,
+                    'variables': json.dumps({'value': 'blue'}),
+                },
+                headers=headers,
+            )
+            self.assertEqual(status, 200)
+            self.assertEqual(
+                json.loads(data)['errors'][0]['extensions']['code'],
+                'PERSISTED_QUERY_NOT_FOUND')
+
+            data, _, status = self.http_con_request(
+                con,
+                {
+                    'query': query,
+                    'extensions': extensions,
+                    'variables': json.dumps({'value': 'blue'}),
+                },
+                headers=headers,
+            )
+            self.assertEqual(status, 200)
+            self.assertEqual(
+                json.loads(data)['data'],
+                {'Setting': [{'value': 'blue'}]})
+
+            for value in ['full', 'none']:
+                data, _, status = self.http_con_request(
+                    con,
+                    {
+                        'extensions': extensions,
+                        'variables': json.dumps({'value': value}),
+                    },
+                    headers=headers,
+                )
+                self.assertEqual(status, 200)
+                self.assertEqual(
+                    json.loads(data)['data'],
+                    {'Setting': [{'value': value}]})
+
+    def test_graphql_http_persisted_query_02(self):
+        extensions = json.dumps({
+            'persistedQuery': {'version': 1, 'sha256Hash': '0' * 64},
+        })
+        with self.http_con() as con:
+            data, headers, status = self.http_con_request(
+                con,
+                {'query': '{ Setting { value } }', 'extensions': extensions},
+                headers={
+                    'Authorization': self.make_auth_header(),
+                },
+            )
+
+            self.assertEqual(status, 400)
+            self.assertEqual(headers['connection'], 'close')
+            self.assertIn(b'does not match the query', data)
+
+    def test_graphql_http_batch_01(self):
+        batch = [
+            {
+                'query': '''
+                    {
+                        Setting(order: {value: {dir: ASC}}) {
+                            value
+                        }
+                    }
+                ''',
+            },
+            {
+                'query': '''
+                    query settings($value: String) {
+                        Setting(filter: {value: {eq: $value}}) {
+                            value
+                        }
+                    }
+                ''',
+                'variables': {'value': 'blue'},
+            },
+            {
+                'query': '''
+                    {
+                        NON_EXISTING_TYPE {
+                            name
+                        }
+                    }
+                ''',
+            },
+            {
+                'query': '''
+                    {
+                        Setting(filter: {value: {eq: "none"}}) {
+                            value
+                        }
+                    }
+                ''',
+            },
+        ]
+
+        with self.http_con() as con:
+            data, headers, status = self.http_con_request(
+                con,
+                method='POST',
+                body=json.dumps(batch).encode(),
+                headers={
+                    'Authorization': self.make_auth_header(),
+                    'Content-Type': 'application/json',
+                },
+            )
+
+            self.assertEqual(status, 200)
+            results = json.loads(data)
+            self.assertEqual(len(results), 4)
+            self.assertEqual(
+                results[0]['data'],
+                {'Setting': [{'value': 'blue'}, {'value': 'full'},
+                             {'value': 'none'}]})
+            self.assertEqual(
+                results[1]['data'],
+                {'Setting': [{'value': 'blue'}]})
+            self.assertIn(
+                'QueryError:',
+                results[2]['errors'][0]['message'])
+            self.assertEqual(
+                results[3]['data'],
+                {'Setting': [{'value': 'none'}]})
+
+    def test_graphql_http_batch_02(self):
+        # An operation failing at run time in the middle of a batch
+        # must not affect the results of the other operations.
+        batch = [
+            {
+                'query': '''
+                    {
+                        Setting(filter: {value: {eq: "blue"}}) {
+                            value
+                        }
+                    }
+                ''',
+            },
+            {
+                'query': '''
+                    {
+                        ErrorTest {
+                            div_by_val
+                        }
+                    }
+                ''',
+            },
+            {
+                'query': '''
+                    query settings($value: String) {
+                        Setting(filter: {value: {eq: $value}}) {
+                            value
+                        }
+                    }
+                ''',
+                'variables': {'value': 'full'},
+            },
+        ]
+
+        # Repeat to test prepared pgcon statements.
+        for _ in range(3):
+            with self.http_con() as con:
+                data, headers, status = self.http_con_request(
+                    con,
+                    method='POST',
+                    body=json.dumps(batch).encode(),
+                    headers={
+                        'Authorization': self.make_auth_header(),
+                        'Content-Type': 'application/json',
+                    },
+                )
+
+                self.assertEqual(status, 200)
+                results = json.loads(data)
+                self.assertEqual(len(results), 3)
+                self.assertEqual(
+                    results[0],
+                    {'data': {'Setting': [{'value': 'blue'}]}})
+                self.assertNotIn('data', results[1])
+                self.assertIn(
+                    'division by zero',
+                    results[1]['errors'][0]['message'])
+                self.assertEqual(
+                    results[2],
+                    {'data': {'Setting': [{'value': 'full'}]}})
+
     def test_graphql_functional_query_01(self):
         for _ in range(10):  # repeat to test prepared pgcon statements
             self.assert_graphql_query_result(r"""
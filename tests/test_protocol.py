@@ -140,6 +140,212 @@ class TestProtocol(ProtocolTestCase):
             transaction_state=protocol.TransactionState.NOT_IN_TRANSACTION,
         )
 
+    async def test_proto_execute_pipeline_01(self):
+        # Test that pipelined Execute messages are processed in order and
+        # that the ones following an error are skipped until Sync.
+
+        await self.con.connect()
+
+        await self.con.send(
+            protocol.Parse(
+                annotations=[],
+                allowed_capabilities=protocol.Capability.ALL,
+                compilation_flags=protocol.CompilationFlag(0),
+                implicit_limit=0,
+                output_format=protocol.OutputFormat.NONE,
+                expected_cardinality=protocol.Cardinality.MANY,
+                command_text='SELECT 1',
+                state_typedesc_id=b'\0' * 16,
+                state_data=b'',
+            ),
+            protocol.Sync(),
+        )
+        cdd = await self.con.recv_match(protocol.CommandDataDescription)
+        await self.con.recv_match(protocol.ReadyForCommand)
+
+        def execute(command_text):
+            return protocol.Execute(
+                annotations=[],
+                allowed_capabilities=protocol.Capability.ALL,
+                compilation_flags=protocol.CompilationFlag(0),
+                implicit_limit=0,
+                command_text=command_text,
+                output_format=protocol.OutputFormat.NONE,
+                expected_cardinality=protocol.Cardinality.MANY,
+                input_typedesc_id=cdd.input_typedesc_id,
+                output_typedesc_id=cdd.output_typedesc_id,
+                state_typedesc_id=b'\0' * 16,
+                arguments=b'',
+                state_data=b'',
+            )
+
+        await self.con.send(
+            execute('SELECT 1'),
+            execute('SELECT 2'),
+            execute('SELECT 1/0'),
+            execute('SELECT 3'),
+            protocol.Sync(),
+        )
+        for _ in range(2):
+            await self.con.recv_match(
+                protocol.CommandComplete,
+                status='SELECT'
+            )
+        await self.con.recv_match(
+            protocol.ErrorResponse,
+            message='division by zero'
+        )
+        await self.con.recv_match(
+            protocol.ReadyForCommand,
+            transaction_state=protocol.TransactionState.NOT_IN_TRANSACTION,
+        )
+
+        # Test that the protocol has recovered.
+        await self.con.send(execute('SELECT 4'), protocol.Sync())
+        await self.con.recv_match(
+            protocol.CommandComplete,
+            status='SELECT'
+        )
+        await self.con.recv_match(
+            protocol.ReadyForCommand,
+            transaction_state=protocol.TransactionState.NOT_IN_TRANSACTION,
+        )
+
+    async def test_proto_execute_pipeline_02(self):
+        # Test that the statements prepared by the queries following a
+        # failed one in a pipeline can be executed again.
+
+        await self.con.connect()
+
+        await self.con.send(
+            protocol.Parse(
+                annotations=[],
+                allowed_capabilities=protocol.Capability.ALL,
+                compilation_flags=protocol.CompilationFlag(0),
+                implicit_limit=0,
+                output_format=protocol.OutputFormat.NONE,
+                expected_cardinality=protocol.Cardinality.MANY,
+                command_text='SELECT 1',
+                state_typedesc_id=b'\0' * 16,
+                state_data=b'',
+            ),
+            protocol.Sync(),
+        )
+        cdd = await self.con.recv_match(protocol.CommandDataDescription)
+        await self.con.recv_match(protocol.ReadyForCommand)
+
+        def execute(command_text):
+            return protocol.Execute(
+                annotations=[],
+                allowed_capabilities=protocol.Capability.ALL,
+                compilation_flags=protocol.CompilationFlag(0),
+                implicit_limit=0,
+                command_text=command_text,
+                output_format=protocol.OutputFormat.NONE,
+                expected_cardinality=protocol.Cardinality.MANY,
+                input_typedesc_id=cdd.input_typedesc_id,
+                output_typedesc_id=cdd.output_typedesc_id,
+                state_typedesc_id=b'\0' * 16,
+                arguments=b'',
+                state_data=b'',
+            )
+
+        query = "SELECT count({'pipeline', 'execute', '02'})"
+        await self.con.send(
+            execute('SELECT 1/0'),
+            execute(query),
+            protocol.Sync(),
+        )
+        await self.con.recv_match(
+            protocol.ErrorResponse,
+            message='division by zero'
+        )
+        await self.con.recv_match(
+            protocol.ReadyForCommand,
+            transaction_state=protocol.TransactionState.NOT_IN_TRANSACTION,
+        )
+
+        for _ in range(3):
+            await self.con.send(execute(query), protocol.Sync())
+            await self.con.recv_match(
+                protocol.CommandComplete,
+                status='SELECT'
+            )
+            await self.con.recv_match(
+                protocol.ReadyForCommand,
+                transaction_state=(
+                    protocol.TransactionState.NOT_IN_TRANSACTION),
+            )
+
+    async def test_proto_execute_pipeline_03(self):
+        # Test that pipelined Execute messages are run with the state
+        # they were sent with.
+
+        await self.con.connect()
+
+        states = []
+        for value in (1, 2):
+            await self._execute(
+                f'CONFIGURE SESSION SET __internal_sess_testvalue := {value}'
+            )
+            states.append(await self.con.recv_match(
+                protocol.CommandComplete,
+                _ignore_msg=protocol.StateDataDescription,
+            ))
+            await self.con.recv_match(protocol.ReadyForCommand)
+
+        query = 'SELECT assert_single(cfg::Config.__internal_sess_testvalue)'
+        await self.con.send(
+            protocol.Parse(
+                annotations=[],
+                allowed_capabilities=protocol.Capability.ALL,
+                compilation_flags=protocol.CompilationFlag(0),
+                implicit_limit=0,
+                output_format=protocol.OutputFormat.BINARY,
+                expected_cardinality=protocol.Cardinality.MANY,
+                command_text=query,
+                state_typedesc_id=states[0].state_typedesc_id,
+                state_data=states[0].state_data,
+            ),
+            protocol.Sync(),
+        )
+        cdd = await self.con.recv_match(protocol.CommandDataDescription)
+        await self.con.recv_match(protocol.ReadyForCommand)
+
+        def execute(cc):
+            return protocol.Execute(
+                annotations=[],
+                allowed_capabilities=protocol.Capability.ALL,
+                compilation_flags=protocol.CompilationFlag(0),
+                implicit_limit=0,
+                command_text=query,
+                output_format=protocol.OutputFormat.BINARY,
+                expected_cardinality=protocol.Cardinality.MANY,
+                input_typedesc_id=cdd.input_typedesc_id,
+                output_typedesc_id=cdd.output_typedesc_id,
+                state_typedesc_id=cc.state_typedesc_id,
+                arguments=b'',
+                state_data=cc.state_data,
+            )
+
+        for values in ((1, 2), (1, 1, 2, 2, 1), (2, 1, 1)):
+            await self.con.send(
+                *(execute(states[value - 1]) for value in values),
+                protocol.Sync(),
+            )
+            for value in values:
+                data = await self.con.recv_match(protocol.Data)
+                self.assertEqual(data.data[0].data[-1], value)
+                await self.con.recv_match(
+                    protocol.CommandComplete,
+                    status='SELECT'
+                )
+            await self.con.recv_match(
+                protocol.ReadyForCommand,
+                transaction_state=(
+                    protocol.TransactionState.NOT_IN_TRANSACTION),
+            )
+
     async def test_proto_flush_01(self):
 
         await self.con.connect()
@@ -18,9 +18,12 @@
 
 
 from __future__ import annotations
-from typing import *
 
+import gc
+import pickle
 import re
+import unittest.mock
+import weakref
 
 from edb import errors
 
@@ -31,17 +34,17 @@ from edb.edgeql import parser as qlparser
 from edb.edgeql import qltypes
 
 from edb.schema import ddl as s_ddl
+from edb.schema import delta as sd
 from edb.schema import links as s_links
 from edb.schema import name as s_name
+from edb.schema import objects as s_obj
 from edb.schema import objtypes as s_objtypes
 from edb.schema import properties as s_props
+from edb.schema import schema as s_schema
 
 from edb.testbase import lang as tb
 from edb.tools import test
 
-if TYPE_CHECKING:
-    from edb.schema import schema as s_schema
-
 
 class TestSchema(tb.BaseSchemaLoadTest):
     DEFAULT_MODULE = 'test'
@@ -1254,6 +1257,163 @@ class TestSchema(tb.BaseSchemaLoadTest):
                 """
             )
 
+    def test_schema_delta_01(self):
+        schema = self.load_schema("""
+            type Object1;
+            type Object2 {
+                link foo -> Object1;
+            };
+        """)
+
+        new_schema = self.run_ddl(schema, '''
+            ALTER TYPE test::Object1 CREATE PROPERTY bar -> str;
+            ALTER TYPE test::Object2 RENAME TO test::Object3;
+            DROP TYPE test::Object3;
+        ''')
+
+        delta = new_schema.get_delta(schema)
+        rebuilt = schema.apply_delta(pickle.loads(pickle.dumps(delta)))
+
+        for field in s_schema.FlatSchema._delta_fields:
+            self.assertEqual(
+                getattr(rebuilt, field), getattr(new_schema, field), field)
+
+        self.assertIsNone(rebuilt.get('test::Object2', None))
+        self.assertIsNone(rebuilt.get('test::Object3', None))
+        Obj1 = rebuilt.get('test::Object1')
+        self.assertIsNotNone(
+            Obj1.maybe_get_ptr(rebuilt, s_name.UnqualName('bar')))
+        self.assertEqual(
+            (rebuilt._type_to_ids, rebuilt._module_to_ids),
+            rebuilt._build_indexes(),
+        )
+
+    def test_schema_resolve_name_cache_01(self):
+        schema = self.load_schema("""
+            type Object1;
+        """)
+
+        aliases = {None: 'test'}
+        obj = schema.get('Object1', module_aliases=aliases)
+        self.assertEqual(obj.get_name(schema), s_name.QualName(
+            'test', 'Object1'))
+        self.assertTrue(schema._resolve_cache)
+
+        # The cache is neither pickled nor shared with newer versions.
+        self.assertEqual(pickle.loads(pickle.dumps(schema))._resolve_cache,
+                         {})
+        new_schema = self.run_ddl(schema, 'CREATE TYPE test::Object2;')
+        self.assertIsNot(new_schema._resolve_cache, schema._resolve_cache)
+        self.assertIsNotNone(
+            new_schema.get('Object2', module_aliases=aliases))
+
+        # It goes away along with the schema version it was built for.
+        schema = s_schema.FlatSchema()
+        self.assertIsNone(schema.get('Object1', None, module_aliases=aliases))
+        self.assertTrue(schema._resolve_cache)
+        ref = weakref.ref(schema)
+        del schema
+        gc.collect()
+        self.assertIsNone(ref())
+
+    def test_schema_get_objects_index_01(self):
+        schema = self.load_schema("""
+            type Object1 {
+                property foo -> str;
+            };
+            type Object2 extending Object1;
+            scalar type Scalar1 extending str;
+        """)
+
+        schema = self.run_ddl(schema, '''
+            CREATE MODULE other;
+            CREATE TYPE other::Object3;
+            ALTER TYPE test::Object2 RENAME TO other::Object2;
+            DROP SCALAR TYPE test::Scalar1;
+        ''')
+
+        self.assertEqual(
+            (schema._type_to_ids, schema._module_to_ids),
+            schema._build_indexes(),
+        )
+
+        for kwargs in [
+            dict(type=s_objtypes.ObjectType),
+            dict(type=s_props.Property),
+            dict(included_modules=[s_name.UnqualName('other')]),
+            dict(
+                type=s_objtypes.ObjectType,
+                included_modules=[s_name.UnqualName('test')],
+            ),
+        ]:
+            typ = kwargs.get('type')
+            modules = kwargs.get('included_modules')
+            expected = {
+                obj for obj in schema.get_objects()
+                if typ is None or isinstance(obj, typ)
+                if modules is None or (
+                    isinstance(obj, s_obj.QualifiedObject)
+                    and obj.get_name(schema).get_module_name() in modules
+                )
+            }
+            self.assertEqual(set(schema.get_objects(**kwargs)), expected)
+
+        names = {
+            str(obj.get_name(schema))
+            for obj in schema.get_objects(
+                type=s_objtypes.ObjectType,
+                included_modules=[s_name.UnqualName('other')],
+            )
+        }
+        self.assertEqual(names, {'other::Object2', 'other::Object3'})
+
+    def test_schema_name_resolution_cache_01(self):
+        schema = self.load_schema("""
+            type Object1;
+            function len(x: str) -> str using (x);
+        """)
+
+        schema = self.run_ddl(schema, '''
+            CREATE MODULE other;
+            CREATE TYPE other::Object2;
+        ''')
+
+        for name, aliases, expected in [
+            ('Object1', {None: 'test'}, 'test::Object1'),
+            ('Object1', {None: 'other'}, None),
+            ('o::Object2', {None: 'test', 'o': 'other'}, 'other::Object2'),
+            ('__current__::Object1', {None: 'test'}, 'test::Object1'),
+            ('__current__::Object1', None, None),
+            ('str', {None: 'test'}, 'std::str'),
+            ('__std__::str', {None: 'other'}, 'std::str'),
+            ('cal::local_date', None, 'cal::local_date'),
+            ('c::local_date', {'c': 'cal'}, 'cal::local_date'),
+            ('x::local_date', None, None),
+        ]:
+            for _ in range(2):
+                obj = schema.get(name, default=None, module_aliases=aliases)
+                self.assertEqual(
+                    None if obj is None else str(obj.get_name(schema)),
+                    expected,
+                    (name, aliases),
+                )
+
+        # Functions in the current module shadow std ones.
+        for aliases, expected in [
+            ({None: 'test'}, {'test::len'}),
+            ({None: 'other'}, {'std::len'}),
+        ]:
+            funcs = schema.get_functions('len', module_aliases=aliases)
+            self.assertEqual(
+                {str(f.get_name(schema)) for f in funcs}, expected)
+
+        # A new version of the schema must not see stale resolutions.
+        schema = self.run_ddl(schema, '''
+            CREATE TYPE other::Object1;
+        ''')
+        obj = schema.get('Object1', module_aliases={None: 'other'})
+        self.assertEqual(str(obj.get_name(schema)), 'other::Object1')
+
     def test_schema_annotation_inheritance_01(self):
         schema = self.load_schema("""
             abstract annotation noninh;
@@ -2000,6 +2160,85 @@ class TestSchema(tb.BaseSchemaLoadTest):
             f'<{x.id} default>'
         )
 
+    def test_schema_fingerprint_01(self):
+        sdl = '''
+            type Foo {
+                property name -> str;
+                link bar -> Bar;
+            }
+            type Bar {
+                property val := 1 + 2;
+            }
+        '''
+        schema1 = self.load_schema(sdl)
+        schema2 = self.load_schema(sdl)
+        schema3 = self.load_schema(sdl.replace('1 + 2', '1 + 3'))
+
+        context = s_obj.ComparisonContext()
+        foo1 = schema1.get('test::Foo')
+        bar1 = schema1.get('test::Bar')
+        fp = context.get_fingerprint(schema1, foo1)
+        self.assertIsNotNone(fp.digest)
+        self.assertIn((s_objtypes.ObjectType, bar1.get_name(schema1)), fp.refs)
+
+        # The same definitions have the same fingerprints even though
+        # the objects have different ids.
+        for name in ('test::Foo', 'test::Bar'):
+            self.assertTrue(context.is_unchanged(
+                schema1, schema1.get(name),
+                schema2, schema2.get(name),
+            ))
+
+        # A changed pointer changes the fingerprint of its source.
+        self.assertFalse(context.is_unchanged(
+            schema1, bar1, schema3, schema3.get('test::Bar'),
+        ))
+        self.assertTrue(context.is_unchanged(
+            schema1, foo1, schema3, schema3.get('test::Foo'),
+        ))
+
+    def test_schema_rename_candidates_01(self):
+        old_schema = self.load_schema('''
+            type Foo { property a -> str };
+            type Bar { property b -> str };
+            type Baz;
+        ''')
+        new_schema = self.load_schema('''
+            type Foo2 { property a -> str };
+            type Bar2 { property b -> str };
+            type Baz2;
+        ''')
+
+        def get_objtypes(schema):
+            return [
+                schema.get(f'test::{name}')
+                for name in ('Foo', 'Bar', 'Baz', 'Foo2', 'Bar2', 'Baz2')
+                if schema.get(f'test::{name}', default=None) is not None
+            ]
+
+        with unittest.mock.patch.object(sd, 'MAX_RENAME_CANDIDATES', 0):
+            pairs = sd.get_rename_candidates(
+                get_objtypes(new_schema),
+                get_objtypes(old_schema),
+                context=s_obj.ComparisonContext(),
+                old_schema=old_schema,
+                new_schema=new_schema,
+                can_create=lambda obj, name: True,
+                can_delete=lambda obj, name: True,
+            )
+
+        self.assertEqual(
+            {
+                (str(x.get_name(new_schema)), str(y.get_name(old_schema)))
+                for x, y in pairs
+            },
+            {
+                ('test::Foo2', 'test::Foo'),
+                ('test::Bar2', 'test::Bar'),
+                ('test::Baz2', 'test::Baz'),
+            },
+        )
+
     @tb.must_fail(errors.InvalidReferenceError,
                   "cannot follow backlink 'bar'",
                   line=4, col=27)
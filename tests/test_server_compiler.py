@@ -30,6 +30,10 @@ import unittest.mock
 import immutables
 
 from edb import edgeql
+from edb.schema import ddl as s_ddl
+from edb.schema import delta as s_delta
+from edb.schema import name as s_name
+from edb.schema import schema as s_schema
 from edb.testbase import lang as tb
 from edb.testbase import server as tbs
 from edb.server import args as edbargs
@@ -37,6 +41,11 @@ from edb.server import compiler as edbcompiler
 from edb.server import config
 from edb.server.compiler_pool import amsg
 from edb.server.compiler_pool import pool
+from edb.server.compiler_pool import queue
+from edb.server.compiler_pool import scaling
+from edb.server.compiler_pool import scheduler
+from edb.server.compiler_pool import state
+from edb.server.compiler_pool import worker_proc
 from edb.server.dbview import dbview
 
 
@@ -74,6 +83,97 @@ class TestServerCompiler(tb.BaseSchemaLoadTest):
             ''',
         )
 
+    def _apply_ddl(self, schema, ddl):
+        deltas = []
+        for stmt in edgeql.parse_block(ddl):
+            delta = s_ddl.delta_from_ddl(
+                stmt,
+                schema=schema,
+                modaliases={None: 'default'},
+                testmode=True,
+            )
+            context = s_delta.CommandContext()
+            context.testmode = True
+            schema = delta.apply(schema, context)
+            deltas.append(delta)
+        return schema, deltas
+
+    def _get_affected_object_ids(self, old_schema, new_schema, deltas):
+        return edbcompiler.compiler._get_affected_object_ids(
+            s_schema.EMPTY_SCHEMA,
+            s_schema.EMPTY_SCHEMA,
+            old_schema,
+            new_schema,
+            deltas,
+        )
+
+    def test_server_compiler_affected_object_ids_01(self):
+        schema = self.load_schema('''
+            type Bar;
+            type Baz {
+                link bar -> Bar;
+            };
+            type Qux;
+            function foo(x: int64) -> int64 using (x);
+        ''')
+        Bar = schema.get('default::Bar')
+        Baz = schema.get('default::Baz')
+        Qux = schema.get('default::Qux')
+        [foo_int] = schema.get_functions('default::foo')
+
+        new_schema, deltas = self._apply_ddl(schema, '''
+            ALTER TYPE default::Bar CREATE PROPERTY name -> str;
+        ''')
+        name = Bar.getptr(new_schema, s_name.UnqualName('name'))
+
+        affected = self._get_affected_object_ids(schema, new_schema, deltas)
+        self.assertIn(Bar.id, affected)
+        self.assertIn(name.id, affected)
+        # Changes of a link target don't propagate to the link source.
+        self.assertNotIn(Baz.id, affected)
+        self.assertNotIn(Qux.id, affected)
+        self.assertNotIn(foo_int.id, affected)
+
+    def test_server_compiler_affected_object_ids_02(self):
+        schema = self.load_schema('''
+            type Bar;
+            function foo(x: int64) -> int64 using (x);
+        ''')
+        Bar = schema.get('default::Bar')
+        [foo_int] = schema.get_functions('default::foo')
+
+        # A new overload changes how calls of the existing one resolve.
+        new_schema, deltas = self._apply_ddl(schema, '''
+            CREATE FUNCTION default::foo(x: str) -> str USING (x);
+        ''')
+        overloads = new_schema.get_functions('default::foo')
+        self.assertEqual(len(overloads), 2)
+
+        affected = self._get_affected_object_ids(schema, new_schema, deltas)
+        self.assertLessEqual({f.id for f in overloads}, affected)
+        self.assertNotIn(Bar.id, affected)
+
+        # So does dropping one.
+        newer_schema, deltas = self._apply_ddl(new_schema, '''
+            DROP FUNCTION default::foo(x: str);
+        ''')
+        affected = self._get_affected_object_ids(
+            new_schema, newer_schema, deltas)
+        self.assertLessEqual({f.id for f in overloads}, affected)
+        self.assertNotIn(Bar.id, affected)
+
+    def test_server_compiler_affected_object_ids_03(self):
+        schema = self.load_schema('''
+            type Bar;
+        ''')
+
+        # Modules change name resolution, so everything is affected.
+        new_schema, deltas = self._apply_ddl(schema, '''
+            CREATE MODULE other;
+        ''')
+        self.assertIsNone(
+            self._get_affected_object_ids(schema, new_schema, deltas))
+
 
 class ServerProtocol(amsg.ServerProtocol):
     def __init__(self):
@@ -387,7 +487,9 @@ class TestCompilerPool(tbs.TestCase):
         result = tb._load_reflection_schema()
         cls._refl_schema, cls._schema_class_layout = result
 
-    async def _test_pool_disconnect_queue(self, pool_class):
+    async def _test_pool_disconnect_queue(
+        self, pool_class, shared_schema=False
+    ):
         with tempfile.TemporaryDirectory() as td:
             pool_ = await pool.create_compiler_pool(
                 runstate_dir=td,
@@ -397,6 +499,7 @@ class TestCompilerPool(tbs.TestCase):
                 refl_schema=self._refl_schema,
                 schema_class_layout=self._schema_class_layout,
                 pool_class=pool_class,
+                shared_schema=shared_schema,
                 dbindex=dbview.DatabaseIndex(
                     unittest.mock.MagicMock(),
                     std_schema=self._std_schema,
@@ -443,3 +546,332 @@ class TestCompilerPool(tbs.TestCase):
 
     async def test_server_compiler_pool_disconnect_queue_adaptive(self):
         await self._test_pool_disconnect_queue(pool.SimpleAdaptivePool)
+
+    async def test_server_compiler_pool_adaptive_scaling(self):
+        with tempfile.TemporaryDirectory() as td:
+            pool_ = await pool.create_compiler_pool(
+                runstate_dir=td,
+                pool_size=3,
+                backend_runtime_params=None,
+                std_schema=self._std_schema,
+                refl_schema=self._refl_schema,
+                schema_class_layout=self._schema_class_layout,
+                pool_class=pool.SimpleAdaptivePool,
+                dbindex=dbview.DatabaseIndex(
+                    unittest.mock.MagicMock(),
+                    std_schema=self._std_schema,
+                    global_schema_pickle=pickle.dumps(None, -1),
+                    sys_config={},
+                    default_sysconfig=immutables.Map(),
+                    sys_config_spec=config.load_spec_from_schema(
+                        self._std_schema),
+                ),
+            )
+            try:
+                self.assertEqual(len(pool_._workers), 1)
+
+                # Requests waiting for a worker make the pool fork more.
+                workers = await asyncio.wait_for(
+                    asyncio.gather(
+                        *(pool_._acquire_worker() for _ in range(3))),
+                    LONG_WAIT,
+                )
+                self.assertEqual(len({w.get_pid() for w in workers}), 3)
+                self.assertEqual(len(pool_._workers), 3)
+                for w in workers:
+                    pool_._release_worker(w)
+
+                # Idle workers are stopped.
+                pool_._scale_down()
+                async with asyncio.timeout(LONG_WAIT):
+                    while len(pool_._workers) > 1:
+                        await asyncio.sleep(0.1)
+            finally:
+                await pool_.stop()
+
+    async def test_server_compiler_pool_adaptive_rss(self):
+        with tempfile.TemporaryDirectory() as td:
+            pool_ = pool.SimpleAdaptivePool(
+                loop=asyncio.get_running_loop(),
+                pool_size=8,
+                runstate_dir=td,
+                backend_runtime_params=None,
+                std_schema=self._std_schema,
+                refl_schema=self._refl_schema,
+                schema_class_layout=self._schema_class_layout,
+                dbindex=None,
+            )
+            pool_._running = True
+            pool_._template_transport = unittest.mock.MagicMock()
+            stdin = pool_._template_transport.get_pipe_transport(0)
+            pool_._policy = scaling.ScalingPolicy(
+                min_workers=1,
+                max_workers=8,
+                wait_slo=0.5,
+                max_rss=500,
+                peak_ttl=60,
+            )
+            pool_._workers = {1: None, 2: None}
+
+            with unittest.mock.patch.object(pool.psutil, 'Process') as proc:
+                proc.return_value.memory_info.return_value.rss = 100
+
+                pool_._scale_up(4, 'latency')
+                stdin.write.assert_called_once_with(b'++')
+                self.assertEqual(proc.call_count, 2)
+
+                # The workers being forked are not forked again, and the
+                # RSS measured a moment ago is reused.
+                pool_._scale_up(4, 'latency')
+                stdin.write.assert_called_once()
+                self.assertEqual(proc.call_count, 2)
+
+                # The RSS is measured again when the forked workers
+                # attach, and caps the number of new workers at 100
+                # bytes each.
+                pool_._pending_spawns.clear()
+                pool_._workers.update({3: None, 4: None})
+                pool_._scale_up(8, 'latency')
+                stdin.write.assert_called_with(b'+')
+                self.assertEqual(proc.call_count, 6)
+
+                # ... and when the last measurement is too old.
+                with unittest.mock.patch.object(
+                    pool, 'ADAPTIVE_RSS_SAMPLE_INTERVAL', 0
+                ):
+                    self.assertEqual(pool_._get_workers_rss(), 400)
+                self.assertEqual(proc.call_count, 10)
+
+    async def test_server_compiler_pool_disconnect_queue_shared(self):
+        # Workers respawned by the template still see the shared schema.
+        await self._test_pool_disconnect_queue(
+            pool.FixedPool, shared_schema=True)
+
+    async def test_server_compiler_pool_shared_schema(self):
+        with tempfile.TemporaryDirectory() as td:
+            pool_ = pool.FixedPool(
+                loop=asyncio.get_running_loop(),
+                pool_size=1,
+                runstate_dir=td,
+                backend_runtime_params=None,
+                std_schema=self._std_schema,
+                refl_schema=self._refl_schema,
+                schema_class_layout=self._schema_class_layout,
+                dbindex=None,
+                shared_schema=True,
+            )
+            self.assertIsNotNone(pool_._get_schema_init_args()[0])
+
+            pool_._write_shared_schema()
+            self.assertEqual(
+                pool_._get_schema_init_args(), (None, None, None))
+
+            with unittest.mock.patch.object(
+                worker_proc, 'SHARED_SCHEMA', None
+            ):
+                with self.assertRaises(RuntimeError):
+                    worker_proc.get_shared_schema()
+                worker_proc.load_shared_schema(pool_._shared_schema_path)
+                std_schema, _, _ = worker_proc.get_shared_schema()
+            self.assertTrue(std_schema.has_module('std'))
+
+            # Standalone workers would not get the std schema at all.
+            with self.assertRaisesRegex(RuntimeError, 'template process'):
+                await pool_._create_compiler_process()
+
+
+class TestCompilerPoolScheduler(tbs.TestCase):
+
+    def test_server_compiler_pool_scheduler_fair_order(self):
+        fq = scheduler.FairQueue(max_queued_per_flow=10)
+        for i in range(4):
+            fq.push('noisy', f'noisy{i}')
+        fq.push('quiet', 'quiet0')
+
+        # The quiet client doesn't wait for all of the noisy one's
+        # requests that came in before it.
+        self.assertEqual(fq.pop(), 'noisy0')
+        self.assertEqual(fq.pop(), 'quiet0')
+        self.assertEqual(
+            [fq.pop() for _ in range(len(fq))],
+            ['noisy1', 'noisy2', 'noisy3'],
+        )
+        self.assertIsNone(fq.pop())
+
+    def test_server_compiler_pool_scheduler_cost(self):
+        fq = scheduler.FairQueue(max_queued_per_flow=10, cost_decay=1)
+        # A client with requests 3 times as expensive gets served
+        # 3 times less often.
+        for key, duration in [('slow', 3), ('fast', 1)]:
+            fq.start(key)
+            fq.start(key)
+            fq.finish(key, duration)
+        for i in range(2):
+            fq.push('slow', f'slow{i}')
+        for i in range(6):
+            fq.push('fast', f'fast{i}')
+        self.assertEqual(
+            [fq.pop() for _ in range(len(fq))],
+            ['slow0', 'fast0', 'fast1', 'fast2',
+             'slow1', 'fast3', 'fast4', 'fast5'],
+        )
+
+    def test_server_compiler_pool_scheduler_limit(self):
+        fq = scheduler.FairQueue(max_queued_per_flow=2)
+        fq.push('a', 1)
+        entry = fq.push('a', 2)
+        with self.assertRaises(scheduler.QueueFull):
+            fq.push('a', 3)
+        # Other clients and the server itself are not affected.
+        fq.push('b', 4)
+        fq.push(None, 5)
+        fq.push(None, 6)
+        fq.push(None, 7)
+
+        fq.remove(entry)
+        fq.push('a', 3)
+        self.assertEqual(sorted(fq.pop() for _ in range(len(fq))),
+                         [1, 3, 4, 5, 6, 7])
+
+    async def test_server_compiler_pool_scheduler_queue(self):
+        wq = queue.WorkerQueue(
+            asyncio.get_running_loop(), max_queued_per_client=1)
+        wq.release('w')
+
+        worker = await wq.acquire(client_key='a')
+        waiter = asyncio.create_task(wq.acquire(client_key='a'))
+        await asyncio.sleep(0)
+        with self.assertRaises(scheduler.QueueFull):
+            await wq.acquire(client_key='a')
+
+        wq.release(worker)
+        self.assertEqual(await waiter, 'w')
+        self.assertEqual(wq.count_waiters(), 0)
+
+    async def test_server_compiler_pool_scheduler_queue_cancel(self):
+        wq = queue.WorkerQueue(
+            asyncio.get_running_loop(), max_queued_per_client=1)
+        wq.release('w')
+        worker = await wq.acquire(client_key='a')
+
+        # A cancelled waiter leaves the queue and doesn't count against
+        # the limit of its client.
+        waiter = asyncio.create_task(wq.acquire(client_key='a'))
+        await asyncio.sleep(0)
+        self.assertEqual(wq.count_waiters(), 1)
+        waiter.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+        self.assertEqual(wq.count_waiters(), 0)
+
+        # A waiter cancelled after being woken up passes the worker on
+        # to the next one.
+        waiter_a = asyncio.create_task(wq.acquire(client_key='a'))
+        waiter_b = asyncio.create_task(wq.acquire(client_key='b'))
+        await asyncio.sleep(0)
+        self.assertEqual(wq.count_waiters(), 2)
+        wq.release(worker)
+        waiter_a.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter_a
+        self.assertEqual(await waiter_b, 'w')
+        self.assertEqual(wq.count_waiters(), 0)
+
+    async def test_server_compiler_pool_scheduler_affinity(self):
+        pool_ = pool.FixedPool.__new__(pool.FixedPool)
+
+        def make_worker(pid, dbs):
+            return pool.Worker(
+                None, None, pid, immutables.Map(dbs),
+                None, None, None, None, None, None,
+            )
+
+        cold = [make_worker(pid, {}) for pid in range(10, 20)]
+        stale = make_worker(2, {
+            'db': state.PickledDatabaseState(b'old', None, None)})
+        warm = make_worker(3, {
+            'db': state.PickledDatabaseState(b'new', None, None)})
+        wq = queue.WorkerQueue(asyncio.get_running_loop())
+        for worker in [warm, stale, *cold]:
+            wq.release(worker, put_in_front=False)
+
+        weighter = pool_._get_affinity_weighter(
+            None, {'dbname': 'db', 'user_schema_pickle': b'new'})
+        self.assertIs(await wq.acquire(weighter=weighter), warm)
+        self.assertIs(await wq.acquire(weighter=weighter), stale)
+
+        # Requests of a database no worker has the schema of keep going
+        # to the same worker, wherever it is in the queue.
+        weighter = pool_._get_affinity_weighter(
+            None, {'dbname': 'other', 'user_schema_pickle': b'new'})
+        worker = await wq.acquire(weighter=weighter)
+        wq.release(worker, put_in_front=False)
+        self.assertIs(await wq.acquire(weighter=weighter), worker)
+
+
+class TestCompilerPoolScaling(tbs.TestCase):
+
+    def _make_policy(self, **kwargs):
+        return scaling.ScalingPolicy(**{
+            'min_workers': 1,
+            'max_workers': 8,
+            'wait_slo': 0.5,
+            'max_rss': 1000,
+            'peak_ttl': 60,
+            'history_size': 4,
+            **kwargs,
+        })
+
+    def test_server_compiler_pool_scaling_slo(self):
+        policy = self._make_policy()
+        self.assertFalse(policy.is_slo_breached())
+        policy.on_wait(0.1)
+        policy.on_wait(0.2)
+        self.assertFalse(policy.is_slo_breached())
+        policy.on_wait(2.0)
+        self.assertTrue(policy.is_slo_breached())
+        # Only the recent waits count.
+        for _ in range(4):
+            policy.on_wait(0)
+        self.assertFalse(policy.is_slo_breached())
+
+    def test_server_compiler_pool_scaling_peak(self):
+        policy = self._make_policy(peak_ttl=10)
+        self.assertEqual(policy.get_peak(0), 1)
+        policy.on_demand(100, 5)
+        policy.on_demand(101, 3)
+        self.assertEqual(policy.get_peak(105), 5)
+        # The peak is forgotten after a while.
+        self.assertEqual(policy.get_peak(111), 1)
+        policy.on_demand(112, 2)
+        self.assertEqual(policy.get_peak(112), 2)
+
+    def test_server_compiler_pool_scaling_count(self):
+        policy = self._make_policy()
+        self.assertEqual(
+            policy.count_new_workers(
+                nworkers=2, npending=1, nwanted=6, total_rss=200),
+            (3, False),
+        )
+        # No more than max_workers in total.
+        self.assertEqual(
+            policy.count_new_workers(
+                nworkers=2, npending=0, nwanted=20, total_rss=0),
+            (6, False),
+        )
+        self.assertEqual(
+            policy.count_new_workers(
+                nworkers=4, npending=0, nwanted=3, total_rss=400),
+            (0, False),
+        )
+        # 200 bytes per worker, room for 1 more.
+        self.assertEqual(
+            policy.count_new_workers(
+                nworkers=4, npending=0, nwanted=8, total_rss=800),
+            (1, True),
+        )
+        self.assertEqual(
+            policy.count_new_workers(
+                nworkers=4, npending=1, nwanted=8, total_rss=800),
+            (0, True),
+        )
@@ -449,6 +449,42 @@ class TestServerOps(tb.BaseHTTPTestCase, tb.CLITestCaseMixin):
             finally:
                 await con.aclose()
 
+    async def test_server_ops_query_result_cache_cascade(self):
+        # Objects deleted by a link deletion policy must invalidate
+        # the cached results of queries reading them.
+        async with tb.start_edgedb_server(
+            extra_args=["--query-result-cache-size=100"],
+        ) as sd:
+            con = await sd.connect()
+            try:
+                await con.execute('''
+                    CREATE TYPE User {
+                        CREATE REQUIRED PROPERTY name -> str;
+                    };
+                    CREATE TYPE Post {
+                        CREATE REQUIRED LINK author -> User {
+                            ON TARGET DELETE DELETE SOURCE;
+                        };
+                    };
+                    INSERT Post {
+                        author := (INSERT User { name := 'alice' }),
+                    };
+                ''')
+
+                for _ in range(2):
+                    self.assertEqual(
+                        await con.query_single('SELECT count(Post)'), 1)
+                self.assertIn(
+                    'edgedb_server_query_result_cache_hits_total',
+                    sd.fetch_metrics(),
+                )
+
+                await con.execute('DELETE User')
+                self.assertEqual(
+                    await con.query_single('SELECT count(Post)'), 0)
+            finally:
+                await con.aclose()
+
     async def test_server_ops_detect_postgres_pool_size(self):
         actual = random.randint(50, 100)
 
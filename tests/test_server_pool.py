@@ -1570,6 +1570,105 @@ class TestServerConnectionPool(unittest.TestCase):
 
         asyncio.run(main())
 
+    def test_connpool_min_idle_conns(self):
+        async def test():
+            pool = connpool.Pool(
+                connect=self.make_fake_connect(),
+                disconnect=self.make_fake_disconnect(),
+                max_capacity=10,
+                min_idle_time_before_gc=0.1,
+                min_idle_conns=1,
+            )
+            pool.set_min_idle_conns('block_b', 3)
+            self.assertEqual(pool.get_min_idle_conns('block_a'), 1)
+            self.assertEqual(pool.get_min_idle_conns('block_b'), 3)
+
+            pool.ensure_min_idle_conns('block_b')
+            await asyncio.sleep(0.1)
+            self.assertEqual(
+                pool._blocks['block_b'].count_queued_conns(), 3)
+
+            conns = [await pool.acquire('block_a') for _ in range(4)]
+            for conn in conns:
+                pool.release('block_a', conn)
+
+            # GC must leave the minimum number of idle connections alone.
+            await asyncio.sleep(0.5)
+            self.assertEqual(
+                pool._blocks['block_a'].count_queued_conns(), 1)
+            self.assertEqual(
+                pool._blocks['block_b'].count_queued_conns(), 3)
+
+            pool.set_min_idle_conns('block_b', None)
+            self.assertEqual(pool.get_min_idle_conns('block_b'), 1)
+
+        asyncio.run(asyncio.wait_for(test(), timeout=5))
+
+    @unittest.mock.patch('edb.server.connpool.pool.MIN_BURST_GAP', 0.05)
+    def test_connpool_predictive_warmup(self):
+        async def burst(pool, nconns):
+            conns = await asyncio.gather(
+                *(pool.acquire('block_a') for _ in range(nconns)))
+            await asyncio.sleep(0.01)
+            for conn in conns:
+                pool.release('block_a', conn)
+
+        async def test():
+            pool = connpool.Pool(
+                connect=self.make_fake_connect(),
+                disconnect=self.make_fake_disconnect(),
+                max_capacity=10,
+                min_idle_time_before_gc=0.05,
+            )
+            block = pool._get_block('block_a')
+
+            for _ in range(pool_impl.MIN_BURST_HISTORY):
+                await burst(pool, 3)
+                await asyncio.sleep(0.4)
+                # All connections were garbage-collected in between.
+                self.assertEqual(block.count_conns(), 0)
+
+            await burst(pool, 3)
+            self.assertIn('block_a', pool._warmups)
+
+            # Connections are pre-opened before the next expected burst.
+            await asyncio.sleep(0.45)
+            self.assertNotIn('block_a', pool._warmups)
+            self.assertGreaterEqual(block.count_conns(), 3)
+
+            await pool.prune_inactive_connections('block_a')
+            self.assertNotIn('block_a', pool._predictors)
+
+        asyncio.run(asyncio.wait_for(test(), timeout=10))
+
+    def test_connpool_session_state(self):
+        async def test():
+            pool = connpool.Pool(
+                connect=self.make_fake_connect(),
+                disconnect=self.make_fake_disconnect(),
+                max_capacity=10,
+            )
+
+            conns = [await pool.acquire('block_a') for _ in range(3)]
+            for conn, state in zip(conns, [b'x', b'y', b'z']):
+                pool.release('block_a', conn, state=state)
+
+            # The connection with the requested state is preferred
+            # over the most recently used one.
+            conn = await pool.acquire('block_a', state=b'x')
+            self.assertIs(conn, conns[0])
+            pool.release('block_a', conn, state=b'x')
+
+            conn = await pool.acquire('block_a', state=b'nope')
+            self.assertIs(conn, conns[0])
+            pool.release('block_a', conn)
+
+            conn = await pool.acquire('block_a')
+            self.assertIs(conn, conns[0])
+            pool.release('block_a', conn)
+
+        asyncio.run(asyncio.wait_for(test(), timeout=5))
+
 
 HTML_TPL = R'''<!DOCTYPE html>
 <html>
@@ -17,9 +17,20 @@
 #
 
 
+import asyncio
+import pathlib
+import tempfile
 import unittest
+import unittest.mock
+import uuid
 
+from edb import buildmeta
+from edb import errors
 from edb.server import server
+from edb.server.cache import persistent
+from edb.server.dbview import result_cache
+from edb.server.protocol import binary
+from edb.server.protocol import dump_compression
 
 
 class TestServerUnittests(unittest.TestCase):
@@ -108,3 +119,141 @@ class TestServerUnittests(unittest.TestCase):
                 (set(expected[0]), set(expected[1]))
             )
             self.assertEqual(tuple(has_wildcards), expected_wildcard)
+
+    def test_server_unittest_dump_compression(self):
+        self.assertIsNone(dump_compression.negotiate(None))
+        self.assertIsNone(dump_compression.negotiate(b''))
+        self.assertIsNone(dump_compression.negotiate(b'brotli'))
+
+        for algo in dump_compression.ALGORITHMS:
+            self.assertEqual(
+                dump_compression.negotiate(b'brotli, ' + algo.upper()),
+                algo,
+            )
+
+            data = b'd\x00\x00\x00\x10' + b'x' * 100_000
+            compressed = dump_compression.compress(algo, memoryview(data))
+            self.assertLess(len(compressed), len(data))
+            self.assertEqual(
+                dump_compression.decompress(algo, compressed), data)
+
+            with self.assertRaises(errors.ProtocolError):
+                dump_compression.decompress(algo, b'garbage')
+
+        with self.assertRaises(errors.ProtocolError):
+            dump_compression.decompress(b'brotli', b'')
+
+    def test_server_unittest_unwrap_task_group_error(self):
+        async def fail():
+            raise errors.QueryError('boom')
+
+        async def run():
+            async with asyncio.TaskGroup() as g:
+                g.create_task(fail())
+                await asyncio.sleep(10)
+
+        with self.assertRaises(ExceptionGroup) as cm:
+            asyncio.run(run())
+        ex = binary.unwrap_task_group_error(cm.exception)
+        self.assertIsInstance(ex, errors.QueryError)
+        self.assertEqual(str(ex), 'boom')
+
+        nested = ExceptionGroup('outer', [ExceptionGroup('inner', [ex])])
+        self.assertIs(binary.unwrap_task_group_error(nested), ex)
+        self.assertIs(binary.unwrap_task_group_error(ex), ex)
+
+    def test_server_unittest_result_cache(self):
+        cache = result_cache.ResultCache(
+            maxsize=2, ttl=60, max_entry_size=10)
+        t1, t2 = uuid.uuid4(), uuid.uuid4()
+
+        self.assertTrue(cache.put('a', 1, frozenset([t1]), b'A', 0))
+        self.assertTrue(cache.put('b', 1, frozenset([t2]), b'B', 0))
+        self.assertEqual(cache.get('a', 1), b'A')
+        self.assertIsNone(cache.get('a', 2))
+        self.assertIsNone(cache.get('a', 1))
+
+        # Too large
+        self.assertFalse(cache.put('c', 1, frozenset(), b'x' * 11, 0))
+
+        # Writes invalidate the entries depending on the written types,
+        # including the results of queries racing with the write.
+        seq = cache.write_seq()
+        self.assertTrue(cache.put('a', 1, frozenset([t1]), b'A', seq))
+        cache.on_write([t2])
+        self.assertEqual(cache.get('a', 1), b'A')
+        self.assertIsNone(cache.get('b', 1))
+        self.assertFalse(cache.put('b', 1, frozenset([t2]), b'B', seq))
+        self.assertTrue(
+            cache.put('b', 1, frozenset([t2]), b'B', cache.write_seq()))
+
+        cache.on_write(None)
+        self.assertEqual(len(cache), 0)
+        self.assertFalse(cache.put('a', 1, frozenset([t1]), b'A', seq))
+
+        cache = result_cache.ResultCache(maxsize=2, ttl=0, max_entry_size=10)
+        self.assertTrue(cache.put('a', 1, frozenset([t1]), b'A', 0))
+        self.assertIsNone(cache.get('a', 1))
+
+    def test_server_unittest_persistent_query_cache(self):
+        v1, v2 = uuid.uuid4(), uuid.uuid4()
+        q1, q2, q3 = [(name, 1, True) for name in (b'q1', b'q2', b'q3')]
+
+        async def open_cache(path, max_entries=10):
+            cache = persistent.PersistentQueryCache(
+                path, max_entries=max_entries)
+            cache.open()
+            return cache
+
+        async def test(path):
+            cache = await open_cache(path)
+            try:
+                cache.store('db', v1, q1, {'unit': 1})
+                cache.store('db', v1, q2, {'unit': 2})
+                cache.store('other', v1, q1, {'unit': 3})
+                await cache.flush()
+                cache.store('db', v2, q3, {'unit': 4})
+            finally:
+                # Closing writes out the pending entries.
+                await cache.close()
+
+            # Entries survive a restart...
+            cache = await open_cache(path)
+            try:
+                self.assertEqual(
+                    await cache.load('db', v1),
+                    {q1: {'unit': 1}, q2: {'unit': 2}},
+                )
+                # Loading the entries of a schema version drops the
+                # ones of the other versions.
+                self.assertEqual(await cache.load('db', v2), {})
+                self.assertEqual(await cache.load('db', v1), {})
+                self.assertEqual(
+                    await cache.load('other', v1), {q1: {'unit': 3}})
+            finally:
+                await cache.close()
+
+            # A new catalog version invalidates all of them.
+            with unittest.mock.patch.object(
+                buildmeta, 'EDGEDB_CATALOG_VERSION',
+                buildmeta.EDGEDB_CATALOG_VERSION + 1,
+            ):
+                cache = await open_cache(path)
+                try:
+                    self.assertEqual(await cache.load('other', v1), {})
+                finally:
+                    await cache.close()
+
+            # The least recently used entries are evicted above the cap.
+            cache = await open_cache(path, max_entries=2)
+            try:
+                for i in range(3):
+                    cache.store('db', v1, (b'q', i), {'unit': i})
+                    await cache.flush()
+                self.assertEqual(
+                    set(await cache.load('db', v1)), {(b'q', 1), (b'q', 2)})
+            finally:
+                await cache.close()
+
+        with tempfile.TemporaryDirectory() as td:
+            asyncio.run(test(pathlib.Path(td) / 'cache.sqlite'))
@@ -0,0 +1,247 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright 2024-present MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+import unittest
+
+from edb.pgsql import codegen
+from edb.pgsql import normalization
+
+
+class _IdentityTranslation:
+
+    def translate(self, pos):
+        return pos
+
+
+class TestSQLNormalization(unittest.TestCase):
+
+    def test_sql_normalization_placeholders(self):
+        CASES = [
+            (
+                "SELECT 1",
+                "SELECT '?i4'",
+                ('1',),
+            ),
+            (
+                "SELECT 3000000000, 99999999999999999999",
+                "SELECT '?i8', '?n'",
+                ('3000000000', '99999999999999999999'),
+            ),
+            (
+                "SELECT 1.5, .5, 1., 1e5, 2E-3",
+                "SELECT '?n', '?n', '?n', '?n', '?n'",
+                ('1.5', '.5', '1.', '1e5', '2E-3'),
+            ),
+            (
+                "SELECT 'a', 'it''s', ''",
+                "SELECT '?s', '?s', '?s'",
+                ("'a'", "'it''s'", "''"),
+            ),
+            (
+                "SELECT a-1, b[2] FROM t WHERE c = 'x'",
+                "SELECT a-'?i4', b['?i4'] FROM t WHERE c = '?s'",
+                ('1', '2', "'x'"),
+            ),
+            (
+                # Parameters are kept as they are.
+                "SELECT $1 + 2, $2",
+                "SELECT $1 + '?i4', $2",
+                ('2',),
+            ),
+            (
+                # Comments and quoted identifiers are not searched.
+                "SELECT \"1\" -- 2\n/* 3 */ FROM t",
+                "SELECT \"1\" -- 2\n/* 3 */ FROM t",
+                (),
+            ),
+        ]
+
+        for text, key, literals in CASES:
+            with self.subTest(text=text):
+                normalized = normalization.normalize(text)
+                self.assertIsNotNone(normalized)
+                self.assertEqual(normalized.key, key)
+                self.assertEqual(normalized.literals, literals)
+                self.assertEqual(
+                    tuple(text[o:o + len(lit)] for lit, o in zip(
+                        normalized.literals, normalized.offsets)),
+                    literals,
+                )
+
+    def test_sql_normalization_verbatim(self):
+        # Numbers and strings that are part of other tokens must be kept
+        # as they are.
+        CASES = [
+            "SELECT x.1",
+            "SELECT (x).1",
+            "SELECT \"x\".1",
+            "SELECT x1, x$1, x_1",
+            "SELECT 0x1f, 0o17, 0b101, 1_000, 1.5e",
+            "SELECT E'\\n', B'101', X'1f', U&'d\\0061t'",
+        ]
+
+        for text in CASES:
+            with self.subTest(text=text):
+                normalized = normalization.normalize(text)
+                self.assertIsNotNone(normalized)
+                self.assertNotIn("'?", normalized.key)
+                self.assertEqual(normalized.literals, ())
+
+        normalized = normalization.normalize("SELECT a[1].2")
+        self.assertEqual(normalized.key, "SELECT a['?i4'].2")
+
+    def test_sql_normalization_distinct_keys(self):
+        # Queries that differ in anything but their literals must not
+        # share the normalized text.
+        CASES = [
+            ("SELECT 1", "SELECT '1'"),
+            ("SELECT 1", "SELECT 3000000000"),
+            ("SELECT 1", "SELECT 1.0"),
+            ("SELECT x.1", "SELECT x'1'"),
+            ("SELECT E'a'", "SELECT E'b'"),
+            ("SELECT 1", "SELECT $1"),
+        ]
+
+        for text1, text2 in CASES:
+            with self.subTest(text1=text1, text2=text2):
+                self.assertNotEqual(
+                    normalization.normalize(text1).key,
+                    normalization.normalize(text2).key,
+                )
+
+    def test_sql_normalization_unsupported(self):
+        CASES = [
+            "SELECT $$a$$",
+            "SELECT $tag$a$tag$",
+            "SELECT 'a",
+            "SELECT \"a",
+            "SELECT /* a",
+            "SELECT /* a /* b */ */ 1",
+        ]
+
+        for text in CASES:
+            with self.subTest(text=text):
+                self.assertIsNone(normalization.normalize(text))
+
+    def test_sql_normalization_substitute(self):
+        text = "SELECT 'a', 1, 3000000000, 1.5 FROM t WHERE x = 'b'"
+        normalized = normalization.normalize(text)
+        sentinel_sql = normalization.substitute(text, normalized, (0, 1, 2, 3))
+
+        self.assertEqual(sorted(sentinel_sql.sentinels.values()), [0, 1, 2, 3])
+        self.assertIn("'b'", sentinel_sql.text)
+        for sentinel in sentinel_sql.sentinels:
+            self.assertIn(sentinel_sql.nonce, sentinel)
+        for sentinel, offset in zip(
+            sentinel_sql.sentinels, sentinel_sql.offsets
+        ):
+            self.assertEqual(
+                sentinel_sql.text[offset:offset + len(sentinel)], sentinel)
+
+        # The sentinels have the types of the literals they replace.
+        sentinel_normalized = normalization.normalize(sentinel_sql.text)
+        self.assertEqual(sentinel_normalized.key, normalized.key)
+
+        # The compiled query may have the sentinels in any order.
+        sentinels = list(sentinel_sql.sentinels)
+        compiled = (
+            f"SELECT {sentinels[3]}, {sentinels[0]}::text "
+            f"FROM (SELECT {sentinels[1]}, {sentinels[2]}) AS q"
+        )
+        fragments, indexes, offsets = normalization.split(
+            compiled, sentinel_sql)
+        self.assertEqual(indexes, (3, 0, 1, 2))
+        self.assertEqual(
+            fragments,
+            ('SELECT ', ', ', '::text FROM (SELECT ', ', ', ') AS q'),
+        )
+        for offset, i in zip(offsets, indexes):
+            self.assertTrue(
+                compiled.startswith(sentinels[i], offset))
+
+    def test_sql_normalization_split_fails(self):
+        text = "SELECT 1, 'a'"
+        normalized = normalization.normalize(text)
+        sentinel_sql = normalization.substitute(text, normalized, (0, 1))
+        num, string = sentinel_sql.sentinels
+
+        CASES = [
+            # A sentinel evaluated by the compiler.
+            f"SELECT {string}",
+            # A sentinel duplicated by the compiler.
+            f"SELECT {num}, {string}, {num}",
+            # A sentinel as part of another token.
+            f"SELECT {num}0, {string}",
+            f"SELECT x.{num}, {string}",
+        ]
+
+        for compiled in CASES:
+            with self.subTest(compiled=compiled):
+                self.assertIsNone(
+                    normalization.split(compiled, sentinel_sql))
+
+    def test_sql_normalization_shifted_translation(self):
+        # The template was compiled from "SELECT 'S1' || 'S2'" with both
+        # literals replaced by sentinels of 4 characters at offsets 7
+        # and 15, here instantiated as "SELECT 'abc' || ''".
+        spans = ((7, 4, 5), (15, 4, 2))
+        data = codegen.ShiftedTranslationData(
+            _IdentityTranslation(),  # type: ignore
+            source_spans=spans,
+            output_spans=spans,
+        )
+
+        CASES = [
+            (0, 0),
+            # Positions within a literal map to its start.
+            (7, 7),
+            (10, 7),
+            # Positions after a literal are shifted by the difference
+            # of the lengths of the literal and its sentinel.
+            (13, 13),
+            (16, 16),
+            (17, 16),
+        ]
+
+        for pos, expected in CASES:
+            with self.subTest(pos=pos):
+                self.assertEqual(data.translate(pos), expected)
+
+        # The output of the compiler has the literals at other offsets
+        # than the source.
+        class Translation:
+            def translate(self, pos):
+                # "SELECT ('S1')::text || b" -> "SELECT 'S1' || b"
+                if pos < 7:
+                    return pos
+                elif pos < 19:
+                    return 7
+                else:
+                    return pos - 8
+
+        data = codegen.ShiftedTranslationData(
+            Translation(),  # type: ignore
+            source_spans=((7, 4, 5),),
+            output_spans=((8, 4, 5),),
+        )
+        self.assertEqual(data.translate(9), 7)
+        self.assertEqual(data.translate(7), 7)
+        self.assertEqual(data.translate(3), 3)
+        # "SELECT ('abc')::text || b" -> "SELECT 'abc' || b"
+        self.assertEqual(data.translate(24), 16)
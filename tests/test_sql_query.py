@@ -1140,6 +1140,56 @@ class TestSQL(tb.SQLQueryTestCase):
         ):
             await self.scon.execute(query)
 
+    def _get_sql_compilations(self, path):
+        key = 'edgedb_server_sql_query_compilations_total{'
+        total = 0.0
+        for line in self.fetch_metrics().split('\n'):
+            if line.startswith(key) and f'path="{path}"' in line:
+                total += float(line.split(' ')[1])
+        return total
+
+    async def test_sql_query_normalized_01(self):
+        # Queries differing only in their literals share a compilation.
+        normalized = self._get_sql_compilations('normalized')
+        for title, year, expected in [
+            ('Forrest Gump', 1994, [['Forrest Gump', 1995]]),
+            ('Saving Private Ryan', 1998, [['Saving Private Ryan', 1999]]),
+            ('Saving Private Ryan', 1994, []),
+        ]:
+            res = await self.squery_values(
+                f"""
+                SELECT title, release_year + 1 FROM "Movie"
+                WHERE title = '{title}' AND release_year = {year}
+                LIMIT 10
+                """
+            )
+            self.assertEqual(res, expected)
+
+        # The last two queries are instantiated from the compilation of
+        # the first one.  Other tests may run concurrently, so only the
+        # lower bound of the counter can be checked.
+        self.assertGreaterEqual(
+            self._get_sql_compilations('normalized') - normalized, 2)
+
+    async def test_sql_query_normalized_02(self):
+        # Error positions are reported in the text of the query that
+        # was instantiated from a shared compilation.
+        normalized = self._get_sql_compilations('normalized')
+        for padding in ['a', 'aaaaaaaa']:
+            query = (
+                f"SELECT title FROM \"Movie\" WHERE title = '{padding}' "
+                f"ORDER BY 1 + 'b'"
+            )
+            with self.assertRaisesRegex(
+                asyncpg.InvalidTextRepresentationError,
+                "type integer",
+                position=str(len(query) - 2),
+            ):
+                await self.scon.execute(query)
+
+        self.assertGreaterEqual(
+            self._get_sql_compilations('normalized') - normalized, 1)
+
     async def test_sql_query_empty(self):
         await self.scon.executemany('', args=[])
 